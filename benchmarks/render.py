@@ -0,0 +1,157 @@
+# SPDX-FileCopyrightText: 2026 ORDeC contributors
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+End-to-end schematic renderer benchmark.
+
+    python -m benchmarks.render --scale default --repeats 5 \\
+        --backends all --out results/render.json
+
+The render_scan workload models the graph traversal of the renderer with the
+toy schema, so that it can be compared across ORDB implementations. This
+benchmark runs the real renderer (ordec/schematic/render.py) on a real
+frozen Schematic of the same shape instead: I instances of Y library
+symbols placed on a grid with random orientations, one net connection per
+symbol pin. Each variant times render() plus webdata() for one combination
+of SVG writer backend ('etree', 'stream') and symbol sharing (plain,
+'defs'), i.e. exactly what the web viewer gets. Results are not part of the
+cross-world JSON schema of benchmarks.runner.
+"""
+
+import argparse
+import gc
+import json
+import sys
+import time
+
+from ordec.core import *
+from ordec.core import ordb
+from ordec.lib import generic_mos, base
+from ordec.schematic.render import render
+
+from .prng import Lcg
+
+SCALES = {
+    'tiny':    dict(insts=5, nets=4),
+    'small':   dict(insts=100, nets=50),
+    'default': dict(insts=200, nets=100),
+    'large':   dict(insts=8000, nets=4000),
+}
+
+VARIANTS = {
+    'etree':        dict(backend='etree'),
+    'stream':       dict(backend='stream'),
+    'etree+defs':   dict(backend='etree', symbol_defs=True),
+    'stream+defs':  dict(backend='stream', symbol_defs=True),
+}
+
+def _symbols():
+    """Y=8 library symbols, like render_scan's symbols=8."""
+    return [cell.symbol for cell in (
+        generic_mos.Nmos(), generic_mos.Pmos(), generic_mos.Inv(),
+        generic_mos.And2(), generic_mos.Or2(),
+        base.Res(r=R('1k')), base.Cap(c=R('1p')), base.Vdc(dc=R(1)),
+    )]
+
+def build_schematic(insts: int, nets: int, seed: int) -> Schematic:
+    """Frozen schematic with the given number of instances and nets."""
+    rng = Lcg(seed)
+    symbols = _symbols()
+    pitch = 6 # symbols are at most 5 units wide
+    cols = max(1, int(insts ** 0.5))
+    rows = (insts + cols - 1) // cols
+
+    s = Schematic(outline=Rect4R(0, 0, cols*pitch, rows*pitch))
+    net_list = []
+    for n in range(nets):
+        setattr(s, f'n{n}', Net())
+        net_list.append(getattr(s, f'n{n}'))
+    for i in range(insts):
+        sym = symbols[rng.randint(len(symbols))]
+        orientation = list(D4)[rng.randint(8)]
+        # Keep the rotated symbol inside its grid cell:
+        rect = TD4R(d4=orientation) * sym.outline
+        pos = Vec2R((i % cols)*pitch, (i // cols)*pitch) - Vec2R(rect.lx, rect.ly)
+        setattr(s, f'i{i}', SchemInstance(pos=pos, orientation=orientation,
+            symbol=sym))
+        inst = getattr(s, f'i{i}')
+        for pin in sym.all(Pin):
+            s % SchemInstanceConn(ref=inst, here=net_list[rng.randint(nets)],
+                there=pin)
+    return s.freeze()
+
+def run_variant(schematic, variant: str, repeats: int, warmup: int) -> dict:
+    """Times render() plus webdata() of one variant."""
+    opts = VARIANTS[variant]
+    wall_ns = []
+    for r in range(warmup + repeats):
+        gc.collect()
+        t0 = time.perf_counter_ns()
+        _, data = render(schematic, indent=False, **opts).webdata()
+        dt = time.perf_counter_ns() - t0
+        if r >= warmup:
+            wall_ns.append(dt)
+    return {
+        'variant': variant,
+        'wall_ns': wall_ns,
+        'inner_bytes': len(data['inner']),
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.render',
+        description='Run the end-to-end schematic renderer benchmark.')
+    parser.add_argument('--scale', default='default', choices=list(SCALES))
+    parser.add_argument('--variants', default='all',
+        help='comma-separated variants, or "all"')
+    parser.add_argument('--backends', default=None,
+        help='comma-separated ORDB backends, or "all" (default: current)')
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--warmup', type=int, default=1)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--out', default=None,
+        help='output JSON path (default: print to stdout)')
+    args = parser.parse_args(argv)
+
+    if args.variants == 'all':
+        variants = list(VARIANTS)
+    else:
+        variants = [v.strip() for v in args.variants.split(',') if v.strip()]
+        for v in variants:
+            if v not in VARIANTS:
+                raise SystemExit(f"Unknown variant {v!r}. Available: "
+                    f"{', '.join(VARIANTS)}")
+    if args.backends is None:
+        backends = [None]
+    elif args.backends == 'all':
+        backends = ordb.available_backends()
+    else:
+        backends = [b.strip() for b in args.backends.split(',') if b.strip()]
+
+    params = SCALES[args.scale]
+    results = []
+    for backend_name in backends:
+        if backend_name is None:
+            schematic = build_schematic(seed=args.seed, **params)
+        else:
+            with ordb.use_backend(backend_name):
+                schematic = build_schematic(seed=args.seed, **params)
+        for variant in variants:
+            record = run_variant(schematic, variant, args.repeats, args.warmup)
+            record['backend'] = backend_name
+            record['params'] = {**params, 'scale': args.scale, 'seed': args.seed}
+            print(f"[{variant} @ {backend_name or 'default'}] "
+                f"{min(record['wall_ns'])/1e6:.1f}ms "
+                f"({record['inner_bytes']} bytes)", file=sys.stderr)
+            results.append(record)
+
+    out = json.dumps({'benchmark': 'render', 'results': results}, indent=2)
+    if args.out:
+        with open(args.out, 'w') as f:
+            f.write(out + '\n')
+        print(f"wrote {args.out}", file=sys.stderr)
+    else:
+        print(out)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
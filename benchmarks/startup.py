@@ -0,0 +1,122 @@
+# SPDX-FileCopyrightText: 2026 ORDeC contributors
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Cold start benchmark.
+
+    python -m benchmarks.startup --repeats 5 --out results/startup.json
+
+Each step runs in a fresh Python process and is timed from the outside
+(wall time of the whole process, including interpreter startup):
+
+- 'import': python -c "import ordec.core"
+- 'compile': import ordec.core, then compile_ord() of one ORD source
+  (ordec/examples/vco_pseudodiff.ord by default), i.e. what the first
+  import of an .ord module or the first web editor run costs.
+
+All cache files are written to a temporary sys.pycache_prefix, which is
+filled by one unmeasured run first. Every step is then measured in three
+cache states, whose remaining cache files are removed before each run:
+
+- 'cold': only Python's own bytecode is cached.
+- 'tables': the Lark parser tables (.larkc) are cached as well.
+- 'warm': compiled ORD sources (.ordc) are cached as well.
+
+Results are not part of the cross-world JSON schema of benchmarks.runner.
+"""
+
+import argparse
+import json
+import os
+import pathlib
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+
+STEPS = {
+    'import': "import ordec.core",
+    'compile': (
+        "import ordec.core\n"
+        "from ordec.language import compile_ord, ord_cache_path\n"
+        "path = {path!r}\n"
+        "compile_ord(open(path).read(), {{}}, path, cache_path=ord_cache_path(path))\n"
+    ),
+}
+
+def run_step(code: str, prefix: str) -> int:
+    """Runs code in a fresh interpreter, returns its wall time in ns."""
+    env = dict(os.environ)
+    env.pop('PYTHONDONTWRITEBYTECODE', None)
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, (str(ROOT), env.get('PYTHONPATH'))))
+    t0 = time.perf_counter_ns()
+    subprocess.run([sys.executable, '-X', f'pycache_prefix={prefix}', '-c', code],
+        env=env, check=True)
+    return time.perf_counter_ns() - t0
+
+# Cache files removed before each run, by cache state:
+CACHE_STATES = {
+    'cold': ('.larkc', '.ordc'),
+    'tables': ('.ordc',),
+    'warm': (),
+}
+
+def run_variant(step: str, cache: str, path: str, repeats: int) -> dict:
+    code = STEPS[step].format(path=path)
+    removed = CACHE_STATES[cache]
+    wall_ns = []
+    with tempfile.TemporaryDirectory() as prefix:
+        run_step(code, prefix)
+        for _ in range(repeats):
+            for cache_file in pathlib.Path(prefix).rglob('*'):
+                if cache_file.suffix in removed:
+                    cache_file.unlink()
+            wall_ns.append(run_step(code, prefix))
+    return {
+        'step': step,
+        'cache': cache,
+        'wall_ns': wall_ns,
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.startup',
+        description='Run the cold start benchmark.')
+    parser.add_argument('--steps', default='all',
+        help='comma-separated steps, or "all"')
+    parser.add_argument('--ord', default=str(ROOT / 'ordec' / 'examples' / 'vco_pseudodiff.ord'),
+        help='ORD source compiled by the compile step')
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--out', default=None,
+        help='output JSON path (default: print to stdout)')
+    args = parser.parse_args(argv)
+
+    if args.steps == 'all':
+        steps = list(STEPS)
+    else:
+        steps = [s.strip() for s in args.steps.split(',') if s.strip()]
+        for s in steps:
+            if s not in STEPS:
+                raise SystemExit(f"Unknown step {s!r}. Available: "
+                    f"{', '.join(STEPS)}")
+
+    results = []
+    for step in steps:
+        for cache in CACHE_STATES:
+            record = run_variant(step, cache, args.ord, args.repeats)
+            print(f"[{step} @ {record['cache']}] "
+                f"{min(record['wall_ns'])/1e6:.1f}ms", file=sys.stderr)
+            results.append(record)
+
+    out = json.dumps({'benchmark': 'startup', 'results': results}, indent=2)
+    if args.out:
+        with open(args.out, 'w') as f:
+            f.write(out + '\n')
+        print(f"wrote {args.out}", file=sys.stderr)
+    else:
+        print(out)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,4 +1,10 @@
 # SPDX-FileCopyrightText: 2025 ORDeC contributors
 # SPDX-License-Identifier: Apache-2.0
 
-from .version import version as __version__
+def __getattr__(name):
+    # Looking up the installed version (importlib.metadata) is comparatively
+    # slow, so it is only done when __version__ is used.
+    if name == '__version__':
+        from .version import version
+        return version
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
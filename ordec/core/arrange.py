@@ -6,7 +6,9 @@ Arrangement groups arrange schematic elements (instances, ports, nested
 groups) relative to each other without explicit coordinates. A group
 records its children in declaration order and emits constraints for the
 view's Solver during postprocessing, so children of different sizes are
-placed without user intervention.
+placed without user intervention. Top-level groups that are neither
+constrained nor pinned by the user are placed directly, without the
+solver.
 
 Row and Col place their children geometrically. Series and Parallel
 additionally connect them electrically, so circuit structures can be
@@ -25,15 +27,15 @@ additionally recorded in the group.
 import math
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
-from itertools import chain
 from typing import Callable, NamedTuple
 
 from public import public
 
 from .constraints import (EqualsZero, LinearTerm, Rect4LinearTerm,
-    Solver, Variable, coerce_term)
+    Solver, Variable, Vec2LinearTerm)
 from .context import _view_ctx_var
-from .geoprim import D4
+from .geoprim import D4, TD4R, Vec2R
+from .rational import R
 from .ordb import Node, QueryException, SubgraphRoot
 
 SIDE_NAMES = {
@@ -121,6 +123,17 @@ def connect_endpoints(endpoints: list[Endpoint], root: SubgraphRoot):
         endpoint.connect(net)
 
 
+class GroupLayout(NamedTuple):
+    """
+    Numeric relative layout of a group's children, see
+    ArrangementGroup.layout().
+    """
+    extents: list #: Child bounding boxes (lx, ly, ux, uy) relative to each child's reference point (see ArrangementGroup.child_extent()).
+    offsets: list #: Constant (x, y) offset of each child from the group's southwest corner.
+    width: float #: Extent of the group along the x axis.
+    height: float #: Extent of the group along the y axis.
+
+
 class ArrangedRects(NamedTuple):
     """
     Rigid relative layout of a group's children, see
@@ -167,6 +180,7 @@ class ArrangementGroup(ABC):
         self.align = align
         self.anchor = anchor
         self.sealed = False #: Set by rect() to block further add().
+        self._layout = None #: Cached result of layout().
 
     def __enter__(self):
         """
@@ -203,6 +217,7 @@ class ArrangementGroup(ABC):
                     f"{describe(child)} is already a child of "
                     f"{describe(self)}.")
         self.children.append(child)
+        self._layout = None
         return child
 
     def subgraph_root(self) -> SubgraphRoot:
@@ -228,6 +243,18 @@ class ArrangementGroup(ABC):
         from .schema import Net, SchemPort
         if isinstance(child, ArrangementGroup):
             return child.rect()
+        if isinstance(child, (Net, SchemPort)):
+            pos = self.leaf_pos(child)
+            return Rect4LinearTerm(pos.x, pos.y, pos.x, pos.y)
+        outline = child.outline
+        return Rect4LinearTerm(outline.lx, outline.ly, outline.ux, outline.uy)
+
+    def leaf_pos(self, child) -> 'Vec2R | Vec2LinearTerm':
+        """
+        Returns the position of an instance or port child. A net is
+        placed through its port.
+        """
+        from .schema import Net
         if isinstance(child, Net):
             try:
                 child = child.port
@@ -235,29 +262,59 @@ class ArrangementGroup(ABC):
                 raise ValueError(
                     f"Cannot place net {describe(child)}: it has no "
                     "port.") from None
-        if isinstance(child, SchemPort):
-            pos = child.pos
-            return Rect4LinearTerm(pos.x, pos.y, pos.x, pos.y)
-        outline = child.outline
-        return Rect4LinearTerm(outline.lx, outline.ly, outline.ux, outline.uy)
+        return child.pos
 
-    def arrangement(self) -> ArrangedRects:
+    def child_symbol(self, inst) -> 'Symbol':
+        """
+        Returns the Symbol of an instance child. For unresolved
+        instances, it is generated from the recorded parameters.
+        """
+        from .schema import SchemInstance, SchemInstanceUnresolvedParameter
+        if isinstance(inst, SchemInstance):
+            return inst.symbol
+        params = {
+            p.name: p.value
+            for p in inst.root.all(SchemInstanceUnresolvedParameter.ref_idx.query(inst))
+        }
+        return inst.resolver(**params)
+
+    def child_extent(self, child) -> tuple:
         """
-        Computes the relative arrangement of the children. Since child
-        sizes are constants, the arrangement is rigid. Center alignment
-        is snapped down to the unit grid so that on-grid children stay
-        on grid regardless of size differences.
+        Returns a child's bounding box (lx, ly, ux, uy) as numbers,
+        relative to its reference point: the position of an instance or
+        port, the southwest corner of a nested group. Unlike
+        child_rect(), this does not depend on the child's position.
         """
+        from .schema import Net, SchemPort
+        if isinstance(child, ArrangementGroup):
+            layout = child.layout()
+            return (0.0, 0.0, layout.width, layout.height)
+        if isinstance(child, (Net, SchemPort)):
+            self.leaf_pos(child) # Raises for nets without port.
+            return (0.0, 0.0, 0.0, 0.0)
+        outline = TD4R(d4=child.orientation) * self.child_symbol(child).outline
+        return (float(outline.lx), float(outline.ly),
+            float(outline.ux), float(outline.uy))
+
+    def layout(self) -> GroupLayout:
+        """
+        Computes the relative arrangement of the children in closed
+        form from their extents (prefix sums along the main axis) and
+        caches it. Since child sizes are constants, the arrangement is
+        rigid. Center alignment is snapped down to the unit grid so that
+        on-grid children stay on grid regardless of size differences.
+        """
+        if self._layout is not None:
+            return self._layout
         if not self.children:
             raise ValueError(f"{describe(self)} has no children.")
         if self.vertical:
             main, cross = 1, 0
         else:
             main, cross = 0, 1
-        rects = [self.child_rect(child) for child in self.children]
-        main_sizes = [term_constant(r[main+2] - r[main], child)
-            for child, r in zip(self.children, rects)]
-        cross_offsets, cross_span = self.cross_arrangement(rects, cross)
+        extents = [self.child_extent(child) for child in self.children]
+        main_sizes = [e[main+2] - e[main] for e in extents]
+        cross_offsets, cross_span = self.cross_arrangement(extents, cross)
 
         main_offsets = []
         position = 0
@@ -277,21 +334,30 @@ class ArrangementGroup(ABC):
         else:
             offsets = list(zip(cross_offsets, main_offsets))
             width, height = cross_span, main_span
-        return ArrangedRects(rects, offsets, width, height)
+        self._layout = GroupLayout(extents, offsets, width, height)
+        return self._layout
 
-    def cross_arrangement(self, rects: list, cross: int) -> tuple[list, float]:
+    def arrangement(self) -> ArrangedRects:
+        """
+        Returns the layout() together with the children's bounding boxes
+        as Rect4LinearTerms in view coordinates, for use in constraints.
+        """
+        layout = self.layout()
+        rects = [self.child_rect(child) for child in self.children]
+        return ArrangedRects(rects, layout.offsets, layout.width, layout.height)
+
+    def cross_arrangement(self, extents: list, cross: int) -> tuple[list, float]:
         """
         Arranges the children on the cross axis according to align,
         returning (offsets, span): their constant offsets from the
         group's edge and the group's cross-axis extent.
         """
-        sizes = [term_constant(r[cross+2] - r[cross], child)
-            for child, r in zip(self.children, rects)]
+        sizes = [e[cross+2] - e[cross] for e in extents]
         span = max(sizes)
         if self.align == 'center':
             offsets = [math.floor((span - size) / 2) for size in sizes]
         elif self.align == 'start':
-            offsets = [0] * len(rects)
+            offsets = [0] * len(extents)
         else: # 'end'
             offsets = [span - size for size in sizes]
         return offsets, span
@@ -331,8 +397,9 @@ class ArrangementGroup(ABC):
             if isinstance(child, ArrangementGroup):
                 variables |= child.variables()
             else:
-                for term in self.child_rect(child):
-                    variables |= set(term.variables)
+                pos = self.leaf_pos(child)
+                if isinstance(pos, Vec2LinearTerm):
+                    variables |= set(pos.x.variables) | set(pos.y.variables)
         return variables
 
     def pinned(self) -> bool:
@@ -345,7 +412,7 @@ class ArrangementGroup(ABC):
             if isinstance(child, ArrangementGroup):
                 if child.pinned():
                     return True
-            elif not any(term.variables for term in self.child_rect(child)):
+            elif not isinstance(self.leaf_pos(child), Vec2LinearTerm):
                 return True
         return False
 
@@ -359,6 +426,34 @@ class ArrangementGroup(ABC):
         """
         pass
 
+    def resolve_all_connectivity(self):
+        """
+        Resolves the connectivity of the group and all nested groups, in
+        the same order as emit().
+        """
+        self.resolve_connectivity()
+        for child in self.children:
+            if isinstance(child, ArrangementGroup):
+                child.resolve_all_connectivity()
+
+    def place(self, corner: tuple):
+        """
+        Assigns the positions of all (transitive) children directly from
+        layout(), with the group's southwest corner at corner.
+        """
+        for child, extent, offset in zip(self.children,
+                self.layout().extents, self.layout().offsets):
+            x = corner[0] + offset[0] - extent[0]
+            y = corner[1] + offset[1] - extent[1]
+            if isinstance(child, ArrangementGroup):
+                child.place((x, y))
+                continue
+            from .schema import Net
+            if isinstance(child, Net):
+                child = child.port
+            child.pos = Vec2R(R(x).limit_denominator(),
+                R(y).limit_denominator())
+
     def emit(self, solver: Solver, toplevel: bool = True,
             auto_anchor: tuple = (0, 0)) -> bool:
         """
@@ -368,11 +463,23 @@ class ArrangementGroup(ABC):
         viewgen. Nested groups are emitted with toplevel=False and never
         anchored. auto_anchor is the position used for anchor='auto'.
         Returns True if the automatic anchor was applied.
+
+        An anchored top-level group none of whose members is pinned or
+        appears in a constraint is placed directly (see place()) and
+        emits no constraints at all.
         """
         if toplevel:
-            constrained = set()
-            for constraint in chain(solver.equalities, solver.inequalities):
-                constrained |= set(constraint.term.variables)
+            constrained = solver.constrained_variables()
+            # Groups placed by the user (own constraints or a directly
+            # assigned child position) are not anchored automatically.
+            free = not (self.variables() & constrained or self.pinned())
+            anchor = self.anchor
+            if anchor == 'auto':
+                anchor = auto_anchor if free else None
+            if free and anchor is not None:
+                self.resolve_all_connectivity()
+                self.place(anchor)
+                return self.anchor == 'auto'
         self.resolve_connectivity()
         for child in self.children:
             if isinstance(child, ArrangementGroup):
@@ -397,21 +504,11 @@ class ArrangementGroup(ABC):
                 solver.constrain(EqualsZero(term))
         if not toplevel:
             return False
-        anchor = self.anchor
-        applied_auto = False
-        if anchor == 'auto':
-            # Groups placed by the user (own constraints or a directly
-            # assigned child position) are not anchored.
-            if self.variables() & constrained or self.pinned():
-                anchor = None
-            else:
-                anchor = auto_anchor
-                applied_auto = True
         if anchor is not None:
             group = self.rect()
             solver.constrain(EqualsZero(group[0] - anchor[0]))
             solver.constrain(EqualsZero(group[1] - anchor[1]))
-        return applied_auto
+        return False
 
 
 @public
@@ -482,20 +579,6 @@ class ConnectingGroup(ArrangementGroup):
         ordering contract).
         """
 
-    def child_symbol(self, inst) -> 'Symbol':
-        """
-        Returns the Symbol of an instance child. For unresolved
-        instances, it is generated from the recorded parameters.
-        """
-        from .schema import SchemInstance, SchemInstanceUnresolvedParameter
-        if isinstance(inst, SchemInstance):
-            return inst.symbol
-        params = {
-            p.name: p.value
-            for p in inst.root.all(SchemInstanceUnresolvedParameter.ref_idx.query(inst))
-        }
-        return inst.resolver(**params)
-
     def facing_pin(self, inst, side: D4) -> str:
         """
         Returns the name of the single pin of an instance child that
@@ -612,19 +695,18 @@ class Series(ConnectingGroup):
             f"Series has no {SIDE_NAMES[side]}-facing boundary "
             "(orientation mismatch with the enclosing group).")
 
-    def cross_arrangement(self, rects: list, cross: int) -> tuple[list, float]:
+    def cross_arrangement(self, extents: list, cross: int) -> tuple[list, float]:
         if self.align != 'pins':
-            return super().cross_arrangement(rects, cross)
-        sizes = [term_constant(r[cross+2] - r[cross], child)
-            for child, r in zip(self.children, rects)]
+            return super().cross_arrangement(extents, cross)
+        sizes = [e[cross+2] - e[cross] for e in extents]
         # Chain the offsets so that each pair's facing pins line up.
         # Flooring snaps to the unit grid where center fallbacks (nested
         # Parallel) introduce half units.
         to_next, to_prev = self.flow_sides
         offsets = [0]
         for i, (prev, cur) in enumerate(zip(self.children, self.children[1:])):
-            step = (self.junction_offset(prev, to_next, rects[i], cross)
-                - self.junction_offset(cur, to_prev, rects[i+1], cross))
+            step = (self.junction_offset(prev, to_next, extents[i], cross)
+                - self.junction_offset(cur, to_prev, extents[i+1], cross))
             offsets.append(offsets[-1] + step)
         offsets = [math.floor(offset) for offset in offsets]
         base = min(offsets)
@@ -632,30 +714,32 @@ class Series(ConnectingGroup):
         span = max(offset + size for offset, size in zip(offsets, sizes))
         return offsets, span
 
-    def junction_offset(self, child, side: D4, rect: tuple, cross: int) -> float:
+    def junction_offset(self, child, side: D4, extent: tuple, cross: int) -> float:
         """
         Returns the cross-axis offset of a child's connection point on
-        side, relative to its bounding box, or the center where there is no
-        single connection point (nested Parallel rails).
+        side, relative to its bounding box (given by its child_extent()),
+        or the center where there is no single connection point (nested
+        Parallel rails).
         """
         from .schema import Net, SchemPort
         if isinstance(child, ConnectingGroup):
             offset = child.boundary_junction_offset(side, cross)
             if offset is None:
-                offset = term_constant(rect[cross+2] - rect[cross], child) / 2
+                offset = (extent[cross+2] - extent[cross]) / 2
             return offset
         if isinstance(child, (Net, SchemPort)):
             return 0
-        pin = getattr(child, self.facing_pin(child, side)).pos
-        coord = pin.x if cross == 0 else pin.y
-        return term_constant(coerce_term(coord) - rect[cross], child)
+        pin = getattr(self.child_symbol(child), self.facing_pin(child, side))
+        pos = TD4R(d4=child.orientation) * pin.pos
+        coord = pos.x if cross == 0 else pos.y
+        return float(coord) - extent[cross]
 
     def boundary_junction_offset(self, side: D4, cross: int) -> float:
         index = self.boundary_index(side)
-        arrangement = self.arrangement()
-        return (arrangement.offsets[index][cross]
+        layout = self.layout()
+        return (layout.offsets[index][cross]
             + self.junction_offset(self.children[index], side,
-                arrangement.rects[index], cross))
+                layout.extents[index], cross))
 
 
 @public
@@ -715,4 +799,4 @@ def emit_toplevel_groups(groups: list[ArrangementGroup], solver: Solver):
     default_group_spacing = 4
     for group in groups:
         if group.emit(solver, auto_anchor=(origin, 0)):
-            origin += group.arrangement().width + default_group_spacing
+            origin += group.layout().width + default_group_spacing
@@ -4,8 +4,9 @@
 from dataclasses import dataclass
 from public import public
 from itertools import chain
+from collections import OrderedDict
+import threading
 from abc import ABC, abstractmethod
-import numpy as np
 from .geoprim import *
 from .ordb import Attr, MutableSubgraph
 from .rational import *
@@ -97,7 +98,7 @@ class Variable:
         return f"nid{self.nid}.{self.attr.name}.{self.subid}"
 
     def term(self):
-        return LinearTerm((self,), (1.0,), 0.0)
+        return LinearTerm._make((self,), (1.0,), 0.0)
 
     def mav(self):
         return MissingAttrVal(self.subgraph, self.nid, self.attr)
@@ -119,50 +120,80 @@ class LinearTerm:
         l = " + ".join(l)
         return f"LinearTerm({l} + {self.constant})"
 
+    @classmethod
+    def _make(cls, variables, coefficients, constant) -> 'LinearTerm':
+        # Skips the frozen dataclass __init__, which is comparatively slow
+        # and dominates the arithmetic below for terms of few variables.
+        term = object.__new__(cls)
+        d = term.__dict__
+        d['variables'] = variables
+        d['coefficients'] = coefficients
+        d['constant'] = constant
+        return term
+
     def __rmul__(self, other):
-        return LinearTerm(
+        return LinearTerm._make(
             self.variables,
-            tuple((other*coeff for coeff in self.coefficients)),
+            tuple([other*coeff for coeff in self.coefficients]),
             other*self.constant,
             )
 
     def __neg__(self):
-        return LinearTerm(
+        return LinearTerm._make(
             self.variables,
-            tuple((-coeff for coeff in self.coefficients)),
+            tuple([-coeff for coeff in self.coefficients]),
             -self.constant,
             )
 
-    def __add__(self, other):
-        other = coerce_term(other)
+    def _merge(self, other, sign: float) -> 'LinearTerm':
+        """Returns self + sign*other for sign 1.0 or -1.0."""
+        if not isinstance(other, LinearTerm):
+            if isinstance(other, (float, int, R)):
+                return LinearTerm._make(self.variables, self.coefficients,
+                    self.constant + sign*float(other))
+            return NotImplemented
 
-        variables = list(self.variables)
+        constant = self.constant + sign*other.constant
+        other_variables = other.variables
+        if not other_variables:
+            return LinearTerm._make(self.variables, self.coefficients, constant)
+        if sign < 0:
+            other_coefficients = [-c for c in other.coefficients]
+        else:
+            other_coefficients = other.coefficients
+        variables = self.variables
+        if not variables:
+            return LinearTerm._make(other_variables, tuple(other_coefficients), constant)
+        if variables == other_variables:
+            return LinearTerm._make(variables,
+                tuple([a + b for a, b in zip(self.coefficients, other_coefficients)]),
+                constant)
+
+        variables = list(variables)
         coefficients = list(self.coefficients)
-
-        for v, c in zip(other.variables, other.coefficients):
-            try:
-                idx = variables.index(v)
-            except ValueError:
+        index = {v: i for i, v in enumerate(variables)}
+        for v, c in zip(other_variables, other_coefficients):
+            i = index.get(v)
+            if i is None:
+                index[v] = len(variables)
                 variables.append(v)
                 coefficients.append(c)
             else:
-                coefficients[idx] += c
-            
-        return LinearTerm(
-            tuple(variables),
-            tuple(coefficients),
-            self.constant + other.constant
-            )
+                coefficients[i] += c
+        return LinearTerm._make(tuple(variables), tuple(coefficients), constant)
+
+    def __add__(self, other):
+        return self._merge(other, 1.0)
 
     def __radd__(self, other):
-        return self.__add__(other)
+        return self._merge(other, 1.0)
 
     def __rsub__(self, other):
-        return -self.__sub__(other)
+        term = self._merge(other, -1.0)
+        return term if term is NotImplemented else -term
 
     def __sub__(self, other):
-        other = coerce_term(other)
-        return self + (-other)
+        return self._merge(other, -1.0)
 
     def __le__(self, other):
         return LessThanOrEqualsZero(self - other)
@@ -427,7 +458,7 @@ class AmbiguityInfo:
     degrees_of_freedom: int #: Number of remaining unconstrained degrees of freedom
     #: Null space basis vectors. Each column represents a direction
     #: in which the solution can vary while remaining optimal.
-    null_space: np.ndarray
+    null_space: 'np.ndarray'
 
     def describe_freedom(self) -> str:
         """
@@ -447,99 +478,80 @@ class AmbiguityInfo:
 
         return '\n'.join(lines)
 
-def check_solution_uniqueness(res, A_eq, A_ub, b_ub, variables: tuple[Variable]) -> AmbiguityInfo | None:
+@public
+class SolverSession:
     """
-    Check if the linear programming solution is unique using rank analysis.
-
-    Builds the active constraint matrix (equality constraints plus inequality
-    constraints with zero slack) and computes its rank. If the rank equals
-    the number of variables, the solution is unique and None is returned.
-    Otherwise, computes the null space to identify directions of freedom and
-    returns an AmbiguityInfo object.
+    Keeps the :class:`DecomposedProblem` instances of recent solves, keyed by
+    the structure of their constraints. When a layout or schematic is
+    rebuilt with only some constants changed (e.g. while editing it
+    interactively in the web UI), its Solver finds the previous problem here
+    and re-solves it with a warm start instead of assembling and solving the
+    LP from scratch.
 
     Args:
-        res: Result from scipy.optimize.linprog
-        A_eq: Equality constraint matrix
-        A_ub: Inequality constraint matrix
-        b_ub: Inequality constraint bounds
-        variables: Tuple of Variable objects in the problem
-
-    Returns:
-        None if solution is unique, AmbiguityInfo if solution has degrees of freedom
+        size: Maximum number of problems kept, least recently used first out.
+            Set to 0 to disable caching.
     """
-    from scipy.linalg import null_space
-
-    n_variables = len(variables)
-
-    # Build active constraint matrix
-    active_parts = []
-
-    # Equality constraints are always active
-    if A_eq.size > 0:
-        active_parts.append(A_eq)
-
-    # Find inequality constraints that are active (slack ≈ 0)
-    if A_ub.size > 0:
-        slack = b_ub - A_ub @ res.x
-        tolerance = 1e-7
-        active_mask = np.abs(slack) < tolerance
-
-        if np.any(active_mask):
-            active_parts.append(A_ub[active_mask])
-
-    # Build active constraint matrix
-    if active_parts:
-        active_matrix = np.vstack(active_parts)
-    else:
-        # No active constraints - completely unconstrained
-        active_matrix = np.zeros((0, n_variables), dtype=np.float64)
-
-    if active_matrix.shape[0] == 0:
-        # No constraints - completely unconstrained
-        return AmbiguityInfo(
-            variables=variables,
-            constraint_rank=0,
-            degrees_of_freedom=n_variables,
-            null_space=np.eye(n_variables)
-        )
-
-    # Compute rank of active constraints
-    rank = np.linalg.matrix_rank(active_matrix, tol=1e-10)
-    dof = max(0, n_variables - rank)
-    if dof == 0:
-        return None # Solution is unique!
-
-    # Solution is not unique!
-    return AmbiguityInfo(
-        variables=variables,
-        constraint_rank=rank,
-        degrees_of_freedom=dof,
-        null_space=null_space(active_matrix, rcond=1e-10)
-    )
-
-def constraints_to_Ab(constraints: list[Constraint], n_variables: int, idx_of_var: dict[Variable,int]):
-    A = np.zeros((len(constraints), n_variables), dtype=np.float64)
-    b = np.zeros(len(constraints), dtype=np.float64)
-
-    for i, e in enumerate(constraints):
-        for variable, coefficient in zip(e.term.variables, e.term.coefficients):
-            j = idx_of_var[variable]
-            A[i, j] = coefficient
-
-        b[i] = -e.term.constant
-
-    return A, b
+    def __init__(self, size: int=16):
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+        self._problems = OrderedDict()
+        self._lock = threading.Lock()
+
+    def problem(self, key, n: int, equalities, inequalities) -> 'DecomposedProblem':
+        """
+        Returns the cached problem for key or creates a new one from n,
+        equalities and inequalities (see :class:`DecomposedProblem`).
+        """
+        with self._lock:
+            try:
+                problem = self._problems[key]
+            except KeyError:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._problems.move_to_end(key)
+                return problem
+        from .lpsolve import DecomposedProblem
+        problem = DecomposedProblem(n, equalities, inequalities)
+        if self.size > 0:
+            with self._lock:
+                self._problems[key] = problem
+                while len(self._problems) > self.size:
+                    self._problems.popitem(last=False)
+        return problem
+
+    def clear(self):
+        """Removes all cached problems."""
+        with self._lock:
+            self._problems.clear()
+
+#: Session used by all Solvers that are not given a session explicitly.
+default_session = SolverSession()
 
 @public
 class Solver:
     """
     Collects and solves constraints for a set of :class:`ConstrainableAttr`
     attributes of specified subgraph.
+
+    Args:
+        subgraph: Subgraph whose attributes are solved.
+        session: Caches problem structures between solves. Defaults to a
+            session shared by all Solvers.
     """
-    def __init__(self, subgraph: 'SubgraphRoot'):
+    def __init__(self, subgraph: 'SubgraphRoot', session: SolverSession=None):
         self.equalities = []
         self.inequalities = []
         self.subgraph = subgraph
+        self.session = default_session if session is None else session
+        # Variables interned by variable_ids(), position = id:
+        self._variables = []
+        self._id_of_var = {}
+        # Constraints added by constrain_rows(), as (equality, variable ids,
+        # coefficients, constants) arrays of shapes (m, k), (m, k) and (m,):
+        self._rows = []
 
     def constrain(self, constraint: Constraint|MultiConstraint):
         """Add constraint that must be satisfied by the solution."""
@@ -553,6 +565,85 @@ class Solver:
         else:
             raise TypeError("constrain() expects LessThanOrEqualsZero or EqualsZero.")
 
+    def variable_ids(self, nodes, attr: ConstrainableAttr) -> 'np.ndarray':
+        """
+        Returns the ids of the variables of attribute attr of each node, as
+        integer array of shape (len(nodes), number of subids), e.g. one
+        column each for lx, ly, ux and uy of a Rect4 attribute. The ids are
+        specific to this Solver and are used with :meth:`constrain_rows`.
+
+        Unlike reading the attributes, this creates no placeholder terms.
+        The attributes must be undefined (None).
+        """
+        import numpy as np
+        sg = self.subgraph.subgraph
+        subids = attr.placeholder.subids()
+        variables = self._variables
+        id_of_var = self._id_of_var
+        ids = []
+        for node in nodes:
+            if node.subgraph is not sg:
+                raise SolverError(f"Solver found Variables of unexpected subgraph {node.subgraph}.")
+            if getattr(node.tuple, attr.name) is not None:
+                raise ValueError(f"Attribute {attr.name} of {node!r} is already defined.")
+            for subid in subids:
+                v = Variable(sg, node.nid, attr, subid)
+                i = id_of_var.get(v)
+                if i is None:
+                    i = id_of_var[v] = len(variables)
+                    variables.append(v)
+                ids.append(i)
+        return np.array(ids, dtype=np.int64).reshape(-1, len(subids))
+
+    def constrain_rows(self, ids, coefficients, constants=0, equality: bool=True):
+        """
+        Adds many constraints of the same shape at once, without creating
+        :class:`LinearTerm` or constraint objects. Row r adds the constraint
+
+            sum over j of coefficients[r, j] * variable(ids[r, j]) + constants[r] == 0
+
+        or <= 0 if equality is False. ids is an integer array of shape
+        (m, k) with ids from :meth:`variable_ids`, coefficients and
+        constants are broadcast to shapes (m, k) and (m,). For example,
+        to place rects in a row with a gap of 50::
+
+            lx, ly, ux, uy = solver.variable_ids(rects, LayoutRect.rect).T
+            solver.constrain_rows(np.column_stack((lx[1:], ux[:-1])), (1, -1), -50)
+        """
+        import numpy as np
+        ids = np.asarray(ids, dtype=np.int64)
+        if ids.ndim != 2:
+            raise ValueError("constrain_rows() expects ids of shape (m, k).")
+        if ids.size > 0 and (ids.min() < 0 or ids.max() >= len(self._variables)):
+            raise ValueError("constrain_rows() got ids not returned by variable_ids().")
+        coefficients = np.broadcast_to(np.asarray(coefficients, dtype=np.float64), ids.shape)
+        constants = np.broadcast_to(np.asarray(constants, dtype=np.float64), ids.shape[:1])
+        self._rows.append((bool(equality), ids, coefficients, constants))
+
+    def constrained_variables(self) -> set[Variable]:
+        """Returns all variables that appear in the constraints added so far."""
+        variables = set()
+        for e in chain(self.equalities, self.inequalities):
+            variables.update(e.term.variables)
+        for _, ids, _, _ in self._rows:
+            variables.update(self._variables[i] for i in set(ids.ravel().tolist()))
+        return variables
+
+    def _row_term(self, equality: bool, k: int) -> LinearTerm:
+        """Returns the term of the k-th equality or inequality."""
+        objects = self.equalities if equality else self.inequalities
+        if k < len(objects):
+            return objects[k].term
+        k -= len(objects)
+        for eq, ids, coefficients, constants in self._rows:
+            if eq != equality:
+                continue
+            if k < len(ids):
+                return LinearTerm(tuple(self._variables[i] for i in ids[k].tolist()),
+                    tuple(coefficients[k].tolist()), float(constants[k]))
+            k -= len(ids)
+        raise IndexError(k)
+
     def undefined_attrs(self) -> set[MissingAttrVal]:
         """
         Returns a MissingAttrVal for every ConstrainableAttr in the subgraph
@@ -591,61 +682,67 @@ class Solver:
                 allow_undefined=False and a ConstrainableAttr is left undefined.
         """
 
-        from scipy.optimize import linprog
-
-        variables = set()
-        for e in chain(self.equalities, self.inequalities):
-            variables |= set(e.term.variables)
+        variables = self.constrained_variables()
 
         for v in variables:
             if v.subgraph != self.subgraph.subgraph:
                 raise SolverError(f"Solver found Variables of unexpected subgraph {v.subgraph}.")
 
         # Expand variable set to include all subids for each affected
-        # attribute, so that check_solution_uniqueness can detect variables
+        # attribute, so that the uniqueness check can detect variables
         # that are completely missing from constraints.
         mavs = {v.mav() for v in variables}
         for mav in mavs:
             for subid in mav.attr.placeholder.subids():
                 variables.add(Variable(mav.subgraph, mav.nid, mav.attr, subid))
 
-        variables = tuple(variables)
-        n_variables = len(variables)
-        idx_of_var = {variable: index for index, variable in enumerate(variables)}
-
-        # With no constraints there are no variables to solve. linprog rejects
-        # a zero-length objective vector, so skip it; the allow_undefined check
-        # below still runs to catch attributes never constrained nor assigned.
-        if n_variables > 0:
-            A_eq, b_eq = constraints_to_Ab(self.equalities, n_variables, idx_of_var)
-            A_ub, b_ub = constraints_to_Ab(self.inequalities, n_variables, idx_of_var)
-
-            c = np.zeros(n_variables, dtype=np.float64)
-            # (c * variables) is minimized. By subtracting each row of A_ub, the
-            # speicified inequalities are optimized towards equality. Each
-            # inequality is given the same weight in this process.
-            for x in A_ub:
-                c -= x
-
-            bounds = n_variables*[(None, None)]
-            res = linprog(c=c, A_eq=A_eq, b_eq=b_eq, A_ub=A_ub, b_ub=b_ub, bounds=bounds)
-
-            if not res.success:
-                raise SolverError(res.message)
-
-            # Check solution uniqueness unless explicitly allowed to be ambiguous
-            if not allow_ambiguous:
-                ambiguity_info = check_solution_uniqueness(res, A_eq, A_ub, b_ub, variables)
-
-                if ambiguity_info is not None:
-                    raise UnderconstrainedError(ambiguity_info)
+        # Deterministic order, so that rebuilds of the same subgraph map to
+        # the same cached problem:
+        variables = tuple(sorted(variables, key=lambda v: (v.nid, v.attr.name, v.subid)))
+
+        # With no constraints there are no variables to solve. The
+        # allow_undefined check below still runs to catch attributes never
+        # constrained nor assigned.
+        if len(variables) > 0:
+            import numpy as np
+            index_of_var = {v: i for i, v in enumerate(variables)}
+            equalities = [(tuple(index_of_var[v] for v in e.term.variables), e.term.coefficients)
+                for e in self.equalities]
+            inequalities = [(tuple(index_of_var[v] for v in e.term.variables), e.term.coefficients)
+                for e in self.inequalities]
+            eq_constants = [np.array([e.term.constant for e in self.equalities], dtype=np.float64)]
+            ub_constants = [np.array([e.term.constant for e in self.inequalities], dtype=np.float64)]
+            if self._rows:
+                index_of_id = np.array([index_of_var.get(v, -1) for v in self._variables], dtype=np.int64)
+                for equality, ids, coefficients, constants in self._rows:
+                    rows = zip(map(tuple, index_of_id[ids].tolist()), map(tuple, coefficients.tolist()))
+                    if equality:
+                        equalities.extend(rows)
+                        eq_constants.append(constants)
+                    else:
+                        inequalities.extend(rows)
+                        ub_constants.append(constants)
+            equalities = tuple(equalities)
+            inequalities = tuple(inequalities)
+            key = (tuple((v.nid, v.attr, v.subid) for v in variables), equalities, inequalities)
+            problem = self.session.problem(key, len(variables), equalities, inequalities)
+            values = problem.solve(variables, np.concatenate(eq_constants),
+                np.concatenate(ub_constants), allow_ambiguous,
+                describe=lambda eq, k: repr(self._row_term(eq, k)))
 
             # Keep float values here; int/R conversion happens in make_solution
-            value_of_var = {variable: value for variable, value in zip(variables, res.x)}
+            value_of_var = dict(zip(variables, values.tolist()))
 
+            # Write all solutions in a single update:
+            sg = self.subgraph.subgraph
+            node_tuples = {}
             for mav in mavs:
-                node = self.subgraph.cursor_at(mav.nid, lookup_npath=False)
-                node.update_byattr(mav.attr, mav.attr.placeholder.make_solution(mav, value_of_var))
+                node_tuple = node_tuples.get(mav.nid) or sg.nodes[mav.nid]
+                node_tuples[mav.nid] = node_tuple.set_byattr(mav.attr,
+                    mav.attr.placeholder.make_solution(mav, value_of_var))
+            with sg.updater() as u:
+                for nid, node_tuple in node_tuples.items():
+                    u.update(node_tuple, nid)
 
         # Unless more attributes will be assigned manually afterward, every
         # ConstrainableAttr must now have a concrete value. Any still left
@@ -660,3 +757,11 @@ class Solver:
                 raise SolverError(
                     "Undefined constrainable attribute(s) found. Please add "
                     "constraints or assign them directly: " + ", ".join(locations))
+
+def __getattr__(name):
+    # DecomposedProblem lives in .lpsolve, which imports numpy and scipy
+    # only when it is needed.
+    if name == 'DecomposedProblem':
+        from .lpsolve import DecomposedProblem
+        return DecomposedProblem
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -154,6 +154,8 @@ class SchematicViewContext(ViewContext):
 
     def postprocess(self):
         from .arrange import emit_toplevel_groups
+        from ..schematic.incremental import (
+            incremental_auto_wire_check, schematic_key)
 
         emit_toplevel_groups(self.arrangement_groups, self.solver)
         self.solver.solve(allow_undefined=True)
@@ -166,8 +168,10 @@ class SchematicViewContext(ViewContext):
         # were placed above. auto_wire() and check() rely on this.
         assert not self.solver.undefined_attrs()
 
-        self.root.auto_wire()
-        self.root.check(add_conn_points=True, add_terminal_taps=True)
+        # auto_wire() and check(add_conn_points=True, add_terminal_taps=True),
+        # reusing what is unchanged since the cell's schematic was last
+        # generated.
+        incremental_auto_wire_check(self.root, key=schematic_key(self.root))
 
 
 class LayoutViewContext(ViewContext):
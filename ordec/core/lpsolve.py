@@ -0,0 +1,353 @@
+# SPDX-FileCopyrightText: 2026 ORDeC contributors
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Numerical backend of :class:`ordec.core.constraints.Solver`. Kept separate
+from the constraint classes, so that numpy and scipy are only imported once
+a problem is actually solved.
+"""
+
+import threading
+import numpy as np
+from .constraints import Variable, SolverError, UnderconstrainedError, AmbiguityInfo
+
+class _OffsetUnionFind:
+    """
+    Union-find over n variables plus a ground element (index n) of value 0.
+    Each element x is related to its root by x = x_root + offset. Ground
+    always stays the root of its set, so the variables in its set have the
+    fixed value of their offset.
+    """
+    def __init__(self, n: int):
+        self.ground = n
+        self.parent = list(range(n + 1))
+        self.offset = [0.0] * (n + 1)
+        self.size = [1] * (n + 1)
+
+    def find(self, i: int) -> tuple[int, float]:
+        """Returns (root, offset) with x_i = x_root + offset."""
+        parent = self.parent
+        path = []
+        while parent[i] != i:
+            path.append(i)
+            i = parent[i]
+        # Path compression:
+        acc = 0.0
+        for j in reversed(path):
+            acc += self.offset[j]
+            self.offset[j] = acc
+            parent[j] = i
+        return i, (self.offset[path[0]] if path else 0.0)
+
+    def union(self, i: int, j: int, d: float, tol: float=1e-7) -> bool:
+        """
+        Adds the relation x_i = x_j + d. Returns False if it contradicts
+        the relations added before.
+        """
+        ri, oi = self.find(i)
+        rj, oj = self.find(j)
+        if ri == rj:
+            return abs(oi - oj - d) <= tol
+        if rj == self.ground or (ri != self.ground and self.size[ri] <= self.size[rj]):
+            # x_ri = x_rj + oj + d - oi
+            self.parent[ri] = rj
+            self.offset[ri] = oj + d - oi
+            self.size[rj] += self.size[ri]
+        else:
+            # x_rj = x_ri + oi - oj - d
+            self.parent[rj] = ri
+            self.offset[rj] = oi - oj - d
+            self.size[ri] += self.size[rj]
+        return True
+
+class DecomposedProblem:
+    """
+    Sparse, decomposed form of the linear program solved by
+    :meth:`Solver.solve`:
+
+        minimize c @ x subject to A_eq @ x == b_eq and A_ub @ x <= b_ub,
+
+    where c = -(sum of the rows of A_ub), i.e. all inequalities are pushed
+    towards equality with equal weight.
+
+    Equalities of the form x == c and x == y + c are eliminated up front with
+    a union-find (see :class:`_OffsetUnionFind`), leaving one reduced
+    variable per set of variables with fixed differences. The remaining
+    constraints are substituted into scipy.sparse matrices over the reduced
+    variables, which are split into connected components of the
+    variable-constraint graph. Since neither objective nor constraints couple
+    components, they are checked for uniqueness independently. The LP itself
+    is block diagonal and therefore solved in a single sparse HiGHS call;
+    separate calls per component would mostly add call overhead.
+
+    A DecomposedProblem only depends on the structure of the constraints
+    (variables and coefficients), not on their constants. After a unique
+    solution was found, the factorization of its active constraints is kept.
+    Solving again with changed constants then first tries this active set:
+    as the LP's dual solution does not depend on the constants, the old
+    active set stays optimal as long as the solution of its constraints is
+    feasible (warm start). Only otherwise the LP is solved again.
+
+    Args:
+        n: Number of variables.
+        equalities: (variable indices, coefficients) of each equality.
+        inequalities: (variable indices, coefficients) of each inequality.
+    """
+    #: Tolerance for equality constraints, inequality slack and coefficients.
+    tol = 1e-7
+
+    def __init__(self, n: int, equalities: list[tuple[tuple[int], tuple[float]]],
+            inequalities: list[tuple[tuple[int], tuple[float]]]):
+        import scipy.sparse as sp
+        from scipy.sparse.csgraph import connected_components
+
+        self.n = n
+        self.lock = threading.Lock()
+        uf = _OffsetUnionFind(n)
+        ground = uf.ground
+
+        # Equalities eliminated by union-find, as (index, i, j, a) for
+        # a*x_i - a*x_j + k == 0 or a*x_i + k == 0 (j = ground):
+        self.eliminated = []
+        def kept_rows(constraints, eliminate: bool):
+            rows, cols, vals = [], [], []
+            kept = []
+            for k, (indices, coefficients) in enumerate(constraints):
+                entries = [(i, c) for i, c in zip(indices, coefficients) if c != 0]
+                if eliminate and len(entries) == 1:
+                    (i, a), = entries
+                    self.eliminated.append((k, i, ground, a))
+                    uf.union(i, ground, 0.0)
+                    continue
+                if eliminate and len(entries) == 2 and entries[0][1] == -entries[1][1]:
+                    (i, a), (j, _) = entries
+                    self.eliminated.append((k, i, j, a))
+                    uf.union(i, j, 0.0)
+                    continue
+                row = len(kept)
+                for i, c in entries:
+                    rows.append(row)
+                    cols.append(i)
+                    vals.append(c)
+                kept.append(k)
+            M = sp.csr_matrix((np.array(vals, dtype=np.float64), (rows, cols)), shape=(len(kept), n))
+            return M, np.array(kept, dtype=np.int64)
+
+        M_eq, self.kept_eq = kept_rows(equalities, True)
+        M_ub, self.kept_ub = kept_rows(inequalities, False)
+
+        # Every variable is x_root + offset, where root is a reduced variable
+        # or ground. The roots do not depend on the constants:
+        roots = np.array([uf.find(i)[0] for i in range(n)], dtype=np.int64)
+        free_roots = np.unique(roots[roots != ground])
+        self.n_reduced = len(free_roots)
+        # Reduced variable index of each variable, -1 for fixed variables:
+        self.reduced_of_var = np.full(n, -1, dtype=np.int64)
+        not_fixed = roots != ground
+        self.reduced_of_var[not_fixed] = np.searchsorted(free_roots, roots[not_fixed])
+        P = sp.csr_matrix((np.ones(np.count_nonzero(not_fixed)),
+            (np.flatnonzero(not_fixed), self.reduced_of_var[not_fixed])),
+            shape=(n, self.n_reduced))
+
+        def reduce(M):
+            A = (M @ P).tocsr()
+            A.data[np.abs(A.data) < 1e-12] = 0
+            A.eliminate_zeros()
+            # Rows without remaining variables are only checked for feasibility:
+            empty = np.diff(A.indptr) == 0
+            return M, A[~empty], empty
+
+        self.M_eq, self.A_eq, self.empty_eq = reduce(M_eq)
+        self.M_ub, self.A_ub, self.empty_ub = reduce(M_ub)
+        self.c = -np.asarray(self.A_ub.sum(axis=0)).ravel()
+
+        pattern = sp.vstack((self.A_eq, self.A_ub)).tocsr()
+        pattern.data[:] = 1
+        adjacency = (pattern.T @ pattern).tocsr()
+        self.n_components, self.component_of = connected_components(adjacency, directed=False)
+
+        # Set after a unique solution was found: (active inequality mask,
+        # active constraint matrix, LU factorization of its normal matrix).
+        self.active = None
+
+    def _offsets(self, eq_constants: np.ndarray, describe) -> np.ndarray:
+        """Replays the union-find elimination with the actual constants."""
+        uf = _OffsetUnionFind(self.n)
+        for k, i, j, a in self.eliminated:
+            if not uf.union(i, j, -float(eq_constants[k]) / a, self.tol):
+                raise SolverError(f"Conflicting equality constraint: {describe(True, k)} == 0")
+        return np.array([uf.find(i)[1] for i in range(self.n)], dtype=np.float64)
+
+    def _reduced_b(self, constants, kept, M, empty, offsets, eq: bool, describe) -> np.ndarray:
+        b = -constants[kept]
+        b -= M @ offsets
+        if eq:
+            bad = empty & (np.abs(b) > self.tol)
+        else:
+            bad = empty & (b < -self.tol)
+        if np.any(bad):
+            k = int(kept[np.flatnonzero(bad)[0]])
+            raise SolverError(f"Infeasible constraint: {describe(eq, k)} {'==' if eq else '<='} 0")
+        return b[~empty]
+
+    def solve(self, variables: tuple[Variable], eq_constants: np.ndarray,
+            ub_constants: np.ndarray, allow_ambiguous: bool, describe=None) -> np.ndarray:
+        """
+        Solves the problem for the given constants of the equalities and
+        inequalities (in the order of the structure this problem was
+        created from) and returns the values of all variables. Raises
+        UnderconstrainedError unless allow_ambiguous is True and SolverError
+        if the LP is infeasible or unbounded.
+
+        describe(eq, k) returns a description of the k-th equality (eq=True)
+        or inequality for error messages.
+        """
+        if describe is None:
+            describe = lambda eq, k: f"{'equality' if eq else 'inequality'} {k}"
+        eq_constants = np.asarray(eq_constants, dtype=np.float64)
+        ub_constants = np.asarray(ub_constants, dtype=np.float64)
+        with self.lock:
+            offsets = self._offsets(eq_constants, describe)
+            b_eq = self._reduced_b(eq_constants, self.kept_eq, self.M_eq, self.empty_eq, offsets, True, describe)
+            b_ub = self._reduced_b(ub_constants, self.kept_ub, self.M_ub, self.empty_ub, offsets, False, describe)
+
+            x = self._warm_start(b_eq, b_ub)
+            if x is None:
+                x = self._solve_lp(variables, b_eq, b_ub, allow_ambiguous)
+
+        values = offsets.copy()
+        not_fixed = self.reduced_of_var >= 0
+        values[not_fixed] += x[self.reduced_of_var[not_fixed]]
+        # Remove float noise around integers, e.g. 99.99999999 for 100:
+        rounded = np.rint(values)
+        return np.where(np.abs(values - rounded) < self.tol, rounded, values)
+
+    def _warm_start(self, b_eq: np.ndarray, b_ub: np.ndarray) -> np.ndarray|None:
+        """
+        Solves the active constraints of the previous solution for the new
+        constants. Returns None if there is no previous solution or if the
+        result violates any constraint.
+        """
+        if self.n_reduced == 0:
+            return np.zeros(0)
+        if self.active is None:
+            return None
+        active_ub, A_act, lu = self.active
+        b_act = np.concatenate((b_eq, b_ub[active_ub]))
+        x = lu.solve(A_act.T @ b_act)
+        # Normal equations square the condition number, refine once:
+        x += lu.solve(A_act.T @ (b_act - A_act @ x))
+        if np.any(np.abs(A_act @ x - b_act) > self.tol):
+            return None
+        if self.A_ub.shape[0] > 0 and np.any(self.A_ub @ x - b_ub > self.tol):
+            return None
+        return x
+
+    def _solve_lp(self, variables, b_eq, b_ub, allow_ambiguous) -> np.ndarray:
+        import scipy.sparse as sp
+        from scipy.sparse.linalg import splu
+        from scipy.optimize import linprog
+
+        self.active = None
+        has_eq = self.A_eq.shape[0] > 0
+        has_ub = self.A_ub.shape[0] > 0
+        if not (has_eq or has_ub):
+            x = np.zeros(self.n_reduced, dtype=np.float64)
+        else:
+            res = linprog(c=self.c,
+                A_eq=self.A_eq if has_eq else None,
+                b_eq=b_eq if has_eq else None,
+                A_ub=self.A_ub if has_ub else None,
+                b_ub=b_ub if has_ub else None,
+                bounds=(None, None))
+            if not res.success:
+                raise SolverError(res.message)
+            x = res.x
+
+        if has_ub:
+            active_ub = np.abs(b_ub - self.A_ub @ x) < self.tol
+        else:
+            active_ub = np.zeros(0, dtype=bool)
+        A_act = sp.vstack((self.A_eq, self.A_ub[active_ub])).tocsr()
+
+        # The solution is unique if the active constraints have full rank,
+        # i.e. if their normal matrix is regular:
+        try:
+            lu = splu((A_act.T @ A_act).tocsc())
+        except RuntimeError: # exactly singular
+            lu = None
+        else:
+            pivots = np.abs(lu.U.diagonal())
+            if pivots.min() <= 1e-12 * pivots.max():
+                lu = None
+        if lu is not None:
+            self.active = (active_ub, A_act, lu)
+        elif not allow_ambiguous:
+            # Numerical rank per component, which also yields the null space:
+            ambiguity_info = self.check_uniqueness(A_act, variables)
+            if ambiguity_info is not None:
+                raise UnderconstrainedError(ambiguity_info)
+        return x
+
+    def check_uniqueness(self, active: 'scipy.sparse.csr_matrix', variables: tuple[Variable]) -> 'AmbiguityInfo | None':
+        """
+        Checks whether a solution with the given active constraints
+        (equalities and inequalities with zero slack) is unique. For each
+        component, the rank of its active constraints must equal its number
+        of reduced variables. Returns None if the solution is unique, else an
+        AmbiguityInfo covering all components with degrees of freedom.
+        """
+        from scipy.linalg import null_space
+
+        # Component of each active row = component of its first variable:
+        row_component = self.component_of[active.indices[active.indptr[:-1]]] \
+            if active.shape[0] > 0 else np.zeros(0, dtype=np.int64)
+        rows_by_component = np.argsort(row_component, kind='stable')
+        row_bounds = np.searchsorted(row_component[rows_by_component], np.arange(self.n_components + 1))
+        vars_by_component = np.argsort(self.component_of, kind='stable')
+        var_bounds = np.searchsorted(self.component_of[vars_by_component], np.arange(self.n_components + 1))
+
+        null_spaces = [] # (reduced variable indices, null space basis)
+        for comp in range(self.n_components):
+            comp_vars = vars_by_component[var_bounds[comp]:var_bounds[comp+1]]
+            comp_rows = rows_by_component[row_bounds[comp]:row_bounds[comp+1]]
+            if len(comp_rows) == 0:
+                null_spaces.append((comp_vars, np.eye(len(comp_vars))))
+                continue
+            sub = active[comp_rows][:, comp_vars].toarray()
+            rank = np.linalg.matrix_rank(sub, tol=1e-10)
+            if rank < len(comp_vars):
+                null_spaces.append((comp_vars, null_space(sub, rcond=1e-10)))
+
+        if not null_spaces:
+            return None
+
+        # Map the null spaces back to the original variables: eliminated
+        # variables move along with their reduced variable.
+        n = self.n
+        dof = sum(basis.shape[1] for _, basis in null_spaces)
+        result = np.zeros((n, dof), dtype=np.float64)
+        vars_of_reduced = {}
+        for i, r in enumerate(self.reduced_of_var.tolist()):
+            if r >= 0:
+                vars_of_reduced.setdefault(r, []).append(i)
+        col = 0
+        for comp_vars, basis in null_spaces:
+            rows = []
+            rows_basis = []
+            for local, r in enumerate(comp_vars.tolist()):
+                for i in vars_of_reduced[r]:
+                    rows.append(i)
+                    rows_basis.append(local)
+            expanded = basis[rows_basis]
+            # Orthonormalize again, as expansion repeats rows:
+            q, _ = np.linalg.qr(expanded)
+            result[np.ix_(rows, range(col, col + basis.shape[1]))] = q
+            col += basis.shape[1]
+
+        return AmbiguityInfo(
+            variables=variables,
+            constraint_rank=n - dof,
+            degrees_of_freedom=dof,
+            null_space=result,
+        )
@@ -520,6 +520,231 @@ class NPathIndex(CombinedIndex):
         except UniqueViolation:
             raise ModelViolation("Path exists") # TODO: Report actual path?
 
+@public
+class SpatialQuery(NamedTuple):
+    """Pass SpatialQuery objects (from :meth:`SpatialIndex.query`) to
+    :meth:`SubgraphRoot.all` or :meth:`SubgraphRoot.one` to run a region
+    query on a specific subgraph."""
+    index: 'SpatialIndex'
+    partition: object
+    region: tuple
+
+@public
+class SpatialIndex(GenericIndex):
+    """
+    Region index over axis-aligned bounding boxes (extents) of nodes.
+
+    The index is a multi-level uniform grid: each node is stored in the
+    coarsest-needed level at which its extent spans at most 2x2 cells, so
+    every node occupies at most four cell buckets regardless of its size.
+    Level L has cells of size ``2**(cell_bits+L)``. Additionally, each
+    (partition, level) pair has a BucketKind.SET bucket of its non-empty
+    cells, which bounds the cost of huge region queries on fine levels,
+    and each partition has a BucketKind.SET bucket of its non-empty levels.
+    These only change when a cell becomes empty or non-empty, so adding a
+    node usually updates a single cell bucket.
+
+    All buckets are ordinary index buckets, so the index is maintained
+    incrementally through the StorageTxn of each update and shared across
+    freeze/thaw like any other index.
+
+    Unlike :class:`Index`, a single SpatialIndex object can be registered
+    with the attributes of several node types (see :meth:`track`), which
+    then share one search space.
+
+    Args:
+        extent: Function (state, node, nid, override) returning
+            (partition, (lx, ly, ux, uy)) for the given node, or None if the
+            node currently has no extent. state provides .nodes and .index
+            (a SubgraphUpdater or Subgraph). override maps nids of dependent
+            nodes to the NodeTuple to use instead of the stored one, or to
+            None to ignore that node (see :class:`SpatialIndexDependency`).
+            Coordinates must be ints.
+        cell_bits: log2 of the cell size at level 0.
+    """
+
+    def __init__(self, extent: Callable, cell_bits: int=8):
+        self.extent = extent
+        self.cell_bits = cell_bits
+
+    def track(self, *attrs: Attr) -> 'SpatialIndex':
+        """Registers the index with attributes whose values affect the
+        extent of their nodes. Returns self."""
+        for attr in attrs:
+            attr.indices.append(self)
+        return self
+
+    def level_of(self, box: tuple) -> int:
+        lx, ly, ux, uy = box
+        size = max(ux - lx, uy - ly, 1)
+        return ((size - 1) >> self.cell_bits).bit_length()
+
+    def cells_of(self, box: tuple) -> tuple[int, list[tuple[int, int]]]:
+        """Returns the level and the cells (gx, gy) at which a node with
+        the given extent box is stored."""
+        level = self.level_of(box)
+        shift = self.cell_bits + level
+        lx, ly, ux, uy = box
+        return level, [(gx, gy)
+            for gx in range(lx >> shift, (ux >> shift) + 1)
+            for gy in range(ly >> shift, (uy >> shift) + 1)]
+
+    def index_add(self, sgu: 'SubgraphUpdater', node, nid):
+        self.entry_add(sgu, self.extent(sgu, node, nid, {}), nid)
+
+    def index_remove(self, sgu: 'SubgraphUpdater', node, nid):
+        try:
+            # Not yet moved by reindex_deferred: stored at its old extent.
+            entry = sgu.spatial_deferred.pop((self, nid))
+        except KeyError:
+            entry = self.extent(sgu, node, nid, {})
+        self.entry_remove(sgu, entry, nid)
+
+    def check_constraints(self, sgu: 'SubgraphUpdater', node, nid):
+        pass
+
+    def entry_add(self, sgu: 'SubgraphUpdater', entry, nid):
+        if entry is None:
+            return
+        partition, box = entry
+        level, cells = self.cells_of(box)
+        txn = sgu.txn
+        for cell in cells:
+            key = IndexKey(self, (partition, level, *cell))
+            if key not in txn.index:
+                level_key = IndexKey(self, (partition, level))
+                if level_key not in txn.index:
+                    txn.bucket_add(IndexKey(self, (partition,)), level, BucketKind.SET)
+                txn.bucket_add(level_key, cell, BucketKind.SET)
+            txn.bucket_add(key, nid, BucketKind.NID)
+
+    def entry_remove(self, sgu: 'SubgraphUpdater', entry, nid):
+        if entry is None:
+            return
+        partition, box = entry
+        level, cells = self.cells_of(box)
+        txn = sgu.txn
+        for cell in cells:
+            key = IndexKey(self, (partition, level, *cell))
+            txn.bucket_remove(key, nid, BucketKind.NID)
+            if key not in txn.index:
+                level_key = IndexKey(self, (partition, level))
+                txn.bucket_remove(level_key, cell, BucketKind.SET)
+                if level_key not in txn.index:
+                    txn.bucket_remove(IndexKey(self, (partition,)), level, BucketKind.SET)
+
+    def reindex(self, sgu: 'SubgraphUpdater', node, nid, dep_nid: int, dep_node, present: bool):
+        """
+        Marks node (nid) for moving to its new extent after its dependent
+        node dep_nid was added (present=True) or is about to be removed
+        (present=False). dep_node is the NodeTuple of dep_nid in question.
+
+        The node is moved once by :meth:`SubgraphUpdater.reindex_deferred`,
+        so that adding or removing the k vertices of a polygon costs O(k)
+        rather than O(k²).
+        """
+        key = (self, nid)
+        if key not in sgu.spatial_deferred:
+            # Extent at which the node is stored, i.e. before this change:
+            override = {dep_nid: None} if present else {}
+            sgu.spatial_deferred[key] = self.extent(sgu, node, nid, override)
+
+    def reindex_deferred(self, sgu: 'SubgraphUpdater', nid, stored_entry):
+        """Moves node (nid) from stored_entry to its current extent."""
+        new = self.extent(sgu, sgu.nodes[nid], nid, {})
+        if new == stored_entry:
+            return
+        self.entry_remove(sgu, stored_entry, nid)
+        self.entry_add(sgu, new, nid)
+
+    def query(self, partition, region: tuple) -> SpatialQuery:
+        """
+        Returns SpatialQuery object for all nodes of the given partition
+        whose extent intersects or touches region (lx, ly, ux, uy).
+        """
+        if isinstance(partition, Node):
+            partition = partition.nid
+        return SpatialQuery(self, partition, tuple(region))
+
+    def search(self, state, partition, region: tuple) -> list[int]:
+        """Runs the region query on state (Subgraph or SubgraphUpdater)
+        and returns the matching nids in ascending order."""
+        if isinstance(state, SubgraphUpdater):
+            state.reindex_deferred()
+        index = state.index
+        nodes = state.nodes
+        qlx, qly, qux, quy = region
+        candidates = set()
+        try:
+            levels = index[IndexKey(self, (partition,))]
+        except KeyError:
+            levels = ()
+        for level in levels:
+            shift = self.cell_bits + level
+            gx_range = range(qlx >> shift, (qux >> shift) + 1)
+            gy_range = range(qly >> shift, (quy >> shift) + 1)
+            level_cells = index[IndexKey(self, (partition, level))]
+            if len(gx_range) * len(gy_range) > len(level_cells):
+                # Fewer non-empty cells than cells in region at this level:
+                cells = [(gx, gy) for gx, gy in level_cells
+                    if gx in gx_range and gy in gy_range]
+            else:
+                cells = [(gx, gy) for gx in gx_range for gy in gy_range]
+            for gx, gy in cells:
+                try:
+                    candidates.update(index[IndexKey(self, (partition, level, gx, gy))])
+                except KeyError:
+                    pass
+
+        ret = []
+        for nid in sorted(candidates):
+            _, (lx, ly, ux, uy) = self.extent(state, nodes[nid], nid, {})
+            if lx <= qux and qlx <= ux and ly <= quy and qly <= uy:
+                ret.append(nid)
+        return ret
+
+@public
+class SpatialIndexDependency(GenericIndex):
+    """
+    Keeps the :class:`SpatialIndex` of a referenced node up to date when
+    a node that contributes to its extent changes, e.g. a vertex of a
+    polygon. Register it with the ref attribute and all attributes that
+    affect the referenced node's extent (see :meth:`track`). Referenced
+    nodes without SpatialIndex are ignored.
+
+    Args:
+        ref: LocalRef attribute pointing to the node whose extent depends
+            on this node.
+    """
+    def __init__(self, ref: LocalRef):
+        self.ref = ref
+
+    def track(self, *attrs: Attr) -> 'SpatialIndexDependency':
+        """Registers the dependency with attributes. Returns self."""
+        for attr in attrs:
+            attr.indices.append(self)
+        return self
+
+    def propagate(self, sgu: 'SubgraphUpdater', node, nid, present: bool):
+        owner_nid = node[node._attrdesc_by_attr[self.ref].index]
+        try:
+            owner = sgu.nodes[owner_nid]
+        except KeyError:
+            # Owner not (yet) present: it picks up this node when it is added.
+            return
+        for idx in owner.indices:
+            if isinstance(idx, SpatialIndex):
+                idx.reindex(sgu, owner, owner_nid, nid, node, present)
+
+    def index_add(self, sgu: 'SubgraphUpdater', node, nid):
+        self.propagate(sgu, node, nid, True)
+
+    def index_remove(self, sgu: 'SubgraphUpdater', node, nid):
+        self.propagate(sgu, node, nid, False)
+
+    def check_constraints(self, sgu: 'SubgraphUpdater', node, nid):
+        pass
+
 @public
 class NodeTuple(tuple):
     """
@@ -1200,7 +1425,7 @@ class SubgraphRoot(NonLeafNode):
 class SubgraphQueryMixin:
     __slots__ = ()
 
-    def all(self, query: IndexQuery, wrap_cursor: bool = True) -> Iterable[Node|int]:
+    def all(self, query: IndexQuery|SpatialQuery, wrap_cursor: bool = True) -> Iterable[Node|int]:
         """
         Run query and return all matching nodes.
 
@@ -1211,6 +1436,12 @@ class SubgraphQueryMixin:
         if isinstance(query, type):
             assert issubclass(query, Node)
             query = NodeTuple.index_ntype.query(query.Tuple)
+        if isinstance(query, SpatialQuery):
+            nids = query.index.search(self, query.partition, query.region)
+            if wrap_cursor:
+                return (self.cursor_at(nid) for nid in nids)
+            else:
+                return nids
         try:
             nids = self.index[query.index_key]
         except KeyError:
@@ -1280,6 +1511,7 @@ class SubgraphUpdater(SubgraphQueryMixin):
         'valid',
         'nid_gen_counter',
         'nid_max_encountered',
+        'spatial_deferred',
     )
 
     def __init__(self, target_subgraph: 'Subgraph'):
@@ -1296,6 +1528,9 @@ class SubgraphUpdater(SubgraphQueryMixin):
         self.commit = True
         self.check_nids = {} # used as ordered set
         self.removed_nids = {} # used as ordered set
+        # (SpatialIndex, nid) -> entry at which nid is stored, for nodes whose
+        # extent changed through a SpatialIndexDependency:
+        self.spatial_deferred = {}
         self.valid = True
         return self
 
@@ -1304,6 +1539,7 @@ class SubgraphUpdater(SubgraphQueryMixin):
             self.commit = False
         if self.commit:
             try:
+                self.reindex_deferred()
                 nodes = self.txn.nodes
                 if 0 not in nodes:
                     raise ModelViolation("Missing root node (nid 0).")
@@ -1331,6 +1567,15 @@ class SubgraphUpdater(SubgraphQueryMixin):
 
         self.valid = False
 
+    def reindex_deferred(self):
+        """
+        Moves the nodes marked by :meth:`SpatialIndex.reindex` to their
+        current extent. Runs on commit and before region queries.
+        """
+        while self.spatial_deferred:
+            (index, nid), stored_entry = self.spatial_deferred.popitem()
+            index.reindex_deferred(self, nid, stored_entry)
+
     @property
     def nodes(self):
         """Uncommitted node state of the transaction."""
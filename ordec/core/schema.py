@@ -147,7 +147,9 @@ class MixinRenderable:
         return self.render().svg().decode('ascii'), {'isolated': False}
 
     def webdata(self):
-        return self.render().webdata()
+        # Symbols are shared via <defs> / <use> to keep the transfer small.
+        # The web viewer does not need indentation.
+        return self.render(symbol_defs=True, backend='stream', indent=False).webdata()
 
 
 @public
@@ -1514,6 +1516,64 @@ class Layout(SubgraphRoot):
         #from ..render import render
         #return render(self).webdata()
 
+    def webtiles(self, level: int, tiles: list) -> list[dict]:
+        """Returns tiles of the tiled web viewer data (see webdata())."""
+        from ..layout.webdata import webtiles
+        return webtiles(self, level, tiles)
+
+    def shapes_in(self, region: Rect4I, layer: 'Layer') -> Iterable[Node]:
+        """
+        Returns all LayoutRect, LayoutPoly, LayoutPath and LayoutLabel nodes
+        on the given layer whose bounding box intersects or touches region,
+        ordered by nid. Instances are not looked into; flatten first if needed.
+
+        The bounding box of a LayoutPath includes its width and end
+        extensions (conservatively, in all directions).
+        """
+        return self.all(layout_shape_idx.query(layer, region))
+
+def _layout_shape_extent(state, node, nid, override):
+    """Extent function of :data:`layout_shape_idx`."""
+    layer = node.layer
+    if layer is None:
+        return None
+    if isinstance(node, LayoutRect.Tuple):
+        rect = node.rect
+        if rect is None:
+            return None
+        return layer, tuple(rect)
+    if isinstance(node, LayoutLabel.Tuple):
+        pos = node.pos
+        if pos is None:
+            return None
+        return layer, (pos.x, pos.y, pos.x, pos.y)
+
+    # LayoutPoly / LayoutPath: extent of the vertices.
+    try:
+        vertex_nids = set(state.index[PolyVec2I.ref_idx.query(nid).index_key])
+    except KeyError:
+        vertex_nids = set()
+    vertex_nids.update(override)
+    xs = []
+    ys = []
+    for vertex_nid in vertex_nids:
+        vertex = override[vertex_nid] if vertex_nid in override else state.nodes[vertex_nid]
+        if vertex is None or vertex.pos is None:
+            continue
+        xs.append(vertex.pos.x)
+        ys.append(vertex.pos.y)
+    if not xs:
+        return None
+    pad = 0
+    if isinstance(node, LayoutPath.Tuple):
+        pad = max((node.width or 0) // 2, node.ext_bgn or 0, node.ext_end or 0)
+    return layer, (min(xs) - pad, min(ys) - pad, max(xs) + pad, max(ys) + pad)
+
+#: Spatial index of all shapes (and labels) of a Layout subgraph, partitioned
+#: by layer. Query it through :meth:`Layout.shapes_in` or
+#: ``layout.all(layout_shape_idx.query(layer, region))``.
+layout_shape_idx = SpatialIndex(extent=_layout_shape_extent)
+
 @public
 class LayoutLabel(Node):
     """
@@ -1527,6 +1587,8 @@ class LayoutLabel(Node):
         placeholder=Vec2LinearTerm)
     text = Attr(str)
 
+    shape_idx = layout_shape_idx.track(layer, pos)
+
 @public
 class LayoutPoly(GenericPolyI, MixinClosedPolygon, MixinLayoutPinnable):
     """
@@ -1541,6 +1603,8 @@ class LayoutPoly(GenericPolyI, MixinClosedPolygon, MixinLayoutPinnable):
 
     layer = ExternalRef(Layer, of_subgraph=lambda c: c.root.ref_layers)
 
+    shape_idx = layout_shape_idx.track(layer)
+
 class LayoutPathBase(GenericPolyI):
     endtype = Attr(PathEndType, default=PathEndType.Flush, optional=False)
     ext_bgn = Attr(int) #: Mandatory if endtype is PathEndType.Custom, else ignored.
@@ -1548,6 +1612,8 @@ class LayoutPathBase(GenericPolyI):
     width = Attr(int)
     layer = ExternalRef(Layer, of_subgraph=lambda c: c.root.ref_layers, optional=False)
 
+    shape_idx = layout_shape_idx.track(ext_bgn, ext_end, width, layer)
+
     def __new__(cls, *args, **kwargs):
         if (kwargs.get('ext_bgn') is not None) or (kwargs.get('ext_end') is not None):
             try:
@@ -1574,6 +1640,8 @@ class LayoutRect(Node, MixinLayoutPinnable):
     rect = ConstrainableAttr(Rect4I, factory=coerce_tuple(Rect4I, 4),
         placeholder=Rect4LinearTerm)
 
+    shape_idx = layout_shape_idx.track(layer, rect)
+
     # Delegate Rect4Generic properties:
     lx = _rect_proxy('lx')
     ly = _rect_proxy('ly')
@@ -1810,6 +1878,8 @@ class PolyVec2I(Node):
         placeholder=Vec2LinearTerm)
 
     ref_idx = Index(ref, sortkey=lambda node: node.order)
+    #: Keeps layout_shape_idx of the referenced LayoutPoly/LayoutPath current.
+    ref_shape_idx = SpatialIndexDependency(ref).track(ref, pos)
 
 GenericPolyR.vertex_cls = PolyVec2R
 GenericPolyI.vertex_cls = PolyVec2I
@@ -3,7 +3,6 @@
 
 import logging
 
-from .layout.gds_in import gds_discover
 from .core import *
 from public import public
 
@@ -24,6 +23,7 @@ class ExtLibrary:
 
     def read_gds(self, gds_fn: str, layers: LayerStack):
         """TODO: Document me"""
+        from .layout.gds_in import gds_discover
         layout_funcs_add, frame_funcs_add = gds_discover(gds_fn, layers, self)
         for name in layout_funcs_add.keys():
             if name in self.layout_funcs:
@@ -5,7 +5,7 @@ import sys
 import os
 from importlib.abc import Loader, MetaPathFinder
 from importlib.util import spec_from_loader
-from .language import compile_ord
+from .language import compile_ord, ord_cache_path
 
 # For related examples, see:
 # - https://python.plainenglish.io/metapathfinders-or-how-to-change-python-import-behavior-a1cf3b5a13ec
@@ -24,7 +24,8 @@ class OrdLoader(Loader):
 
     def exec_module(self, module):
         module.__dict__['__file__'] = self.ord_path
-        code = compile_ord(self.source_text, module.__dict__, self.ord_path)
+        code = compile_ord(self.source_text, module.__dict__, self.ord_path,
+            cache_path=ord_cache_path(self.ord_path))
         exec(code, module.__dict__, module.__dict__)
 
 class OrdMetaPathFinder(MetaPathFinder):
@@ -4,9 +4,11 @@
 """
 Execution of view-generation jobs.
 
-A job runner is a stateless execution policy: it owns nothing beyond its
-concurrency limit; every job is a freestanding :class:`Job` whose lifecycle
-the caller tracks. Two implementations:
+A job runner is an execution policy: it owns nothing beyond its
+concurrency limit and the count of jobs it has not finished yet; every job
+is a freestanding :class:`Job` whose lifecycle the caller tracks.
+Background jobs (speculative work, see submit()) only use otherwise idle
+slots and give way to regular jobs. Two implementations:
 
 - :class:`InlineJobRunner`: runs the job synchronously in submit().
   No threads, no cancellation. Trivially-correct reference, also useful
@@ -68,13 +70,29 @@ class Job:
         self._thread = None
 
 class JobRunner(ABC):
+    #: Whether submit() returns before the job has finished.
+    runs_in_background = False
+
     @abstractmethod
-    def submit(self, fn, on_progress=None, on_done=None) -> Job:
-        """Execute fn as a job; returns the Job handle."""
+    def submit(self, fn, on_progress=None, on_done=None, background=False) -> Job:
+        """
+        Execute fn as a job; returns the Job handle. A background job may
+        be cancelled to make room for a later regular job.
+        """
 
     def cancel(self, job: Job):
         """Request cancellation of a job. Default: not supported (no-op)."""
 
+    def idle(self) -> bool:
+        """
+        Whether a job submitted now would start right away. Default: False
+        (no background jobs are worth submitting).
+        """
+        return False
+
+    def promote(self, job: Job):
+        """Turns a background job into a regular one. Default: no-op."""
+
 def _noop_on_done(job, result, cancelled):
     pass
 
@@ -83,7 +101,7 @@ class InlineJobRunner(JobRunner):
     Runs each job synchronously inside submit(). Progress reporting works
     (delivered inline); cancellation is not possible.
     """
-    def submit(self, fn, on_progress=None, on_done=None) -> Job:
+    def submit(self, fn, on_progress=None, on_done=None, background=False) -> Job:
         job = Job(fn, on_progress, on_done or _noop_on_done)
         job.state = JobState.RUNNING
         result = None
@@ -118,21 +136,51 @@ def _async_raise(thread: threading.Thread, exc_type) -> bool:
 class ThreadedJobRunner(JobRunner):
     """
     Runs jobs on fresh daemon threads, at most max_jobs concurrently
-    (excess jobs wait their turn on a semaphore).
+    (excess jobs wait their turn on a semaphore). A regular job submitted
+    while all slots are taken cancels the most recent background job.
     """
+    runs_in_background = True
+
     # Cancellation ladder timeouts; class attributes so tests can shorten them.
     cooperative_timeout = 2.0
     async_exc_timeout = 3.0
 
     def __init__(self, max_jobs: int):
+        self.max_jobs = max_jobs
         self.sem = threading.Semaphore(max_jobs)
+        # Number of submitted jobs whose threads have not released their
+        # slot yet, and the background jobs among them in submission
+        # order (dict as ordered set), both guarded by _jobs_lock:
+        self._jobs_lock = threading.Lock()
+        self._unfinished = 0
+        self._background = {}
 
-    def submit(self, fn, on_progress=None, on_done=None) -> Job:
+    def submit(self, fn, on_progress=None, on_done=None, background=False) -> Job:
         job = Job(fn, on_progress, on_done or _noop_on_done)
         job._thread = threading.Thread(target=self._runner, args=(job,), daemon=True)
+        victim = None
+        with self._jobs_lock:
+            self._unfinished += 1
+            if background:
+                self._background[job] = True
+            elif self._unfinished > self.max_jobs and self._background:
+                victim = next(reversed(self._background))
+                del self._background[victim]
+        if victim is not None:
+            # Cancelling may block for a while, submit must not wait:
+            threading.Thread(target=self.cancel, args=(victim,),
+                daemon=True).start()
         job._thread.start()
         return job
 
+    def idle(self) -> bool:
+        with self._jobs_lock:
+            return self._unfinished < self.max_jobs
+
+    def promote(self, job):
+        with self._jobs_lock:
+            self._background.pop(job, None)
+
     def _runner(self, job):
         self.sem.acquire()
         try:
@@ -155,9 +203,14 @@ class ThreadedJobRunner(JobRunner):
                 if job.state != JobState.RUNNING:
                     return  # canceller gave up on us and already delivered
                 job.state = JobState.CANCELLED if cancelled else JobState.DONE
-            job.on_done(job, result, cancelled)
         finally:
+            # Released before on_done, so that on_done sees the slot as
+            # idle (see idle) when it submits follow-up work.
+            with self._jobs_lock:
+                self._unfinished -= 1
+                self._background.pop(job, None)
             self.sem.release()
+        job.on_done(job, result, cancelled)
 
     def cancel(self, job):
         """
@@ -4,11 +4,32 @@
 
 # standard imports
 import ast
+import hashlib
 import importlib
+import marshal
+import os
+import sys
+import threading
+from collections import OrderedDict
+from importlib.util import cache_from_source
+from pathlib import Path
 
 # ordec imports
 from .ord import ord_to_py
 
+# Number of compiled ORD sources kept in memory (e.g. for re-imports and for
+# web editor sources that are sent again unchanged).
+COMPILE_CACHE_SIZE = 64
+
+# Files of the ORD-to-Python translation; cached results are invalidated when
+# any of them changes.
+_TRANSLATOR_FILES = ('ord.lark', 'parser.py', 'ord_transformer.py',
+    'python_transformer.py')
+
+_compiled = OrderedDict()
+_compiled_lock = threading.Lock()
+_translator_hash = None
+
 
 def prepare_ord_globals(g: dict):
     """Populate g with the implicit globals that ORD-generated code expects."""
@@ -16,14 +37,98 @@ def prepare_ord_globals(g: dict):
     g.setdefault("__ord_context__", importlib.import_module("ordec.ord.context"))
 
 
-def compile_ord(source_data: str, g: dict, filename: str = "<string>"):
-    """Compile ORD source, prepare globals, return compiled code object."""
-    prepare_ord_globals(g)
+def translator_hash() -> bytes:
+    """Hash of the ORDeC version and the ORD grammar and transformer sources."""
+    global _translator_hash
+    if _translator_hash is None:
+        from .version import version
+        h = hashlib.sha256(version.encode())
+        ord_dir = Path(__file__).parent / "ord"
+        for name in _TRANSLATOR_FILES:
+            h.update(b"\0" + (ord_dir / name).read_bytes())
+        _translator_hash = h.digest()
+    return _translator_hash
+
+
+def ord_cache_path(ord_path: str) -> str | None:
+    """
+    Path of the file in which the compiled form of the .ord file at ord_path
+    is cached: foo.ord.<cache tag>.ordc in the __pycache__ directory next to
+    it, or below sys.pycache_prefix if set. Returns None if the Python
+    implementation does not support caching.
+    """
     try:
-        module = ord_to_py(source_data)
-    except SyntaxError as e:
-        if e.filename is None:
-            e.msg = f"In {filename}:\n{e.msg}"
-        raise
-    g["__ord_py_source__"] = ast.unparse(module)
-    return compile(module, filename, "exec")
+        pyc_path = cache_from_source(ord_path + ".py")
+    except NotImplementedError:
+        return None
+    return os.path.splitext(pyc_path)[0] + ".ordc"
+
+
+def _read_cache(cache_path: str, key: bytes):
+    try:
+        with open(cache_path, "rb") as f:
+            cached_key, py_source, code = marshal.load(f)
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+    if cached_key != key:
+        return None
+    return py_source, code
+
+
+def _write_cache(cache_path: str, key: bytes, py_source: str, code):
+    if sys.dont_write_bytecode:
+        return
+    # Write atomically, so that concurrent readers never see partial files:
+    tmp_path = f"{cache_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        with open(tmp_path, "wb") as f:
+            marshal.dump((key, py_source, code), f)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        # Like Python's own bytecode cache, an unwritable cache is no error.
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+
+
+def compile_ord(source_data: str, g: dict, filename: str = "<string>",
+        cache_path: str = None):
+    """
+    Compile ORD source, prepare globals, return compiled code object.
+
+    The results are kept in memory, keyed by source, filename and
+    translator_hash(). If cache_path is given (see ord_cache_path()), they
+    are also cached in that file across runs.
+    """
+    prepare_ord_globals(g)
+    key = hashlib.sha256(b"\0".join((translator_hash(),
+        filename.encode("utf-8", "surrogatepass"),
+        source_data.encode("utf-8", "surrogatepass")))).digest()
+
+    with _compiled_lock:
+        compiled = _compiled.get(key)
+        if compiled is not None:
+            _compiled.move_to_end(key)
+    if compiled is None and cache_path is not None:
+        compiled = _read_cache(cache_path, key)
+    if compiled is None:
+        try:
+            module = ord_to_py(source_data)
+        except SyntaxError as e:
+            if e.filename is None:
+                e.msg = f"In {filename}:\n{e.msg}"
+            raise
+        compiled = ast.unparse(module), compile(module, filename, "exec")
+        if cache_path is not None:
+            _write_cache(cache_path, key, *compiled)
+
+    with _compiled_lock:
+        _compiled[key] = compiled
+        while len(_compiled) > COMPILE_CACHE_SIZE:
+            _compiled.popitem(last=False)
+
+    py_source, code = compiled
+    g["__ord_py_source__"] = py_source
+    return code
@@ -0,0 +1,120 @@
+# SPDX-FileCopyrightText: 2026 ORDeC contributors
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Lark LALR parsers that are built on first use, with their parse tables
+cached on disk.
+
+Analyzing a grammar is slow (seconds for the ORD grammar), while loading the
+resulting tables is fast. LazyLark therefore defers building the parser
+until it is first used and keeps the serialized parser in the __pycache__
+directory next to the grammar file, like Python's bytecode cache. The cache
+is keyed by a hash of the grammar, the parser options and the Lark and
+Python versions.
+"""
+
+import hashlib
+import importlib
+import os
+import pickle
+import sys
+import threading
+from importlib.util import cache_from_source
+
+import lark
+from lark import Lark
+from public import public
+
+
+def grammar_cache_path(grammar_path: str) -> str | None:
+    """
+    Path of the parser cache file for the grammar file at grammar_path:
+    foo.lark.<cache tag>.larkc in the __pycache__ directory next to it, or
+    below sys.pycache_prefix if set. Returns None if the Python
+    implementation does not support caching.
+    """
+    try:
+        pyc_path = cache_from_source(grammar_path + ".py")
+    except NotImplementedError:
+        return None
+    return os.path.splitext(pyc_path)[0] + ".larkc"
+
+
+@public
+class LazyLark:
+    """
+    Stand-in for Lark.open_from_package(package, grammar_name, **options)
+    for LALR parsers (options must include parser="lalr"). The parser is
+    built (or loaded from the cache) when parse() or lark() is first called.
+    """
+
+    def __init__(self, package: str, grammar_name: str, **options):
+        self.package = package
+        self.grammar_name = grammar_name
+        self.options = options
+        self._lark = None
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.package!r}, {self.grammar_name!r})"
+
+    def grammar_path(self) -> str:
+        return os.path.join(os.path.dirname(importlib.import_module(self.package).__file__),
+            self.grammar_name)
+
+    def cache_key(self, grammar: bytes) -> bytes:
+        options = sorted((name, type(value).__qualname__ if name == "postlex" else repr(value))
+            for name, value in self.options.items())
+        h = hashlib.sha256(grammar)
+        h.update(repr((options, lark.__version__, sys.version_info[:2])).encode())
+        return h.hexdigest().encode()
+
+    def lark(self) -> Lark:
+        """Returns the Lark parser, building it if necessary."""
+        if self._lark is None:
+            with self._lock:
+                if self._lark is None:
+                    self._lark = self._load_or_build()
+        return self._lark
+
+    def parse(self, text: str, *args, **kwargs):
+        """See Lark.parse()."""
+        return self.lark().parse(text, *args, **kwargs)
+
+    def _load_or_build(self) -> Lark:
+        grammar_path = self.grammar_path()
+        cache_path = grammar_cache_path(grammar_path)
+        if cache_path is None:
+            return self._build()
+        with open(grammar_path, "rb") as f:
+            key = self.cache_key(f.read())
+
+        try:
+            with open(cache_path, "rb") as f:
+                if f.readline().rstrip(b"\n") == key:
+                    return Lark.load(f)
+        except Exception:
+            # Missing, unreadable or corrupt cache files are rebuilt below.
+            pass
+
+        parser = self._build()
+        if not sys.dont_write_bytecode:
+            # Write atomically, so that concurrent readers never see partial
+            # files:
+            tmp_path = f"{cache_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            try:
+                os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+                with open(tmp_path, "wb") as f:
+                    f.write(key + b"\n")
+                    parser.save(f)
+                os.replace(tmp_path, cache_path)
+            except (OSError, pickle.PicklingError):
+                try:
+                    os.unlink(tmp_path)
+                except OSError:
+                    pass
+        return parser
+
+    def _build(self) -> Lark:
+        return Lark.open_from_package(self.package, self.grammar_name,
+            **self.options)
@@ -3,22 +3,48 @@
 
 from .helpers import *
 from .makevias import *
-from .gds_out import *
-from .srouter import SRouter, SRouterException
+
+# Less frequently used parts (and their dependencies, e.g. python-gdsii for
+# gds_out) are imported on first access:
+_LAZY_ATTRS = {
+    'write_gds': 'gds_out',
+    'gds_text': 'gds_out',
+    'layout_diff': 'diff',
+    'LayoutDiff': 'diff',
+    'DiffShape': 'diff',
+    'SRouter': 'srouter',
+    'SRouterException': 'srouter',
+}
+
+def __getattr__(name):
+    try:
+        module = _LAZY_ATTRS[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+    from importlib import import_module
+    value = getattr(import_module(f'.{module}', __name__), name)
+    globals()[name] = value
+    return value
 
 # Without __all__, Sphinx does not document the imported stuff.
 __all__ = [
     'makevias',
     'poly_orientation',
     'expand_paths',
+    'paths_to_poly_vertices',
     'expand_rects',
     'expand_geom',
     'expand_pins',
+    'pin_shape',
+    'rect_vertices',
     'flatten',
     'expand_instancearrays',
     'write_gds',
     'gds_text',
     'compare',
+    'layout_diff',
+    'LayoutDiff',
+    'DiffShape',
     'SRouter',
     'SRouterException',
 ]
@@ -0,0 +1,403 @@
+# SPDX-FileCopyrightText: 2026 ORDeC contributors
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Geometric diff of two layouts.
+
+Both layouts are reduced to multisets of normalized flat shapes (polygons,
+labels and pins, see :class:`DiffShape`). Shapes are hashed, so the shapes
+only present in one layout are found in linear time. Remaining shapes of both
+sides are then paired up through a spatial hash per layer: a removed and an
+added shape whose bounding boxes overlap are reported as changed.
+"""
+
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import NamedTuple
+import numpy as np
+from public import public
+
+from ..core import *
+from .helpers import check_ref_layers, _path_arrays, _path_outlines
+
+@public
+class DiffShape(NamedTuple):
+    """
+    Normalized shape of a flattened layout, as compared by
+    :func:`layout_diff`. Polygons are rotated so that the lexicographically
+    smallest vertex is first.
+    """
+    kind: str #: 'poly', 'label' or 'pin'
+    layer: int #: nid of the shape's layer in the layout's ref_layers
+    vertices: tuple #: ((x, y), ...); a single vertex for labels
+    text: str = None #: Label text (labels only)
+    pin: int = None #: nid of the symbol Pin (pins only)
+
+    def bbox(self) -> tuple[int, int, int, int]:
+        xs = [v[0] for v in self.vertices]
+        ys = [v[1] for v in self.vertices]
+        return min(xs), min(ys), max(xs), max(ys)
+
+def _transform(xy: np.ndarray, tran: TD4I) -> np.ndarray:
+    d4v = tran.d4.value
+    if d4v.flipxy:
+        xy = xy[:, ::-1]
+    sign = np.array((-1 if d4v.negx else 1, -1 if d4v.negy else 1), dtype=np.int64)
+    return xy * sign + np.array((tran.transl.x, tran.transl.y), dtype=np.int64)
+
+def _normalized(counts: np.ndarray, xy: np.ndarray, reverse: bool) -> list[tuple]:
+    """
+    Vertex tuples of the concatenated polygons (counts, xy), each reversed
+    if requested and rotated to start at its smallest vertex.
+    """
+    if len(counts) == 0:
+        return []
+    starts = np.cumsum(counts) - counts
+    poly_of = np.repeat(np.arange(len(counts)), counts)
+    local = np.arange(len(xy)) - starts[poly_of]
+    if reverse:
+        # Keep CCW orientation under mirroring, like flatten() does.
+        xy = xy[starts[poly_of] + counts[poly_of] - 1 - local]
+    order = np.lexsort((xy[:, 1], xy[:, 0], poly_of))
+    nonempty = counts > 0
+    shift = np.zeros_like(counts)
+    shift[nonempty] = order[starts[nonempty]] - starts[nonempty]
+    xy = xy[starts[poly_of] + (local + shift[poly_of]) % counts[poly_of]]
+
+    pairs = list(map(tuple, xy.tolist()))
+    ret = []
+    for start, count in zip(starts.tolist(), counts.tolist()):
+        ret.append(tuple(pairs[start:start+count]))
+    return ret
+
+class _CellShapes:
+    """Polygon outlines and labels of one layout in its own coordinates."""
+
+    def __init__(self, layout: Layout):
+        subgraph = layout.subgraph
+        nodes = subgraph.nodes
+        index = subgraph.index
+
+        nids = []
+        layers = []
+        counts = []
+        coords = []
+        paths = []
+        self.labels = []
+        for nid, node in nodes.items():
+            ntype = type(node)
+            if ntype is LayoutPoly.Tuple:
+                try:
+                    vertex_nids = index[PolyVec2I.ref_idx.query(nid).index_key]
+                except KeyError:
+                    vertex_nids = ()
+                nids.append(nid)
+                layers.append(node.layer)
+                counts.append(len(vertex_nids))
+                for vertex_nid in vertex_nids:
+                    coords.extend(nodes[vertex_nid].pos)
+            elif ntype is LayoutRect.Tuple:
+                r = node.rect
+                nids.append(nid)
+                layers.append(node.layer)
+                counts.append(4)
+                coords.extend((r.lx, r.ly, r.ux, r.ly, r.ux, r.uy, r.lx, r.uy))
+            elif ntype is LayoutPath.Tuple:
+                paths.append((subgraph, nid, node))
+            elif ntype is LayoutLabel.Tuple:
+                self.labels.append((node.layer, node.pos.x, node.pos.y, node.text))
+
+        counts = np.array(counts, dtype=np.int64)
+        xy = np.array(coords, dtype=np.int64).reshape(-1, 2)
+        if paths:
+            path_counts, path_xy, halfwidth, ext_bgn, ext_end, _ = _path_arrays(paths)
+            out_counts, out_xy = _path_outlines(path_counts, path_xy, halfwidth, ext_bgn, ext_end)
+            nids.extend(nid for _, nid, _ in paths)
+            layers.extend(node.layer for _, _, node in paths)
+            counts = np.concatenate((counts, out_counts))
+            xy = np.concatenate((xy, out_xy))
+        self.nids = nids
+        self.layers = layers
+        self.counts = counts
+        self.xy = xy
+        self.label_xy = np.array([(x, y) for _, x, y, _ in self.labels],
+            dtype=np.int64).reshape(-1, 2)
+
+        self.instances = list(layout.all(LayoutInstance))
+        self.instance_arrays = list(layout.all(LayoutInstanceArray))
+
+def _flat_shapes(layout: Layout) -> Counter:
+    """
+    Multiset of the DiffShapes of the layout after flatten(), expand_geom()
+    and with the remaining (top-level) LayoutPins. The hierarchy is traversed
+    read-only: each cell is expanded once and then only transformed per
+    instance.
+    """
+    cells = {}
+    shapes = Counter()
+
+    def cell_shapes(cell: Layout) -> _CellShapes:
+        try:
+            return cells[cell.subgraph]
+        except KeyError:
+            ret = cells[cell.subgraph] = _CellShapes(cell)
+            return ret
+
+    def visit(cell: Layout, tran: TD4I):
+        data = cell_shapes(cell)
+        xy = _transform(data.xy, tran)
+        for layer, vertices in zip(data.layers, _normalized(data.counts, xy, tran.det() < 0)):
+            shapes[DiffShape('poly', layer, vertices)] += 1
+        label_xy = _transform(data.label_xy, tran).tolist()
+        for (layer, _, _, text), pos in zip(data.labels, label_xy):
+            shapes[DiffShape('label', layer, (tuple(pos),), text=text)] += 1
+
+        for inst in data.instances:
+            check_ref_layers(layout, inst)
+            visit(inst.ref, tran * inst.loc_transform())
+        for ainst in data.instance_arrays:
+            check_ref_layers(layout, ainst)
+            for col in range(ainst.cols):
+                for row in range(ainst.rows):
+                    visit(ainst.ref, tran
+                        * (col*ainst.vec_col).transl()
+                        * (row*ainst.vec_row).transl()
+                        * ainst.loc_transform())
+
+    visit(layout, TD4I())
+
+    nodes = layout.subgraph.nodes
+    shape_vertices = None
+    for pin in layout.all(LayoutPin, wrap_cursor=False):
+        pin = nodes[pin]
+        if shape_vertices is None:
+            # nid -> normalized outline of the top-level shapes:
+            top = cell_shapes(layout)
+            shape_vertices = dict(zip(top.nids, _normalized(top.counts, top.xy, False)))
+        shapes[DiffShape('pin', nodes[pin.ref].layer, shape_vertices[pin.ref],
+            pin=pin.pin)] += 1
+
+    return shapes
+
+def _overlap(a: tuple, b: tuple) -> int | None:
+    """Overlap area of two boxes, or None if they neither overlap nor touch."""
+    w = min(a[2], b[2]) - max(a[0], b[0])
+    h = min(a[3], b[3]) - max(a[1], b[1])
+    if w < 0 or h < 0:
+        return None
+    return w * h
+
+def _pair_changed(removed: list[DiffShape], added: list[DiffShape]):
+    """
+    Pairs removed and added shapes of the same kind and layer whose bounding
+    boxes overlap or touch, using a spatial hash of the added shapes per
+    (kind, layer). Each removed shape is paired with the added shape of
+    largest overlap. Returns (changed, removed_rest, added_rest).
+    """
+    # Shapes covering more cells than this are kept in a separate list that
+    # every query checks, instead of being entered into all their cells.
+    max_cells = 16
+
+    groups = {}
+    for shape in added:
+        groups.setdefault((shape.kind, shape.layer), []).append(shape)
+
+    changed = []
+    removed_rest = []
+    paired = set()
+    grids = {}
+    for shape_a in removed:
+        group = groups.get((shape_a.kind, shape_a.layer))
+        if not group:
+            removed_rest.append(shape_a)
+            continue
+
+        try:
+            shift, grid, large, boxes = grids[shape_a.kind, shape_a.layer]
+        except KeyError:
+            boxes = [shape.bbox() for shape in group]
+            sizes = sorted(max(ux - lx, uy - ly, 1) for lx, ly, ux, uy in boxes)
+            # Cells about as large as the median shape:
+            shift = (sizes[len(sizes)//2] - 1).bit_length()
+            grid = {}
+            large = []
+            for i, (lx, ly, ux, uy) in enumerate(boxes):
+                xs = range(lx >> shift, (ux >> shift) + 1)
+                ys = range(ly >> shift, (uy >> shift) + 1)
+                if len(xs) * len(ys) > max_cells:
+                    large.append(i)
+                    continue
+                for gx in xs:
+                    for gy in ys:
+                        grid.setdefault((gx, gy), []).append(i)
+            grids[shape_a.kind, shape_a.layer] = shift, grid, large, boxes
+
+        box_a = shape_a.bbox()
+        lx, ly, ux, uy = box_a
+        xs = range(lx >> shift, (ux >> shift) + 1)
+        ys = range(ly >> shift, (uy >> shift) + 1)
+        if len(xs) * len(ys) > len(group):
+            candidates = range(len(group))
+        else:
+            candidates = set(large)
+            for gx in xs:
+                for gy in ys:
+                    candidates.update(grid.get((gx, gy), ()))
+
+        best = None
+        best_key = None
+        for i in candidates:
+            if (shape_a.kind, shape_a.layer, i) in paired:
+                continue
+            area = _overlap(box_a, boxes[i])
+            if area is None:
+                continue
+            key = (-area, group[i])
+            if best_key is None or key < best_key:
+                best = i
+                best_key = key
+        if best is None:
+            removed_rest.append(shape_a)
+        else:
+            paired.add((shape_a.kind, shape_a.layer, best))
+            changed.append((shape_a, group[best]))
+
+    added_rest = []
+    for (kind, layer), group in groups.items():
+        for i, shape in enumerate(group):
+            if (kind, layer, i) not in paired:
+                added_rest.append(shape)
+    added_rest.sort()
+    return changed, removed_rest, added_rest
+
+@public
+@dataclass
+class LayoutDiff:
+    """
+    Result of :func:`layout_diff`. Shapes are :class:`DiffShape` tuples in
+    flat coordinates of the compared layouts' top cells. A shape occurring
+    n times more often in one layout than in the other is listed n times.
+    """
+    layout_a: Layout
+    layout_b: Layout
+    #: Shapes only in layout_a without overlapping counterpart in layout_b.
+    removed: list[DiffShape] = field(default_factory=list)
+    #: Shapes only in layout_b without overlapping counterpart in layout_a.
+    added: list[DiffShape] = field(default_factory=list)
+    #: (shape of layout_a, shape of layout_b) pairs of the same kind and
+    #: layer that differ, but overlap each other.
+    changed: list[tuple[DiffShape, DiffShape]] = field(default_factory=list)
+
+    def __bool__(self):
+        """True if the layouts differ."""
+        return bool(self.removed or self.added or self.changed)
+
+    def only_a(self) -> list[DiffShape]:
+        """All shapes only in layout_a (removed and changed)."""
+        return sorted(self.removed + [a for a, _ in self.changed])
+
+    def only_b(self) -> list[DiffShape]:
+        """All shapes only in layout_b (added and changed)."""
+        return sorted(self.added + [b for _, b in self.changed])
+
+    def layer_name(self, layer_nid: int) -> str:
+        try:
+            return self.layout_a.ref_layers.subgraph.cursor_at(layer_nid).full_path_str()
+        except Exception:
+            return str(layer_nid)
+
+    def shape_str(self, shape: DiffShape) -> str:
+        layer = self.layer_name(shape.layer)
+        if shape.kind == 'label':
+            return f"layer={layer} pos={shape.vertices[0]} text={shape.text!r}"
+        elif shape.kind == 'pin':
+            return f"pin={shape.pin} layer={layer} verts={shape.vertices}"
+        else:
+            return f"layer={layer} verts={shape.vertices}"
+
+    def summary(self) -> str | None:
+        """
+        Human-readable description of the differences, grouped into
+        polygon, label and pin mismatches. None if there are none.
+        """
+        errors = []
+        for kind, title in (('poly', 'Polygon'), ('label', 'Label'), ('pin', 'Pin')):
+            removed = [s for s in self.removed if s.kind == kind]
+            added = [s for s in self.added if s.kind == kind]
+            changed = [(a, b) for a, b in self.changed if a.kind == kind]
+            if not (removed or added or changed):
+                continue
+            lines = [f"{title} mismatch:"]
+            lines.append(f"  Only in layout_a ({len(removed)}):")
+            lines += [f"    {self.shape_str(s)}" for s in removed]
+            lines.append(f"  Only in layout_b ({len(added)}):")
+            lines += [f"    {self.shape_str(s)}" for s in added]
+            if changed:
+                lines.append(f"  Changed ({len(changed)}):")
+                for a, b in changed:
+                    lines.append(f"    {self.shape_str(a)}")
+                    lines.append(f"      -> {self.shape_str(b)}")
+            errors.append("\n".join(lines) + "\n")
+        if errors:
+            return "\n".join(errors)
+        return None
+
+    def drc_report(self, top_cell_name: str=None) -> DrcReport:
+        """
+        Returns the diff as DrcReport, referencing layout_a. Opened in the web
+        UI, its items highlight the differing shapes in layout_a's layout
+        view like DRC violations. There is one category per kind of change
+        and layer; changed items contain the shape of layout_a (tag 'a')
+        followed by the one of layout_b (tag 'b').
+        """
+        layout_a = self.layout_a
+        if layout_a.subgraph.mutable:
+            layout_a = layout_a.freeze()
+        report = DrcReport(ref_layout=layout_a, top_cell_name=top_cell_name)
+        categories = {}
+
+        def category(change: str, description: str, layer: int) -> DrcCategory:
+            try:
+                return categories[change, layer]
+            except KeyError:
+                cat = categories[change, layer] = report % DrcCategory(
+                    name=f"{change}: {self.layer_name(layer)}",
+                    description=description)
+                return cat
+
+        def add_shape(item: DrcItem, order: int, tag: str, shape: DiffShape):
+            if shape.kind == 'label':
+                report % DrcText(item=item, order=order, tag=tag,
+                    pos=shape.vertices[0], text=shape.text)
+            else:
+                if shape.kind == 'pin':
+                    tag = f"{tag} pin {shape.pin}".strip()
+                report % DrcPoly(item=item, order=order, tag=tag,
+                    vertices=[Vec2I(x, y) for x, y in shape.vertices])
+
+        for shape in self.removed:
+            item = report % DrcItem(category=category('Removed', 'only in layout_a', shape.layer))
+            add_shape(item, 0, '', shape)
+        for shape in self.added:
+            item = report % DrcItem(category=category('Added', 'only in layout_b', shape.layer))
+            add_shape(item, 0, '', shape)
+        for a, b in self.changed:
+            item = report % DrcItem(category=category('Changed', 'differs between layout_a and layout_b', a.layer))
+            add_shape(item, 0, 'a', a)
+            add_shape(item, 1, 'b', b)
+        return report.freeze()
+
+@public
+def layout_diff(layout_a: Layout, layout_b: Layout) -> LayoutDiff:
+    """
+    Compares two layouts for geometric equivalence, like
+    :func:`ordec.layout.compare`, but returns all differences as
+    :class:`LayoutDiff`. ORDB path names, node order and the hierarchy
+    (instances are flattened) are ignored.
+    """
+    shapes_a = _flat_shapes(layout_a)
+    shapes_b = _flat_shapes(layout_b)
+    removed = sorted((shapes_a - shapes_b).elements())
+    added = sorted((shapes_b - shapes_a).elements())
+    changed, removed, added = _pair_changed(removed, added)
+    return LayoutDiff(layout_a, layout_b, removed, added, changed)
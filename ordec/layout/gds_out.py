@@ -2,7 +2,11 @@
 # SPDX-License-Identifier: Apache-2.0
 
 import io
-from typing import IO, Optional
+import itertools
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import IO, NamedTuple, Optional
 from public import public
 from gdsii.library import Library
 from gdsii.structure import Structure
@@ -11,7 +15,7 @@ import gdsii.elements as elements
 from gdsii import types, tags
 
 from ..core import *
-from .helpers import expand_rects, expand_pins
+from .helpers import expand_rects, expand_pins, rect_vertices, pin_shape
 
 def d4_to_gds(d4: D4) -> tuple[float,int]:
     return {
@@ -25,6 +29,103 @@ def d4_to_gds(d4: D4) -> tuple[float,int]:
         D4.MY90: (270.0, (1<<15)),
     }[d4]
 
+def path_to_gds(path) -> tuple[int, int, int]:
+    """Returns path_type, bgn_extn and end_extn of a LayoutPath node."""
+    if path.endtype == PathEndType.Custom:
+        if (path.ext_bgn is None) or (path.ext_end is None):
+            raise ValueError("Encountered path with PathEndType.Custom"
+                " with ext_bgn or ext_end of None.")
+        return 4, path.ext_bgn, path.ext_end
+    elif path.endtype == PathEndType.Flush:
+        return 0, None, None
+    elif path.endtype == PathEndType.Square:
+        return 2, None, None
+    else:
+        raise ValueError(f"Unexpected path.endtype {path.endtype!r}.")
+
+class StrucData(NamedTuple):
+    """
+    Serialized form of a frozen layout, holding only plain Python values.
+    It contains everything needed to generate the layout's GDS structure
+    (see struc_data_to_bytes), with all names and GDS layers already
+    resolved. struc_data_to_bytes emits the elements in the same order as
+    layout_to_struc.
+    """
+    name: str
+    #: (nid, layer, data_type, vertices): Polys have vertices=None (taken
+    #: from vertex_rows), rects and pin shapes have explicit vertex lists.
+    boundaries: list
+    #: (ref nid, order, x, y) of all PolyVec2I nodes.
+    vertex_rows: list
+    #: (nid, layer, text_type, x, y, text)
+    texts: list
+    #: (nid, layer, data_type, width, path_type, bgn_extn, end_extn)
+    paths: list
+    #: (struct_name, xy, angle, strans)
+    srefs: list
+    #: (struct_name, xy, cols, rows, angle, strans)
+    arefs: list
+
+def struc_data_to_bytes(data: StrucData) -> tuple[bytes, bytes]:
+    """
+    Generates the GDS records of one structure from its StrucData.
+    Returns (structure name, records). Runs in worker processes of
+    GdsGenerator.add_layout.
+    """
+    name = data.name.encode('ascii')
+    struc = Structure(name=name)
+
+    vertices_of = {}
+    for ref, order, x, y in sorted(data.vertex_rows):
+        vertices_of.setdefault(ref, []).append((x, y))
+
+    # Boundaries of pins (nid None) come last, as expand_pins adds them:
+    boundaries = sorted((b for b in data.boundaries if b[0] is not None))
+    boundaries += [b for b in data.boundaries if b[0] is None]
+    for nid, layer, data_type, vertices in boundaries:
+        if vertices is None:
+            vertices = list(vertices_of[nid])
+        vertices.append(vertices[0]) # close loop
+        struc.append(elements.Boundary(
+            layer=layer,
+            data_type=data_type,
+            xy=vertices,
+        ))
+    texts = sorted((t for t in data.texts if t[0] is not None))
+    texts += [t for t in data.texts if t[0] is None]
+    for nid, layer, text_type, x, y, text in texts:
+        struc.append(elements.Text(
+            layer=layer,
+            text_type=text_type,
+            xy=[(x, y)],
+            string=text.encode('ascii'),
+        ))
+    for nid, layer, data_type, width, path_type, bgn_extn, end_extn in sorted(data.paths):
+        e = elements.Path(
+            layer=layer,
+            data_type=data_type,
+            xy=vertices_of[nid],
+        )
+        e.width = width
+        e.path_type = path_type
+        if path_type == 4:
+            e.bgn_extn = bgn_extn
+            e.end_extn = end_extn
+        struc.append(e)
+    for struct_name, xy, angle, strans in data.srefs:
+        e = elements.SRef(struct_name=struct_name.encode('ascii'), xy=xy)
+        e.angle, e.strans = angle, strans
+        struc.append(e)
+    for struct_name, xy, cols, rows, angle, strans in data.arefs:
+        e = elements.ARef(struct_name=struct_name.encode('ascii'), xy=xy,
+            cols=cols, rows=rows)
+        e.angle, e.strans = angle, strans
+        struc.append(e)
+
+    buf = io.BytesIO()
+    struc._save(buf)
+    return name, buf.getvalue()
+
 class GdsGenerator:
     def layout_to_struc(self, layout: Layout):
         struc = Structure(name=self.directory.name_subgraph(layout).encode('ascii'))
@@ -64,19 +165,10 @@ class GdsGenerator:
                 xy=path.vertices()
             )
             e.width = path.width
-            if path.endtype == PathEndType.Custom:
-                e.path_type = 4
-                if (path.ext_bgn is None) or (path.ext_end is None):
-                    raise ValueError("Encountered path with PathEndType.Custom"
-                        " with ext_bgn or ext_end of None.")
-                e.bgn_extn = path.ext_bgn
-                e.end_extn = path.ext_end
-            elif path.endtype == PathEndType.Flush:
-                e.path_type = 0
-            elif path.endtype == PathEndType.Square:
-                e.path_type = 2
-            else:
-                raise ValueError(f"Unexpected path.endtype {path.endtype!r}.")
+            e.path_type, bgn_extn, end_extn = path_to_gds(path)
+            if e.path_type == 4:
+                e.bgn_extn = bgn_extn
+                e.end_extn = end_extn
             struc.append(e)
         for inst in layout.all(LayoutInstance):
             layouts_want.add(inst.ref)
@@ -118,6 +210,79 @@ class GdsGenerator:
         self.lib.append(struc)
         return layouts_want
 
+    def layout_to_data(self, layout: Layout) -> StrucData:
+        """
+        Serializes a layout for struc_data_to_bytes. This is the counterpart
+        of layout_to_struc for add_layout with workers: it only collects
+        plain values, leaving the expansion of rects and the generation of
+        GDS elements to the worker processes. Pins (which need the directory
+        for their names) are expanded here.
+        """
+        name = self.directory.name_subgraph(layout)
+
+        if layout.ref_layers != self.layers:
+            raise ValueError(f"ref_layers mismatch during write_gds: {layout.ref_layers!r} != {self.layers!r}")
+
+        gdslayers_shapes = {}
+        gdslayers_text = {}
+        def gdslayer_shapes(layer_nid):
+            try:
+                return gdslayers_shapes[layer_nid]
+            except KeyError:
+                gdslayer = self.layers.subgraph.cursor_at(layer_nid).gdslayer_shapes
+                ret = gdslayers_shapes[layer_nid] = (gdslayer.layer, gdslayer.data_type)
+                return ret
+        def gdslayer_text(layer_nid):
+            try:
+                return gdslayers_text[layer_nid]
+            except KeyError:
+                gdslayer = self.layers.subgraph.cursor_at(layer_nid).gdslayer_text
+                ret = gdslayers_text[layer_nid] = (gdslayer.layer, gdslayer.data_type)
+                return ret
+
+        data = StrucData(name=name, boundaries=[], vertex_rows=[], texts=[],
+            paths=[], srefs=[], arefs=[])
+
+        # Plain shapes are read directly from the NodeTuples. Cursors are
+        # only created for pins and instances below.
+        for nid, node in layout.subgraph.nodes.items():
+            ntype = type(node)
+            if ntype is PolyVec2I.Tuple:
+                data.vertex_rows.append((node.ref, node.order, node.pos.x, node.pos.y))
+            elif ntype is LayoutPoly.Tuple:
+                data.boundaries.append((nid, *gdslayer_shapes(node.layer), None))
+            elif ntype is LayoutRect.Tuple:
+                data.boundaries.append((nid, *gdslayer_shapes(node.layer),
+                    [(v.x, v.y) for v in rect_vertices(node.rect)]))
+            elif ntype is LayoutLabel.Tuple:
+                data.texts.append((nid, *gdslayer_text(node.layer),
+                    node.pos.x, node.pos.y, node.text))
+            elif ntype is LayoutPath.Tuple:
+                data.paths.append((nid, *gdslayer_shapes(node.layer), node.width,
+                    *path_to_gds(node)))
+
+        # Pin shapes as added by expand_pins:
+        for pin in layout.all(LayoutPin):
+            pinlayer, vertices, pos = pin_shape(pin)
+            data.boundaries.append((None, *gdslayer_shapes(pinlayer.nid),
+                [(v.x, v.y) for v in vertices]))
+            data.texts.append((None, *gdslayer_text(pinlayer.nid),
+                pos.x, pos.y, self.directory.name_node(pin.pin)))
+
+        for inst in layout.all(LayoutInstance):
+            data.srefs.append((self.directory.name_subgraph(inst.ref),
+                [tuple(inst.pos)], *d4_to_gds(inst.orientation)))
+        for insta in layout.all(LayoutInstanceArray):
+            cols = 1 if insta.cols is None else insta.cols
+            rows = 1 if insta.rows is None else insta.rows
+            pos_col_end = insta.pos if insta.cols is None else insta.pos + cols*insta.vec_col
+            pos_row_end = insta.pos if insta.rows is None else insta.pos + rows*insta.vec_row
+            data.arefs.append((self.directory.name_subgraph(insta.ref),
+                [tuple(insta.pos), tuple(pos_col_end), tuple(pos_row_end)],
+                cols, rows, *d4_to_gds(insta.orientation)))
+
+        return data
+
     def __init__(self, directory: Directory, layers: LayerStack):
         self.directory = directory
         self.layout_names = {}
@@ -128,35 +293,103 @@ class GdsGenerator:
             physical_unit=float(layers.unit),
             logical_unit=0.001, # Not sure what this is exactly supposed to mean.
         )
+        # (name, records) of structures generated by worker processes:
+        self.struc_records = []
 
-    def add_layout(self, layout: Layout):
-        layouts_want = {layout}
-        layouts_have = set()
-        layout_next = layout
-        while True:
-            want = self.layout_to_struc(layout_next)
-            
-            layouts_have.add(layout_next)
-            layouts_want |= want
+    def hierarchy(self, layout: Layout) -> list[Layout]:
+        """
+        Returns layout and all layouts it references directly or indirectly,
+        each once, in breadth-first order. All of them are named in the
+        directory in this order.
+        """
+        layouts = [layout]
+        layouts_have = {layout}
+        for layout_next in layouts:
+            self.directory.name_subgraph(layout_next)
+            for inst in itertools.chain(layout_next.all(LayoutInstance),
+                    layout_next.all(LayoutInstanceArray)):
+                if inst.ref not in layouts_have:
+                    layouts_have.add(inst.ref)
+                    layouts.append(inst.ref)
+        return layouts
 
-            try:
-                layout_next = (layouts_want - layouts_have).pop()
-            except KeyError:
-                break
+    def add_layout(self, layout: Layout, workers: Optional[int] = None):
+        """
+        Adds GDS structures for layout and all layouts it references.
+
+        Args:
+            layout: Top layout.
+            workers: If None, structures are generated in this process.
+                Otherwise, they are generated in a pool of the given number
+                of worker processes (0 = one per CPU), to which the layouts
+                are shipped as StrucData. The output is the same in both
+                cases. The workers are started by a fork server, as forking
+                a process that runs threads (e.g. the web server) is unsafe.
+        """
+        layouts = self.hierarchy(layout)
+        if workers is None:
+            for layout_next in layouts:
+                self.layout_to_struc(layout_next)
+            return
+
+        data = [self.layout_to_data(layout_next) for layout_next in layouts]
+        workers = workers or os.cpu_count() or 1
+        chunksize = max(1, len(data) // (4 * workers))
+        with ProcessPoolExecutor(max_workers=workers,
+                mp_context=multiprocessing.get_context('forkserver')) as executor:
+            self.struc_records.extend(executor.map(struc_data_to_bytes, data,
+                chunksize=chunksize))
 
     def save(self, file: IO[bytes]):
-        self.lib.sort(key=lambda e:e.name)
-        self.lib.save(file)
+        if not self.struc_records:
+            self.lib.sort(key=lambda e:e.name)
+            self.lib.save(file)
+            return
+
+        # Concatenate library header, structures (sorted like above) and
+        # ENDLIB record:
+        strucs = list(self.struc_records)
+        for struc in self.lib:
+            buf = io.BytesIO()
+            struc._save(buf)
+            strucs.append((struc.name, buf.getvalue()))
+        strucs.sort(key=lambda e:e[0])
+
+        lib_empty = Library(
+            version=self.lib.version,
+            name=self.lib.name,
+            physical_unit=self.lib.physical_unit,
+            logical_unit=self.lib.logical_unit,
+            mod_time=self.lib.mod_time,
+            acc_time=self.lib.acc_time,
+        )
+        buf = io.BytesIO()
+        lib_empty.save(buf)
+        endlib = io.BytesIO()
+        Record(tags.ENDLIB).save(endlib)
+        header = buf.getvalue().removesuffix(endlib.getvalue())
+
+        file.write(header)
+        for name, records in strucs:
+            file.write(records)
+        file.write(endlib.getvalue())
 
 @public
-def write_gds(layout: Layout, file: IO[bytes], directory: Optional[Directory] = None):
-    """Write layout 'layout' as GDS binary data to file-like object 'file'."""
+def write_gds(layout: Layout, file: IO[bytes], directory: Optional[Directory] = None,
+        workers: Optional[int] = None):
+    """
+    Write layout 'layout' as GDS binary data to file-like object 'file'.
+
+    If workers is not None, the structures of the layout hierarchy are
+    generated in parallel by that many processes (0 = one per CPU), see
+    GdsGenerator.add_layout.
+    """
 
     if directory is None:
         directory = Directory()
 
     g = GdsGenerator(directory, layout.ref_layers)
-    g.add_layout(layout)
+    g.add_layout(layout, workers=workers)
     g.save(file)
     
 
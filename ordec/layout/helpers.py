@@ -3,6 +3,7 @@
 
 from itertools import chain
 from typing import Iterable
+import numpy as np
 from public import public
 
 from ..core import *
@@ -118,36 +119,199 @@ def path_to_poly_vertices(path: LayoutPath) -> list[Vec2I]:
             
     return outline
 
+@public
+def rect_vertices(rect: Rect4I) -> list[Vec2I]:
+    """
+    Returns the corners of rect in counterclockwise order, starting at the
+    lower left corner (like the LayoutPoly that expand_rects makes of it).
+    """
+    return [Vec2I(rect.lx, rect.ly), Vec2I(rect.ux, rect.ly),
+        Vec2I(rect.ux, rect.uy), Vec2I(rect.lx, rect.uy)]
+
+def _path_arrays(paths: list[tuple[Subgraph, int, NodeTuple]]):
+    """
+    Collects the vertices and stroke parameters of the given paths, which are
+    (subgraph, nid, NodeTuple) triples, as NumPy arrays for _path_outlines.
+    Returns (counts, xy, halfwidth, ext_bgn, ext_end, vertex_nids), where
+    vertex_nids are the nids of the PolyVec2I nodes of each path.
+    """
+    counts = np.empty(len(paths), dtype=np.int64)
+    halfwidth = np.empty(len(paths), dtype=np.int64)
+    ext_bgn = np.empty(len(paths), dtype=np.int64)
+    ext_end = np.empty(len(paths), dtype=np.int64)
+    coords = []
+    vertex_nids = []
+    for i, (subgraph, nid, node) in enumerate(paths):
+        if node.width % 2 != 0:
+            raise ValueError(f"Path width must be multiple of two (is {node.width}).")
+        nodes = subgraph.nodes
+        try:
+            nids = subgraph.index[PolyVec2I.ref_idx.query(nid).index_key]
+        except KeyError:
+            nids = ()
+        for vertex_nid in nids:
+            pos = nodes[vertex_nid].pos
+            coords.append(pos.x)
+            coords.append(pos.y)
+        vertex_nids.append(nids)
+        counts[i] = len(nids)
+        halfwidth[i] = node.width // 2
+        if node.endtype == PathEndType.Square:
+            ext_bgn[i] = ext_end[i] = halfwidth[i]
+        elif node.endtype == PathEndType.Custom:
+            ext_bgn[i] = node.ext_bgn
+            ext_end[i] = node.ext_end
+        else:
+            ext_bgn[i] = ext_end[i] = 0
+    xy = np.array(coords, dtype=np.int64).reshape(-1, 2)
+    return counts, xy, halfwidth, ext_bgn, ext_end, vertex_nids
+
+def _path_outlines(counts, xy, halfwidth, ext_bgn, ext_end):
+    """
+    Vectorized equivalent of path_to_poly_vertices for many paths at once.
+    The vertices of all paths are concatenated in xy (shape (N, 2)), counts
+    holds the number of vertices of each path. halfwidth, ext_bgn and ext_end
+    hold the half width and the effective begin / end extensions per path.
+
+    Returns (out_counts, out_xy), the concatenated outlines in the same form.
+    """
+    if np.any(counts < 2):
+        raise ValueError("Too few vertices in path (must have at least two).")
+    npaths = len(counts)
+    starts = np.cumsum(counts) - counts
+    ends = starts + counts - 1
+    path_of = np.repeat(np.arange(npaths), counts)
+
+    # Unit direction of each segment xy[i] -> xy[i+1]. Segments from the last
+    # vertex of one path to the first vertex of the next are ignored.
+    seg = np.diff(xy, axis=0)
+    seg_dir = np.sign(seg)
+    in_path = np.ones(len(seg), dtype=bool)
+    in_path[ends[:-1]] = False
+    bad = np.flatnonzero(in_path & ((seg_dir[:, 0] != 0) == (seg_dir[:, 1] != 0)))
+    if len(bad) > 0:
+        raise ValueError(f"{Vec2I(*seg[bad[0]].tolist())} is not rectilinear.")
+
+    d_out = np.zeros_like(xy)
+    d_out[:-1] = seg_dir
+    d_out[ends] = 0
+    d_in = np.zeros_like(xy)
+    d_in[1:] = seg_dir
+    d_in[starts] = 0
+    # At the first and last vertex, one of both is zero:
+    direction = d_in + d_out
+    abs_direction = np.abs(direction)
+
+    middle = np.ones(len(xy), dtype=bool)
+    middle[starts] = False
+    middle[ends] = False
+    # 0 degree turns => vertex can be dropped:
+    straight = middle & (abs_direction.max(axis=1) == 2)
+    if np.any(middle & ~straight & (abs_direction != 1).any(axis=1)):
+        raise ValueError("Unsupported path (only 90 degree and 0 degree turns permitted).")
+
+    extension = np.zeros_like(xy)
+    extension[starts] = -ext_bgn[:, None] * d_out[starts]
+    extension[ends] = ext_end[:, None] * d_in[ends]
+
+    normal = np.stack((direction[:, 1], -direction[:, 0]), axis=1)
+    offset = halfwidth[path_of][:, None] * normal
+    left = xy + offset + extension
+    right = xy - offset + extension
+
+    # Outline of each path: right side backwards, then left side forwards.
+    kept = np.flatnonzero(~straight)
+    kept_path = path_of[kept]
+    kept_counts = np.bincount(kept_path, minlength=npaths)
+    kept_starts = np.cumsum(kept_counts) - kept_counts
+    rank = np.arange(len(kept)) - kept_starts[kept_path]
+    base = 2*kept_starts[kept_path] + kept_counts[kept_path]
+    out_xy = np.empty((2*len(kept), 2), dtype=np.int64)
+    out_xy[base - 1 - rank] = right[kept]
+    out_xy[base + rank] = left[kept]
+    return 2*kept_counts, out_xy
+
+@public
+def paths_to_poly_vertices(paths: Iterable[LayoutPath]) -> list[list[Vec2I]]:
+    """
+    Batch version of path_to_poly_vertices: returns the outlines of all
+    given LayoutPaths, computed together as NumPy arrays.
+    """
+    paths = [(path.subgraph, path.nid, path.tuple) for path in paths]
+    if not paths:
+        return []
+    counts, xy, halfwidth, ext_bgn, ext_end, _ = _path_arrays(paths)
+    out_counts, out_xy = _path_outlines(counts, xy, halfwidth, ext_bgn, ext_end)
+    vertices = [Vec2I(x, y) for x, y in out_xy.tolist()]
+    ret = []
+    start = 0
+    for count in out_counts.tolist():
+        ret.append(vertices[start:start+count])
+        start += count
+    return ret
+
 @public
 def expand_paths(layout: Layout):
     """
     For the given Layout, replaces all LayoutPath instances by geometrically
     equivalent LayoutPoly instances.
+
+    The outlines of all paths are computed at once (see _path_outlines) and
+    the paths are replaced in a single transaction. Like Node.replace, the
+    nid of each path is reused for its LayoutPoly, which keeps LayoutPins
+    and NPaths pointing to it intact.
     """
-    for path in layout.all(LayoutPath):
-        path.replace(LayoutPoly(
-            layer=path.layer,
-            vertices=path_to_poly_vertices(path),
-            ))
+    subgraph = layout.subgraph
+    nodes = subgraph.nodes
+    paths = [(subgraph, nid, nodes[nid]) for nid in layout.all(LayoutPath, wrap_cursor=False)]
+    if not paths:
+        return
+    counts, xy, halfwidth, ext_bgn, ext_end, vertex_nids = _path_arrays(paths)
+    out_counts, out_xy = _path_outlines(counts, xy, halfwidth, ext_bgn, ext_end)
+    vertices = [Vec2I(x, y) for x, y in out_xy.tolist()]
+
+    with subgraph.updater() as u:
+        start = 0
+        for (_, nid, node), old_vertex_nids, count in zip(paths, vertex_nids, out_counts.tolist()):
+            # The path is removed before its vertices and re-added after the
+            # new vertices, so that its extent in layout_shape_idx is computed
+            # only once per removal / insertion instead of once per vertex.
+            u.remove_nid(nid)
+            for vertex_nid in old_vertex_nids:
+                u.remove_nid(vertex_nid)
+            for i, v in enumerate(vertices[start:start+count]):
+                u.add_single(PolyVec2I.Tuple(ref=nid, order=i, pos=v), u.nid_generate())
+            u.add_single(LayoutPoly.Tuple(layer=node.layer), nid)
+            start += count
 
 @public
 def expand_rects(layout: Layout):
     """
     For the given Layout, replaces all LayoutRect instances by geometrically
     equivalent LayoutPoly instances.
-    """
 
-    for rect in layout.all(LayoutRect):
-        r = rect.rect
-        rect.replace(LayoutPoly(
-            layer=rect.layer,
-            vertices=[
-                Vec2I(r.lx, r.ly),
-                Vec2I(r.ux, r.ly),
-                Vec2I(r.ux, r.uy),
-                Vec2I(r.lx, r.uy),
-            ]
-            ))
+    All rects are replaced in a single transaction, reusing their nids like
+    Node.replace does.
+    """
+    subgraph = layout.subgraph
+    nodes = subgraph.nodes
+    rect_nids = list(layout.all(LayoutRect, wrap_cursor=False))
+    if not rect_nids:
+        return
+    rects = [nodes[nid] for nid in rect_nids]
+    if any(rect.rect is None for rect in rects):
+        raise ValueError("Cannot expand LayoutRect without rect.")
+    r = np.array([tuple(rect.rect) for rect in rects], dtype=np.int64)
+    # Vertices lx/ly, ux/ly, ux/uy, lx/uy of each rect, as in rect_vertices:
+    corners = r[:, [0, 1, 2, 1, 2, 3, 0, 3]].tolist()
+
+    with subgraph.updater() as u:
+        for nid, rect, c in zip(rect_nids, rects, corners):
+            u.remove_nid(nid)
+            for i in range(4):
+                u.add_single(PolyVec2I.Tuple(ref=nid, order=i,
+                    pos=Vec2I(c[2*i], c[2*i+1])), u.nid_generate())
+            u.add_single(LayoutPoly.Tuple(layer=rect.layer), nid)
 
 @public
 def expand_geom(layout: Layout):
@@ -312,28 +476,34 @@ def _interior_point(vertices):
     # Fallback (shouldn't happen for valid simple polygons)
     return Vec2I(cx, cy)
 
+@public
+def pin_shape(pin: LayoutPin) -> tuple[Layer, list[Vec2I], Vec2I]:
+    """
+    Returns the layer, the outline and the label position of the pin shape
+    that expand_pins adds for the given LayoutPin. The label position lies
+    inside the outline.
+
+    Handles LayoutPoly, LayoutRect and LayoutPath refs.
+    """
+    ref = pin.ref
+    if isinstance(ref, LayoutPoly):
+        vertices = ref.vertices()
+    elif isinstance(ref, LayoutRect):
+        vertices = rect_vertices(ref.rect)
+    elif isinstance(ref, LayoutPath):
+        vertices = path_to_poly_vertices(ref)
+    else:
+        raise Exception(f"pin_shape: unsupported ref type {type(ref)}.")
+    return ref.layer.pinlayer(), vertices, _interior_point(vertices)
+
 @public
 def expand_pins(layout: Layout, directory: Directory):
     """
     For a given layout, removes LayoutPin objects and adds according LayoutPoly
-    and LayoutLabel instances.
-
-    Handles LayoutPoly and LayoutPath refs directly. Expects that LayoutRect
-    objects have already been expanded (e.g. through expand_rects).
+    and LayoutLabel instances (see pin_shape).
     """
     for pin in layout.all(LayoutPin):
-        ref = pin.ref
-        if isinstance(ref, LayoutPoly):
-            vertices = ref.vertices()
-        elif isinstance(ref, LayoutPath):
-            vertices = path_to_poly_vertices(ref)
-        else:
-            raise Exception(
-                f"expand_pins: unsupported ref type {type(ref)}. "
-                f"Run expand_rects first."
-            )
-
-        pinlayer = pin.ref.layer.pinlayer()
+        pinlayer, vertices, pos = pin_shape(pin)
 
         layout % LayoutPoly(
             layer=pinlayer,
@@ -341,30 +511,12 @@ def expand_pins(layout: Layout, directory: Directory):
             )
         layout % LayoutLabel(
             layer=pinlayer,
-            pos=_interior_point(vertices),
+            pos=pos,
             text=directory.name_node(pin.pin),
             )
 
         pin.remove()
 
-def _normalize_poly_vertices(vertices: list[Vec2I]) -> tuple:
-    """Rotate vertex list so the lexicographically smallest (x, y) is first."""
-    if not vertices:
-        return ()
-    pairs = [(v.x, v.y) for v in vertices]
-    min_idx = min(range(len(pairs)), key=lambda i: pairs[i])
-    rotated = pairs[min_idx:] + pairs[:min_idx]
-    return tuple(rotated)
-
-def _poly_key(poly) -> tuple:
-    return (poly.layer.nid, _normalize_poly_vertices(poly.vertices()))
-
-def _label_key(label) -> tuple:
-    return (label.layer.nid, (label.pos.x, label.pos.y), label.text)
-
-def _pin_key(pin) -> tuple:
-    return (pin.pin.nid, _poly_key(pin.ref))
-
 @public
 def compare(layout_a, layout_b) -> str | None:
     """
@@ -372,6 +524,7 @@ def compare(layout_a, layout_b) -> str | None:
 
     Flattens and expands both layouts to LayoutPoly/LayoutLabel/LayoutPin,
     then compares normalized geometry. ORDB path names are ignored.
+    See :func:`ordec.layout.diff.layout_diff` for a structured result.
 
     Args:
         layout_a: First Layout to compare.
@@ -381,53 +534,5 @@ def compare(layout_a, layout_b) -> str | None:
         None if the layouts are identical, else a str describing the
         differences.
     """
-    a = layout_a.mutable_copy()
-    b = layout_b.mutable_copy()
-    flatten(a)
-    flatten(b)
-    expand_geom(a)
-    expand_geom(b)
-
-    polys_a = sorted(_poly_key(p) for p in a.all(LayoutPoly))
-    polys_b = sorted(_poly_key(p) for p in b.all(LayoutPoly))
-
-    labels_a = sorted(_label_key(l) for l in a.all(LayoutLabel))
-    labels_b = sorted(_label_key(l) for l in b.all(LayoutLabel))
-
-    pins_a = sorted(_pin_key(p) for p in a.all(LayoutPin))
-    pins_b = sorted(_pin_key(p) for p in b.all(LayoutPin))
-
-    errors = []
-    if polys_a != polys_b:
-        only_a = [p for p in polys_a if p not in polys_b]
-        only_b = [p for p in polys_b if p not in polys_a]
-        errors.append(
-            f"Polygon mismatch:\n"
-            f"  Only in layout_a ({len(only_a)}):\n"
-            + "".join(f"    layer={p[0]} verts={p[1]}\n" for p in only_a)
-            + f"  Only in layout_b ({len(only_b)}):\n"
-            + "".join(f"    layer={p[0]} verts={p[1]}\n" for p in only_b)
-        )
-    if labels_a != labels_b:
-        only_a = [l for l in labels_a if l not in labels_b]
-        only_b = [l for l in labels_b if l not in labels_a]
-        errors.append(
-            f"Label mismatch:\n"
-            f"  Only in layout_a ({len(only_a)}):\n"
-            + "".join(f"    {l}\n" for l in only_a)
-            + f"  Only in layout_b ({len(only_b)}):\n"
-            + "".join(f"    {l}\n" for l in only_b)
-        )
-    if pins_a != pins_b:
-        only_a = [p for p in pins_a if p not in pins_b]
-        only_b = [p for p in pins_b if p not in pins_a]
-        errors.append(
-            f"Pin mismatch:\n"
-            f"  Only in layout_a ({len(only_a)}):\n"
-            + "".join(f"    pin={p[0]} shape={p[1]}\n" for p in only_a)
-            + f"  Only in layout_b ({len(only_b)}):\n"
-            + "".join(f"    pin={p[0]} shape={p[1]}\n" for p in only_b)
-        )
-    if errors:
-        return "\n".join(errors)
-    return None
+    from .diff import layout_diff
+    return layout_diff(layout_a, layout_b).summary()
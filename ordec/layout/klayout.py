@@ -8,9 +8,10 @@ import xml.etree.ElementTree as ET
 import re
 import warnings
 
-from lark import Lark, Transformer, v_args
+from lark import Transformer, v_args
 
 from ..core import *
+from ..larkcache import LazyLark
 
 logger = logging.getLogger(__name__)
 
@@ -116,7 +117,7 @@ class RdbValueTransformer(Transformer):
         return ('value', str(num))
 
 
-rdb_value_parser = Lark.open_from_package(
+rdb_value_parser = LazyLark(
     __package__,
     "rdb_value.lark",
     parser="lalr",
@@ -327,7 +328,7 @@ class LvsdbTransformer(Transformer):
         return "()"
 
 
-lvsdb_parser = Lark.open_from_package(
+lvsdb_parser = LazyLark(
     __package__,
     "lvsdb.lark",
     parser="lalr",
@@ -1,87 +1,286 @@
 # SPDX-FileCopyrightText: 2025 ORDeC contributors
 # SPDX-License-Identifier: Apache-2.0
 
+import threading
+from collections import OrderedDict
+import numpy as np
 from public import public
 from ..core import *
 from .helpers import flatten, expand_geom, expand_pins
 
+# Layouts with more polygons than this are sent to the web viewer in tiled
+# mode (see LayoutTiles) unless webdata() is told otherwise.
+TILED_MIN_POLYS = 20000
+
+# Number of tiles that each LayoutTiles keeps for repeated requests:
+TILE_MEMO_SIZE = 256
+
 @public
-def webdata(layout: Layout.Frozen):
+class LayoutTiles:
     """
-    For a given layout, generate and return JSON-serializable data
-    for ORDeC's web viewer (layout-gl.js).
+    Quadtree tile pyramid of a flattened layout for viewport-based streaming
+    to ORDeC's web viewer (layout-gl.js).
+
+    Level 0 is a single square tile covering the whole layout. Each further
+    level splits every tile into 2x2 tiles, down to max_level, where one
+    layout unit corresponds to one pixel when a tile is drawn tile_px pixels
+    wide. Tiles contain all polygons intersecting them, except for those
+    smaller than one pixel at the tile's level (level-of-detail culling).
+
+    The bounding boxes of each layer's polygons are kept in arrays sorted by
+    decreasing size, so that the polygons remaining after culling are a
+    prefix of those arrays, which is short for coarse levels. Tiles are
+    computed on request; the TILE_MEMO_SIZE most recently used tiles are
+    memoized.
     """
 
-    directory = Directory()
+    tile_px = 256
 
-    weblayers_list = []
-    weblayers_dict = {}
+    def __init__(self, layout: Layout.Frozen):
+        directory = Directory()
 
-    # Preprocessing, to boil down everything to LayoutPolys and LayoutLabels:
-    layout = layout.mutable_copy()
-    flatten(layout)
-    expand_geom(layout)
-    expand_pins(layout, directory)
-    layout = layout.freeze()
+        # Preprocessing, to boil down everything to LayoutPolys and LayoutLabels:
+        layout = layout.mutable_copy()
+        flatten(layout)
+        expand_geom(layout)
+        expand_pins(layout, directory)
+        self.layout = layout.freeze()
+        self.unit = float(self.layout.ref_layers.unit)
 
-    def get_weblayer(layer):
-        try:
-            weblayer = weblayers_dict[layer]
-        except KeyError:
-            weblayer = {
+        # layer nid -> weblayer dict without shapes, in first-seen order:
+        self.layers = {}
+        # shape nid -> JSON-serializable record:
+        self.polys = {}
+        self.labels = {}
+        # shape nid -> layer nid:
+        self.shape_layers = {}
+        # layer nid -> list of (nid, lx, ly, ux, uy) of its polys / labels:
+        poly_boxes = {}
+        label_boxes = {}
+
+        extent = None
+        def extent_add_vertex(vertex: Vec2I):
+            nonlocal extent
+            if extent is None:
+                extent = Rect4I(vertex.x, vertex.y, vertex.x, vertex.y)
+            else:
+                extent = extent.extend(vertex)
+
+        for poly in self.layout.all(LayoutPoly):
+            # Flat list of coordinates x0, y0, x1, y1 and so on. This is what
+            # the JS earcut library wants.
+            vertices = poly.vertices()
+            vertices_flat = [pos[xy] for pos in vertices for xy in (0,1)]
+            for pos in vertices:
+                extent_add_vertex(pos)
+            xs = vertices_flat[0::2]
+            ys = vertices_flat[1::2]
+
+            self._add_layer(poly.layer)
+            self.shape_layers[poly.nid] = poly.layer.nid
+            self.polys[poly.nid] = {
+                'nid': poly.nid,
+                'vertices': vertices_flat,
+            }
+            poly_boxes.setdefault(poly.layer.nid, []).append(
+                (poly.nid, min(xs), min(ys), max(xs), max(ys)))
+
+        for label in self.layout.all(LayoutLabel):
+            extent_add_vertex(label.pos)
+
+            self._add_layer(label.layer)
+            self.shape_layers[label.nid] = label.layer.nid
+            self.labels[label.nid] = {
+                'nid': label.nid,
+                'pos': label.pos,
+                'text': label.text,
+            }
+            label_boxes.setdefault(label.layer.nid, []).append(
+                (label.nid, label.pos.x, label.pos.y, label.pos.x, label.pos.y))
+
+        if extent is None:
+            extent = Rect4I(0, 0, 0, 0)
+        self.extent = extent
+
+        size = max(extent.ux - extent.lx, extent.uy - extent.ly, 1)
+        self.max_level = max(0, (size - 1) // self.tile_px).bit_length()
+        self._tiles = OrderedDict()
+        self._tiles_lock = threading.Lock()
+
+        # layer nid -> (nids, boxes, negated sizes), by decreasing size:
+        self._poly_arrays = {}
+        for layer_nid, entries in poly_boxes.items():
+            a = np.array(entries, dtype=np.int64)
+            neg_sizes = -np.maximum(a[:,3] - a[:,1], a[:,4] - a[:,2])
+            order = np.argsort(neg_sizes, kind='stable')
+            self._poly_arrays[layer_nid] = (a[order,0], a[order,1:], neg_sizes[order])
+        # layer nid -> (nids, boxes):
+        self._label_arrays = {}
+        for layer_nid, entries in label_boxes.items():
+            a = np.array(entries, dtype=np.int64)
+            self._label_arrays[layer_nid] = (a[:,0], a[:,1:])
+
+    def _add_layer(self, layer):
+        if layer.nid not in self.layers:
+            self.layers[layer.nid] = {
                 'nid': layer.nid,
                 'path': layer.full_path_str(),
                 'styleFill': layer.style_fill,
                 'styleStroke': layer.style_stroke,
                 'styleCrossRect': layer.style_crossrect,
                 'styleCSS': layer.inline_css(),
-                'polys': [],
-                'labels': [],
             }
-            weblayers_list.append(weblayer)
-            weblayers_dict[layer] = weblayer
-        return weblayer
 
-    extent = None
-    def extent_add_vertex(vertex: Vec2I):
-        nonlocal extent
-        if extent is None:
-            extent = Rect4I(vertex.x, vertex.y, vertex.x, vertex.y)
+    def tile_size(self, level: int) -> int:
+        """Edge length of the tiles of the given level in layout units."""
+        return self.tile_px << (self.max_level - level)
+
+    def tile_rect(self, level: int, x: int, y: int) -> Rect4I:
+        """Region covered by the given tile."""
+        if not (0 <= level <= self.max_level):
+            raise ValueError(f"tile level {level} out of range 0..{self.max_level}")
+        if not (0 <= x < (1 << level) and 0 <= y < (1 << level)):
+            raise ValueError(f"tile ({x}, {y}) out of range for level {level}")
+        size = self.tile_size(level)
+        lx = self.extent.lx + x * size
+        ly = self.extent.ly + y * size
+        return Rect4I(lx, ly, lx + size, ly + size)
+
+    def tile(self, level: int, x: int, y: int) -> dict:
+        """
+        Returns the JSON-serializable content of a single tile: the polygons
+        and labels of each non-empty layer within the tile's region.
+        """
+        key = (level, x, y)
+        with self._tiles_lock:
+            try:
+                tile = self._tiles[key]
+            except KeyError:
+                pass
+            else:
+                self._tiles.move_to_end(key)
+                return tile
+
+        region = self.tile_rect(level, x, y)
+        # Size of one pixel in layout units when this level is displayed:
+        min_size = 1 << (self.max_level - level)
+        weblayers = []
+        for layer_nid in sorted(self.layers):
+            polys = []
+            try:
+                nids, boxes, neg_sizes = self._poly_arrays[layer_nid]
+            except KeyError:
+                pass
+            else:
+                count = np.searchsorted(neg_sizes, -min_size, side='right')
+                hits = nids[:count][self._intersecting(boxes[:count], region)]
+                polys = [self.polys[nid] for nid in np.sort(hits).tolist()]
+            labels = []
+            try:
+                nids, boxes = self._label_arrays[layer_nid]
+            except KeyError:
+                pass
+            else:
+                hits = nids[self._intersecting(boxes, region)]
+                labels = [self.labels[nid] for nid in np.sort(hits).tolist()]
+            if polys or labels:
+                weblayers.append({
+                    'nid': layer_nid,
+                    'polys': polys,
+                    'labels': labels,
+                })
+
+        tile = {'x': x, 'y': y, 'layers': weblayers}
+        with self._tiles_lock:
+            self._tiles[key] = tile
+            while len(self._tiles) > TILE_MEMO_SIZE:
+                self._tiles.popitem(last=False)
+        return tile
+
+    @staticmethod
+    def _intersecting(boxes: np.ndarray, region: Rect4I) -> np.ndarray:
+        return ((boxes[:,0] <= region.ux) & (region.lx <= boxes[:,2])
+            & (boxes[:,1] <= region.uy) & (region.ly <= boxes[:,3]))
+
+    def webdata(self, tiled: bool):
+        """
+        Returns view type and data for layout-gl.js. In tiled mode, only layer
+        metadata is returned; layout-gl.js then fetches the shapes of the
+        visible viewport using tile().
+        """
+        weblayers = {nid: dict(meta, polys=[], labels=[])
+            for nid, meta in self.layers.items()}
+        data = {
+            'layers': sorted(weblayers.values(), key=lambda l: l['nid']),
+            'extent': [self.extent.lx, self.extent.ly, self.extent.ux, self.extent.uy],
+            'unit': self.unit,
+        }
+        if tiled:
+            data['tiled'] = {
+                'origin': [self.extent.lx, self.extent.ly],
+                'maxLevel': self.max_level,
+                'tilePx': self.tile_px,
+            }
         else:
-            extent = extent.extend(vertex)
-
-    for poly in layout.all(LayoutPoly):
-        # Flat list of coordinates x0, y0, x1, y1 and so on. This is what
-        # the JS earcut library wants.
-        vertices = poly.vertices()
-        vertices_flat = [pos[xy] for pos in vertices for xy in (0,1)]
-        for pos in vertices:
-            extent_add_vertex(pos)
-
-        weblayer = get_weblayer(poly.layer)
-
-        weblayer['polys'].append({
-            'nid': poly.nid,
-            'vertices': vertices_flat,
-        })
-
-    for label in layout.all(LayoutLabel):
-        extent_add_vertex(label.pos)
-
-        weblayer = get_weblayer(label.layer)
-        weblayer['labels'].append({
-            'nid': label.nid,
-            'pos': label.pos,
-            'text': label.text,
-        })
-
-    if extent is None:
-        extent = Rect4I(0, 0, 0, 0)
-
-    weblayers_list.sort(key=lambda l: l['nid'])
-
-    return 'layout_gl', {
-        'layers': weblayers_list,
-        'extent': [extent.lx, extent.ly, extent.ux, extent.uy],
-        'unit': float(layout.ref_layers.unit),
-    }
+            for nid, poly in self.polys.items():
+                weblayers[self.shape_layers[nid]]['polys'].append(poly)
+            for nid, label in self.labels.items():
+                weblayers[self.shape_layers[nid]]['labels'].append(label)
+        return 'layout_gl', data
+
+# Tiled layouts that the web viewer might request tiles of, most recently
+# used last. Shared by all server threads.
+_tiles_cache = OrderedDict()
+_tiles_cache_size = 4
+_tiles_cache_lock = threading.Lock()
+
+def _lookup_tiles(layout: Layout.Frozen) -> LayoutTiles | None:
+    with _tiles_cache_lock:
+        try:
+            ret = _tiles_cache[layout]
+        except KeyError:
+            return None
+        _tiles_cache.move_to_end(layout)
+        return ret
+
+def _store_tiles(layout: Layout.Frozen, tiles: LayoutTiles):
+    with _tiles_cache_lock:
+        _tiles_cache[layout] = tiles
+        _tiles_cache.move_to_end(layout)
+        while len(_tiles_cache) > _tiles_cache_size:
+            _tiles_cache.popitem(last=False)
+
+def _cached_tiles(layout: Layout.Frozen) -> LayoutTiles:
+    tiles = _lookup_tiles(layout)
+    if tiles is None:
+        tiles = LayoutTiles(layout)
+        _store_tiles(layout, tiles)
+    return tiles
+
+@public
+def webdata(layout: Layout.Frozen, tiled: bool=None):
+    """
+    For a given layout, generate and return JSON-serializable data
+    for ORDeC's web viewer (layout-gl.js).
+
+    If tiled is True, only layer metadata is returned and the viewer
+    requests the shapes per tile through webtiles(). If tiled is None,
+    tiled mode is used for layouts with more than TILED_MIN_POLYS polygons.
+    """
+    tiles = _lookup_tiles(layout)
+    if tiles is None:
+        tiles = LayoutTiles(layout)
+    if tiled is None:
+        tiled = len(tiles.polys) > TILED_MIN_POLYS
+    if tiled:
+        _store_tiles(layout, tiles)
+    return tiles.webdata(tiled)
+
+@public
+def webtiles(layout: Layout.Frozen, level: int, tiles: list) -> list[dict]:
+    """
+    Returns the content of the requested tiles ((x, y) pairs of the
+    given level) of a layout shown by the web viewer in tiled mode.
+    """
+    layout_tiles = _cached_tiles(layout)
+    return [layout_tiles.tile(level, x, y) for x, y in tiles]
@@ -14,8 +14,7 @@ from ..schematic import spice_params, Netlister
 from ..sim.ngspice import NgspiceSetup
 from . import generic_mos
 from .pdk_common import PdkDict, check_dir, check_file, rundir
-from ..layout import makevias, write_gds
-from ..layout import klayout
+from ..layout import makevias
 
 @functools.cache
 def pdk() -> PdkDict:
@@ -899,6 +898,9 @@ def run_drc(l: Layout, variant='maximal', use_tempdir: bool=True):
     if variant not in ('minimal', 'maximal'):
         raise ValueError("variant must be either 'minimal' or 'maximal'.")
 
+    # GDS writing and KLayout report parsing are only imported when needed:
+    from ..layout import klayout, write_gds
+
     directory = Directory()
 
     with rundir('drc', use_tempdir) as cwd:
@@ -959,6 +961,8 @@ def run_lvs(layout: Layout, symbol: Symbol, use_tempdir: bool=True) -> LvsReport
         symbol: The Symbol containing the reference schematic.
         use_tempdir: If True, use a temporary directory for intermediate files.
     """
+    from ..layout import klayout, write_gds
+
     directory = Directory()
     nl = Netlister(directory, lvs=True)
     nl.netlist_hier_symbol(symbol)
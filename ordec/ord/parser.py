@@ -1,12 +1,13 @@
 # SPDX-FileCopyrightText: 2025 ORDeC contributors
 # SPDX-License-Identifier: Apache-2.0
 
-from lark import Lark, UnexpectedToken, UnexpectedCharacters, UnexpectedInput, Token
+from lark import UnexpectedToken, UnexpectedCharacters, UnexpectedInput, Token
 from lark.exceptions import VisitError
 from pathlib import Path
 import argparse
 from lark.indenter import PythonIndenter
 from .ord_transformer import OrdTransformer
+from ..larkcache import LazyLark
 import ast
 
 
@@ -152,7 +153,7 @@ def parse_with_errors(parser, code):
         raise SyntaxError(error_message) from None
 
 
-parser = Lark.open_from_package(
+parser = LazyLark(
     __package__,
     "ord.lark",
     parser="lalr",
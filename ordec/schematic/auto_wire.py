@@ -3,8 +3,10 @@
 
 import numpy as np
 import heapq
+import multiprocessing
 import sys
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
 from typing import Iterable, NamedTuple
 from dataclasses import dataclass
 
@@ -39,6 +41,8 @@ SHORTCUT_ENABLED = True       # Enable branch-to-existing-path shortcut routing.
 MAX_RIPUP_CANDIDATES = 5      # Blocking routes to try for one-route rip-up.
 CONGESTION_PENALTY = 2.0      # Extra cost multiplier per routed-cell reuse.
 ROUTED_BASE_PENALTY = 0.25    # Base cost for stepping onto an already routed cell.
+ROUTING_WORKERS = None        # Worker processes for auto_wire (None: sequential, 0: one per CPU).
+CLUSTER_MARGIN = 10           # Grid cells around a net's terminals reserved for its routes.
 
 
 # Grid cell type constants (int8 encoding)
@@ -324,11 +328,144 @@ def _point_keys(points, height):
     return {x * height + y for x, y in points}
 
 
+# Unit grid steps and blocked-move mask bits of the four move directions.
+_MOVES = []
+for _d in (North, South, East, West):
+    _v = _d * Vec2R(0, 1)
+    _MOVES.append((_d, _direction_bit(int(_v.x), int(_v.y)), int(_v.x), int(_v.y)))
+del _d, _v
+
+
+def _grid_masks(grid: np.ndarray) -> tuple[bytes, bytes]:
+    """Per-node cell types and _direction_bit() masks of the moves into
+    passable in-bounds cells, indexed by node key (x * height + y).
+
+    Reading the NumPy grid element by element dominated the search loops,
+    so the grid is read with NumPy instead, into one byte per node.
+    """
+    passable = grid < GRID_BLOCKED
+    move_masks = np.zeros(grid.shape, dtype=np.uint8)
+    move_masks[:-1, :] |= passable[1:, :] * np.uint8(1)   # North: y + 1
+    move_masks[1:, :] |= passable[:-1, :] * np.uint8(2)   # South: y - 1
+    move_masks[:, :-1] |= passable[:, 1:] * np.uint8(4)   # East: x + 1
+    move_masks[:, 1:] |= passable[:, :-1] * np.uint8(8)   # West: x - 1
+    return (np.ascontiguousarray(grid.T, dtype=np.int8).tobytes(),
+            np.ascontiguousarray(move_masks.T).tobytes())
+
+
+def _congestion(grid: np.ndarray, height: int, use_congestion: bool,
+                route_cell_usage: dict | None) -> dict:
+    """Congestion penalty of routed cells, by node key."""
+    congestion = dict()
+    if use_congestion:
+        if route_cell_usage is not None:
+            for (x, y), usage in route_cell_usage.items():
+                if usage > 0:
+                    congestion[x * height + y] = ROUTED_BASE_PENALTY + (usage * CONGESTION_PENALTY)
+        else:
+            routed_keys = np.flatnonzero(grid.T.ravel() == GRID_ROUTED)
+            congestion = dict.fromkeys(routed_keys.tolist(), ROUTED_BASE_PENALTY)
+    return congestion
+
+
+def _search_masks(grid: np.ndarray, height: int, use_congestion: bool,
+                  route_cell_usage: dict | None) -> tuple[bytes, bytes, dict]:
+    """Precompute per-node lookup tables of a search, indexed by node key
+    (x * height + y).
+
+    Returns:
+        tuple: (cell types, _direction_bit() mask of the moves into
+        passable in-bounds cells, congestion penalty of routed cells).
+    """
+    kinds, move_masks = _grid_masks(grid)
+    return kinds, move_masks, _congestion(grid, height, use_congestion,
+                                          route_cell_usage)
+
+
+class SearchBuffers:
+    """Score buffers reused by consecutive searches on one routing grid.
+
+    Each search starts a new generation instead of reallocating and
+    resetting width * height entries: a node's g_score and came_from entries
+    are only valid if its stamp equals the current generation. The buffers
+    are Python lists rather than NumPy arrays, as the search loops access
+    them element by element.
+
+    The grid lookup tables of _grid_masks() are kept as well, see
+    grid_masks().
+    """
+    def __init__(self, size: int):
+        self.size = size
+        self.g_score = [0.0] * size
+        self.came_from = [-1] * size
+        self.stamp = [0] * size
+        self.generation = 0
+        self.masks_grid = None
+        self.masks = None
+
+    def next_generation(self) -> int:
+        """Invalidates all entries and returns the new generation."""
+        self.generation += 1
+        return self.generation
+
+    def grid_masks(self, grid: np.ndarray) -> tuple[bytes, bytes]:
+        """_grid_masks() of grid, computed once per grid.
+
+        Routing only switches cells between GRID_EMPTY and GRID_ROUTED,
+        which changes neither passability nor the GRID_DIR markers, the
+        only cell type the searches read. Call invalidate_masks() after
+        any other change of the grid.
+        """
+        if grid is not self.masks_grid:
+            self.masks = _grid_masks(grid)
+            self.masks_grid = grid
+        return self.masks
+
+    def invalidate_masks(self):
+        """Makes the next grid_masks() call recompute the tables."""
+        self.masks_grid = None
+        self.masks = None
+
+
+class SearchBackend:
+    """Pathfinding backend used by ``draw_connections``.
+
+    One backend instance serves all searches of a routing run, including
+    rip-up retries, on a grid of fixed size. This default backend runs
+    ``a_star`` and ``reverse_a_star`` with shared SearchBuffers. Other
+    implementations can be plugged in through the SEARCH_BACKEND setting or
+    the backend argument of ``draw_connections``; they must return the
+    same paths.
+    """
+    def __init__(self, width: int, height: int):
+        self.buffers = SearchBuffers(width * height)
+
+    def a_star(self, grid, start, end, width, height, straight_lines, net,
+               start_dir, routing_cache, route_cell_usage=None,
+               use_congestion=True, blocked_move_hits=None):
+        return a_star(grid, start, end, width, height, straight_lines, net,
+                      start_dir, routing_cache, route_cell_usage,
+                      use_congestion, blocked_move_hits, self.buffers)
+
+    def reverse_a_star(self, grid, start_points, end, width, height,
+                       straight_lines, net, end_dir, endpoint_mapping,
+                       routing_cache, route_cell_usage=None,
+                       use_congestion=True, blocked_move_hits=None):
+        return reverse_a_star(grid, start_points, end, width, height,
+                              straight_lines, net, end_dir, endpoint_mapping,
+                              routing_cache, route_cell_usage,
+                              use_congestion, blocked_move_hits, self.buffers)
+
+
+SEARCH_BACKEND = SearchBackend  # Backend class instantiated per routing run.
+
+
 def a_star(grid: np.ndarray, start: tuple[int, int], end: tuple[int, int],
            width: int, height: int, straight_lines: dict[Net, list],
            net: Net, start_dir: D4, routing_cache: RoutingCache,
            route_cell_usage: dict | None = None, use_congestion: bool = True,
-           blocked_move_hits: set | None = None) -> list[tuple[int, int]]:
+           blocked_move_hits: set | None = None,
+           buffers: SearchBuffers | None = None) -> list[tuple[int, int]]:
     """Perform A* pathfinding between a start and end point.
 
     Args:
@@ -345,6 +482,7 @@ def a_star(grid: np.ndarray, start: tuple[int, int], end: tuple[int, int],
         use_congestion: Whether to apply congestion/history penalties.
         blocked_move_hits: If given, blocked moves encountered during search
             are added to this set, encoded as (node_key << 4) | _direction_bit().
+        buffers: Score buffers to reuse (optional).
 
     Returns:
         list: Calculated path as list of (x, y) tuples, or empty list on failure.
@@ -368,20 +506,23 @@ def a_star(grid: np.ndarray, start: tuple[int, int], end: tuple[int, int],
     start_key = start_x * height + start_y
     end_key = end_x * height + end_y
 
-    # Flat arrays indexed by node key (x * height + y) for O(1) lookup
-    grid_size = width * height
-    inf_score = float("inf")
-    g_score = [inf_score] * grid_size
-    came_from = [-1] * grid_size
+    # Flat buffers indexed by node key (x * height + y) for O(1) lookup,
+    # valid where stamp equals this search's generation.
+    if buffers is None:
+        buffers = SearchBuffers(width * height)
+    generation = buffers.next_generation()
+    g_score = buffers.g_score
+    came_from = buffers.came_from
+    stamp = buffers.stamp
     g_score[start_key] = 0.0
+    came_from[start_key] = -1
+    stamp[start_key] = generation
 
-    # Unit grid steps and blocked-move mask bits of the four directions,
-    # precomputed for the search loop.
-    moves = []
-    for d in (North, South, East, West):
-        v = d * Vec2R(0, 1)
-        dx, dy = int(v.x), int(v.y)
-        moves.append((d, _direction_bit(dx, dy), dx, dy))
+    kinds, move_masks = buffers.grid_masks(grid)
+    congestion = _congestion(grid, height, use_congestion, route_cell_usage)
+    moves = [(d, bit, dx, dy, dx * height + dy) for d, bit, dx, dy in _MOVES]
+    heappush = heapq.heappush
+    heappop = heapq.heappop
 
     # Priority queue: (f_score, node_key, direction, g_score). The direction
     # (a D4, which is not orderable) is never compared: re-pushes of a node
@@ -390,7 +531,7 @@ def a_star(grid: np.ndarray, start: tuple[int, int], end: tuple[int, int],
     open_set = [(h_start, start_key, start_dir, 0.0)]
 
     while open_set:
-        _, current_key, current_direction, popped_g_score = heapq.heappop(open_set)
+        _, current_key, current_direction, popped_g_score = heappop(open_set)
         # Skip stale entries: a better path to this node was already found
         if popped_g_score > g_score[current_key]:
             continue
@@ -405,65 +546,56 @@ def a_star(grid: np.ndarray, start: tuple[int, int], end: tuple[int, int],
             path.reverse()
             return path
 
+        # Skip directions blocked by an existing route segment, out of
+        # bounds or into blocked cells
+        block_mask = blocked_masks.get(current_key, 0)
+        if block_mask and blocked_move_hits is not None:
+            for _, bit, _, _, _ in moves:
+                if block_mask & bit:
+                    blocked_move_hits.add((current_key << 4) | bit)
+        allowed = move_masks[current_key] & ~block_mask
+        if not allowed:
+            continue
+
         # Decode flat key back to 2D coordinates
         cx = current_key // height
         cy = current_key % height
-        remaining_distance = abs(cx - end_x) + abs(cy - end_y)
-        block_mask = blocked_masks.get(current_key, 0)
         current_g_score = g_score[current_key]
 
-        for d, bit, dx, dy in moves:
-            # Skip if this direction is blocked by an existing route segment
-            if block_mask & bit:
-                if blocked_move_hits is not None:
-                    blocked_move_hits.add((current_key << 4) | bit)
-                continue
-
-            nx = cx + dx
-            ny = cy + dy
-            if nx < 0 or nx >= width or ny < 0 or ny >= height:
-                continue
-
-            # Direction markers enforce straight escape from pins/ports. A turn
-            # is allowed on this route's start marker, and on the destination
-            # marker if that marker is the current route target.
-            if (grid[cy, cx] == GRID_DIR and
-                    current_direction is not None and
-                    current_direction != d and
-                    current_key != start_key and
-                    current_key != end_key):
-                continue
-
-            if grid[ny, nx] >= GRID_BLOCKED:
+        # Penalize direction changes proportional to remaining distance
+        # to encourage straight runs near the destination
+        turn_penalty = (abs(cx - end_x) + abs(cy - end_y)) * 0.5
+        if turn_penalty < 10:
+            turn_penalty = 10
+
+        # Direction markers enforce straight escape from pins/ports. A turn
+        # is allowed on this route's start marker, and on the destination
+        # marker if that marker is the current route target.
+        turn_forbidden = (kinds[current_key] == GRID_DIR and
+                          current_key != start_key and
+                          current_key != end_key)
+
+        for d, bit, dx, dy, dkey in moves:
+            if not allowed & bit:
                 continue
-
-            # Penalize direction changes proportional to remaining distance
-            # to encourage straight runs near the destination
             if current_direction is not None and current_direction != d:
-                direction_change_penalty = remaining_distance * 0.5
-                if direction_change_penalty < 10:
-                    direction_change_penalty = 10
+                if turn_forbidden:
+                    continue
+                direction_change_penalty = turn_penalty
             else:
                 direction_change_penalty = 0
 
             # Discourage reuse of cells already occupied by other routes
-            congestion_penalty = 0.0
-            if use_congestion:
-                if route_cell_usage is not None:
-                    usage = route_cell_usage.get((nx, ny), 0)
-                    if usage > 0:
-                        congestion_penalty = ROUTED_BASE_PENALTY + (usage * CONGESTION_PENALTY)
-                elif grid[ny, nx] == GRID_ROUTED:
-                    congestion_penalty = ROUTED_BASE_PENALTY
-
-            tentative_g_score = current_g_score + 1 + direction_change_penalty + congestion_penalty
-            neighbor_key = nx * height + ny
-            if tentative_g_score < g_score[neighbor_key]:
+            neighbor_key = current_key + dkey
+            tentative_g_score = (current_g_score + 1 + direction_change_penalty
+                                 + congestion.get(neighbor_key, 0.0))
+            if stamp[neighbor_key] != generation or tentative_g_score < g_score[neighbor_key]:
+                stamp[neighbor_key] = generation
                 came_from[neighbor_key] = current_key
                 g_score[neighbor_key] = tentative_g_score
-                f_score = tentative_g_score + abs(nx - end_x) + abs(ny - end_y)
-                heapq.heappush(open_set, (f_score, neighbor_key, d,
-                                          tentative_g_score))
+                f_score = tentative_g_score + abs(cx + dx - end_x) + abs(cy + dy - end_y)
+                heappush(open_set, (f_score, neighbor_key, d,
+                                    tentative_g_score))
 
     return []
 
@@ -474,7 +606,8 @@ def reverse_a_star(grid: np.ndarray, start_points: list,
                    endpoint_mapping: dict, routing_cache: RoutingCache,
                    route_cell_usage: dict | None = None,
                    use_congestion: bool = True,
-                   blocked_move_hits: set | None = None) -> list[tuple[int, int]]:
+                   blocked_move_hits: set | None = None,
+                   buffers: SearchBuffers | None = None) -> list[tuple[int, int]]:
     """Perform reverse A* from the end point towards any of the start points.
 
     Args:
@@ -492,6 +625,7 @@ def reverse_a_star(grid: np.ndarray, start_points: list,
         use_congestion: Whether to apply congestion/history penalties.
         blocked_move_hits: If given, blocked moves encountered during search
             are added to this set, encoded as (node_key << 4) | _direction_bit().
+        buffers: Score buffers to reuse (optional).
 
     Returns:
         list: Shortest path found as list of (x, y) tuples, or empty list.
@@ -525,19 +659,21 @@ def reverse_a_star(grid: np.ndarray, start_points: list,
             min_distance = distance
     spm_x, spm_y = start_point_min
 
-    grid_size = width * height
-    inf_score = float("inf")
-    g_score = [inf_score] * grid_size
-    came_from = [-1] * grid_size
+    if buffers is None:
+        buffers = SearchBuffers(width * height)
+    generation = buffers.next_generation()
+    g_score = buffers.g_score
+    came_from = buffers.came_from
+    stamp = buffers.stamp
     g_score[end_key] = 0.0
+    came_from[end_key] = -1
+    stamp[end_key] = generation
 
-    # Unit grid steps and blocked-move mask bits of the four directions,
-    # precomputed for the search loop.
-    moves = []
-    for d in (North, South, East, West):
-        v = d * Vec2R(0, 1)
-        dx, dy = int(v.x), int(v.y)
-        moves.append((d, _direction_bit(dx, dy), dx, dy))
+    kinds, move_masks = buffers.grid_masks(grid)
+    congestion = _congestion(grid, height, use_congestion, route_cell_usage)
+    moves = [(d, bit, dx, dy, dx * height + dy) for d, bit, dx, dy in _MOVES]
+    heappush = heapq.heappush
+    heappop = heapq.heappop
 
     # Priority queue: (f_score, node_key, direction, g_score); the direction
     # is never compared, see a_star().
@@ -548,13 +684,13 @@ def reverse_a_star(grid: np.ndarray, start_points: list,
     best_path_score = sys.maxsize
 
     while open_set:
-        _, current_key, current_direction, popped_g_score = heapq.heappop(open_set)
+        _, current_key, current_direction, popped_g_score = heappop(open_set)
         if popped_g_score > g_score[current_key]:
             continue
 
         # Prune paths that can't beat the current best
-        current_path_length = g_score[current_key]
-        if current_path_length >= best_path_score:
+        current_g_score = g_score[current_key]
+        if current_g_score >= best_path_score:
             continue
 
         # Reached one of the target start points, record if shortest so far
@@ -573,57 +709,46 @@ def reverse_a_star(grid: np.ndarray, start_points: list,
 
             continue
 
-        cx = current_key // height
-        cy = current_key % height
-        remaining_distance = abs(cx - end_x) + abs(cy - end_y)
         block_mask = blocked_masks.get(current_key, 0)
-        current_g_score = g_score[current_key]
-
-        for d, bit, dx, dy in moves:
-            if block_mask & bit:
-                if blocked_move_hits is not None:
+        if block_mask and blocked_move_hits is not None:
+            for _, bit, _, _, _ in moves:
+                if block_mask & bit:
                     blocked_move_hits.add((current_key << 4) | bit)
-                continue
+        allowed = move_masks[current_key] & ~block_mask
+        if not allowed:
+            continue
 
-            nx = cx + dx
-            ny = cy + dy
-            if nx < 0 or nx >= width or ny < 0 or ny >= height:
-                continue
+        cx = current_key // height
+        cy = current_key % height
 
-            if (grid[cy, cx] == GRID_DIR and
-                    current_direction is not None and
-                    current_direction != d and
-                    current_key != end_key and
-                    current_key not in endpoint_keys):
-                continue
+        turn_penalty = (abs(cx - end_x) + abs(cy - end_y)) * 0.5
+        if turn_penalty < 10:
+            turn_penalty = 10
 
-            if grid[ny, nx] >= GRID_BLOCKED:
-                continue
+        turn_forbidden = (kinds[current_key] == GRID_DIR and
+                          current_key != end_key and
+                          current_key not in endpoint_keys)
 
+        for d, bit, dx, dy, dkey in moves:
+            if not allowed & bit:
+                continue
             if current_direction is not None and current_direction != d:
-                direction_change_penalty = remaining_distance * 0.5
-                if direction_change_penalty < 10:
-                    direction_change_penalty = 10
+                if turn_forbidden:
+                    continue
+                direction_change_penalty = turn_penalty
             else:
                 direction_change_penalty = 0
 
-            congestion_penalty = 0.0
-            if use_congestion:
-                if route_cell_usage is not None:
-                    usage = route_cell_usage.get((nx, ny), 0)
-                    if usage > 0:
-                        congestion_penalty = ROUTED_BASE_PENALTY + (usage * CONGESTION_PENALTY)
-                elif grid[ny, nx] == GRID_ROUTED:
-                    congestion_penalty = ROUTED_BASE_PENALTY
-
-            tentative_g_score = current_g_score + 1 + direction_change_penalty + congestion_penalty
-            neighbor_key = nx * height + ny
-            if tentative_g_score < g_score[neighbor_key]:
+            neighbor_key = current_key + dkey
+            tentative_g_score = (current_g_score + 1 + direction_change_penalty
+                                 + congestion.get(neighbor_key, 0.0))
+            if stamp[neighbor_key] != generation or tentative_g_score < g_score[neighbor_key]:
+                stamp[neighbor_key] = generation
                 came_from[neighbor_key] = current_key
                 g_score[neighbor_key] = tentative_g_score
-                f_score = tentative_g_score + abs(nx - spm_x) + abs(ny - spm_y)
-                heapq.heappush(open_set, (f_score, neighbor_key, d,
-                                          tentative_g_score))
+                f_score = tentative_g_score + abs(cx + dx - spm_x) + abs(cy + dy - spm_y)
+                heappush(open_set, (f_score, neighbor_key, d,
+                                    tentative_g_score))
 
     return best_path
 
@@ -790,7 +915,9 @@ def sort_connections(connections: list[GridConn]
 
 # Draw all connections with paths
 def draw_connections(grid: np.ndarray, connections: list[GridConn],
-                     width: int, height: int
+                     width: int, height: int,
+                     backend: SearchBackend | None = None,
+                     workers: int | None = None
                      ) -> dict[Net, list[list[tuple[int, int]]]]:
     """Route all connections and return the calculated vertices.
 
@@ -799,15 +926,200 @@ def draw_connections(grid: np.ndarray, connections: list[GridConn],
         connections: Grid connections to route.
         width: Width of the grid.
         height: Height of the grid.
+        backend: Pathfinding backend (default: a new SEARCH_BACKEND).
+        workers: If None, all connections are routed sequentially in this
+            process. Otherwise, spatially independent clusters of nets
+            (see partition_connections) are routed in parallel by a pool of
+            the given number of worker processes (0 = one per CPU), each on
+            its own grid window. Clusters that fail to route within their
+            window are rerouted sequentially on the full grid afterwards,
+            with backend. The workers route with new instances of the
+            backend's class, which must therefore be importable. They are
+            started by a fork server, as forking the calling process is
+            unsafe if it runs threads (e.g. the web server's).
 
     Returns:
         dict: Grid-space vertex paths per Net.
     """
+    if workers is not None:
+        clusters = partition_connections(connections, width, height)
+        if len(clusters) > 1:
+            return _draw_connections_parallel(grid, clusters, connections,
+                                              width, height, workers, backend)
+    vertices, _ = _route_connections(grid, connections, width, height,
+                                     backend)
+    return vertices
+
+
+class _ClusterNet(NamedTuple):
+    """Stand-in for a Net in worker processes, which get no ORDB nodes."""
+    index: int
+    label: str
+
+    def full_path_label(self) -> str:
+        return self.label
+
+
+def partition_connections(connections: list[GridConn], width: int,
+                          height: int, margin: int | None = None
+                          ) -> list[tuple[tuple[int, int, int, int], list[GridConn]]]:
+    """Cluster connections into groups that can be routed independently.
+
+    Each net covers the bounding box of its connections' terminals, extended
+    by margin cells (default: CLUSTER_MARGIN) and clipped to the grid. Nets
+    whose boxes overlap, directly or through other nets, form one cluster.
+    Clusters are merged further until their windows (the bounding boxes of
+    their nets' boxes) are disjoint, so that routes of different clusters
+    stay apart.
+
+    Args:
+        connections: Grid connections to partition.
+        width: Width of the grid.
+        height: Height of the grid.
+        margin: Space around each net's terminals for its routes.
+
+    Returns:
+        list: (window, connections) per cluster, where window is
+        (lx, ly, ux, uy) with inclusive bounds, in order of each cluster's
+        first connection.
+    """
+    if margin is None:
+        margin = CLUSTER_MARGIN
+
+    boxes = dict()
+    for conn in connections:
+        lx, ly, ux, uy = boxes.get(conn.net, (width, height, -1, -1))
+        for x, y in (conn.start, conn.end):
+            lx, ly, ux, uy = min(lx, x), min(ly, y), max(ux, x), max(uy, y)
+        boxes[conn.net] = (lx, ly, ux, uy)
+    windows = [(max(lx - margin, 0), max(ly - margin, 0),
+                min(ux + margin, width - 1), min(uy + margin, height - 1))
+               for lx, ly, ux, uy in boxes.values()]
+    members = [[net] for net in boxes]
+
+    def overlap(a, b):
+        return a[0] <= b[2] and b[0] <= a[2] and a[1] <= b[3] and b[1] <= a[3]
+
+    # Merge overlapping windows until none overlap. Windows are swept in
+    # order of lx; a merged window may overlap earlier ones, so repeat.
+    merged = True
+    while merged:
+        merged = False
+        order = sorted(range(len(windows)), key=lambda i: windows[i][0])
+        new_windows = []
+        new_members = []
+        for i in order:
+            window = windows[i]
+            for j, other in enumerate(new_windows):
+                if overlap(window, other):
+                    new_windows[j] = (min(window[0], other[0]),
+                                      min(window[1], other[1]),
+                                      max(window[2], other[2]),
+                                      max(window[3], other[3]))
+                    new_members[j].extend(members[i])
+                    merged = True
+                    break
+            else:
+                new_windows.append(window)
+                new_members.append(members[i])
+        windows, members = new_windows, new_members
+
+    cluster_of_net = {net: i for i, nets in enumerate(members) for net in nets}
+    clusters = dict()
+    for conn in connections:
+        clusters.setdefault(cluster_of_net[conn.net], []).append(conn)
+    return [(windows[i], conns) for i, conns in clusters.items()]
+
+
+def _route_window(grid: np.ndarray, connections: list[GridConn],
+                  backend_type: type) -> tuple[dict, int, np.ndarray]:
+    """Worker process part of _draw_connections_parallel()."""
+    height, width = grid.shape
+    vertices, failed = _route_connections(grid, connections, width, height,
+                                          backend_type(width, height),
+                                          report_failures=False)
+    return dict(vertices), len(failed), grid
+
+
+def _draw_connections_parallel(grid, clusters, connections, width, height,
+                               workers, backend=None):
+    # Nets are sent to the workers as _ClusterNet stand-ins and all
+    # coordinates are made relative to the cluster's window.
+    nets = list(dict.fromkeys(conn.net for conn in connections))
+    net_index = {net: i for i, net in enumerate(nets)}
+    stand_ins = [_ClusterNet(i, net.full_path_label())
+                 for i, net in enumerate(nets)]
+    jobs = []
+    for (lx, ly, ux, uy), conns in clusters:
+        window_conns = [
+            GridConn(stand_ins[net_index[c.net]],
+                     (c.start[0] - lx, c.start[1] - ly), c.start_dir,
+                     (c.end[0] - lx, c.end[1] - ly), c.end_dir)
+            for c in conns]
+        jobs.append((grid[ly:uy + 1, lx:ux + 1].copy(), window_conns))
+    # Passed explicitly: the workers do not see changes of SEARCH_BACKEND.
+    backend_type = SEARCH_BACKEND if backend is None else type(backend)
+
+    with ProcessPoolExecutor(max_workers=workers or None,
+            mp_context=multiprocessing.get_context('forkserver')) as executor:
+        results = list(executor.map(_route_window, *zip(*jobs),
+                                    [backend_type] * len(jobs)))
+
+    vertices = dict()
+    retry = []
+    for ((lx, ly, ux, uy), conns), (window_vertices, failed, window_grid) \
+            in zip(clusters, results):
+        if failed:
+            retry.extend(conns)
+            continue
+        for stand_in, paths in window_vertices.items():
+            vertices[nets[stand_in.index]] = [
+                [(x + lx, y + ly) for x, y in path] for path in paths]
+        region = grid[ly:uy + 1, lx:ux + 1]
+        region[window_grid == GRID_ROUTED] = GRID_ROUTED
+
+    if retry:
+        # Clusters that failed within their windows get the full grid,
+        # around the routes of all other clusters.
+        retry_vertices, _ = _route_connections(grid, retry, width, height,
+                                               backend, fixed_paths=vertices)
+        vertices.update(retry_vertices)
+
+    # Same net order as sequential routing
+    _, sorted_connections = sort_connections(connections)
+    order = {net: i for i, net in enumerate(
+        dict.fromkeys(conn.net for conn in sorted_connections))}
+    return dict(sorted(vertices.items(), key=lambda item: order[item[0]]))
+
+
+def _route_connections(grid: np.ndarray, connections: list[GridConn],
+                       width: int, height: int,
+                       backend: SearchBackend | None = None,
+                       fixed_paths: dict | None = None,
+                       report_failures: bool = True
+                       ) -> tuple[dict[Net, list[list[tuple[int, int]]]], list[GridConn]]:
+    """Sequential routing core of draw_connections().
+
+    Args:
+        fixed_paths: Vertex paths of nets routed before, which the new
+            routes must keep clear of. Their cells must already be marked
+            as routed in the grid.
+        report_failures: Whether to print connections that failed.
+
+    Returns:
+        tuple: (grid-space vertex paths per Net, failed connections).
+    """
+    if backend is None:
+        backend = SEARCH_BACKEND(width, height)
     routing_cache = RoutingCache()
     port_drawing_dict = defaultdict(list)
     straight_lines = defaultdict(list)
     route_cell_usage = dict()
     routed_entries = []
+    failed = []
+    if fixed_paths:
+        for net, paths in fixed_paths.items():
+            straight_lines[net] = transform_to_pairs(paths, [])
 
     endpoint_marker_mapping, sorted_connections = sort_connections(connections)
     endpoint_key_mapping = {
@@ -963,7 +1275,7 @@ def draw_connections(grid: np.ndarray, connections: list[GridConn],
                     raise IndexError(f"Shortcut doesn't have valid branch point to connect net '{net.full_path_label()}'")
                 else:
                     # Try reverse A* from endpoint to any existing path point
-                    path = reverse_a_star(
+                    path = backend.reverse_a_star(
                         grid, path_list, end_new, width, height,
                         straight_lines, net, end_dir,
                         endpoint_key_mapping, routing_cache, route_cell_usage,
@@ -972,7 +1284,7 @@ def draw_connections(grid: np.ndarray, connections: list[GridConn],
                     )
                     # Fall back to forward A* if reverse search fails
                     if not path:
-                        path = a_star(
+                        path = backend.a_star(
                             grid, start_new, end_new, width, height,
                             straight_lines, net, start_dir,
                             routing_cache, route_cell_usage, use_congestion=False,
@@ -980,7 +1292,7 @@ def draw_connections(grid: np.ndarray, connections: list[GridConn],
                         )
             else:
                 # First connection for this net, standard forward A*
-                path = a_star(
+                path = backend.a_star(
                     grid, start_new, end_new, width, height,
                     straight_lines, net, start_dir,
                     routing_cache, route_cell_usage,
@@ -1089,8 +1401,10 @@ def draw_connections(grid: np.ndarray, connections: list[GridConn],
                 continue
 
         if path is None:
-            print(f"Failed to connect net '{net.full_path_label()}' from "
-                  f"{start_new} to {end_new}. Adding terminal taps ...")
+            failed.append(GridConn(net, start, start_dir, end, end_dir))
+            if report_failures:
+                print(f"Failed to connect net '{net.full_path_label()}' from "
+                      f"{start_new} to {end_new}. Adding terminal taps ...")
             continue
 
         path_cells = apply_path_to_grid(path)
@@ -1106,12 +1420,75 @@ def draw_connections(grid: np.ndarray, connections: list[GridConn],
         else:
             current_path = keep_corners_and_edges(shorten_lists(port_drawing_dict[key]))
         port_drawing_dict[key] = current_path
-    return port_drawing_dict
+    return port_drawing_dict, failed
+
+
+def net_key(net: Net) -> tuple:
+    """Identifies a net across regenerated schematics: its NPath, or its
+    nid for nets without one."""
+    if net.npath_nid is None:
+        return (None, net.nid)
+    return tuple(net.full_path_list())
+
+
+class RoutingRecord(NamedTuple):
+    """Input and result of one routing run, see calculate_vertices()."""
+    offset: tuple[int, int]
+    obstacles: np.ndarray # grid with cells and ports, before routing
+    conns: dict           # net_key -> tuple of (start, start_dir, end, end_dir)
+    paths: dict           # net_key -> grid-space vertex paths
+
+
+def _path_cells(path: list[tuple[int, int]]) -> list[tuple[int, int]]:
+    """Grid cells covered by a vertex path (as returned by draw_connections)."""
+    cells = [path[0]]
+    for (x0, y0), (x1, y1) in zip(path, path[1:]):
+        step = 1 if x1 >= x0 else -1
+        cells.extend((x, y0) for x in range(x0 + step, x1 + step, step))
+        step = 1 if y1 >= y0 else -1
+        cells.extend((x1, y) for y in range(y0 + step, y1 + step, step))
+    return cells
+
+
+def reusable_paths(previous: RoutingRecord, grid: np.ndarray,
+                   offset: tuple[int, int], conns: dict) -> dict:
+    """Select the routes of a previous run that are still valid.
+
+    A net's previous paths are reused if the net has the same connections
+    as before, its paths reached all of its terminals, and no cell or port
+    was added, moved or removed on any grid cell the paths cover.
+
+    Args:
+        previous: Record of the previous run.
+        grid: Routing grid with cells and ports placed.
+        offset: Schematic-to-grid offset of grid.
+        conns: Connection tuples per net_key, as in RoutingRecord.
+
+    Returns:
+        dict: Grid-space vertex paths per net_key.
+    """
+    if previous.offset != offset or previous.obstacles.shape != grid.shape:
+        return {}
+    changed = previous.obstacles != grid
+    reuse = dict()
+    for key, net_conns in conns.items():
+        paths = previous.paths.get(key)
+        if not paths or previous.conns.get(key) != net_conns:
+            continue
+        cells = {cell for path in paths for cell in _path_cells(path)}
+        if any(start not in cells or end not in cells
+               for start, _, end, _ in net_conns):
+            continue
+        if any(changed[y, x] for x, y in cells):
+            continue
+        reuse[key] = paths
+    return reuse
 
 
 def calculate_vertices(outline: Rect4R, cells: Iterable[SchemInstance],
                        ports: Iterable[RoutingPort],
-                       connections: list[Connection]
+                       connections: list[Connection],
+                       previous: RoutingRecord | None = None
                        ) -> dict[Net, list[list[Vec2R]]]:
     """Place elements on a grid and perform A* routing.
 
@@ -1124,10 +1501,25 @@ def calculate_vertices(outline: Rect4R, cells: Iterable[SchemInstance],
         cells: Instances in the schematic.
         ports: Ports in the schematic.
         connections: Connections from net terminals to instance pins.
+        previous: Record of a previous run for the same schematic. Routes
+            of nets that reusable_paths() finds still valid are kept and
+            only the other nets are routed around them.
 
     Returns:
         dict: Schematic-space vertex paths keyed by Net.
     """
+    vertices, _ = calculate_vertices_record(outline, cells, ports,
+                                            connections, previous)
+    return vertices
+
+
+def calculate_vertices_record(outline: Rect4R, cells: Iterable[SchemInstance],
+                              ports: Iterable[RoutingPort],
+                              connections: list[Connection],
+                              previous: RoutingRecord | None = None
+                              ) -> tuple[dict[Net, list[list[Vec2R]]], RoutingRecord]:
+    """Like calculate_vertices(), but also returns the RoutingRecord of the
+    run, which can be passed as previous to a later run."""
     width = int(outline.ux - outline.lx)
     height = int(outline.uy - outline.ly)
     offset_x = (width  // 2) - int(outline.lx)
@@ -1137,12 +1529,55 @@ def calculate_vertices(outline: Rect4R, cells: Iterable[SchemInstance],
                           offset_x, offset_y)
     gconns = [GridConn.from_connection(c, offset_x, offset_y)
               for c in connections]
-    vertices = draw_connections(grid, gconns, width * 2, height * 2)
-    return {
+    obstacles = grid.copy()
+
+    nets = dict()
+    conns = defaultdict(list)
+    for c in gconns:
+        key = nets.setdefault(c.net, net_key(c.net))
+        conns[key].append((c.start, c.start_dir, c.end, c.end_dir))
+    conns = {key: tuple(net_conns) for key, net_conns in conns.items()}
+
+    reuse = dict()
+    if previous is not None:
+        reuse = reusable_paths(previous, grid, (offset_x, offset_y), conns)
+    if reuse:
+        fixed_paths = dict()
+        for net, key in nets.items():
+            if key in reuse:
+                fixed_paths[net] = reuse[key]
+                for path in reuse[key]:
+                    for x, y in _path_cells(path):
+                        if grid[y, x] == GRID_EMPTY:
+                            grid[y, x] = GRID_ROUTED
+        remaining = [c for c in gconns if c.net not in fixed_paths]
+        vertices = dict(fixed_paths)
+        if remaining:
+            routed, _ = _route_connections(grid, remaining,
+                                           width * 2, height * 2,
+                                           fixed_paths=fixed_paths)
+            vertices.update(routed)
+        # Same net order as a full run
+        _, sorted_connections = sort_connections(gconns)
+        order = {net: i for i, net in enumerate(
+            dict.fromkeys(c.net for c in sorted_connections))}
+        vertices = dict(sorted(vertices.items(),
+                               key=lambda item: order[item[0]]))
+    else:
+        vertices = draw_connections(grid, gconns, width * 2, height * 2,
+                                    workers=ROUTING_WORKERS)
+
+    record = RoutingRecord(
+        offset=(offset_x, offset_y),
+        obstacles=obstacles,
+        conns=conns,
+        paths={nets[net]: paths for net, paths in vertices.items()})
+    vertices = {
         net: [[Vec2R(x=x - offset_x, y=y - offset_y) for x, y in path]
               for path in paths]
         for net, paths in vertices.items()
     }
+    return vertices, record
 
 
 def adjust_outline_initial(node: Schematic) -> Rect4R | None:
@@ -1184,7 +1619,8 @@ def adjust_outline_initial(node: Schematic) -> Rect4R | None:
             outline = instance_geometry
     return outline
 
-def auto_wire(node: Schematic) -> None:
+def auto_wire(node: Schematic, previous: RoutingRecord | None = None
+              ) -> RoutingRecord | None:
     """Calculate routing vertices via A* pathfinding and attach wires to the node.
 
     Routing starts from the node's existing ``node.outline`` if set; otherwise
@@ -1193,6 +1629,11 @@ def auto_wire(node: Schematic) -> None:
 
     Args:
         node: Schematic to wire up.
+        previous: Record returned by auto_wire() for an earlier version of
+            the same schematic (see calculate_vertices()).
+
+    Returns:
+        RoutingRecord: Record of this run, or None if nothing was routed.
     """
     outline = node.outline
     if outline is None:
@@ -1220,7 +1661,7 @@ def auto_wire(node: Schematic) -> None:
     # Early return when ports exist but none need auto-wiring
     if ports and not any(net.auto_wire for net in ports):
         node.outline = outline
-        return
+        return None
 
     #======================
     # Determine connections
@@ -1247,9 +1688,10 @@ def auto_wire(node: Schematic) -> None:
     # Calculate the vertices and add them to the schematic
     #=====================================================
 
+    record = None
     if len(connections) > 0:
-        vertices_dict = calculate_vertices(outline, cells, ports.values(),
-                                           connections)
+        vertices_dict, record = calculate_vertices_record(
+            outline, cells, ports.values(), connections, previous)
         for net, paths in vertices_dict.items():
             # Example: node.vss % SchemWire(vertices=[Vec2R(x=6, y=1), Vec2R(x=6, y=2)])
             for path in paths:
@@ -1257,3 +1699,4 @@ def auto_wire(node: Schematic) -> None:
                     outline = outline.extend(vertex)
                 net % SchemWire(vertices=path)
     node.outline = outline
+    return record
@@ -346,26 +346,6 @@ class PinOfInstance:
 class SchematicError(Exception):
     pass
 
-def _net_at_pos(node: Schematic, pos: Vec2R) -> Net | None:
-    """Look up which Net occupies a position, via tap points or wire vertices."""
-    for tap in node.all(SchemTapPoint.pos_idx.query(pos)):
-        return tap.ref
-    for pv in node.all(PolyVec2R.pos_idx.query(pos)):
-        wire = pv.ref
-        if isinstance(wire, SchemWire):
-            return wire.ref
-    return None
-
-def _has_geometric_short(node: Schematic, pos: Vec2R, net: Net) -> bool:
-    """Check if a position is claimed by a different net."""
-    for tap in node.all(SchemTapPoint.pos_idx.query(pos)):
-        if tap.ref != net:
-            return True
-    for pv in node.all(PolyVec2R.pos_idx.query(pos)):
-        if isinstance(pv.ref, SchemWire) and pv.ref.ref != net:
-            return True
-    return False
-
 def _check_overlapping_instances(node: Schematic):
     """Check all instance pairs for overlapping or touching boundaries.
 
@@ -443,46 +423,122 @@ def _check_overlapping_segments(node: Schematic):
                 max_hi = hi
 
 class ConnectivityGraph:
+    """
+    Wiring connectivity of a schematic: an undirected graph of positions
+    (wire vertices, tap points) and Nets (reached through tap points), plus
+    a union-find over its connected components.
+
+    All positions claimed by tap points and wire vertices are collected into
+    a position -> net map once, so that checks need no pos_idx queries.
+    """
+
     def __init__(self, node: Schematic, suppress_errors: bool = False):
         """Build connectivity graph from wiring, check geometric shorts."""
+        self.subgraph = node.subgraph
         self.edges = {}
+        self.parent = {} #: union-find forest over the keys of edges
+        # Position -> nid of the net of the first (lowest nid) tap point /
+        # wire vertex at this position, matching the order of pos_idx:
+        self.tap_net = {}
+        self.wire_net = {}
+        # Position -> nids of all nets claiming it:
+        self.nets_at = defaultdict(set)
+        # Terminal (SchemPort / SchemInstanceConn) nid -> position, filled
+        # in by _check_terminals():
+        self.terminal_pos = {}
+
+        nodes = node.subgraph.nodes
+        for nid in node.all(SchemTapPoint, wrap_cursor=False):
+            tap = nodes[nid]
+            self.tap_net.setdefault(tap.pos, tap.ref)
+            self.nets_at[tap.pos].add(tap.ref)
+        net_of_wire = {}
+        for nid in node.all(PolyVec2R, wrap_cursor=False):
+            pv = nodes[nid]
+            try:
+                net_nid = net_of_wire[pv.ref]
+            except KeyError:
+                wire = nodes[pv.ref]
+                net_nid = wire.ref if isinstance(wire, SchemWire.Tuple) else None
+                net_of_wire[pv.ref] = net_nid
+            if net_nid is not None:
+                self.wire_net.setdefault(pv.pos, net_nid)
+                self.nets_at[pv.pos].add(net_nid)
+
         short_reported = set()
+        def check_short(pos):
+            if suppress_errors or pos in short_reported:
+                return
+            if len(self.nets_at[pos]) > 1:
+                node.root % SchemErrorMarker(pos=pos, error_type=SchemErrorType.GeometricShort)
+                short_reported.add(pos)
+
         for net in node.all(Net):
             for tap in node.all(SchemTapPoint.ref_idx.query(net)):
                 self.add_biedge(tap.pos, net)
-                if not suppress_errors and tap.pos not in short_reported and _has_geometric_short(node, tap.pos, net):
-                    node.root % SchemErrorMarker(pos=tap.pos, error_type=SchemErrorType.GeometricShort)
-                    short_reported.add(tap.pos)
+                check_short(tap.pos)
 
             for poly in node.all(SchemWire.ref_idx.query(net)):
                 vertices = poly.vertices()
                 for a, b in itertools.pairwise(vertices):
                     self.add_biedge(a, b)
-                if not suppress_errors:
-                    for pos in vertices:
-                        if pos not in short_reported and _has_geometric_short(node, pos, net):
-                            node.root % SchemErrorMarker(pos=pos, error_type=SchemErrorType.GeometricShort)
-                            short_reported.add(pos)
+                for pos in vertices:
+                    check_short(pos)
 
     def add_biedge(self, p1, p2):
         if p1 not in self.edges:
             self.edges[p1] = []
+            self.parent[p1] = p1
         self.edges[p1].append(p2)
         if p2 not in self.edges:
             self.edges[p2] = []
+            self.parent[p2] = p2
         self.edges[p2].append(p1)
-
-    def reachable_from(self, cur, visited=None):
-        if visited is None:
-            visited=set()
-        if cur in visited:
-            return
-        visited.add(cur)
-        yield cur
-        for nxt in self.edges[cur]:
-            yield from self.reachable_from(nxt, visited)
-
-def _check_conn_points(node: Schematic, suppress_errors: bool = False):
+        r1 = self.find(p1)
+        r2 = self.find(p2)
+        if r1 != r2:
+            self.parent[r2] = r1
+
+    def add_tap(self, pos: Vec2R, net: Net):
+        """Registers a SchemTapPoint of net inserted at pos."""
+        self.tap_net.setdefault(pos, net.nid)
+        self.nets_at[pos].add(net.nid)
+        self.add_biedge(pos, net)
+
+    def find(self, key):
+        """Returns the representative of key's connected component."""
+        parent = self.parent
+        while parent[key] != key:
+            # Path halving:
+            parent[key] = parent[parent[key]]
+            key = parent[key]
+        return key
+
+    def net_at(self, pos: Vec2R) -> Net | None:
+        """Net occupying a position, via tap points or wire vertices."""
+        try:
+            nid = self.tap_net[pos]
+        except KeyError:
+            try:
+                nid = self.wire_net[pos]
+            except KeyError:
+                return None
+        return self.subgraph.cursor_at(nid)
+
+    def reachable_from(self, cur):
+        """Iterates over all graph nodes reachable from cur (depth-first)."""
+        visited = {cur}
+        stack = [cur]
+        while stack:
+            cur = stack.pop()
+            yield cur
+            for nxt in reversed(self.edges[cur]):
+                if nxt not in visited:
+                    visited.add(nxt)
+                    stack.append(nxt)
+
+def _check_conn_points(node: Schematic, g: ConnectivityGraph,
+                       suppress_errors: bool = False):
     """Validate SchemConnPoints are correctly placed."""
     if suppress_errors:
         return
@@ -491,7 +547,7 @@ def _check_conn_points(node: Schematic, suppress_errors: bool = False):
         if p.pos in seen_positions:
             node.root % SchemErrorMarker(pos=p.pos, error_type=SchemErrorType.OverlappingSchemConnPoints)
         else:
-            net_here = _net_at_pos(node, p.pos)
+            net_here = g.net_at(p.pos)
             if net_here is None or net_here != p.ref:
                 node.root % SchemErrorMarker(pos=p.pos, error_type=SchemErrorType.IncorrectlyPlacedSchemConnPoint)
             else:
@@ -503,48 +559,57 @@ def _check_terminals(node: Schematic, g: ConnectivityGraph,
     """Validate terminals (ports + instance pins). Returns terminal positions."""
     terminal_positions = set()
 
-    def add_terminal(t):
+    def add_terminal(t, pos):
         if not isinstance(t.ref, Net):
             raise TypeError(f"Illegal connection of {t} to {type(t.ref)}.")
-        if t.pos in terminal_positions:
+        if pos in terminal_positions:
             if not suppress_errors:
-                node.root % SchemErrorMarker(pos=t.pos, error_type=SchemErrorType.OverlappingTerminals)
+                node.root % SchemErrorMarker(pos=pos, error_type=SchemErrorType.OverlappingTerminals)
             return
-        terminal_positions.add(t.pos)
+        terminal_positions.add(pos)
 
-        net_here = _net_at_pos(node, t.pos)
+        net_here = g.net_at(pos)
         if net_here is None:
             if add_terminal_taps:
-                t.ref % SchemTapPoint(pos=t.pos, align=t.align.unflip())
-                g.add_biedge(t.pos, t.ref)
+                t.ref % SchemTapPoint(pos=pos, align=t.align.unflip())
+                g.add_tap(pos, t.ref)
             elif not suppress_errors:
-                node.root % SchemErrorMarker(pos=t.pos, error_type=SchemErrorType.MissingTerminalConnection)
+                node.root % SchemErrorMarker(pos=pos, error_type=SchemErrorType.MissingTerminalConnection)
                 return
             else:
                 return
         elif net_here != t.ref:
             if not suppress_errors:
-                node.root % SchemErrorMarker(pos=t.pos, error_type=SchemErrorType.IncorrectTerminalConnection)
+                node.root % SchemErrorMarker(pos=pos, error_type=SchemErrorType.IncorrectTerminalConnection)
             return
 
+    nodes = node.subgraph.nodes
     for port in node.all(SchemPort):
-        add_terminal(port)
+        pos = port.pos
+        g.terminal_pos[port.nid] = pos
+        add_terminal(port, pos)
     for inst in node.all(SchemInstance):
+        trans = inst.loc_transform()
+        conn_nids = list(node.all(SchemInstanceConn.ref_idx.query(inst), wrap_cursor=False))
         pins_expected = set(inst.symbol.all(Pin, wrap_cursor=False))
-        pins_found = {c.there.nid for c in inst.conns()}
+        pins_found = {nodes[nid].there for nid in conn_nids}
         pins_missing = pins_expected - pins_found
         pins_stray = pins_found - pins_expected
         if not suppress_errors:
             for pin_nid in pins_missing:
                 pin = inst.symbol.subgraph.cursor_at(pin_nid)
-                pin_pos = inst.loc_transform() * pin.pos
-                pin_align = inst.loc_transform().d4 * pin.align
+                pin_pos = trans * pin.pos
+                pin_align = trans.d4 * pin.align
                 node.root % SchemErrorMarker(pos=pin_pos, error_type=SchemErrorType.UnconnectedPin, align=pin_align)
             if len(pins_stray) > 0:
                 node.root % SchemErrorMarker(pos=inst.pos, error_type=SchemErrorType.StrayPinsInPortmap)
         if pins_expected == pins_found:
-            for conn in node.all(SchemInstanceConn.ref_idx.query(inst)):
-                add_terminal(PinOfInstance(conn))
+            symbol_sg = inst.symbol.subgraph
+            for nid in conn_nids:
+                conn = node.subgraph.cursor_at(nid)
+                pos = trans * symbol_sg.nodes[nodes[nid].there].pos
+                g.terminal_pos[nid] = pos
+                add_terminal(PinOfInstance(conn), pos)
 
     return terminal_positions
 
@@ -559,12 +624,13 @@ def _check_wiring_validity(node: Schematic, g: ConnectivityGraph,
     At non-terminals: flags dead-end wiring, stray conn points on simple
     pass-throughs, and junctions (>2 connections) missing a conn point.
     """
+    conn_point_positions = {p.pos for p in node.all(SchemConnPoint)}
     for pos, connections in g.edges.items():
         if isinstance(pos, Net):
             continue
         assert isinstance(pos, Vec2R)
         is_terminal = pos in terminal_positions
-        has_conn_point = any(True for _ in node.all(SchemConnPoint.pos_idx.query(pos)))
+        has_conn_point = pos in conn_point_positions
         if is_terminal:
             if not suppress_errors:
                 if has_conn_point:
@@ -579,7 +645,7 @@ def _check_wiring_validity(node: Schematic, g: ConnectivityGraph,
                     node.root % SchemErrorMarker(pos=pos, error_type=SchemErrorType.StraySchemConnPoint)
             if len(connections) > 2 and not has_conn_point:
                 if add_conn_points:
-                    net = _net_at_pos(node, pos)
+                    net = g.net_at(pos)
                     net % SchemConnPoint(pos=pos)
                 elif not suppress_errors:
                     node.root % SchemErrorMarker(pos=pos, error_type=SchemErrorType.MissingSchemConnPoint)
@@ -597,42 +663,45 @@ def _check_net_connectivity(node: Schematic, g: ConnectivityGraph,
     # Build terminals-of-net from indices
     terminals_of_net = {net: [] for net in node.all(Net)}
     for port in node.all(SchemPort):
-        terminals_of_net[port.ref].append(port)
+        pos = g.terminal_pos.get(port.nid)
+        if pos is None:
+            pos = port.pos
+        terminals_of_net[port.ref].append((port, pos))
     for conn in node.all(SchemInstanceConn):
-        terminals_of_net[conn.here].append(PinOfInstance(conn))
+        t = PinOfInstance(conn)
+        pos = g.terminal_pos.get(conn.nid)
+        if pos is None:
+            pos = t.pos
+        terminals_of_net[conn.here].append((t, pos))
 
     for net, terminals in terminals_of_net.items():
-        if len(terminals) == 0:
-            continue
-        # Skip terminals not in the connectivity graph (already flagged
-        # as MissingTerminalConnection).
-        reachable_terminals = [t for t in terminals if t.pos in g.edges]
-        if len(reachable_terminals) == 0:
+        # Group terminals by wiring component. Terminals not in the
+        # connectivity graph are skipped (already flagged as
+        # MissingTerminalConnection).
+        components = {}
+        for t, pos in terminals:
+            if pos in g.parent:
+                components.setdefault(g.find(pos), []).append((t, pos))
+        if len(components) <= 1:
             continue
+        net_root = g.find(net) if net in g.parent else None
         terminal_components = []
-        seen_terminals = set()
-        for terminal in reachable_terminals:
-            if terminal.pos in seen_terminals:
-                continue
-            reaches = set(g.reachable_from(terminal.pos))
-            component = [t for t in reachable_terminals if t.pos in reaches]
-            seen_terminals.update(t.pos for t in component)
+        for root, component in components.items():
             # Taps reach the Net node and ports display the net name directly.
-            labeled = net in reaches or any(
-                not isinstance(t, PinOfInstance) for t in component)
+            labeled = root == net_root or any(
+                not isinstance(t, PinOfInstance) for t, _ in component)
             terminal_components.append((component, labeled))
 
-        if len(terminal_components) > 1:
-            # Only unlabeled components are cut off. With no label anywhere,
-            # keep the largest component as the net's main part instead.
-            stray = [c for c, labeled in terminal_components if not labeled]
-            if len(stray) == len(terminal_components):
-                stray.remove(max(stray, key=len))
-            for component in stray:
-                node.root % SchemErrorMarker(
-                    pos=component[0].pos,
-                    error_type=SchemErrorType.NetMissesWiring
-                )
+        # Only unlabeled components are cut off. With no label anywhere,
+        # keep the largest component as the net's main part instead.
+        stray = [c for c, labeled in terminal_components if not labeled]
+        if len(stray) == len(terminal_components):
+            stray.remove(max(stray, key=len))
+        for component in stray:
+            node.root % SchemErrorMarker(
+                pos=component[0][1],
+                error_type=SchemErrorType.NetMissesWiring
+            )
 
 def schem_check(node: Schematic, add_conn_points: bool=False, add_terminal_taps=False) -> bool:
     """Validate schematic connectivity and wiring structure.
@@ -640,6 +709,8 @@ def schem_check(node: Schematic, add_conn_points: bool=False, add_terminal_taps=
     Checks are run in phases. If an early phase produces errors,
     later phases suppress further error reporting but still perform
     structural work (e.g. inserting SchemConnPoints or SchemTapPoints).
+    Each phase is a single pass over the schematic; positions are looked
+    up in the ConnectivityGraph built once in the third phase.
 
     Args:
         node: The schematic to validate.
@@ -660,7 +731,7 @@ def schem_check(node: Schematic, add_conn_points: bool=False, add_terminal_taps=
     suppress = suppress or node.has_errors()
     g = ConnectivityGraph(node, suppress_errors=suppress)
     suppress = suppress or node.has_errors()
-    _check_conn_points(node, suppress_errors=suppress)
+    _check_conn_points(node, g, suppress_errors=suppress)
     suppress = suppress or node.has_errors()
     terminal_positions = _check_terminals(node, g, add_terminal_taps, suppress_errors=suppress)
     suppress = suppress or node.has_errors()
@@ -0,0 +1,156 @@
+# SPDX-FileCopyrightText: 2026 ORDeC contributors
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Incremental auto_wire() and check() for regenerated schematics.
+
+When a schematic viewgen is evaluated again (e.g. after its source was
+edited), most of the schematic usually is the same as before. The result of
+the previous run is kept per cell, with nets and instances identified by
+their NPath, and reused as follows:
+
+- auto_wire() keeps the routes of all nets whose connections and surrounding
+  obstacles are unchanged and only routes the remaining nets around them
+  (see auto_wire.reusable_paths()).
+- check() is skipped if everything it looks at is unchanged. The tap points,
+  connection points and error markers it added last time are then added
+  again. Since the check phases suppress each other's errors globally, any
+  change runs the complete check.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import NamedTuple
+from public import public
+
+from ..core import *
+from .auto_wire import auto_wire, net_key, RoutingRecord
+from .helpers import schem_check
+
+# Number of schematics whose previous results are kept.
+INCREMENTAL_CACHE_SIZE = 32
+
+class _Record(NamedTuple):
+    routing: RoutingRecord | None
+    check_input: tuple
+    check_output: tuple
+
+# Records of recently generated schematics, most recently used last. Shared
+# by all server threads.
+_records = OrderedDict()
+_records_lock = threading.Lock()
+
+@public
+def schematic_key(node: Schematic):
+    """
+    Key under which the results for node are kept: the cell's class (by
+    module and qualified name, which stay the same when a module is
+    reloaded) and parameters. Returns None for schematics without a cell or
+    with unhashable parameters.
+    """
+    cell = node.cell
+    if cell is None:
+        return None
+    key = (type(cell).__module__, type(cell).__qualname__, cell.params)
+    try:
+        hash(key)
+    except TypeError:
+        return None
+    return key
+
+def _node_key(node) -> tuple:
+    if node.npath_nid is None:
+        return (None, node.nid)
+    return tuple(node.full_path_list())
+
+def _symbol_signature(symbol: Symbol) -> tuple:
+    return (symbol.outline, tuple(
+        (_node_key(pin), pin.pos, pin.align) for pin in symbol.all(Pin)))
+
+def check_signature(node: Schematic) -> tuple:
+    """Everything schem_check() looks at, with nodes identified by NPath."""
+    symbols = {}
+    def symbol_signature(symbol):
+        try:
+            return symbols[symbol.subgraph]
+        except KeyError:
+            sig = symbols[symbol.subgraph] = _symbol_signature(symbol)
+            return sig
+
+    return (
+        tuple(net_key(net) for net in node.all(Net)),
+        tuple((net_key(p.ref), p.pos, p.align) for p in node.all(SchemPort)),
+        tuple((_node_key(i), i.pos, i.orientation, symbol_signature(i.symbol))
+            for i in node.all(SchemInstance)),
+        tuple((_node_key(c.ref), _node_key(c.there), net_key(c.here))
+            for c in node.all(SchemInstanceConn)),
+        tuple((net_key(w.ref), tuple(w.vertices()))
+            for w in node.all(SchemWire)),
+        tuple((net_key(t.ref), t.pos, t.align)
+            for t in node.all(SchemTapPoint)),
+        tuple((net_key(p.ref), p.pos) for p in node.all(SchemConnPoint)),
+        tuple((m.pos, m.align, m.error_type)
+            for m in node.all(SchemErrorMarker)),
+    )
+
+def _added_nodes(node: Schematic, before: set) -> tuple:
+    added = []
+    for n in node.all(SchemTapPoint):
+        if n.nid not in before:
+            added.append((n.nid, SchemTapPoint, net_key(n.ref),
+                dict(pos=n.pos, align=n.align)))
+    for n in node.all(SchemConnPoint):
+        if n.nid not in before:
+            added.append((n.nid, SchemConnPoint, net_key(n.ref),
+                dict(pos=n.pos)))
+    for n in node.all(SchemErrorMarker):
+        if n.nid not in before:
+            added.append((n.nid, SchemErrorMarker, None,
+                dict(pos=n.pos, align=n.align, error_type=n.error_type)))
+    added.sort(key=lambda a: a[0])
+    return tuple(a[1:] for a in added)
+
+def _marker_nids(node: Schematic) -> set:
+    nids = set()
+    for t in (SchemTapPoint, SchemConnPoint, SchemErrorMarker):
+        nids.update(node.all(t, wrap_cursor=False))
+    return nids
+
+@public
+def incremental_auto_wire_check(node: Schematic, key=None):
+    """
+    Runs auto_wire() and check(add_conn_points=True, add_terminal_taps=True)
+    on node, reusing the results of the previous run with the same key
+    where possible. Without key, both run in full.
+
+    The result does not depend on whether anything was reused, except that
+    nets routed around reused routes can take different paths than in a
+    complete run.
+    """
+    previous = None
+    if key is not None:
+        with _records_lock:
+            previous = _records.get(key)
+
+    routing = auto_wire(node, previous=previous.routing if previous else None)
+
+    check_input = check_signature(node)
+    if previous is not None and previous.check_input == check_input:
+        nets = {net_key(net): net for net in node.all(Net)}
+        for node_type, ref, attrs in previous.check_output:
+            if ref is None:
+                node.root % node_type(**attrs)
+            else:
+                nets[ref] % node_type(**attrs)
+        check_output = previous.check_output
+    else:
+        before = _marker_nids(node)
+        schem_check(node, add_conn_points=True, add_terminal_taps=True)
+        check_output = _added_nodes(node, before)
+
+    if key is not None:
+        with _records_lock:
+            _records[key] = _Record(routing, check_input, check_output)
+            _records.move_to_end(key)
+            while len(_records) > INCREMENTAL_CACHE_SIZE:
+                _records.popitem(last=False)
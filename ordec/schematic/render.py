@@ -3,6 +3,10 @@
 
 import xml.etree.ElementTree as ET
 import math
+import copy
+import hashlib
+import threading
+from collections import OrderedDict
 from contextlib import contextmanager
 from ..core import *
 from enum import Enum
@@ -25,6 +29,8 @@ class VAlign(Enum):
     Bottom = 2
     Middle = 3
 
+SVG_NS = "http://www.w3.org/2000/svg"
+
 class ArrowType(Enum):
     Pin = 1
     Port = 2
@@ -33,6 +39,209 @@ def clean_css(css: str) -> str:
     """remove newlines / unneeded spaces from CSS literal string"""
     return re.sub(r"\s+", " ", css).strip()
 
+def indent_element(elem: ET.Element, depth: int):
+    """
+    Add newlines and indentation below elem, which is located at the given
+    depth, without messing up <text>.
+    """
+    if elem.tag in ('text',):
+        # Spaces within <text></text> are sometimes rendered. To avoid this,
+        # no not add spaces / new lines within <text></text.
+        return
+    if elem.text:
+        # Also skip elements with leading text to avoid messing up something
+        # here. This is likely never the case, unless indent_element() is
+        # called twice.
+        return
+    if len(elem):
+        # For elements that have children, indent children:
+
+        indent = '  '
+        indent_here  = '\n' + depth*indent
+        indent_below = '\n' + (depth + 1)*indent
+
+        # Increase indentation after <opening> tag:
+        elem.text =  indent_below
+        for i, subelem in enumerate(elem):
+            if not subelem.tail:
+                if i < len(elem)-1:
+                    subelem.tail = indent_below
+                else:
+                    # Reduce indentation for </closing> tag after last element:
+                    subelem.tail = indent_here
+            indent_element(subelem, depth + 1)
+
+class EtreeSvgWriter:
+    """
+    SVG backend of Renderer that builds an xml.etree.ElementTree, which is
+    indented (if requested) and serialized at the end.
+
+    The writer has a topmost <g>, whose attributes are top_attrib. The
+    start(), end() and element() methods write within this <g>.
+    """
+
+    def __init__(self, css: str|None, indent: bool=False):
+        self.indent = indent
+        self.root = ET.Element('svg', xmlns=SVG_NS)
+        if css is not None:
+            style = ET.SubElement(self.root, 'style', type='text/css')
+            style.text = css
+        self.top = ET.SubElement(self.root, 'g')
+        self.root_attrib = self.root.attrib
+        self.top_attrib = self.top.attrib
+        self.defs = None
+        self.stack = [] #: open elements below the topmost <g>
+
+    def start(self, tag: str, attrib: dict):
+        """Opens an element, which is closed by end()."""
+        parent = self.stack[-1] if self.stack else self.top
+        self.stack.append(ET.SubElement(parent, tag, attrib))
+
+    def end(self):
+        self.stack.pop()
+
+    def element(self, tag: str, attrib: dict, text: str=None):
+        """Writes an element without child elements."""
+        parent = self.stack[-1] if self.stack else self.top
+        e = ET.SubElement(parent, tag, attrib)
+        if text is not None:
+            e.text = text
+
+    def add_def(self, fragment: 'SymbolFragment'):
+        """Adds a fragment to <defs>, which precedes the topmost <g>."""
+        if self.defs is None:
+            self.defs = ET.Element('defs')
+            self.root.insert(list(self.root).index(self.top), self.defs)
+        # Copy, as indent_element() modifies the tree:
+        self.defs.append(copy.deepcopy(fragment.element))
+
+    def indent_xml(self):
+        indent_element(self.root, 0)
+
+    def inner_svg(self) -> bytes:
+        if self.indent:
+            self.indent_xml()
+        return b''.join(ET.tostring(e) for e in self.root)
+
+    def svg(self) -> bytes:
+        if self.indent:
+            self.indent_xml()
+        return ET.tostring(self.root)
+
+    def inner_svg_str(self) -> str:
+        return self.inner_svg().decode('ascii')
+
+_escape_attrib = str.maketrans({'&': '&amp;', '<': '&lt;', '>': '&gt;',
+    '"': '&quot;', '\r': '&#13;', '\n': '&#10;', '\t': '&#09;'})
+_escape_cdata = str.maketrans({'&': '&amp;', '<': '&lt;', '>': '&gt;'})
+
+def _start_tag(tag: str, attrib: dict) -> str:
+    return '<' + tag + ''.join(f' {k}="{v.translate(_escape_attrib)}"'
+        for k, v in attrib.items())
+
+class StreamSvgWriter:
+    """
+    SVG backend of Renderer that writes SVG text fragments into a list as
+    drawing proceeds, which avoids building and walking an element tree.
+    Indentation is decided upfront. The output is identical to that of
+    EtreeSvgWriter.
+    """
+
+    def __init__(self, css: str|None, indent: bool=False):
+        self.css = css
+        self.indent = indent
+        self.root_attrib = {'xmlns': SVG_NS}
+        self.top_attrib = {}
+        self.defs = []
+        self.parts = [] #: content of the topmost <g>
+        self.stack = [] #: [tag, has_children] of open elements below the topmost <g>
+        self.top_has_children = False
+        self.in_text = 0
+
+    def _newline(self, depth: int) -> str:
+        return '\n' + depth*'  ' if self.indent else ''
+
+    def _begin_child(self):
+        if self.stack:
+            parent = self.stack[-1]
+            if not parent[1]:
+                self.parts.append('>')
+                parent[1] = True
+        else:
+            self.top_has_children = True
+        if self.indent and not self.in_text:
+            # Depth 0 is <svg>, depth 1 the topmost <g>.
+            self.parts.append(self._newline(len(self.stack) + 2))
+
+    def start(self, tag: str, attrib: dict):
+        """Opens an element, which is closed by end()."""
+        self._begin_child()
+        self.parts.append(_start_tag(tag, attrib))
+        self.stack.append([tag, False])
+        if tag == 'text':
+            self.in_text += 1
+
+    def end(self):
+        tag, has_children = self.stack.pop()
+        if tag == 'text':
+            self.in_text -= 1
+        if has_children:
+            if self.indent and not self.in_text and tag != 'text':
+                self.parts.append(self._newline(len(self.stack) + 2))
+            self.parts.append(f'</{tag}>')
+        else:
+            self.parts.append(' />')
+
+    def element(self, tag: str, attrib: dict, text: str=None):
+        """Writes an element without child elements."""
+        self._begin_child()
+        if text:
+            self.parts.append(f'{_start_tag(tag, attrib)}>{text.translate(_escape_cdata)}</{tag}>')
+        else:
+            self.parts.append(_start_tag(tag, attrib) + ' />')
+
+    def add_def(self, fragment: 'SymbolFragment'):
+        """Adds a fragment to <defs>, which precedes the topmost <g>."""
+        self.defs.append(fragment.text(self.indent))
+
+    def indent_xml(self):
+        if not self.indent:
+            raise TypeError("StreamSvgWriter indents while writing, pass indent=True instead.")
+
+    def _root_children(self) -> list[str]:
+        ret = []
+        if self.css is not None:
+            ret.append(f'<style type="text/css">{self.css.translate(_escape_cdata)}</style>')
+        if self.defs:
+            nl = self._newline(2)
+            ret.append('<defs>' + ''.join(nl + d for d in self.defs)
+                + self._newline(1) + '</defs>')
+        top = _start_tag('g', self.top_attrib)
+        if self.top_has_children:
+            top += '>' + ''.join(self.parts) + self._newline(1) + '</g>'
+        else:
+            top += ' />'
+        ret.append(top)
+        return ret
+
+    def inner_svg_str(self) -> str:
+        if self.indent:
+            return '\n  '.join(self._root_children()) + '\n'
+        else:
+            return ''.join(self._root_children())
+
+    def inner_svg(self) -> bytes:
+        return self.inner_svg_str().encode('ascii', 'xmlcharrefreplace')
+
+    def svg(self) -> bytes:
+        head = _start_tag('svg', self.root_attrib) + '>' + self._newline(1)
+        return (head + self.inner_svg_str() + '</svg>').encode('ascii', 'xmlcharrefreplace')
+
+SVG_WRITERS = {
+    'etree': EtreeSvgWriter,
+    'stream': StreamSvgWriter,
+}
+
 class Renderer:
     """
     Instantiate the Renderer class and then call one of its render_ methods,
@@ -56,37 +265,31 @@ class Renderer:
     font_size_actual_grid_units = 0.66
     css = ""
 
-    def __init__(self, include_nids: bool=True, enable_css: bool=True):
+    def __init__(self, include_nids: bool=True, enable_css: bool=True,
+            backend: str='etree', indent: bool=False):
         """
         Args:
             include_nids: controls whether to include id="nid123" attributes.
                 These ids make the SVG more useful for interactions, but make
                 them less comparable in test scenarios.
+            backend: 'etree' builds an ElementTree (EtreeSvgWriter), 'stream'
+                writes SVG text directly (StreamSvgWriter). Both produce the
+                same output, 'stream' is faster.
+            indent: controls whether to add newlines and indentation to the
+                SVG.
         """
         self.include_nids = include_nids
-
-        self.root = ET.Element('svg', xmlns="http://www.w3.org/2000/svg", )
-        if enable_css:
-            style = ET.SubElement(self.root, 'style', type='text/css')
-            style.text = self.css
-        self.group_stack = [ET.SubElement(self.root, 'g')]
-
-    @property
-    def cur_group(self):
-        return self.group_stack[-1]
+        self.writer = SVG_WRITERS[backend](self.css if enable_css else None, indent=indent)
 
     @contextmanager
-    def subgroup(self, node=None, existing_group=None, data_nid=None):
-        if existing_group:
-            self.group_stack.append(existing_group)
-        else:
-            self.group_stack.append(ET.SubElement(self.cur_group, 'g'))
+    def subgroup(self, attrib: dict=None, data_nid=None):
         if data_nid is not None and self.include_nids:
-            self.cur_group.attrib['data-nid'] = str(data_nid)
+            attrib = {'data-nid': str(data_nid)} | (attrib or {})
+        self.writer.start('g', attrib or {})
         try:
             yield
         finally:
-            self.group_stack.pop()
+            self.writer.end()
 
     def draw_label(self, text: str, trans: TD4R, halign=HAlign.Left, valign=VAlign.Top, space=None, svg_class=""):
         """
@@ -122,26 +325,27 @@ class Renderer:
         # Rounding avoids float noise (0.045000000000000005) in the SVG.
         # The negative y_scale un-flips the y-axis flip of setup_canvas.
         scale = round(self.font_size_actual_grid_units / (self.font_size_internal_pt * 96/72), 6)
-        tag = ET.SubElement(self.cur_group, 'text', transform=g_matrix.svg_transform(x_scale=scale, y_scale=-scale))
+        attrib = {
+            'transform': g_matrix.svg_transform(x_scale=scale, y_scale=-scale),
+            'dominant-baseline': {
+                VAlign.Top: 'hanging',
+                VAlign.Bottom: 'ideographic',
+                VAlign.Middle: 'middle',
+                }[valign],
+            'text-anchor': {HAlign.Left: 'start', HAlign.Right: 'end'}[halign],
+            'class': svg_class,
+        }
 
         lines = text.split('\n')
         if len(lines) == 1:
             # Make the XML tree more compact by skipping <tspan> for single-line text:
-            tag.text = lines[0]
+            self.writer.element('text', attrib, lines[0])
         else:
+            self.writer.start('text', attrib)
             for idx, line in enumerate(lines):
                 y = idx+1-len(lines)
-                tspan=ET.SubElement(tag, 'tspan', x="0", y=f"{y}em")
-                tspan.text = line
-
-        tag.attrib['dominant-baseline'] = {
-            VAlign.Top: 'hanging',
-            VAlign.Bottom: 'ideographic',
-            VAlign.Middle: 'middle',
-            }[valign]
-        tag.attrib['text-anchor'] = {HAlign.Left: 'start', HAlign.Right: 'end'}[halign]
-        tag.attrib['class'] = svg_class
-
+                self.writer.element('tspan', {'x': "0", 'y': f"{y}em"}, line)
+            self.writer.end()
 
     def setup_canvas(self, rect: Rect4R, padding: float = 1.0, scale_viewbox: float|int = 1):
         """
@@ -162,7 +366,7 @@ class Renderer:
                 such as 1e6 for layouts.
         """
 
-        assert len(self.group_stack) == 1 # ensures that there is no subgroup() currently active.
+        assert not self.writer.stack # ensures that there is no subgroup() currently active.
 
         lx, ly, ux, uy = rect.tofloat()
 
@@ -173,66 +377,39 @@ class Renderer:
         w_p = ux_p - lx_p
         h_p = uy_p - ly_p
 
-        self.root.attrib['width'] = f'{w_p*self.pixel_per_unit}px'
-        self.root.attrib['height'] = f'{h_p*self.pixel_per_unit}px'
+        root_attrib = self.writer.root_attrib
+        root_attrib['width'] = f'{w_p*self.pixel_per_unit}px'
+        root_attrib['height'] = f'{h_p*self.pixel_per_unit}px'
         self.viewbox = [scale_viewbox*lx_p, scale_viewbox*ly_p, scale_viewbox*w_p, scale_viewbox*h_p]
-        self.root.attrib['viewBox'] = ' '.join([str(x) for x in self.viewbox])
+        root_attrib['viewBox'] = ' '.join([str(x) for x in self.viewbox])
         # This matrix maps (x, y) to (x, (uy+ly)-y), both scaled by
         # scale_viewbox: it flips the y axis (schematic y points up, SVG y
         # points down) by mirroring about the canvas midline y=(uy+ly)/2,
         # which maps the canvas y range [ly, uy] onto itself. This also
         # holds for the padded range, because the padding is symmetric.
-        self.cur_group.attrib['transform']=f"matrix({scale_viewbox} 0 0 {-scale_viewbox} 0 {(uy+ly)*scale_viewbox})"
-
-    def indent_xml_recursive(self, elem, depth):
-        if elem.tag in ('text',):
-            # Spaces within <text></text> are sometimes rendered. To avoid this,
-            # no not add spaces / new lines within <text></text.
-            return
-        if elem.text:
-            # Also skip elements with leading text to avoid messing up something
-            # here. This is likely never the case, unless indent_xml() is called
-            # twice.
-            return
-        if len(elem):
-            # For elements that have children, indent children:
-
-            indent = '  '
-            indent_here  = '\n' + depth*indent
-            indent_below = '\n' + (depth + 1)*indent
-
-            # Increase indentation after <opening> tag:
-            elem.text =  indent_below
-            for i, subelem in enumerate(elem):
-                if not subelem.tail:
-                    if i < len(elem)-1:
-                        subelem.tail = indent_below
-                    else:
-                        # Reduce indentation for </closing> tag after last element:
-                        subelem.tail = indent_here
-                self.indent_xml_recursive(subelem, depth + 1)
+        self.writer.top_attrib['transform']=f"matrix({scale_viewbox} 0 0 {-scale_viewbox} 0 {(uy+ly)*scale_viewbox})"
 
     def indent_xml(self):
         """Add newlines and indent SVG without messing up <text>."""
-        self.indent_xml_recursive(self.root, 0)
+        self.writer.indent_xml()
 
     def inner_svg(self) -> bytes:
         """Like svg(), but without the top <svg> tag."""
-        return b''.join(ET.tostring(e) for e in self.root)
+        return self.writer.inner_svg()
 
     def svg(self) -> bytes:
         """
         Returns SVG XML data as bytes. (Does not depend on cairo or other
         fancy SVG libraries.)
         """
-        return ET.tostring(self.root)
+        return self.writer.svg()
 
     def webdata(self):
         return 'svg', {
-            'inner': self.inner_svg().decode('ascii'),
+            'inner': self.writer.inner_svg_str(),
             'viewbox': self.viewbox,
-            'width': self.root.attrib.get('width'),
-            'height': self.root.attrib.get('height'),
+            'width': self.writer.root_attrib.get('width'),
+            'height': self.writer.root_attrib.get('height'),
         }
 
 class SchematicRenderer(Renderer):
@@ -266,7 +443,7 @@ class SchematicRenderer(Renderer):
             fill: none;
             stroke-width: 0.1;
         }
-        g[data-srcline] .symbolOutline {
+        g[data-srcline] .symbolOutline, g[data-srcline] use {
             pointer-events: all;
         }
         .grid {
@@ -290,21 +467,30 @@ class SchematicRenderer(Renderer):
         }
     """)
 
-    def __init__(self, include_nids: bool=True, enable_css: bool=True, enable_grid: bool=True):
+    def __init__(self, include_nids: bool=True, enable_css: bool=True, enable_grid: bool=True,
+            symbol_defs: bool=False, **kwargs):
+        """
+        Args:
+            symbol_defs: if True, render_schematic() draws each distinct symbol
+                (per orientation) once under <defs> and places instances via
+                <use>. Only the instance names are drawn per instance.
+
+        Further arguments are passed to Renderer.
+        """
         self.enable_grid = enable_grid
-        return super().__init__(include_nids=include_nids, enable_css=enable_css)
+        self.symbol_defs = symbol_defs
+        self.defs_ids = set()
+        return super().__init__(include_nids=include_nids, enable_css=enable_css, **kwargs)
 
     def draw_grid(self, rect: Rect4R, dot_size: float = 0.1):
         lx, ly, ux, uy = rect.tofloat()
-        with self.subgroup():
-            self.cur_group.attrib['class']='grid'
-
+        with self.subgroup({'class': 'grid'}):
             for x in range(math.floor(lx), math.ceil(ux)+1):
                 for y in range(math.floor(ly), math.ceil(uy)+1):
-                    ET.SubElement(self.cur_group, 'rect',
-                        x=str(x - dot_size/2), y=str(y - dot_size/2),
-                        height=str(dot_size), width=str(dot_size)
-                        )
+                    self.writer.element('rect', {
+                        'x': str(x - dot_size/2), 'y': str(y - dot_size/2),
+                        'height': str(dot_size), 'width': str(dot_size),
+                        })
 
     def render_symbol(self, s: Symbol):
         self.setup_canvas(s.outline)
@@ -318,33 +504,38 @@ class SchematicRenderer(Renderer):
             self.draw_grid(s.outline)
 
         for poly in s.all(SchemWire):
-            p = ET.SubElement(self.cur_group, 'path', d=poly.svg_path())
-            p.attrib['class'] = 'schemWire'
+            attrib = {'d': svg_path(poly), 'class': 'schemWire'}
             if self.include_nids:
-                p.attrib['data-nid'] = str(poly.ref.nid)
+                attrib['data-nid'] = str(poly.ref.nid)
+            self.writer.element('path', attrib)
 
         for p in s.all(SchemConnPoint):
             cx, cy = p.pos.tofloat()
-            circle = ET.SubElement(self.cur_group, 'circle', cx=str(cx), cy=str(cy), r=str(self.conn_point_radius))
-            circle.attrib['class'] = 'connPoint'
+            attrib = {'cx': str(cx), 'cy': str(cy), 'r': str(self.conn_point_radius),
+                'class': 'connPoint'}
             if self.include_nids:
-                circle.attrib['data-nid'] = str(p.ref.nid)
+                attrib['data-nid'] = str(p.ref.nid)
+            self.writer.element('circle', attrib)
 
         for p in s.all(SchemTapPoint):
             self.draw_schem_tappoint(p)
 
         for inst in s.all(SchemInstance):
-            with self.subgroup(node=inst, data_nid=inst.nid):
-                # Source location for click-to-source
-                if self.include_nids and inst.src_loc is not None:
-                    self.cur_group.attrib['data-srcfile'] = str(inst.src_loc.filename)
-                    self.cur_group.attrib['data-srcline'] = str(inst.src_loc.line)
-                    self.cur_group.attrib['data-srccol'] = str(inst.src_loc.column)
+            attrib = {}
+            # Source location for click-to-source
+            if self.include_nids and inst.src_loc is not None:
+                attrib['data-srcfile'] = str(inst.src_loc.filename)
+                attrib['data-srcline'] = str(inst.src_loc.line)
+                attrib['data-srccol'] = str(inst.src_loc.column)
+            with self.subgroup(attrib, data_nid=inst.nid):
                 trans = inst.loc_transform()
-                self.draw_symbol(inst.symbol, trans, inst.full_path_label())
+                if self.symbol_defs:
+                    self.use_symbol(inst.symbol, trans, inst.full_path_label())
+                else:
+                    self.draw_symbol(inst.symbol, trans, inst.full_path_label())
 
         for port in s.all(SchemPort):
-            with self.subgroup(node=port, data_nid=port.ref.nid):
+            with self.subgroup(data_nid=port.ref.nid):
                 self.draw_schem_port(port)
 
         for err in s.all(SchemErrorMarker):
@@ -352,18 +543,45 @@ class SchematicRenderer(Renderer):
 
     def draw_error_marker(self, err: SchemErrorMarker):
         cx, cy = err.pos.tofloat()
-        circle = ET.SubElement(self.cur_group, 'circle',
-            cx=str(cx), cy=str(cy), r='0.5')
-        circle.attrib['class'] = 'errorMarker'
-        circle.attrib['data-error'] = err.error_type.value
+        self.writer.element('circle', {
+            'cx': str(cx), 'cy': str(cy), 'r': '0.5',
+            'class': 'errorMarker',
+            'data-error': err.error_type.value,
+            })
 
-    def draw_symbol(self, s: Symbol, trans: TD4R, inst_name: str="?"):
+    def use_symbol(self, s: Symbol, trans: TD4R, inst_name: str="?"):
+        """
+        Like draw_symbol(), but references a shared drawing of the symbol
+        under <defs> through a <use> tag.
+        """
+        # Everything drawn by draw_symbol() moves along with the translation
+        # of trans. Only the orientation needs its own drawing, as draw_label()
+        # keeps text upright.
+        frag = symbol_fragment(s, trans.d4)
+        if frag.id not in self.defs_ids:
+            self.writer.add_def(frag)
+            self.defs_ids.add(frag.id)
+
+        x, y = trans.transl.tofloat()
+        self.writer.element('use', {'href': '#'+frag.id, 'transform': f'translate({x} {y})'})
+        self.draw_instance_name(trans * s.outline, inst_name)
+
+    def draw_instance_name(self, rect: Rect4R, inst_name: str):
+        self.draw_label(inst_name, rect.northwest.transl() * MX90,
+            svg_class="instanceName")
+
+    def draw_symbol(self, s: Symbol, trans: TD4R, inst_name: str|None="?"):
+        """
+        Draws symbol s transformed by trans. The instance name label is
+        omitted if inst_name is None.
+        """
         # Draw outline
         rect = trans * s.outline
         lx, ly, ux, uy = rect.tofloat()
-        outline = ET.SubElement(self.cur_group, 'rect',
-            x=str(lx), y=str(ly), width=str(ux-lx), height=str(uy-ly))
-        outline.attrib['class'] = 'symbolOutline'
+        self.writer.element('rect', {
+            'x': str(lx), 'y': str(ly), 'width': str(ux-lx), 'height': str(uy-ly),
+            'class': 'symbolOutline',
+            })
 
         #params_str = cell.params_str()
         params_str = "\n".join(s.cell.params_list())
@@ -372,18 +590,17 @@ class SchematicRenderer(Renderer):
             rect.northeast.transl() * R90, svg_class="cellName")
         self.draw_label(params_str, rect.southeast.transl() * R90,
             valign=VAlign.Bottom, svg_class="params")
-        self.draw_label(inst_name, rect.northwest.transl() * MX90,
-            svg_class="instanceName")
+        if inst_name is not None:
+            self.draw_instance_name(rect, inst_name)
 
+        svg_trans = trans.svg_transform()
         for poly in s.all(SymbolPoly):
-            p = ET.SubElement(self.cur_group, 'path', d=poly.svg_path(),
-                transform=trans.svg_transform())
-            p.attrib['class'] = 'symbolPoly'
+            self.writer.element('path', {'d': svg_path(poly), 'transform': svg_trans,
+                'class': 'symbolPoly'})
 
         for arc in s.all(SymbolArc):
-            p = ET.SubElement(self.cur_group, 'path', d=arc.svg_path(),
-                transform=trans.svg_transform())
-            p.attrib['class'] = 'symbolPoly'
+            self.writer.element('path', {'d': svg_path(arc), 'transform': svg_trans,
+                'class': 'symbolPoly'})
 
         for pin in s.all(Pin):
             self.draw_pin(pin, trans)
@@ -430,8 +647,7 @@ class SchematicRenderer(Renderer):
             "Z",
             ])
 
-        p=ET.SubElement(self.cur_group, 'path', d=d, transform=m.svg_transform())
-        p.attrib['class']=svg_class
+        self.writer.element('path', {'d': d, 'transform': m.svg_transform(), 'class': svg_class})
 
     def draw_schem_port(self, p: SchemPort):
         trans = p.pos.transl() * p.align
@@ -472,10 +688,10 @@ class SchematicRenderer(Renderer):
 
         tran = p.loc_transform()
 
-        path = ET.SubElement(self.cur_group, 'path', d=d, transform=tran.svg_transform())
-        path.attrib['class'] = 'tapPoint'
+        attrib = {'d': d, 'transform': tran.svg_transform(), 'class': 'tapPoint'}
         if self.include_nids:
-            path.attrib['data-nid'] = str(p.ref.nid)
+            attrib['data-nid'] = str(p.ref.nid)
+        self.writer.element('path', attrib)
 
         if not (is_default_supply or is_default_ground):
             label = p.ref.full_path_label()
@@ -483,14 +699,105 @@ class SchematicRenderer(Renderer):
                 space=self.port_text_space, valign=VAlign.Middle,
                 svg_class="tapPointLabel")
 
-def render(obj, **kwargs) -> Renderer:
+# svg_path() strings of SymbolPolys, SymbolArcs and SchemWires per frozen
+# subgraph (nid -> str), most recently used last. Shared by all threads.
+_svg_paths = OrderedDict()
+_svg_paths_size = 64
+_svg_paths_lock = threading.Lock()
+
+def svg_path(node) -> str:
+    """Returns node.svg_path(), cached for nodes of frozen subgraphs."""
+    sg = node.subgraph
+    if sg.mutable:
+        return node.svg_path()
+    with _svg_paths_lock:
+        try:
+            paths = _svg_paths[sg]
+        except KeyError:
+            paths = _svg_paths[sg] = {}
+            while len(_svg_paths) > _svg_paths_size:
+                _svg_paths.popitem(last=False)
+        else:
+            _svg_paths.move_to_end(sg)
+    try:
+        return paths[node.nid]
+    except KeyError:
+        ret = paths[node.nid] = node.svg_path()
+        return ret
+
+class SymbolFragment:
+    """
+    Drawing of a symbol in one orientation for <defs>, see symbol_fragment().
+    """
+
+    def __init__(self, element: ET.Element):
+        self.element = element #: <g> element, must be copied before being modified
+        self.id = element.attrib['id']
+        self._text = {}
+
+    def text(self, indent: bool) -> str:
+        """
+        Serialized element. With indent=True, it is indented for its place
+        in <svg><defs>.
+        """
+        try:
+            return self._text[indent]
+        except KeyError:
+            pass
+        elem = self.element
+        if indent:
+            elem = copy.deepcopy(elem)
+            indent_element(elem, 2)
+        ret = self._text[indent] = ET.tostring(elem, encoding='unicode')
+        return ret
+
+# Symbol drawings for SchematicRenderer.use_symbol(), keyed by (frozen symbol
+# subgraph, orientation), most recently used last. Shared by all threads.
+_symbol_fragments = OrderedDict()
+_symbol_fragments_size = 256
+_symbol_fragments_lock = threading.Lock()
+
+def symbol_fragment(s: Symbol, d4: D4) -> SymbolFragment:
+    """
+    Returns a drawing of symbol s in orientation d4 (without instance name).
+    Its id is derived from the content, so that identical fragments of
+    different SVGs embedded in the same HTML document do not conflict.
+
+    Fragments of frozen symbols are cached and shared between renderings.
+    """
+    key = None
+    if not s.subgraph.mutable:
+        key = (s.subgraph, d4)
+        with _symbol_fragments_lock:
+            try:
+                ret = _symbol_fragments[key]
+            except KeyError:
+                pass
+            else:
+                _symbol_fragments.move_to_end(key)
+                return ret
+
+    r = SchematicRenderer(include_nids=False, enable_css=False, enable_grid=False)
+    r.draw_symbol(s, TD4R(d4=d4), inst_name=None)
+    elem = r.writer.top
+    digest = hashlib.sha1(ET.tostring(elem)).hexdigest()[:12]
+    elem.attrib['id'] = f'sym-{digest}'
+    ret = SymbolFragment(elem)
+
+    if key is not None:
+        with _symbol_fragments_lock:
+            _symbol_fragments[key] = ret
+            while len(_symbol_fragments) > _symbol_fragments_size:
+                _symbol_fragments.popitem(last=False)
+    return ret
+
+def render(obj, indent: bool=True, **kwargs) -> Renderer:
     if isinstance(obj, Symbol):
-        r = SchematicRenderer(**kwargs)
+        r = SchematicRenderer(indent=indent, **kwargs)
         r.render_symbol(obj)
     elif isinstance(obj, Schematic):
-        r = SchematicRenderer(**kwargs)
+        r = SchematicRenderer(indent=indent, **kwargs)
         r.render_schematic(obj)
     else:
         raise TypeError(f"Unsupported object {obj} for rendering.")
-    r.indent_xml()
     return r
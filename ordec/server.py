@@ -42,6 +42,8 @@ Furthermore, there are two modes in which you can use the ORDeC web UI:
     Source code is entered and stored in the local file system. An editor
     outside the web browser is used. The design is rebuilt automatically when
     it is detected that source files have changed. This is done using inotify.
+    Only the changed modules and the modules that (transitively) import them
+    are reloaded; cells of all other modules keep their cached views.
 
     By specifying ``--module`` (``-m``), the web UI is launched in local mode.
 
@@ -51,48 +53,67 @@ Furthermore, there are two modes in which you can use the ORDeC web UI:
     __init__.py (which enables projects / packages with multiple modules / 
     source files). Hierarchical names such as mydesign.submodule are permitted
     as well.
+
+To serve many users at once (e.g. a classroom), ``--workers`` (``-w``) runs
+the server in several worker processes, which use all CPU cores and share
+the generated views through a common cache directory (``--cache-dir``).
 """
 
 import argparse
+import asyncio
 import http
 import json
 import traceback
 import linecache
 import itertools
 import queue
+from collections import OrderedDict
 from pathlib import Path
-from types import ModuleType
+from types import ModuleType, MappingProxyType
 import mimetypes
 from urllib.parse import urlparse, parse_qs, quote_plus
 import threading
 import signal
+import builtins
 import importlib
+import importlib.util
 from contextlib import contextmanager
 import importlib.resources
 import tarfile
 import secrets
 import hmac
+import weakref
 import hashlib
+import gzip
 import io
+import re
 import time
 import tempfile
 import sys
 import os
 import select
+import socket
 import errno
 
 import inotify_simple
 from websockets.sync.server import serve
+from websockets.asyncio.server import serve as serve_async
 from websockets.http11 import Request, Response
 from websockets.datastructures import Headers
 from websockets.exceptions import ConnectionClosed, ConnectionClosedOK
 
-from . import importer, language
+try:
+    # Optional: without brotli, static files are served gzip-compressed only.
+    import brotli
+except ImportError:
+    brotli = None
+
+from . import importer, language, viewdiff
 from .hub import HubIntegration, HubAuthError
 from .version import version, doc_url
 from .core import Cell, generate, generate_func, SubgraphRoot
 from .language import compile_ord
-from .extlibrary import ExtLibrary
+from .extlibrary import ExtLibrary, ExtLibraryCell
 from .jobrunner import ThreadedJobRunner
 
 RELOAD_PROTECTED_MODULE_PREFIXES = (
@@ -106,6 +127,14 @@ def is_reload_protected_module(module_name):
         for prefix in RELOAD_PROTECTED_MODULE_PREFIXES
     )
 
+def file_stamp(path):
+    """Returns (mtime, size) of the file at path, or None if it is missing."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
 class ServerKey:
     def __init__(self):
         self.key = secrets.token_bytes(32)
@@ -121,6 +150,76 @@ class ServerKey:
         digest = hmac.digest(self.key, moduleview.encode('utf8'), digest=hashlib.sha256)
         return f"local={quote_plus(moduleview)}&hmac={digest.hex()}"
 
+# Maximum number of recently requested views that are generated
+# speculatively after a rebuild (see ConnectionJobs.prefetch):
+PREFETCH_VIEWS = 8
+# Number of client ids whose recently requested views are remembered:
+PREFETCH_CLIENTS = 64
+
+# Total JSON size in bytes of the recently sent view payloads that clients
+# can name as base of a getview, so that the updated view is sent as patch
+# (see view_delta):
+VIEW_DIFF_BASES_BYTES = 64 * 1024**2
+# Patches whose JSON is larger than this fraction of the full payload are
+# not worth it; the full payload is sent instead:
+VIEW_DIFF_MAX_RATIO = 0.5
+
+# ExtLibraries with more cells are listed by a single placeholder in the
+# viewlist; the client fetches their views in pages (see query_view_page):
+VIEWLIST_INLINE_CELLS = 200
+# Number of ExtLibrary cells per viewpage message:
+VIEWLIST_PAGE_CELLS = 250
+
+_view_manifests = weakref.WeakKeyDictionary()
+_view_manifests_lock = threading.Lock()
+
+def view_manifest(cls) -> list[tuple[str, dict]]:
+    """
+    Returns (member name, info dict) for all generate members of the Cell
+    subclass cls. The result is cached per class.
+    """
+    with _view_manifests_lock:
+        manifest = _view_manifests.get(cls)
+    if manifest is None:
+        manifest = []
+        for member_name in dir(cls):
+            member = getattr(cls, member_name)
+            if isinstance(member, generate):
+                manifest.append((member_name, member.info_dict()))
+        with _view_manifests_lock:
+            _view_manifests[cls] = manifest
+    return manifest
+
+def extlibrary_view_maps(lib: ExtLibrary) -> dict:
+    view_maps = {}
+    for view_name, attr in (
+        ('layout', 'layout_funcs'),
+        ('frame', 'frame_funcs'),
+        ('symbol', 'symbol_funcs'),
+        ('schematic', 'schematic_funcs')):
+        fmap = getattr(lib, attr, None)
+        if isinstance(fmap, dict):
+            view_maps[view_name] = fmap
+    return view_maps
+
+def extlibrary_cell_names(lib: ExtLibrary) -> list[str]:
+    return sorted({name for fmap in extlibrary_view_maps(lib).values() for name in fmap})
+
+def extlibrary_views(lib_name: str, lib: ExtLibrary, cell_names) -> list[dict]:
+    """
+    Views of the given cells of the ExtLibrary lib, which is reachable as
+    lib_name. The cells are not instantiated.
+    """
+    view_maps = extlibrary_view_maps(lib)
+    manifest = dict(view_manifest(ExtLibraryCell))
+    views = []
+    for cell_name in cell_names:
+        cell_expr = f"{lib_name}[{cell_name!r}]"
+        for view_name, fmap in view_maps.items():
+            if cell_name in fmap and view_name in manifest:
+                views.append({'name': f"{cell_expr}.{view_name}"} | manifest[view_name])
+    return views
+
 def discover_views(conn_globals, recursive=True, modules_visited=None):
     if modules_visited is None:
         modules_visited = set()
@@ -139,46 +238,23 @@ def discover_views(conn_globals, recursive=True, modules_visited=None):
         elif isinstance(v, generate_func):
             views.append({'name': f"{k}()"} | v.info_dict())
         elif isinstance(v, type) and issubclass(v, Cell) and v!=Cell:
-            generate_members = []
-            for member_name in dir(v):
-                member = getattr(v, member_name)
-                if isinstance(member, generate):
-                    generate_members.append((member_name, member))
-                    
+            manifest = view_manifest(v)
+            if not manifest:
+                continue
             for instance in v.discoverable_instances():
-                for member_name, member in generate_members:
-                    views.append({'name': f'{instance!r}.{member_name}'} | member.info_dict())
+                for member_name, info in manifest:
+                    views.append({'name': f'{instance!r}.{member_name}'} | info)
         elif isinstance(v, Cell):
-            for member_name in dir(type(v)):
-                member = getattr(type(v), member_name)
-                if isinstance(member, generate):
-                    views.append({'name': f"{k}.{member_name}"} | member.info_dict())
+            for member_name, info in view_manifest(type(v)):
+                views.append({'name': f"{k}.{member_name}"} | info)
         elif isinstance(v, SubgraphRoot):
             views.append({'name': k, 'auto_refresh': True})
         elif isinstance(v, ExtLibrary):
-            view_maps = {}
-            for view_name, attr in (
-                ('layout', 'layout_funcs'),
-                ('frame', 'frame_funcs'),
-                ('symbol', 'symbol_funcs'),
-                ('schematic', 'schematic_funcs')):
-                fmap = getattr(v, attr, None)
-                if isinstance(fmap, dict):
-                    view_maps[view_name] = fmap
-
-            cell_names = {name for fmap in view_maps.values() for name in fmap}
-
-            for cell_name in sorted(cell_names):
-                cell_expr = f"{k}[{cell_name!r}]"
-                cell = v[cell_name]
-                if not isinstance(cell, Cell):
-                    continue
-                for view_name, fmap in view_maps.items():
-                    if cell_name not in fmap:
-                        continue
-                    member = getattr(type(cell), view_name, None)
-                    if isinstance(member, generate):
-                        views.append({'name': f"{cell_expr}.{view_name}"} | member.info_dict())
+            cell_names = extlibrary_cell_names(v)
+            if len(cell_names) > VIEWLIST_INLINE_CELLS:
+                views.append({'name': k, 'library': True, 'cells': len(cell_names)})
+            else:
+                views += extlibrary_views(k, v, cell_names)
 
     if "__ord_py_source__" in conn_globals:
         views.append({"name": "__ord_py_source__", "auto_refresh": True})
@@ -272,20 +348,52 @@ class ImportTracker:
     Even if an import fails (e.g., SyntaxError), all files that were
     located before the failure are recorded. This would not be possible by
     inspecting sys.modules alone.
+
+    Additionally, the import statements executed while the tracker is active
+    are recorded (by wrapping builtins.__import__) as dependency graph:
+    imports maps the name of each importing module to the set of the names
+    of the modules it imported, including modules that were already loaded.
+    module_files and stamps map the name of each newly found module to its
+    source file and to the file_stamp() of that file before it was executed.
     """
 
     def __init__(self):
         self.files = []
+        self.module_files = {}
+        self.stamps = {}
+        self.imports = {}
 
     def __enter__(self):
         self.files = []
+        self.module_files = {}
+        self.stamps = {}
+        self.imports = {}
+        self._import_orig = builtins.__import__
+        builtins.__import__ = self._import
         sys.meta_path.insert(0, self)
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
         sys.meta_path.remove(self)
+        builtins.__import__ = self._import_orig
         return False  # Don't suppress exceptions
 
+    def _import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        module = self._import_orig(name, globals, locals, fromlist, level)
+        importer_name = globals.get('__name__') if globals else None
+        if importer_name is None:
+            return module
+        if level > 0:
+            name = importlib.util.resolve_name('.' * level + name,
+                globals.get('__package__') or importer_name)
+        imported = self.imports.setdefault(importer_name, set())
+        imported.add(name)
+        # "from pkg import submodule" depends on pkg.submodule:
+        for attr in fromlist or ():
+            if f"{name}.{attr}" in sys.modules:
+                imported.add(f"{name}.{attr}")
+        return module
+
     def find_spec(self, fullname, path, target=None):
         # Delegate to other finders and record the file path
         for finder in sys.meta_path:
@@ -298,13 +406,13 @@ class ImportTracker:
             if spec is not None:
                 # Record file path for both regular modules and .ord modules.
                 origin = getattr(spec, "origin", None)
+                if not (isinstance(origin, str) and os.path.isfile(origin)):
+                    loader = getattr(spec, "loader", None)
+                    origin = getattr(loader, "ord_path", None)
                 if isinstance(origin, str) and os.path.isfile(origin):
                     self.files.append(origin)
-                else:
-                    loader = getattr(spec, "loader", None)
-                    ord_path = getattr(loader, "ord_path", None)
-                    if isinstance(ord_path, str) and os.path.isfile(ord_path):
-                        self.files.append(ord_path)
+                    self.module_files[fullname] = origin
+                    self.stamps[fullname] = file_stamp(origin)
                 return spec
         return None
 
@@ -320,6 +428,16 @@ def is_internal_frame(filename):
         or (filename.startswith('<') and filename != '<webeditor>')
         or 'importlib' in filename)
 
+def client_id(msg_first):
+    """
+    Id of the client page from its first message (see ConnectionJobs.client),
+    or None if it sent none.
+    """
+    client = msg_first.get('client')
+    if isinstance(client, str) and 0 < len(client) <= 64:
+        return client
+    return None
+
 def progress_sender(send_msg, req, view_name, min_interval=0.1):
     """
     Returns an on_progress callback for a view-generation job that sends
@@ -359,8 +477,283 @@ def format_user_exception(exc):
     parts += traceback.format_exception_only(type(exc), exc)
     return ''.join(parts)
 
+class ConnectionJobs:
+    """
+    View-generation jobs of one websocket connection.
+
+    dispatch() handles the client messages that follow the first one
+    (getview, gettiles, getviewpage, cancelview). Results and progress are delivered
+    through send_msg(payload), which is called from the job threads.
+
+    prefetch() speculatively generates views before the client asks for
+    them, one at a time, as background jobs of the job runner: they only
+    start while the runner has idle slots and are cancelled when a real
+    request needs their slot. A getview for the prefetched view takes over
+    its result (or the running prefetch job); any other getview stops
+    prefetching.
+
+    A getview may name the digest of the data the client currently shows
+    as base; the view is then sent as patch against it where possible
+    (see ConnectionHandler.view_delta).
+    """
+
+    def __init__(self, handler, conn_globals, send_msg, source_key=None,
+            client=None):
+        self.handler = handler
+        self.conn_globals = conn_globals
+        self.send_msg = send_msg
+        # Id the client page sent with its first message, which keeps its
+        # recently requested views apart from those of other clients (see
+        # ConnectionHandler.remember_view), or None:
+        self.client = client
+        # Key of the connection's source in handler.view_cache, or None if
+        # its views are not cached (see ConnectionHandler.open_connection):
+        self.source_key = source_key
+        # In-flight view-generation jobs of this connection: req id -> Job.
+        # Entries are inserted as None before submit so that an on_done
+        # firing during submit (InlineJobRunner) pops the key first and
+        # the subsequent conditional insert leaves no stale entry behind.
+        self.jobs = {}
+        self.jobs_lock = threading.Lock()
+        # Prefetch state, also protected by jobs_lock: views still to
+        # prefetch, the running prefetch job and its view, the requests
+        # waiting for it (req id -> on_progress) and finished results.
+        self.prefetch_queue = []
+        self.prefetch_job = None
+        self.prefetch_view = None
+        self.prefetch_waiters = {}
+        self.prefetched = {}
+
+    def dispatch(self, msg):
+        msg_type = msg.get('msg')
+        if msg_type == 'getview':
+            try:
+                view_name = msg['view']
+                req = msg['req']
+            except KeyError as e:
+                raise ValueError(f"getview message missing key {e}")
+            refresh = msg.get('refresh', False)
+            if not isinstance(refresh, bool):
+                raise ValueError(f"getview refresh must be a boolean")
+            base = msg.get('base')
+            if base is not None and not isinstance(base, str):
+                raise ValueError(f"getview base must be a string")
+            self.submit_view_job(req, view_name, base, refresh)
+        elif msg_type == 'gettiles':
+            try:
+                view_name = msg['view']
+                req = msg['req']
+                level = int(msg['level'])
+                tiles = [(int(x), int(y)) for x, y in msg['tiles']]
+            except KeyError as e:
+                raise ValueError(f"gettiles message missing key {e}")
+            self.submit_tiles_job(req, view_name, level, tiles)
+        elif msg_type == 'getviewpage':
+            try:
+                library = msg['library']
+                offset = int(msg['offset'])
+            except KeyError as e:
+                raise ValueError(f"getviewpage message missing key {e}")
+            if offset < 0:
+                raise ValueError(f"getviewpage offset must not be negative")
+            self.send_msg(self.handler.query_view_page(library, offset,
+                self.conn_globals))
+        elif msg_type == 'cancelview':
+            req = msg.get('req')
+            with self.jobs_lock:
+                job = self.jobs.get(req)
+                waiting = self.prefetch_waiters.pop(req, None)
+            if job is not None:
+                self.handler.jobrunner.cancel(job)
+            elif waiting is not None:
+                # The prefetch job keeps running, its result is kept.
+                self.send_msg({'msg': 'view', 'view': self.prefetch_view,
+                    'cancelled': True, 'req': req})
+        else:
+            raise ValueError(f"unexpected message type: {msg_type!r}")
+
+    def submit_view_job(self, req, view_name, base=None, refresh=False):
+        """
+        With refresh (the user asked to refresh the view), prefetched and
+        cached results are not used.
+        """
+        on_progress = progress_sender(self.send_msg, req, view_name)
+        with self.jobs_lock:
+            prefetched = self.prefetched.pop(view_name, None)
+            if refresh:
+                prefetched = None
+            adopt = (not refresh and prefetched is None
+                and view_name == self.prefetch_view)
+            if adopt:
+                self.prefetch_waiters[req] = on_progress, base
+                # The client now waits for it, it must no longer give way
+                # to other jobs:
+                self.handler.jobrunner.promote(self.prefetch_job)
+            self.prefetch_queue.clear()
+            if adopt or self.prefetch_waiters:
+                stale_prefetch = None
+            else:
+                stale_prefetch = self.prefetch_job
+        if stale_prefetch is not None:
+            # Cancelling may block for a while, the request must not wait:
+            threading.Thread(target=self.handler.jobrunner.cancel,
+                args=(stale_prefetch,), daemon=True).start()
+        if prefetched is not None:
+            self.send_msg(dict(self.handler.view_delta(prefetched, base), req=req))
+            return
+        if adopt:
+            return
+
+        def on_done(job, result, cancelled):
+            with self.jobs_lock:
+                self.jobs.pop(req, None)
+            # A cancel that kills an external tool subprocess surfaces
+            # as an ordinary exception in query_view; report those as
+            # cancelled, too. A view that completed successfully
+            # despite cancellation is sent normally (it is cached).
+            if cancelled or (job.run.cancel_event.is_set()
+                    and (result is None or 'exception' in result)):
+                result = {'msg': 'view', 'view': view_name,
+                    'cancelled': True}
+            elif result is None:
+                # Job crashed outside query_view (already logged).
+                result = {'msg': 'view', 'view': view_name,
+                    'exception': 'internal error during view generation'}
+            elif 'exception' not in result:
+                self.handler.remember_view(self.client, view_name)
+                result = self.handler.view_delta(result, base)
+            self.send_msg(dict(result, req=req))
+
+        self._submit(req,
+            lambda: self.query_view(view_name, refresh),
+            on_progress=on_progress,
+            on_done=on_done)
+
+    def submit_tiles_job(self, req, view_name, level, tiles):
+        def on_done(job, result, cancelled):
+            with self.jobs_lock:
+                self.jobs.pop(req, None)
+            if cancelled:
+                result = {'msg': 'tiles', 'view': view_name,
+                    'level': level, 'cancelled': True}
+            elif result is None:
+                result = {'msg': 'tiles', 'view': view_name,
+                    'level': level,
+                    'exception': 'internal error during tile generation'}
+            self.send_msg(dict(result, req=req))
+
+        self._submit(req,
+            lambda: self.handler.query_tiles(view_name, level, tiles, self.conn_globals),
+            on_done=on_done)
+
+    def _submit(self, req, fn, on_progress=None, on_done=None):
+        with self.jobs_lock:
+            self.jobs[req] = None
+        job = self.handler.jobrunner.submit(fn, on_progress=on_progress,
+            on_done=on_done)
+        with self.jobs_lock:
+            if req in self.jobs:
+                self.jobs[req] = job
+
+    def query_view(self, view_name, refresh=False):
+        """
+        Like ConnectionHandler.query_view, but takes the result from the
+        handler's view cache if possible (unless refresh is set), and
+        stores it there otherwise.
+        """
+        cache = self.handler.view_cache
+        if cache is None or self.source_key is None:
+            return self.handler.query_view(view_name, self.conn_globals)
+        result = None if refresh else cache.get(self.source_key, view_name)
+        if result is not None:
+            self.handler.remember_payload(result['data'])
+            return result
+        result = self.handler.query_view(view_name, self.conn_globals)
+        # Views sent in tiled mode are not cached: the client requests
+        # their tiles right away, which needs the generated view anyway.
+        if 'data' in result and not (isinstance(result['data'], dict)
+                and 'tiled' in result['data']):
+            cache.put(self.source_key, view_name, result)
+        return result
+
+    def prefetch(self, view_names):
+        """
+        Generates the views view_names one after another in the background,
+        unless the job runner would run them inline.
+        """
+        if not self.handler.jobrunner.runs_in_background:
+            return
+        with self.jobs_lock:
+            self.prefetch_queue = list(view_names)
+        self._prefetch_next()
+
+    def _prefetch_next(self):
+        def on_progress(status, fraction, detail=None):
+            with self.jobs_lock:
+                waiting = list(self.prefetch_waiters.values())
+            for waiter_on_progress, _ in waiting:
+                waiter_on_progress(status, fraction, detail)
+
+        def on_done(job, result, cancelled):
+            cancelled = cancelled or job.run.cancel_event.is_set()
+            if cancelled:
+                result = {'msg': 'view', 'view': view_name,
+                    'cancelled': True}
+            elif result is None:
+                result = {'msg': 'view', 'view': view_name,
+                    'exception': 'internal error during view generation'}
+            with self.jobs_lock:
+                self.prefetch_job = None
+                self.prefetch_view = None
+                waiting = list(self.prefetch_waiters.items())
+                self.prefetch_waiters.clear()
+                if not waiting and not cancelled:
+                    self.prefetched[view_name] = result
+            for req, (_, base) in waiting:
+                if cancelled:
+                    # Preempted by a real request before it was adopted:
+                    # the waiting requests become real ones.
+                    self.submit_view_job(req, view_name, base)
+                else:
+                    self.send_msg(dict(self.handler.view_delta(result, base), req=req))
+            self._prefetch_next()
+
+        jobrunner = self.handler.jobrunner
+        with self.jobs_lock:
+            if self.prefetch_view is not None or not self.prefetch_queue:
+                return
+            if not jobrunner.idle():
+                # Prefetching must not make real requests wait:
+                self.prefetch_queue.clear()
+                return
+            view_name = self.prefetch_view = self.prefetch_queue.pop(0)
+            # Submitted under jobs_lock, so that submit_view_job and
+            # cancel_all never see prefetch_view without prefetch_job.
+            # Background job runners (see prefetch) never call on_done
+            # from submit, which would deadlock here.
+            self.prefetch_job = jobrunner.submit(
+                lambda: self.query_view(view_name),
+                on_progress=on_progress, on_done=on_done, background=True)
+
+    def cancel_all(self):
+        """
+        Cancels jobs the client no longer waits for. This matters for
+        the local-mode reload flow: the client reconnects on
+        localmodule_changed, and the rebuild's import_lock.write()
+        must not wait behind a stale long-running generation.
+        """
+        with self.jobs_lock:
+            live_jobs = [j for j in self.jobs.values() if j is not None]
+            self.prefetch_queue.clear()
+            self.prefetch_waiters.clear()
+            if self.prefetch_job is not None:
+                live_jobs.append(self.prefetch_job)
+        for job in live_jobs:
+            self.handler.jobrunner.cancel(job)
+
 class ConnectionHandler:
-    def __init__(self, key, sysmodules_orig, jobrunner=None, on_activity=None):
+    def __init__(self, key, sysmodules_orig, jobrunner=None, on_activity=None,
+            view_cache=None):
         self.sysmodules_orig = set(sysmodules_orig.keys())
         self.key = key
         # Called on every websocket message; feeds JupyterHub idle culling
@@ -368,6 +761,9 @@ class ConnectionHandler:
         # activity, but every user interaction does.
         self.on_activity = on_activity or (lambda: None)
         self.jobrunner = jobrunner or ThreadedJobRunner(4)
+        # Optional ordec.viewcache.ViewCache, which may be shared with other
+        # server processes:
+        self.view_cache = view_cache
         self.import_lock = RWLock()
         # import_lock makes sure that there is never more than one thread in the
         # initial build_cells / build_localmodule phase and that during this
@@ -375,6 +771,53 @@ class ConnectionHandler:
         # In RWLock's logic, query_view is the resource reader and the initial
         # build_cells / build_localmodule phase is the resource writer. 
 
+        # Views recently requested per client id, most recent last, and
+        # the client ids themselves, least recently active first (see
+        # remember_view and ConnectionJobs.prefetch):
+        self.recent_views = OrderedDict()
+        self.recent_views_lock = threading.Lock()
+        # Recently sent view payloads, digest -> (data, JSON text), most
+        # recent last, and their total JSON size (see remember_payload and
+        # view_delta):
+        self.view_payloads = OrderedDict()
+        self.view_payloads_bytes = 0
+        self.view_payloads_lock = threading.Lock()
+        # Import dependency graph of the modules loaded by build_localmodule,
+        # see ImportTracker and purge_changed_modules:
+        self.module_files = {}
+        self.module_stamps = {}
+        self.module_imports = {}
+        # Modules imported by build_localmodule itself (no importer):
+        self.module_roots = set()
+
+    def remember_view(self, client, view_name):
+        """
+        Records that view_name was generated successfully for the client
+        with the given id (see ConnectionJobs.client). No-op without id.
+        """
+        if client is None:
+            return
+        with self.recent_views_lock:
+            recent = self.recent_views.pop(client, None) or OrderedDict()
+            self.recent_views[client] = recent
+            while len(self.recent_views) > PREFETCH_CLIENTS:
+                self.recent_views.popitem(last=False)
+            recent[view_name] = True
+            recent.move_to_end(view_name)
+            while len(recent) > PREFETCH_VIEWS:
+                recent.popitem(last=False)
+
+    def prefetch_candidates(self, client, views) -> list[str]:
+        """
+        Names of the auto_refresh views among views (from discover_views)
+        that the client with the given id requested recently, most recent
+        first. They are likely to be requested again after a rebuild.
+        """
+        auto_refresh = {v['name'] for v in views if v.get('auto_refresh')}
+        with self.recent_views_lock:
+            recent = list(reversed(self.recent_views.get(client, ())))
+        return [name for name in recent if name in auto_refresh]
+
     def query_view(self, view_name, conn_globals):
         msg_ret = {
             'msg':'view',
@@ -393,11 +836,131 @@ class ConnectionHandler:
                 viewtype, data = view.webdata()
             msg_ret['type'] = viewtype
             msg_ret['data'] = data
+            msg_ret['digest'] = self.remember_payload(data)
+        except Exception as e:
+            msg_ret['exception'] = format_user_exception(e)
+
+        return msg_ret
+
+    def remember_payload(self, data) -> str:
+        """
+        Keeps the view data as possible base of later patches and returns
+        its digest, which clients send back as base of their next getview.
+        Its JSON text is kept as well, for encode_msg.
+        """
+        encoded = json.dumps(data)
+        digest = hashlib.blake2b(encoded.encode(), digest_size=16).hexdigest()
+        with self.view_payloads_lock:
+            old = self.view_payloads.pop(digest, None)
+            if old is not None:
+                self.view_payloads_bytes -= len(old[1])
+            self.view_payloads[digest] = data, encoded
+            self.view_payloads_bytes += len(encoded)
+            # The newest payload is kept even if it alone is too large,
+            # as encode_msg is about to need it.
+            while (self.view_payloads_bytes > VIEW_DIFF_BASES_BYTES
+                    and len(self.view_payloads) > 1):
+                _, (_, evicted) = self.view_payloads.popitem(last=False)
+                self.view_payloads_bytes -= len(evicted)
+        return digest
+
+    def encode_msg(self, payload) -> str:
+        """
+        Returns json.dumps(payload). The data of view messages is not
+        encoded again if remember_payload still has its JSON text.
+        """
+        data = payload.get('data')
+        if data is None or 'digest' not in payload:
+            return json.dumps(payload)
+        with self.view_payloads_lock:
+            entry = self.view_payloads.get(payload['digest'])
+        if entry is None or entry[0] is not data:
+            return json.dumps(payload)
+        rest = json.dumps({key: value for key, value in payload.items()
+            if key != 'data'})
+        return f'{rest[:-1]}, "data": {entry[1]}}}'
+
+    def view_delta(self, result, base):
+        """
+        Replaces the data of the view message result by a patch (see
+        ordec.viewdiff) against the payload with digest base, if the
+        client has sent such a base and the patch is small enough.
+        """
+        if base is None or 'data' not in result:
+            return result
+        with self.view_payloads_lock:
+            base_entry = self.view_payloads.get(base)
+            entry = self.view_payloads.get(result['digest'])
+            if base_entry is not None:
+                self.view_payloads.move_to_end(base)
+        if entry is None:
+            return result
+        if base_entry is not None:
+            base_data = base_entry[0]
+        elif self.view_cache is not None:
+            # The client might have got base from another server process.
+            base_data = self.view_cache.get_payload(base)
+            if base_data is None:
+                return result
+        else:
+            return result
+        patch = viewdiff.diff(base_data, result['data'])
+        if patch is not None and len(json.dumps(patch)) > VIEW_DIFF_MAX_RATIO * len(entry[1]):
+            return result
+        delta = {key: value for key, value in result.items() if key != 'data'}
+        delta['base'] = base
+        delta['patch'] = patch
+        return delta
+
+    def query_tiles(self, view_name, level, tiles, conn_globals):
+        """
+        Returns the requested tiles of a view that webdata() sent in tiled
+        mode (currently only layouts, see ordec.layout.webdata).
+        """
+        msg_ret = {
+            'msg':'tiles',
+            'view':view_name,
+            'level':level,
+        }
+
+        try:
+            with self.import_lock.read():
+                view = eval(view_name, conn_globals, conn_globals)
+                if not hasattr(view, 'webtiles'):
+                    raise TypeError(f"view {view_name!r} does not support tiles")
+                msg_ret['tiles'] = view.webtiles(level, tiles)
         except Exception as e:
             msg_ret['exception'] = format_user_exception(e)
 
         return msg_ret
 
+    def query_view_page(self, library, offset, conn_globals):
+        """
+        Returns the views of the ExtLibrary cells offset to
+        offset + VIEWLIST_PAGE_CELLS of library, which discover_views
+        listed as placeholder.
+        """
+        msg_ret = {
+            'msg':'viewpage',
+            'library':library,
+            'offset':offset,
+        }
+
+        try:
+            with self.import_lock.read():
+                lib = eval(library, conn_globals, conn_globals)
+                if not isinstance(lib, ExtLibrary):
+                    raise TypeError(f"{library!r} is not an ExtLibrary")
+                cell_names = extlibrary_cell_names(lib)
+                page = cell_names[offset:offset + VIEWLIST_PAGE_CELLS]
+                msg_ret['views'] = extlibrary_views(library, lib, page)
+                # Offset of the next page, or None after the last page:
+                next_offset = offset + len(page)
+                msg_ret['next'] = next_offset if next_offset < len(cell_names) else None
+        except Exception as e:
+            msg_ret['exception'] = format_user_exception(e)
+
+        return msg_ret
 
     def build_cells(self, source_type: str, source_data: str,
             check_src: str=None) -> (dict, dict):
@@ -460,11 +1023,109 @@ class ConnectionHandler:
                     continue
                 #print(f"Unloading {k}...")
                 del sys.modules[k]
+        self.module_files = {}
+        self.module_stamps = {}
+        self.module_imports = {}
+        self.module_roots = set()
+
+    def is_reloadable(self, module_name):
+        return (module_name not in self.sysmodules_orig
+            and not is_reload_protected_module(module_name))
+
+    def purge_changed_modules(self):
+        """
+        Like purge_modules, but only removes the modules whose source files
+        changed since they were imported, and all modules that import them
+        directly or indirectly.
+
+        The dependency graph only knows the import statements executed by
+        build_localmodule. Falls back to purge_modules if a module was
+        loaded outside of it (e.g. by an import in a function that generates
+        a view) or if a changed module has no known importers (e.g. when it
+        was loaded through importlib.import_module), as the modules that
+        use it are unknown.
+
+        Only call this method with self.import_lock acquired as writer.
+        """
+        importers = {}
+        for name, imported in self.module_imports.items():
+            for dep in imported:
+                importers.setdefault(dep, set()).add(name)
+
+        stale = {name for name, stamp in self.module_stamps.items()
+            if file_stamp(self.module_files[name]) != stamp}
+        untracked = any(self.is_reloadable(name) and name not in self.module_imports
+            for name in sys.modules)
+        if untracked or any(name not in importers and name not in self.module_roots
+                for name in stale):
+            self.purge_modules()
+            return
+
+        todo = list(stale)
+        while todo:
+            for name in importers.get(todo.pop(), ()):
+                if name not in stale:
+                    stale.add(name)
+                    todo.append(name)
+
+        for name in stale:
+            #print(f"Unloading {name}...")
+            sys.modules.pop(name, None)
+            self.module_files.pop(name, None)
+            self.module_stamps.pop(name, None)
+            self.module_imports.pop(name, None)
+            self.module_roots.discard(name)
+
+    def record_imports(self, tracker):
+        """
+        Adds the modules loaded while tracker was active to the dependency
+        graph used by purge_changed_modules.
+        """
+        for name, path in tracker.module_files.items():
+            if self.is_reloadable(name):
+                self.module_files[name] = path
+                self.module_stamps[name] = tracker.stamps[name]
+        for name, imported in tracker.imports.items():
+            if self.is_reloadable(name):
+                self.module_imports.setdefault(name, set()).update(imported)
+        for name, module in list(sys.modules.items()):
+            if not self.is_reloadable(name):
+                continue
+            self.module_imports.setdefault(name, set())
+            # A reloaded package lacks the attributes of its submodules that
+            # were kept, which the import system only sets when loading them:
+            parent_name, _, child = name.rpartition('.')
+            parent = sys.modules.get(parent_name)
+            if parent is not None and not hasattr(parent, child):
+                setattr(parent, child, module)
+        # Forget modules that failed to import:
+        for name in list(self.module_files):
+            if name not in sys.modules:
+                del self.module_files[name]
+                del self.module_stamps[name]
+        for name in list(self.module_imports):
+            if name not in sys.modules:
+                del self.module_imports[name]
+
+    def module_dependency_files(self, module_name):
+        """Source files of module_name and of all modules it imports."""
+        files = []
+        visited = set()
+        todo = [module_name]
+        while todo:
+            name = todo.pop()
+            if name in visited:
+                continue
+            visited.add(name)
+            if name in self.module_files:
+                files.append(self.module_files[name])
+            todo.extend(sorted(self.module_imports.get(name, ()), reverse=True))
+        return files
 
     def build_localmodule(self, localmodule: str):
         exc = None
         with self.import_lock.write():
-            self.purge_modules()
+            self.purge_changed_modules()
             with ImportTracker() as tracker:
                 try:
                     module = importlib.import_module(localmodule)
@@ -473,150 +1134,123 @@ class ConnectionHandler:
                     conn_globals = {}
                 else:
                     conn_globals = module.__dict__
+            self.record_imports(tracker)
+            if localmodule in self.module_imports:
+                self.module_roots.add(localmodule)
 
             # Use tracked files - includes all files found even if import failed.
+            # Modules that are still loaded from a previous build are not
+            # found again; their files are taken from the dependency graph.
             # Keep first-seen order, drop duplicates.
-            return conn_globals, list(dict.fromkeys(tracker.files)), exc
+            watch_files = tracker.files + self.module_dependency_files(localmodule)
+            return conn_globals, list(dict.fromkeys(watch_files)), exc
 
-    def handle_connection(self, websocket):
-        remote = f"{websocket.remote_address[0]}:{websocket.remote_address[1]}"
-        print(f"{remote}: new websocket connection")
-        msgs = iter(websocket)
-
-        def send_exception_info(reason):
-            websocket.send(json.dumps({
-                'msg': 'exception',
-                'exception': reason,
-            }))
+    def open_connection(self, msg_first):
+        """
+        Authenticates the first message of a connection and builds the
+        design it requests (source or localmodule).
 
-        # Validate auth_token to prevent code execution from untrusted connections:
-        try:
-            msg_first = json.loads(next(msgs))
-        except StopIteration:
-            # Client connected and disconnected without sending anything.
-            print(f"{remote}: websocket closed before first message")
-            return
+        Returns (reply, conn_globals, watch_files, source_key): reply is the
+        message to send back. conn_globals is None if the connection is to
+        be closed after sending the reply. source_key is the key of the
+        views in the view cache, or None if they are not to be cached.
+        """
+        def exception_info(reason):
+            return {'msg': 'exception', 'exception': reason}, None, [], None
 
         try:
             auth = msg_first['auth']
             msg_first_type = msg_first['msg']
         except (KeyError, TypeError):
-            send_exception_info("malformed first message: missing 'auth' or 'msg'")
-            return
+            return exception_info("malformed first message: missing 'auth' or 'msg'")
 
         if not self.key.authenticate(auth):
-            send_exception_info("incorrect auth token provided")
-            return
+            return exception_info("incorrect auth token provided")
 
         # First message - read design input / build cells:
 
+        source_key = None
         try:
             if msg_first_type == 'source':
                 conn_globals, exc = self.build_cells(
                     msg_first['srctype'], msg_first['src'],
                     check_src=msg_first.get('check_src'))
                 watch_files = []
+                if self.view_cache is not None:
+                    source_key = self.view_cache.source_key(msg_first['srctype'],
+                        msg_first['src'], msg_first.get('check_src') or '')
             elif msg_first_type == 'localmodule':
+                # Views of local modules are not cached, as they depend on
+                # files that the server does not know upfront.
                 conn_globals, watch_files, exc = self.build_localmodule(msg_first['module'])
             else:
-                send_exception_info("expected 'source' or 'localmodule' message")
-                return
+                return exception_info("expected 'source' or 'localmodule' message")
         except KeyError as e:
-            send_exception_info(f"malformed first message: missing key {e}")
-            return
-        
+            return exception_info(f"malformed first message: missing key {e}")
+
         if exc:
-            websocket.send(json.dumps({
+            reply = {
                 'msg': 'exception',
                 'exception': format_user_exception(exc),
-            }))
-        else: 
-            websocket.send(json.dumps({
+            }
+        else:
+            reply = {
                 'msg': 'viewlist',
                 'views': discover_views(conn_globals),
-            }))
+            }
+        return reply, conn_globals, watch_files, source_key
+
+    def handle_connection(self, websocket):
+        remote = f"{websocket.remote_address[0]}:{websocket.remote_address[1]}"
+        print(f"{remote}: new websocket connection")
+        msgs = iter(websocket)
+
+        # Validate auth_token to prevent code execution from untrusted connections:
+        try:
+            msg_first = json.loads(next(msgs))
+        except StopIteration:
+            # Client connected and disconnected without sending anything.
+            print(f"{remote}: websocket closed before first message")
+            return
+
+        reply, conn_globals, watch_files, source_key = self.open_connection(msg_first)
+        if conn_globals is None:
+            websocket.send(json.dumps(reply))
+            return
 
         # Create websocket send lock to prevent concurrent sends from corrupting messages
         # (e.g., main thread sending view data while inotify thread sends change notification)
         websocket_lock = threading.Lock()
 
         if watch_files:
+            # Watch before replying, so that no change after the reply is missed:
+            inotify = inotify_watch(watch_files)
             pipe_inotify_abort_r_fd, pipe_inotify_abort_w_fd = os.pipe()
             pipe_inotify_abort_r = os.fdopen(pipe_inotify_abort_r_fd, 'r')
             pipe_inotify_abort_w = os.fdopen(pipe_inotify_abort_w_fd, 'w')
             watch_thread = threading.Thread(target=background_inotify,
-                args=(watch_files, pipe_inotify_abort_r, websocket, websocket_lock), daemon=True)
+                args=(inotify, pipe_inotify_abort_r, websocket, websocket_lock), daemon=True)
             watch_thread.start()
         def send_msg(payload):
             with websocket_lock:
                 try:
-                    websocket.send(json.dumps(payload))
+                    websocket.send(self.encode_msg(payload))
                 except ConnectionClosed:
                     pass  # late progress/terminal after disconnect
 
-        # In-flight view-generation jobs of this connection: req id -> Job.
-        # Entries are inserted as None before submit so that an on_done
-        # firing during submit (InlineJobRunner) pops the key first and
-        # the subsequent conditional insert leaves no stale entry behind.
-        jobs = {}
-        jobs_lock = threading.Lock()
-
-        def submit_view_job(req, view_name):
-            def on_done(job, result, cancelled):
-                with jobs_lock:
-                    jobs.pop(req, None)
-                # A cancel that kills an external tool subprocess surfaces
-                # as an ordinary exception in query_view; report those as
-                # cancelled, too. A view that completed successfully
-                # despite cancellation is sent normally (it is cached).
-                if cancelled or (job.run.cancel_event.is_set()
-                        and (result is None or 'exception' in result)):
-                    result = {'msg': 'view', 'view': view_name,
-                        'cancelled': True}
-                elif result is None:
-                    # Job crashed outside query_view (already logged).
-                    result = {'msg': 'view', 'view': view_name,
-                        'exception': 'internal error during view generation'}
-                send_msg(dict(result, req=req))
-
-            with jobs_lock:
-                jobs[req] = None
-            job = self.jobrunner.submit(
-                lambda: self.query_view(view_name, conn_globals),
-                on_progress=progress_sender(send_msg, req, view_name),
-                on_done=on_done)
-            with jobs_lock:
-                if req in jobs:
-                    jobs[req] = job
-
+        jobs = ConnectionJobs(self, conn_globals, send_msg, source_key,
+            client_id(msg_first))
+        # Start generating the views the client will likely ask for first:
+        jobs.prefetch(self.prefetch_candidates(jobs.client,
+            reply.get('views', [])))
+        with websocket_lock:
+            websocket.send(json.dumps(reply))
         try:
             for msg_raw in websocket:
                 self.on_activity()
-                msg = json.loads(msg_raw)
-                msg_type = msg.get('msg')
-                if msg_type == 'getview':
-                    try:
-                        view_name = msg['view']
-                        req = msg['req']
-                    except KeyError as e:
-                        raise ValueError(f"getview message missing key {e}")
-                    submit_view_job(req, view_name)
-                elif msg_type == 'cancelview':
-                    with jobs_lock:
-                        job = jobs.get(msg.get('req'))
-                    if job is not None:
-                        self.jobrunner.cancel(job)
-                else:
-                    raise ValueError(f"unexpected message type: {msg_type!r}")
+                jobs.dispatch(json.loads(msg_raw))
         finally:
-            # Cancel jobs the client no longer waits for. This matters for
-            # the local-mode reload flow: the client reconnects on
-            # localmodule_changed, and the rebuild's import_lock.write()
-            # must not wait behind a stale long-running generation.
-            with jobs_lock:
-                live_jobs = [j for j in jobs.values() if j is not None]
-            for job in live_jobs:
-                self.jobrunner.cancel(job)
+            jobs.cancel_all()
             if watch_files:
                 pipe_inotify_abort_w.write("abort!")
                 pipe_inotify_abort_w.flush()
@@ -631,14 +1265,79 @@ class ConnectionHandler:
 
         print(f"{remote}: websocket connection ended")
 
-def background_inotify(watch_files, pipe_inotify_abort_r, websocket, websocket_lock):
-    # This has be to a separate thread, because the file websocket.socket
-    # is done in yet another separate thread. I would have preferred a single
-    # thread per websocket that uses select.select. Now, we have three threads
-    # per websocket: the event processor thread of the websockets library,
-    # the background_inotify thread and the connection's handle_connection
-    # thread.
+    async def handle_connection_async(self, websocket):
+        """
+        Counterpart of handle_connection for the asyncio server (see
+        async_server_thread). All connections share one event loop:
+        Building the design and handling client messages (which may block,
+        e.g. InlineJobRunner or cancellation) run in the loop's default
+        executor, one message at a time per connection as in
+        handle_connection. Messages from job threads are queued to the loop,
+        and inotify events are read by the loop itself.
+        """
+        loop = asyncio.get_running_loop()
+        remote = f"{websocket.remote_address[0]}:{websocket.remote_address[1]}"
+        print(f"{remote}: new websocket connection")
+
+        # Validate auth_token to prevent code execution from untrusted connections:
+        try:
+            msg_first = json.loads(await websocket.recv())
+        except ConnectionClosed:
+            # Client connected and disconnected without sending anything.
+            print(f"{remote}: websocket closed before first message")
+            return
+
+        reply, conn_globals, watch_files, source_key = await loop.run_in_executor(None,
+            self.open_connection, msg_first)
+        if conn_globals is None:
+            await websocket.send(json.dumps(reply))
+            return
+
+        # The sender task is the only one that sends, in order of send_msg calls.
+        outbox = asyncio.Queue()
+        def send_msg(payload):
+            try:
+                loop.call_soon_threadsafe(outbox.put_nowait, payload)
+            except RuntimeError:
+                pass  # event loop closed: late progress/terminal after shutdown
+        async def sender():
+            while True:
+                payload = await outbox.get()
+                try:
+                    await websocket.send(self.encode_msg(payload))
+                except ConnectionClosed:
+                    pass  # late progress/terminal after disconnect
+
+        if watch_files:
+            # Watch before replying, so that no change after the reply is missed:
+            inotify = inotify_watch(watch_files)
+            def on_inotify():
+                for m in inotify.read(timeout=0):
+                    outbox.put_nowait({'msg':'localmodule_changed'})
+            loop.add_reader(inotify.fileno(), on_inotify)
+        jobs = ConnectionJobs(self, conn_globals, send_msg, source_key,
+            client_id(msg_first))
+        # Start generating the views the client will likely ask for first:
+        jobs.prefetch(self.prefetch_candidates(jobs.client,
+            reply.get('views', [])))
+        outbox.put_nowait(reply)
+        sender_task = loop.create_task(sender())
+
+        try:
+            async for msg_raw in websocket:
+                self.on_activity()
+                await loop.run_in_executor(None, jobs.dispatch, json.loads(msg_raw))
+        finally:
+            if watch_files:
+                loop.remove_reader(inotify.fileno())
+                inotify.close()
+            await loop.run_in_executor(None, jobs.cancel_all)
+            sender_task.cancel()
+
+        print(f"{remote}: websocket connection ended")
 
+def inotify_watch(watch_files):
+    """Returns an INotify instance that watches watch_files for changes."""
     inotify = inotify_simple.INotify()
     watch_flags = inotify_simple.flags.DELETE_SELF \
         | inotify_simple.flags.MODIFY \
@@ -646,7 +1345,15 @@ def background_inotify(watch_files, pipe_inotify_abort_r, websocket, websocket_l
     for f in watch_files:
         #print(f"Watching for changes to file: {f}")
         inotify.add_watch(f, watch_flags)
+    return inotify
 
+def background_inotify(inotify, pipe_inotify_abort_r, websocket, websocket_lock):
+    # This has be to a separate thread, because the file websocket.socket
+    # is done in yet another separate thread. I would have preferred a single
+    # thread per websocket that uses select.select. Now, we have three threads
+    # per websocket: the event processor thread of the websockets library,
+    # the background_inotify thread and the connection's handle_connection
+    # thread.
     try:
         while True:
             readable, _, _ = select.select([inotify, pipe_inotify_abort_r], [], [])
@@ -711,6 +1418,111 @@ def tar_path(p: Path) -> str:
     else:
         return f'./{p}'
 
+# Static files smaller than this are not compressed:
+COMPRESS_MIN_SIZE = 256
+GZIP_LEVEL = 9
+# Quality 11 compresses a few percent better, but about ten times slower,
+# which would noticeably delay the server startup:
+BROTLI_QUALITY = 9
+
+# Vite build output (assets/<name>-<hash>.<ext>): the content of a name never
+# changes, browsers may cache these files without revalidation.
+HASHED_ASSET_RE = re.compile(r'assets/.+-[A-Za-z0-9_-]{8}\.\w+')
+
+class StaticAsset:
+    """
+    One file of the static archive, with its gzip and brotli compressed
+    variants (if they are smaller) precomputed.
+    """
+
+    def __init__(self, name: str, data: bytes):
+        try:
+            self.mime_type = mimetypes.types_map[Path(name).suffix]
+        except KeyError:
+            self.mime_type = 'application/octet-stream'
+        if HASHED_ASSET_RE.fullmatch(name):
+            self.cache_control = 'public, max-age=31536000, immutable'
+        else:
+            self.cache_control = 'no-cache'
+        digest = hashlib.sha256(data).hexdigest()[:32]
+        # Content-Encoding -> (strong ETag, body). Each variant needs its own
+        # strong ETag, as the bodies differ.
+        self.variants = {'identity': (f'"{digest}"', data)}
+        if len(data) >= COMPRESS_MIN_SIZE:
+            compressed = {'gzip': gzip.compress(data, GZIP_LEVEL, mtime=0)}
+            if brotli is not None:
+                compressed['br'] = brotli.compress(data, quality=BROTLI_QUALITY)
+            for encoding, body in compressed.items():
+                if len(body) < len(data):
+                    self.variants[encoding] = (f'"{digest}-{encoding}"', body)
+
+    def response(self, request):
+        """Returns the response to request (200 or 304), see RFC 9110."""
+        encoding = self.select_encoding(request.headers.get('Accept-Encoding', ''))
+        etag, data = self.variants[encoding]
+        extra_headers = [('ETag', etag), ('Cache-Control', self.cache_control)]
+        if len(self.variants) > 1:
+            extra_headers.append(('Vary', 'Accept-Encoding'))
+
+        if_none_match = request.headers.get('If-None-Match')
+        if if_none_match is not None:
+            tags = [t.strip().removeprefix('W/') for t in if_none_match.split(',')]
+            if etag in tags or '*' in tags:
+                response = build_response(http.HTTPStatus.NOT_MODIFIED,
+                    mime_type=self.mime_type, data=b'', extra_headers=extra_headers)
+                # A 304 has no body; its Content-Length would be taken as
+                # the length of the cached representation.
+                del response.headers['Content-Length']
+                return response
+
+        if encoding != 'identity':
+            extra_headers.append(('Content-Encoding', encoding))
+        return build_response(http.HTTPStatus.OK, mime_type=self.mime_type,
+            data=data, extra_headers=extra_headers)
+
+    def select_encoding(self, accept_encoding: str) -> str:
+        """Smallest variant whose encoding accept_encoding permits."""
+        qvalues = {}
+        for item in accept_encoding.split(','):
+            coding, *params = [part.strip() for part in item.split(';')]
+            q = 1.0
+            for param in params:
+                if param.startswith('q='):
+                    try:
+                        q = float(param[2:])
+                    except ValueError:
+                        q = 0.0
+            if coding:
+                qvalues[coding.lower()] = q
+        default = qvalues.get('*', 0.0)
+        candidates = [(len(body), encoding)
+            for encoding, (_, body) in self.variants.items()
+            if encoding != 'identity' and qvalues.get(encoding, default) > 0]
+        return min(candidates)[1] if candidates else 'identity'
+
+def load_static_assets(tar: tarfile.TarFile) -> MappingProxyType:
+    """
+    Reads all files of tar into memory. Returns an immutable mapping from
+    path within the archive (see tar_path) to StaticAsset. Directories map to
+    the StaticAsset of their index.html file.
+    """
+    assets = {}
+    directories = []
+    for info in tar.getmembers():
+        key = tar_path(Path(info.name))
+        if info.isdir():
+            directories.append(key)
+            continue
+        f = tar.extractfile(info)
+        if f is None:
+            continue  # neither a regular file nor a link to one
+        assets[key] = StaticAsset(str(Path(info.name)), f.read())
+    for key in directories:
+        index = assets.get(tar_path(Path(key) / 'index.html'))
+        if index is not None:
+            assets[key] = index
+    return MappingProxyType(assets)
+
 def lesson_check_src(course_name, entry):
     """Epilogue source binding a course lesson's check as the lesson() view.
 
@@ -756,15 +1568,13 @@ class StaticHandler:
                 hub-authenticated browsers.
             key: the server's auth key; required for the api/token route.
         """
-        self.tar = tar
-        self.tar_lock = threading.Lock()
+        # Static files are read and compressed once, no locking is needed:
+        self.assets = load_static_assets(tar) if tar else None
         if not base_path.startswith('/') or not base_path.endswith('/'):
             raise ValueError("base_path must start and end with '/'")
         self.base_path = base_path
         self.hub = hub
         self.key = key
-        from .schematic.render import SchematicRenderer
-        self.schematic_css = SchematicRenderer.css.encode('utf8')
 
     def process_request(self, connection, request):
         try:
@@ -805,7 +1615,7 @@ class StaticHandler:
             if req_path == Path('api/schematic.css'):
                 return self.process_request_schematic_css()
 
-            return self.process_request_static(req_path)
+            return self.process_request_static(request, req_path)
         except Exception:
             traceback.print_exc()
             return build_response(http.HTTPStatus.INTERNAL_SERVER_ERROR)
@@ -939,30 +1749,17 @@ class StaticHandler:
         return build_response(data=data.encode('utf8'), mime_type='application/json')
 
     def process_request_schematic_css(self):
-        return build_response(data=self.schematic_css, mime_type='text/css')
+        from .schematic.render import SchematicRenderer
+        return build_response(data=SchematicRenderer.css.encode('utf8'), mime_type='text/css')
 
-    def process_request_static(self, req_path):
-        if not self.tar:
+    def process_request_static(self, request, req_path):
+        if not self.assets:
             return build_response(http.HTTPStatus.NOT_FOUND)
-        
-        # tarfile.TarFile seems not to be thread-safe, a semaphore seems to fix this.
-        with self.tar_lock:
-            try:
-                info = self.tar.getmember(tar_path(req_path))
-                if info.type == tarfile.DIRTYPE:
-                    req_path = req_path / 'index.html'
-                    info = self.tar.getmember(tar_path(req_path))
-            except KeyError:
-                return build_response(http.HTTPStatus.NOT_FOUND)
-
-            data = self.tar.extractfile(info).read()
-
         try:
-            mime_type = mimetypes.types_map[req_path.suffix]
+            asset = self.assets[tar_path(req_path)]
         except KeyError:
-            mime_type = 'application/octet-stream'
-
-        return build_response(http.HTTPStatus.OK, mime_type=mime_type, data=data)    
+            return build_response(http.HTTPStatus.NOT_FOUND)
+        return asset.response(request)
 
 def secure_url_open(user_url):
     """
@@ -1004,6 +1801,9 @@ def main():
     parser.add_argument('-n', '--no-browser', action='store_true', help="Show URL, but do not launch browser.")
     parser.add_argument('-m', '--module', help="Open the specified module from the local file system (local mode). Furthermore, a specific view can be preselected as MODULE:VIEW.")
     parser.add_argument('-j', '--jobs', default=4, type=int, help="Maximum number of concurrently generated views (default 4). With 0, views are generated inline in the connection handler (no progress reporting or cancellation).")
+    parser.add_argument('-w', '--workers', default=0, type=int, help="Serve from the given number of worker processes (default 0: serve from this process). Each worker generates up to --jobs views at a time, and the workers share a cache of the generated views (see --cache-dir).")
+    parser.add_argument('--cache-dir', help="Directory of the view cache, which keeps the generated views of integrated-mode sources across connections and worker processes. With --workers, a temporary directory is used by default; otherwise, no cache is used by default. Cached views are reused for the same source until the user refreshes them explicitly (Refresh button), so views that depend on time, files or other external state may be outdated until then.")
+    parser.add_argument('--asyncio', action='store_true', help="Serve all connections from a single asyncio event loop instead of using several threads per connection (e.g. for many mostly idle connections).")
     parser.add_argument('--url-authority', help="Use provided URL authority part (host:port) instead values of --hostname and --port for printed / opened URL.")
     parser.add_argument('--base-url', default='/', help="URL path prefix to serve under (e.g. /ordec/). Behind JupyterHub, the prefix is taken from JUPYTERHUB_SERVICE_PREFIX instead.")
     parser.add_argument('-V', '--version', action='version', version=f'%(prog)s {version}')
@@ -1027,6 +1827,10 @@ def main():
         if args.module:
             print("ERROR: local mode (-m) is not supported behind JupyterHub.")
             raise SystemExit(1)
+        if args.workers > 0:
+            # Activity for idle culling is only tracked per process.
+            print("ERROR: worker processes (-w) are not supported behind JupyterHub.")
+            raise SystemExit(1)
         base_path = hub.prefix
         args.no_browser = True
         bind = hub.service_url_bind()
@@ -1081,25 +1885,114 @@ def main():
     else:
         user_url += f"{base_path}#auth={key.token()}"
 
+    if args.cache_dir:
+        cache_dir = args.cache_dir
+    elif args.workers > 0:
+        # The workers share a cache for the lifetime of the supervisor:
+        cache_tmpdir = tempfile.TemporaryDirectory(prefix='ordec-cache-')
+        cache_dir = cache_tmpdir.name
+    else:
+        cache_dir = None
+
+    server_kwargs = {
+        'static_handler': static_handler,
+        'key': key,
+        'use_asyncio': args.asyncio,
+        'jobs': args.jobs,
+        'on_activity': hub.touch_activity if hub else None,
+        'cache_dir': cache_dir,
+    }
+    if args.workers > 0:
+        try:
+            supervisor = WorkerSupervisor(args.workers, hostname, port, server_kwargs)
+        except OSError as e:
+            print_startup_error(e, hostname, port)
+            raise SystemExit(1)
+        server = thread = None
+    else:
+        try:
+            server, thread = launch_server(hostname, port, **server_kwargs)
+        except Exception as e:
+            print_startup_error(e, hostname, port)
+            raise SystemExit(1)
+
+    if hub:
+        hub.start_activity_reporter()
+    else:
+        print(f"To start ORDeC, navigate to: {user_url}")
+
+    if args.no_browser:
+        launch_html = None
+    else:
+        time.sleep(1)
+        launch_html = secure_url_open(user_url)
+
+    try:
+        if args.workers > 0:
+            supervisor.run()
+        else:
+            while True:
+                signal.pause()
+    except KeyboardInterrupt:
+        print("Terminating.")
+    finally:
+        if args.workers > 0:
+            supervisor.stop()
+        else:
+            server.shutdown()
+            thread.join()
+        if launch_html:
+            launch_html.close() # Deletes the temporary file.
+
+def print_startup_error(e, hostname, port):
+    if isinstance(e, OSError) and e.errno == errno.EADDRINUSE:
+        print(f"ERROR: Address already in use: {hostname}:{port}")
+    else:
+        print(f"ERROR: Failed to start server on {hostname}:{port}: {e}")
+
+def launch_server(hostname, port, static_handler, key, use_asyncio=False,
+        jobs=4, on_activity=None, cache_dir=None, reuse_port=False):
+    """
+    Starts the server in a background thread and waits until it has either
+    bound to hostname and port or failed (then the error is raised).
+    Returns the server (with a shutdown() method) and the thread.
+
+    jobs is the number of concurrently generated views (0: inline), and
+    cache_dir the directory of the view cache (see ordec.viewcache), if any.
+    With reuse_port, other processes can listen on the same port, and the
+    kernel distributes the connections among them (see WorkerSupervisor).
+    """
     # Launch server in separate daemon thread (daemon=True). The connection
     # threads automatically inherit the daemon property. All daemon threads
     # are terminated when the main thread terminates. This makes it possible
     # to terminate the whole thing with a single Ctrl+C.
     # A future version of the websockets library might make this workaround
     # unnecessary.
-    if args.jobs > 0:
-        jobrunner = ThreadedJobRunner(args.jobs)
+    if jobs > 0:
+        jobrunner = ThreadedJobRunner(jobs)
     else:
         from .jobrunner import InlineJobRunner
         jobrunner = InlineJobRunner()
 
+    if cache_dir:
+        from .viewcache import ViewCache
+        view_cache = ViewCache(cache_dir)
+    else:
+        view_cache = None
+
+    if reuse_port:
+        sock = socket.create_server((hostname, port), reuse_port=True)
+        hostname = port = None
+    else:
+        sock = None
+
     startup_queue = queue.Queue(maxsize=1)
     server_queue = queue.Queue(maxsize=1)
     thread = threading.Thread(
-        target=server_thread,
+        target=async_server_thread if use_asyncio else server_thread,
         args=(hostname, port, static_handler, key, startup_queue, server_queue),
-        kwargs={'jobrunner': jobrunner,
-            'on_activity': hub.touch_activity if hub else None},
+        kwargs={'jobrunner': jobrunner, 'on_activity': on_activity,
+            'view_cache': view_cache, 'sock': sock},
         daemon=True,
     )
     thread.start()
@@ -1107,41 +2000,128 @@ def main():
     # Wait until the server thread has either successfully bound or failed.
     startup_error = startup_queue.get()
     if startup_error is not None:
-        if isinstance(startup_error, OSError) and startup_error.errno == errno.EADDRINUSE:
-            print(f"ERROR: Address already in use: {hostname}:{port}")
-        else:
-            print(f"ERROR: Failed to start server on {hostname}:{port}: {startup_error}")
-        raise SystemExit(1)
-    server = server_queue.get()
+        raise startup_error
+    return server_queue.get(), thread
 
-    if hub:
-        hub.start_activity_reporter()
-    else:
-        print(f"To start ORDeC, navigate to: {user_url}")
+def raise_keyboard_interrupt(signum, frame):
+    raise KeyboardInterrupt
 
-    if args.no_browser:
-        launch_html = None
-    else:
-        time.sleep(1)
-        launch_html = secure_url_open(user_url)
+class WorkerSupervisor:
+    """
+    Runs the server in n worker processes that listen on the same port
+    (SO_REUSEPORT). The kernel assigns each new connection to a worker by
+    a hash of its addresses and ports; the connection then stays with that
+    worker. As each worker has its own interpreter, CPU-bound view
+    generation of different connections is not serialized by the GIL.
+
+    Workers are forked from the supervisor, so they share the static
+    assets and the server key. They share generated views through the view
+    cache (server_kwargs['cache_dir']). Workers that exit unexpectedly are
+    restarted.
+    """
 
-    try:
+    #: Seconds to wait before restarting a worker that exited.
+    restart_delay = 1.0
+    #: Seconds to wait for workers to shut down before killing them.
+    stop_timeout = 10.0
+
+    def __init__(self, n, hostname, port, server_kwargs):
+        import multiprocessing
+        # Forking is required to share static_handler and key; it is safe
+        # as long as the supervisor starts no threads.
+        self.mp = multiprocessing.get_context('fork')
+        self.n = n
+        self.hostname = hostname
+        self.server_kwargs = server_kwargs
+        # Reserves the port (and determines it if 0) without accepting
+        # connections: only listening sockets get connections assigned.
+        self.reserved_sock = reserve_port(hostname, port)
+        self.port = self.reserved_sock.getsockname()[1]
+        self.workers = [self.start_worker(i) for i in range(n)]
+
+    def start_worker(self, index):
+        worker = self.mp.Process(target=self.worker_main, args=(index,),
+            name=f'ordec-worker-{index}')
+        worker.start()
+        return worker
+
+    def worker_main(self, index):
+        signal.signal(signal.SIGTERM, raise_keyboard_interrupt)
+        self.reserved_sock.close()
+        try:
+            server, thread = launch_server(self.hostname, self.port,
+                reuse_port=True, **self.server_kwargs)
+        except Exception as e:
+            print(f"ERROR: Worker {index} failed to start: {e}")
+            raise SystemExit(1)
+        try:
+            while True:
+                signal.pause()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.shutdown()
+            thread.join()
+
+    def run(self):
+        """Restarts workers that exit, until interrupted (KeyboardInterrupt)."""
+        from multiprocessing.connection import wait
+        signal.signal(signal.SIGTERM, raise_keyboard_interrupt)
         while True:
-            signal.pause()
-    except KeyboardInterrupt:
-        print("Terminating.")
-    finally:
-        server.shutdown()
-        thread.join()
-        if launch_html:
-            launch_html.close() # Deletes the temporary file.
+            wait([worker.sentinel for worker in self.workers])
+            for index, worker in enumerate(self.workers):
+                if worker.exitcode is not None:
+                    print(f"Worker {index} exited with code {worker.exitcode}, restarting.")
+                    time.sleep(self.restart_delay)
+                    self.workers[index] = self.start_worker(index)
+
+    def stop(self):
+        """Shuts all workers down (they also get Ctrl+C themselves)."""
+        for worker in self.workers:
+            if worker.exitcode is None:
+                worker.terminate()
+        deadline = time.monotonic() + self.stop_timeout
+        for worker in self.workers:
+            worker.join(max(0, deadline - time.monotonic()))
+            if worker.exitcode is None:
+                worker.kill()
+                worker.join()
+        self.reserved_sock.close()
+
+def reserve_port(hostname, port) -> socket.socket:
+    """
+    Returns a socket bound to hostname and port with SO_REUSEPORT, so
+    that other sockets with SO_REUSEPORT can listen on the port.
+    """
+    family, type_, proto, _, addr = socket.getaddrinfo(hostname, port,
+        type=socket.SOCK_STREAM)[0]
+    # SO_REUSEPORT would silently share the port with any other process
+    # of the same user that uses it as well (e.g. a second "ordec -w").
+    # Binding without it first fails if the port is taken at all:
+    with socket.socket(family, type_, proto) as probe:
+        probe.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        probe.bind(addr)
+        addr = (addr[0], probe.getsockname()[1]) + addr[2:]
+    sock = socket.socket(family, type_, proto)
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        sock.bind(addr)
+    except BaseException:
+        sock.close()
+        raise
+    return sock
 
-def server_thread(hostname, port, static_handler, key, startup_queue, server_queue=None, jobrunner=None, on_activity=None):
+def server_thread(hostname, port, static_handler, key, startup_queue, server_queue=None, jobrunner=None, on_activity=None, view_cache=None, sock=None):
+    """
+    Runs the server until it is shut down. Instead of hostname and port
+    (which must be None then), a listening socket sock can be given.
+    """
     c = ConnectionHandler(key=key, sysmodules_orig=sys.modules,
-        jobrunner=jobrunner, on_activity=on_activity)
+        jobrunner=jobrunner, on_activity=on_activity, view_cache=view_cache)
     startup_notified = False
     try:
-        with serve(c.handle_connection, hostname, port, process_request=static_handler.process_request) as server:
+        with serve(c.handle_connection, hostname, port, sock=sock, process_request=static_handler.process_request) as server:
             if server_queue is not None:
                 server_queue.put(server)
             startup_queue.put(None)
@@ -1154,3 +2134,46 @@ def server_thread(hostname, port, static_handler, key, startup_queue, server_que
             startup_queue.put(e)
             return
         raise
+
+class AsyncServerHandle:
+    """
+    Handle to the server of async_server_thread with the shutdown() method
+    of the sync server, so it can be stopped from other threads.
+    """
+    def __init__(self, server, loop):
+        self.server = server
+        self.loop = loop
+
+    def shutdown(self):
+        self.loop.call_soon_threadsafe(self.server.close)
+
+def async_server_thread(hostname, port, static_handler, key, startup_queue, server_queue=None, jobrunner=None, on_activity=None, view_cache=None, sock=None):
+    """
+    Like server_thread, but serves all connections, inotify watches and
+    static requests from a single asyncio event loop (see
+    ConnectionHandler.handle_connection_async) instead of using several
+    threads per connection.
+    """
+    c = ConnectionHandler(key=key, sysmodules_orig=sys.modules,
+        jobrunner=jobrunner, on_activity=on_activity, view_cache=view_cache)
+
+    async def process_request(connection, request):
+        # Static requests may block (tar archive, hub OAuth requests):
+        return await asyncio.get_running_loop().run_in_executor(None,
+            static_handler.process_request, connection, request)
+
+    async def run():
+        try:
+            server = await serve_async(c.handle_connection_async, hostname, port,
+                sock=sock, process_request=process_request)
+        except Exception as e:
+            # If startup fails (e.g. EADDRINUSE), report to main thread and return.
+            startup_queue.put(e)
+            return
+        if server_queue is not None:
+            server_queue.put(AsyncServerHandle(server, asyncio.get_running_loop()))
+        startup_queue.put(None)
+        #print(f"Listening on {hostname}, port {port}")
+        await server.serve_forever()
+
+    asyncio.run(run())
@@ -0,0 +1,163 @@
+# SPDX-FileCopyrightText: 2026 ORDeC contributors
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+On-disk cache of generated views, shared by the worker processes of the
+server (see ``ordec --workers``).
+
+In integrated mode, the source sent by the client determines the views of
+a connection. Many clients often send the same source (e.g. a course lesson
+that every student starts from), and every client sends the same source
+again on reconnect. The cache therefore keeps the view messages of the
+server (webdata() results, including the simulation results of simulation
+views) keyed by a hash of the source and the view name, so that a view is
+generated once for all worker processes. Views that depend on anything
+but the source (time, files, ...) are reused as well; a refresh that the
+user requests explicitly bypasses the cache (see ConnectionJobs.query_view
+in ordec.server) and replaces the entry.
+
+Entries are gzip-compressed JSON files in two directories below the cache
+directory: views/ maps (source, view name) to a view message whose data is
+stored separately in data/, by digest (see ConnectionHandler.remember_payload
+in ordec.server). Files are written atomically, so concurrent readers in
+other processes never see partial files. When the cache grows beyond its
+size limit, the least recently used files are deleted.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+
+from public import public
+
+# Default size limit of the cache directory in bytes:
+VIEW_CACHE_MAX_BYTES = 2 * 1024**3
+
+# Fast compression: the cache is written in the job threads of the server.
+GZIP_LEVEL = 1
+
+@public
+class ViewCache:
+    """
+    View message cache in directory path, which is created if necessary.
+    The directory can be shared by any number of processes.
+    """
+
+    def __init__(self, path, max_bytes: int=VIEW_CACHE_MAX_BYTES):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        (self.path / 'views').mkdir(parents=True, exist_ok=True)
+        (self.path / 'data').mkdir(exist_ok=True)
+        # Bytes written since the last prune():
+        self.written = 0
+        self.written_lock = threading.Lock()
+
+    def __repr__(self):
+        return f"{type(self).__name__}({str(self.path)!r})"
+
+    @staticmethod
+    def source_key(*parts: str) -> str:
+        """
+        Key of the views of a connection whose source is given by parts
+        (e.g. source type and source), for get() and put().
+        """
+        from .version import version
+        h = hashlib.sha256(version.encode())
+        for part in parts:
+            h.update(b'\0' + part.encode('utf-8', 'surrogatepass'))
+        return h.hexdigest()
+
+    def _view_path(self, source_key: str, view_name: str) -> Path:
+        key = hashlib.sha256(f'{source_key}\0{view_name}'.encode('utf-8',
+            'surrogatepass')).hexdigest()
+        return self.path / 'views' / f'{key}.json.gz'
+
+    def _data_path(self, digest: str) -> Path:
+        return self.path / 'data' / f'{digest}.json.gz'
+
+    def _read(self, path: Path):
+        try:
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                obj = json.load(f)
+            # Record the use for prune():
+            os.utime(path)
+        except (OSError, EOFError, ValueError):
+            # Missing, just pruned or corrupt: like a cache miss.
+            return None
+        return obj
+
+    def _write(self, path: Path, obj):
+        tmp_path = path.with_name(f'{path.name}.{os.getpid()}.{threading.get_ident()}.tmp')
+        try:
+            with gzip.open(tmp_path, 'wt', encoding='utf-8',
+                    compresslevel=GZIP_LEVEL) as f:
+                json.dump(obj, f)
+            size = tmp_path.stat().st_size
+            os.replace(tmp_path, path)
+        except OSError:
+            # A full or unwritable cache directory is no error.
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            return
+        with self.written_lock:
+            self.written += size
+            prune = self.written > self.max_bytes // 8
+            if prune:
+                self.written = 0
+        if prune:
+            self.prune()
+
+    def get(self, source_key: str, view_name: str) -> dict | None:
+        """Returns the cached view message, or None."""
+        msg = self._read(self._view_path(source_key, view_name))
+        if msg is None:
+            return None
+        data = self.get_payload(msg['digest'])
+        if data is None:
+            return None
+        return dict(msg, data=data)
+
+    def get_payload(self, digest: str) -> object | None:
+        """Returns the cached view data with the given digest, or None."""
+        if not digest.isalnum():
+            return None
+        return self._read(self._data_path(digest))
+
+    def put(self, source_key: str, view_name: str, msg: dict):
+        """Caches the view message msg, which must have data and digest."""
+        data_path = self._data_path(msg['digest'])
+        try:
+            # Already cached (e.g. for another source): record the use.
+            os.utime(data_path)
+        except OSError:
+            # Missing, or just pruned by another process.
+            self._write(data_path, msg['data'])
+        self._write(self._view_path(source_key, view_name),
+            {key: value for key, value in msg.items() if key != 'data'})
+
+    def prune(self):
+        """Deletes the least recently used files beyond max_bytes."""
+        files = []
+        for subdir in ('views', 'data'):
+            with os.scandir(self.path / subdir) as it:
+                for entry in it:
+                    try:
+                        st = entry.stat()
+                    except OSError:
+                        continue
+                    files.append((st.st_mtime_ns, st.st_size, entry.path))
+        total = sum(size for _, size, _ in files)
+        files.sort()
+        for _, size, path in files:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+            total -= size
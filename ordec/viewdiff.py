@@ -0,0 +1,201 @@
+# SPDX-FileCopyrightText: 2026 ORDeC contributors
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Structural diffs of the JSON data that webdata() methods return, so that
+the server can send an updated view as a patch against the data the client
+already shows (see ConnectionHandler.view_delta in ordec.server and
+web/src/viewdiff.js, which applies the patches).
+
+A patch is None (unchanged) or one of:
+
+- {'v': value}: replaced by value.
+- {'o': {key: patch}, 'x': [keys]}: dict with the given keys patched or
+  added (as {'v': value}) and the keys x removed.
+- {'l': ops}: list rebuilt from ops, which are [i, j] (copy old[i:j]),
+  {'i': [items]} (insert items) or {'p': i, 'd': patch} (old[i] patched).
+- {'s': ops}: string rebuilt from ops, which are [i, j] (copy tokens i to j
+  of the old string, see tokenize) or a string to insert.
+
+Lists are matched item by item, and dicts carrying a 'nid' (layers, report
+elements, shapes) are patched against the old item with the same nid.
+Long strings, like the SVG of schematics and symbols, are compared in
+tokens that start at '<' or after a newline, so that a changed SVG group
+(<g data-nid="...">) costs about its own size.
+
+Values are compared with ==, so True and 1 (or 1 and 1.0) count as equal.
+webdata() methods should thus not change the type of a value between runs.
+"""
+
+import json
+import re
+from difflib import SequenceMatcher
+
+from public import public
+
+# Strings shorter than this are replaced rather than diffed:
+STRING_DIFF_MIN_LEN = 256
+
+# Above this number of differing items or tokens, lists and strings are
+# not matched (which is quadratic in the worst case), but replaced:
+MATCH_MAX_ITEMS = 4000
+
+# Must give the same tokens as TOKEN_RE in web/src/viewdiff.js:
+TOKEN_RE = re.compile(r'<[^<\n]*\n?|[^<\n]+\n?|\n')
+
+def tokenize(s: str) -> list[str]:
+    """Splits s into tokens that start at '<' or after a newline."""
+    return TOKEN_RE.findall(s)
+
+def _match_key(item):
+    if isinstance(item, (dict, list)):
+        return json.dumps(item, separators=(',', ':'))
+    return (type(item).__name__, item)
+
+def _trim(old, new):
+    """Returns the lengths of the common prefix and suffix of old and new."""
+    n = min(len(old), len(new))
+    prefix = 0
+    while prefix < n and old[prefix] == new[prefix]:
+        prefix += 1
+    suffix = 0
+    while suffix < n - prefix and old[-1 - suffix] == new[-1 - suffix]:
+        suffix += 1
+    return prefix, suffix
+
+def _opcodes(old, new, keys):
+    """
+    Yields (tag, i1, i2, j1, j2) like SequenceMatcher.get_opcodes for
+    old and new, matching items by keys(item).
+    """
+    prefix, suffix = _trim(old, new)
+    if prefix:
+        yield 'equal', 0, prefix, 0, prefix
+    i1, i2 = prefix, len(old) - suffix
+    j1, j2 = prefix, len(new) - suffix
+    if i1 == i2 and j1 == j2:
+        pass
+    elif i1 == i2:
+        yield 'insert', i1, i2, j1, j2
+    elif j1 == j2:
+        yield 'delete', i1, i2, j1, j2
+    elif i2 - i1 + j2 - j1 > MATCH_MAX_ITEMS:
+        yield 'replace', i1, i2, j1, j2
+    else:
+        matcher = SequenceMatcher(None, keys(old[i1:i2]), keys(new[j1:j2]),
+            autojunk=False)
+        for tag, a1, a2, b1, b2 in matcher.get_opcodes():
+            yield tag, i1 + a1, i1 + a2, j1 + b1, j1 + b2
+    if suffix:
+        yield 'equal', len(old) - suffix, len(old), len(new) - suffix, len(new)
+
+def _nid(item):
+    if isinstance(item, dict):
+        return item.get('nid')
+    return None
+
+def _diff_list(old: list, new: list):
+    ops = []
+    def copy(i1, i2):
+        if ops and isinstance(ops[-1], list) and ops[-1][1] == i1:
+            ops[-1][1] = i2
+        else:
+            ops.append([i1, i2])
+    def insert(item):
+        if ops and isinstance(ops[-1], dict) and 'i' in ops[-1]:
+            ops[-1]['i'].append(item)
+        else:
+            ops.append({'i': [item]})
+
+    keys = lambda items: [_match_key(item) for item in items]
+    for tag, i1, i2, j1, j2 in _opcodes(old, new, keys):
+        if tag == 'equal':
+            copy(i1, i2)
+        elif tag in ('insert', 'replace'):
+            by_nid = {}
+            for i in range(i1, i2):
+                nid = _nid(old[i])
+                if nid is not None:
+                    by_nid.setdefault(nid, i)
+            for j in range(j1, j2):
+                item = new[j]
+                nid = _nid(item)
+                if nid is not None:
+                    i = by_nid.get(nid)
+                elif i2 - i1 == j2 - j1:
+                    i = i1 + j - j1
+                else:
+                    i = None
+                patch = None if i is None else diff(old[i], item)
+                if patch is None or 'v' in patch:
+                    insert(item)
+                else:
+                    ops.append({'p': i, 'd': patch})
+    return {'l': ops}
+
+def _diff_str(old: str, new: str):
+    old_tokens = tokenize(old)
+    new_tokens = tokenize(new)
+    ops = []
+    for tag, i1, i2, j1, j2 in _opcodes(old_tokens, new_tokens, list):
+        if tag == 'equal':
+            ops.append([i1, i2])
+        elif tag in ('insert', 'replace'):
+            ops.append(''.join(new_tokens[j1:j2]))
+    return {'s': ops}
+
+@public
+def diff(old, new) -> dict | None:
+    """Returns a patch that turns old into new (None if they are equal)."""
+    if type(old) is not type(new):
+        return {'v': new}
+    if old == new:
+        return None
+    if isinstance(new, dict):
+        changed = {}
+        for key, value in new.items():
+            if key in old:
+                patch = diff(old[key], value)
+                if patch is not None:
+                    changed[key] = patch
+            else:
+                changed[key] = {'v': value}
+        patch = {'o': changed}
+        removed = [key for key in old if key not in new]
+        if removed:
+            patch['x'] = removed
+        return patch
+    if isinstance(new, list):
+        return _diff_list(old, new)
+    if isinstance(new, str) and len(new) >= STRING_DIFF_MIN_LEN:
+        return _diff_str(old, new)
+    return {'v': new}
+
+@public
+def apply_patch(old, patch):
+    """Returns the result of applying patch (see diff) to old."""
+    if patch is None:
+        return old
+    if 'v' in patch:
+        return patch['v']
+    if 'o' in patch:
+        new = {key: value for key, value in old.items()
+            if key not in patch.get('x', ())}
+        for key, value_patch in patch['o'].items():
+            new[key] = apply_patch(old.get(key), value_patch)
+        return new
+    if 'l' in patch:
+        new = []
+        for op in patch['l']:
+            if isinstance(op, list):
+                new.extend(old[op[0]:op[1]])
+            elif 'i' in op:
+                new.extend(op['i'])
+            else:
+                new.append(apply_patch(old[op['p']], op['d']))
+        return new
+    if 's' in patch:
+        tokens = tokenize(old)
+        return ''.join(''.join(tokens[op[0]:op[1]]) if isinstance(op, list) else op
+            for op in patch['s'])
+    raise ValueError(f"invalid patch: {patch!r}")
@@ -24,6 +24,8 @@ from ordec.core import ordb
 from benchmarks.workloads import WORKLOADS
 from benchmarks.runner import run_one
 from benchmarks import equivalence
+from benchmarks import render as render_benchmark
+from benchmarks import startup as startup_benchmark
 
 @pytest.mark.parametrize('backend', ordb.available_backends())
 def test_all_workloads(backend):
@@ -65,3 +67,23 @@ def test_equivalence():
 
 def test_differential_fuzz():
     equivalence.differential_fuzz_all()
+
+def test_render_benchmark(capsys):
+    """The end-to-end renderer benchmark runs, and both SVG writers agree."""
+    import json
+
+    render_benchmark.main(['--scale', 'tiny', '--repeats', '1', '--warmup', '0'])
+    results = json.loads(capsys.readouterr().out)['results']
+    sizes = {r['variant']: r['inner_bytes'] for r in results}
+    assert set(sizes) == set(render_benchmark.VARIANTS)
+    assert sizes['etree'] == sizes['stream']
+    assert sizes['etree+defs'] == sizes['stream+defs']
+
+def test_startup_benchmark(capsys):
+    """The cold start benchmark runs its import step in every cache state."""
+    import json
+
+    startup_benchmark.main(['--steps', 'import', '--repeats', '1'])
+    results = json.loads(capsys.readouterr().out)['results']
+    assert [r['cache'] for r in results] == list(startup_benchmark.CACHE_STATES)
+    assert all(len(r['wall_ns']) == 1 for r in results)
@@ -0,0 +1,50 @@
+# SPDX-FileCopyrightText: 2026 ORDeC contributors
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Import time budget: CLI tools, forked workers and JupyterHub spawns pay the
+import cost of ordec on every start. Heavy dependencies must only be loaded
+when they are actually used. The checks run "python -X importtime" in a
+fresh interpreter and look at which modules were imported (robust) and at
+the total import time (generous, to catch gross regressions only).
+"""
+
+import os
+import pathlib
+import subprocess
+import sys
+
+import pytest
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+
+# Total import time of the entry point in ms, far above the typical value
+# (about 100ms for ordec.core):
+BUDGET_MS = 2000
+
+def importtime(module: str) -> dict[str, int]:
+    """Returns the cumulative import time in us of every module imported by module."""
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, (str(ROOT), env.get('PYTHONPATH'))))
+    res = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        env=env, capture_output=True, text=True, check=True)
+    times = {}
+    for line in res.stderr.splitlines():
+        # Lines are "import time: <self us> | <cumulative us> | <module>":
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line.split('|')
+        times[name.strip()] = int(cumulative)
+    return times
+
+@pytest.mark.parametrize('module, deferred', [
+    ('ordec', ['importlib.metadata', 'numpy']),
+    ('ordec.core', ['numpy', 'scipy', 'lark', 'gdsii', 'importlib.metadata']),
+    ('ordec.layout', ['scipy', 'lark', 'gdsii', 'ordec.layout.srouter']),
+    ('ordec.lib.ihp130', ['scipy', 'gdsii', 'ordec.layout.klayout']),
+])
+def test_import_budget(module, deferred):
+    times = importtime(module)
+    assert module in times
+    assert [m for m in deferred if m in times] == []
+    assert times[module] < BUDGET_MS * 1000
@@ -80,6 +80,43 @@ def test_threaded_respects_max_jobs():
         c.wait()
     assert max(max_running) == 2
 
+def test_background_job_gives_way():
+    pm = ThreadedJobRunner(1)
+    assert pm.idle()
+    bg_c, real_c = Collector(), Collector()
+    started = threading.Event()
+    def background():
+        started.set()
+        while True:
+            checkpoint()
+            time.sleep(0.01)
+    pm.submit(background, on_done=bg_c.on_done, background=True)
+    assert started.wait(timeout=10)
+    assert not pm.idle()
+    # A regular job that finds no idle slot cancels the background job:
+    pm.submit(lambda: "real", on_done=real_c.on_done)
+    bg_c.wait()
+    real_c.wait()
+    assert bg_c.cancelled is True
+    assert (real_c.result, real_c.cancelled) == ("real", False)
+    assert pm.idle()
+
+def test_promoted_job_is_not_preempted():
+    pm = ThreadedJobRunner(1)
+    bg_c, real_c = Collector(), Collector()
+    release = threading.Event()
+    job = pm.submit(lambda: release.wait(timeout=10) and "bg",
+        on_done=bg_c.on_done, background=True)
+    pm.promote(job)
+    pm.submit(lambda: "real", on_done=real_c.on_done)
+    time.sleep(0.2)
+    assert not bg_c.done.is_set()
+    release.set()
+    bg_c.wait()
+    real_c.wait()
+    assert (bg_c.result, bg_c.cancelled) == ("bg", False)
+    assert real_c.result == "real"
+
 def test_cancel_queued_job_never_runs():
     pm = ThreadedJobRunner(1)
     release = threading.Event()
@@ -392,6 +392,56 @@ def test_expand_paths_custom():
         Vec2I(570, -50),
     ]
 
+def test_paths_to_poly_vertices():
+    """Batch path expansion matches path_to_poly_vertices path by path."""
+    from ordec.layout.helpers import path_to_poly_vertices
+    layers = SG13G2().layers
+    l = Layout(ref_layers=layers)
+    l % LayoutPath(width=100, endtype=PathEndType.Square, layer=layers.Metal1,
+        vertices=[Vec2I(0, 0), Vec2I(0, 500), Vec2I(300, 500), Vec2I(300, -200)])
+    # Straight continuation (0 degree turn) in the middle:
+    l % LayoutPath(width=40, endtype=PathEndType.Flush, layer=layers.Metal2,
+        vertices=[Vec2I(0, 0), Vec2I(100, 0), Vec2I(250, 0), Vec2I(250, 80)])
+    l % LayoutPath(width=20, ext_bgn=5, ext_end=15, layer=layers.Metal1,
+        vertices=[Vec2I(-10, 0), Vec2I(-10, -300)])
+    paths = list(l.all(LayoutPath))
+    assert paths_to_poly_vertices(paths) == [path_to_poly_vertices(p) for p in paths]
+    assert paths_to_poly_vertices([]) == []
+
+    l % LayoutPath(width=20, layer=layers.Metal1,
+        vertices=[Vec2I(0, 0), Vec2I(100, 100)])
+    with pytest.raises(ValueError, match="not rectilinear"):
+        paths_to_poly_vertices(l.all(LayoutPath))
+
+def test_expand_geom_keeps_refs():
+    """expand_rects / expand_paths reuse the nids of the replaced shapes."""
+    sym = Symbol()
+    sym.a = Pin()
+    sym.b = Pin()
+    sym = sym.freeze()
+    layers = SG13G2().layers
+    l = Layout(ref_layers=layers, symbol=sym)
+    l.rect = LayoutRect(layer=layers.Metal1, rect=Rect4I(0, 0, 100, 50))
+    l.path = LayoutPath(width=20, layer=layers.Metal2,
+        vertices=[Vec2I(0, 0), Vec2I(0, 200), Vec2I(100, 200)])
+    rect_pin = l.rect.create_pin(sym.a)
+    path_pin = l.path.create_pin(sym.b)
+
+    expand_geom(l)
+
+    assert len(list(l.all(LayoutRect))) == 0
+    assert len(list(l.all(LayoutPath))) == 0
+    assert isinstance(l.rect, LayoutPoly)
+    assert isinstance(l.path, LayoutPoly)
+    assert rect_pin.ref == l.rect
+    assert path_pin.ref == l.path
+    assert l.rect.vertices() == [Vec2I(0, 0), Vec2I(100, 0), Vec2I(100, 50), Vec2I(0, 50)]
+    assert l.path.vertices() == [
+        Vec2I(100, 210), Vec2I(-10, 210), Vec2I(-10, 0),
+        Vec2I(10, 0), Vec2I(10, 190), Vec2I(100, 190),
+    ]
+    assert list(l.shapes_in(Rect4I(-10, 195, -5, 200), layers.Metal2)) == [l.path]
+
 def test_path_infer_custom_endtype():
     layers = SG13G2().layers
     l = Layout(ref_layers=layers)
@@ -547,6 +597,135 @@ def test_expand_rect():
         Vec2I(100, 700),
     ]
 
+def test_shapes_in():
+    layers = SG13G2().layers
+
+    l = Layout(ref_layers=layers)
+    rect = l % LayoutRect(layer=layers.Metal1, rect=Rect4I(0, 0, 100, 100))
+    poly = l % LayoutPoly(layer=layers.Metal1, vertices=[
+        Vec2I(1000, 0), Vec2I(9000, 0), Vec2I(9000, 50), Vec2I(1000, 50),
+        ])
+    path = l % LayoutPath(layer=layers.Metal2, width=20,
+        endtype=PathEndType.Square, vertices=[Vec2I(0, 500), Vec2I(0, 900)])
+    label = l % LayoutLabel(layer=layers.Metal1, pos=Vec2I(50, 50), text='x')
+
+    assert list(l.shapes_in(Rect4I(40, 40, 60, 60), layers.Metal1)) == [rect, label]
+    assert list(l.shapes_in(Rect4I(5000, 25, 5000, 25), layers.Metal1)) == [poly]
+    assert list(l.shapes_in(Rect4I(5000, 25, 5000, 25), layers.Metal2)) == []
+    # Path extent includes width and square end extension:
+    assert list(l.shapes_in(Rect4I(-10, 490, -10, 490), layers.Metal2)) == [path]
+    assert list(l.shapes_in(Rect4I(-11, 489, -11, 489), layers.Metal2)) == []
+
+    # Vertex updates move the polygon:
+    poly_vertices = list(l.all(PolyVec2I.ref_idx.query(poly)))
+    poly_vertices[1].pos = Vec2I(20000, 0)
+    poly_vertices[2].pos = Vec2I(20000, 50)
+    assert list(l.shapes_in(Rect4I(15000, 0, 15000, 0), layers.Metal1)) == [poly]
+
+    # Replacement (as done by expand_rects) and removal:
+    expand_rects(l)
+    assert [type(s).canonical_cls() for s in
+        l.shapes_in(Rect4I(40, 40, 60, 60), layers.Metal1)] == [LayoutPoly, LayoutLabel]
+    poly.remove()
+    assert list(l.shapes_in(Rect4I(15000, 0, 15000, 0), layers.Metal1)) == []
+
+    f = l.freeze()
+    assert [s.nid for s in f.shapes_in(Rect4I(-10**6, -10**6, 10**6, 10**6), layers.Metal1)] \
+        == [rect.nid, label.nid]
+
+def test_shapes_in_many_vertices(monkeypatch):
+    from ordec.core.schema import layout_shape_idx
+    layers = SG13G2().layers
+    extent = layout_shape_idx.extent
+    calls = []
+    def counting_extent(*args):
+        calls.append(args[2])
+        return extent(*args)
+    monkeypatch.setattr(layout_shape_idx, 'extent', counting_extent)
+
+    # The extent of a polygon is computed a few times per update, not once
+    # per vertex (which made building large polygons quadratic):
+    k = 4000
+    l = Layout(ref_layers=layers)
+    poly = l % LayoutPoly(layer=layers.Metal1, vertices=[
+        Vec2I(i, (i * 7919) % 1000) for i in range(k)])
+    assert len(calls) < 10
+    assert list(l.shapes_in(Rect4I(k - 1, 0, k - 1, 0), layers.Metal1)) == [poly]
+
+    # Queries within an update see the current extent:
+    with l.subgraph.updater() as u:
+        u.add_single(PolyVec2I.Tuple(ref=poly.nid, order=k,
+            pos=Vec2I(10000, 10000)), u.nid_generate())
+        assert layout_shape_idx.search(u, layers.Metal1.nid,
+            (10000, 10000, 10000, 10000)) == [poly.nid]
+    assert list(l.shapes_in(Rect4I(10000, 10000, 10000, 10000), layers.Metal1)) == [poly]
+
+    calls.clear()
+    poly.remove()
+    assert len(calls) < 10
+    assert list(l.shapes_in(Rect4I(-10**6, -10**6, 10**6, 10**6), layers.Metal1)) == []
+
+def test_webdata_tiles(monkeypatch):
+    from ordec.layout import webdata as webdata_module
+    from ordec.layout.webdata import LayoutTiles, webdata, webtiles
+    layers = SG13G2().layers
+
+    l = Layout(ref_layers=layers)
+    l % LayoutRect(layer=layers.Metal1, rect=Rect4I(0, 0, 4000, 100))
+    l % LayoutRect(layer=layers.Metal1, rect=Rect4I(3000, 3000, 3002, 3002))
+    l % LayoutRect(layer=layers.Metal2, rect=Rect4I(100, 3900, 200, 4000))
+    l % LayoutLabel(layer=layers.Metal1, pos=Vec2I(3001, 3001), text='x')
+    l = l.freeze()
+
+    tiles = LayoutTiles(l)
+    assert tiles.max_level == 4
+    assert tiles.tile_size(0) == 4096
+    assert tiles.tile_rect(4, 1, 2) == Rect4I(256, 512, 512, 768)
+    with pytest.raises(ValueError):
+        tiles.tile(1, 2, 0)
+
+    def tile_shapes(level, x, y):
+        tile = tiles.tile(level, x, y)
+        return {layer['nid']: (sorted(p['nid'] for p in layer['polys']),
+            [label['text'] for label in layer['labels']])
+            for layer in tile['layers']}
+
+    # Level of detail: at level 0, one pixel is 16 units wide.
+    shapes0 = tile_shapes(0, 0, 0)
+    assert len(shapes0) == 2
+    assert shapes0[layers.Metal1.nid][1] == ['x']
+    assert len(shapes0[layers.Metal1.nid][0]) == 1
+    # Finest level: the small rect is visible, only in its own tile.
+    shapes4 = tile_shapes(4, 11, 11)
+    assert shapes4.keys() == {layers.Metal1.nid}
+    assert len(shapes4[layers.Metal1.nid][0]) == 1
+    assert shapes4[layers.Metal1.nid][0] != shapes0[layers.Metal1.nid][0]
+    assert len(tile_shapes(4, 15, 0)[layers.Metal1.nid][0]) == 1
+    assert tile_shapes(4, 0, 15).keys() == {layers.Metal2.nid}
+    assert tile_shapes(4, 5, 5) == {}
+
+    # Untiled data contains all shapes, tiled data only layer metadata:
+    _, data_full = webdata(l, tiled=False)
+    assert [len(layer['polys']) for layer in data_full['layers']] == [2, 1]
+    assert 'tiled' not in data_full
+    _, data_tiled = webdata(l, tiled=True)
+    assert data_tiled['tiled'] == {'origin': [0, 0], 'maxLevel': 4, 'tilePx': 256}
+    assert [layer['polys'] for layer in data_tiled['layers']] == [[], []]
+    assert data_tiled['extent'] == data_full['extent'] == [0, 0, 4000, 4000]
+    assert l.webtiles(4, [(11, 11)]) == [tiles.tile(4, 11, 11)]
+    assert webtiles(l, 0, [(0, 0)]) == [tiles.tile(0, 0, 0)]
+
+    # Tiled layouts are prepared once:
+    monkeypatch.setattr(webdata_module, 'LayoutTiles', None)
+    assert webdata(l, tiled=True) == ('layout_gl', data_tiled)
+    assert webdata(l) == ('layout_gl', data_full)
+
+    # Only the most recently used tiles are memoized:
+    monkeypatch.setattr(webdata_module, 'TILE_MEMO_SIZE', 2)
+    for x in range(4):
+        tiles.tile(2, x, 0)
+    assert list(tiles._tiles) == [(2, 2, 0), (2, 3, 0)]
+
 def test_write_gds():
     layers = SG13G2().layers
 
@@ -598,6 +777,61 @@ def test_write_gds():
 
     assert gds_text_from_layout(Top().layout) == gds_text_from_file(gds_dir / 'test_write_gds.gds')
 
+def test_write_gds_workers():
+    layers = SG13G2().layers
+
+    sym = Symbol()
+    sym.a = Pin()
+    sym.b = Pin()
+    sym.c = Pin()
+    sym = sym.freeze()
+
+    class Leaf(Cell):
+        @generate
+        def layout(self) -> Layout:
+            l = Layout(ref_layers=layers, cell=self, symbol=sym)
+            r = l % LayoutRect(layer=layers.Metal1, rect=(0, 0, 100, 100))
+            r.create_pin(sym.a)
+            p = l % LayoutPoly(layer=layers.Metal2, vertices=[
+                (200, 0), (200, 200), (100, 200), (100, 100), (0, 100), (0, 0)])
+            p.create_pin(sym.b)
+            path = l % LayoutPath(layer=layers.Metal3, width=20,
+                endtype=PathEndType.Custom, ext_bgn=5, ext_end=10,
+                vertices=[(0, 0), (0, 500), (300, 500)])
+            path.create_pin(sym.c)
+            l % LayoutLabel(layer=layers.Metal1.pin, pos=(10, 10), text="leaf")
+            return l
+
+    class Mid(Cell):
+        @generate
+        def layout(self) -> Layout:
+            l = Layout(ref_layers=layers, cell=self)
+            l % LayoutInstance(pos=(0, 0), orientation=R90, ref=Leaf().layout)
+            l % LayoutRect(layer=layers.Metal1, rect=(-50, -50, 0, 0))
+            return l
+
+    class Top(Cell):
+        @generate
+        def layout(self) -> Layout:
+            l = Layout(ref_layers=layers, cell=self)
+            l % LayoutPoly(layer=layers.Metal2, vertices=[(0, 0), (50, 0), (50, 50)])
+            l % LayoutRect(layer=layers.Metal1, rect=(100, 200, 300, 400))
+            l % LayoutInstance(pos=(1000, 0), orientation=MX, ref=Mid().layout)
+            l % LayoutInstance(pos=(2000, 0), ref=Leaf().layout)
+            l % LayoutInstanceArray(pos=(0, 2000), ref=Leaf().layout,
+                cols=3, rows=2, vec_col=(500, 0), vec_row=(0, 700))
+            return l
+
+    def gds_text_workers(workers):
+        buf = io.BytesIO()
+        write_gds(Top().layout, buf, workers=workers)
+        buf.seek(0)
+        return gds_text(buf)
+
+    serial = gds_text_workers(None)
+    assert "STRNAME: 'leaf'" in serial
+    assert gds_text_workers(2) == serial
+
 def test_write_gds_without_cell():
     layers = SG13G2().layers
 
@@ -854,6 +1088,80 @@ def test_compare_pin_mismatch():
     assert result is not None
     assert "Pin mismatch" in result
 
+def test_layout_diff():
+    """layout_diff() reports added, removed and changed shapes."""
+    layers = SG13G2().layers
+
+    a = Layout(ref_layers=layers)
+    a % LayoutRect(layer=layers.Metal1, rect=(0, 0, 100, 200))
+    a % LayoutRect(layer=layers.Metal1, rect=(1000, 0, 1100, 200))
+    a % LayoutRect(layer=layers.Metal2, rect=(0, 0, 100, 200))
+    a % LayoutLabel(layer=layers.Metal1, pos=(50, 100), text="A")
+
+    b = Layout(ref_layers=layers)
+    b % LayoutRect(layer=layers.Metal1, rect=(0, 0, 101, 200))
+    b % LayoutRect(layer=layers.Metal2, rect=(0, 0, 100, 200))
+    b % LayoutRect(layer=layers.Metal2, rect=(5000, 0, 5100, 200))
+    b % LayoutLabel(layer=layers.Metal1, pos=(50, 100), text="B")
+
+    d = layout_diff(a, b)
+    assert d
+    assert d.removed == [DiffShape('poly', layers.Metal1.nid,
+        ((1000, 0), (1100, 0), (1100, 200), (1000, 200)))]
+    assert d.added == [DiffShape('poly', layers.Metal2.nid,
+        ((5000, 0), (5100, 0), (5100, 200), (5000, 200)))]
+    assert sorted(d.changed) == [
+        (DiffShape('label', layers.Metal1.nid, ((50, 100),), text='A'),
+            DiffShape('label', layers.Metal1.nid, ((50, 100),), text='B')),
+        (DiffShape('poly', layers.Metal1.nid, ((0, 0), (100, 0), (100, 200), (0, 200))),
+            DiffShape('poly', layers.Metal1.nid, ((0, 0), (101, 0), (101, 200), (0, 200)))),
+    ]
+    assert len(d.only_a()) == 3
+    assert len(d.only_b()) == 3
+    assert not layout_diff(a, a.freeze())
+
+    report = d.drc_report()
+    assert report.ref_layout == a.freeze()
+    assert report.summary() == {'Removed: Metal1': 1, 'Added: Metal2': 1, 'Changed: Metal1': 2}
+    view_type, data = report.webdata()
+    assert view_type == 'drc_report'
+    changed_poly = [item['shapes'] for item in data['items']
+        if item['shapes'][0]['type'] == 'poly' and len(item['shapes']) == 2]
+    assert changed_poly == [[
+        {'type': 'poly', 'vertices': [[0, 0], [100, 0], [100, 200], [0, 200]]},
+        {'type': 'poly', 'vertices': [[0, 0], [101, 0], [101, 200], [0, 200]]},
+    ]]
+
+def test_layout_diff_hierarchy():
+    """layout_diff() compares hierarchical layouts like flatten() + expand_geom()."""
+    layers = SG13G2().layers
+
+    leaf = Layout(ref_layers=layers)
+    leaf % LayoutRect(layer=layers.Metal1, rect=(0, 0, 100, 50))
+    leaf % LayoutPath(width=20, endtype=PathEndType.Square, layer=layers.Metal2,
+        vertices=[Vec2I(0, 0), Vec2I(0, 200), Vec2I(150, 200)])
+    leaf % LayoutPoly(layer=layers.Metal1, vertices=[
+        Vec2I(200, 0), Vec2I(400, 0), Vec2I(400, 100),
+        Vec2I(300, 100), Vec2I(300, 300), Vec2I(200, 300)])
+    leaf % LayoutLabel(layer=layers.Metal1, pos=(10, 10), text="x")
+    leaf = leaf.freeze()
+
+    top = Layout(ref_layers=layers)
+    for i, orientation in enumerate(D4):
+        top % LayoutInstance(ref=leaf, pos=Vec2I(1000*i, 0), orientation=orientation)
+    top % LayoutInstanceArray(ref=leaf, pos=Vec2I(0, 5000), orientation=MX,
+        cols=2, rows=3, vec_col=Vec2I(1000, 0), vec_row=Vec2I(0, 1000))
+
+    flat = top.mutable_copy()
+    flatten(flat)
+    expand_geom(flat)
+    assert not layout_diff(top, flat)
+
+    next(iter(flat.all(LayoutLabel))).remove()
+    d = layout_diff(top, flat)
+    assert len(d.removed) == 1 and d.removed[0].kind == 'label'
+    assert d.added == [] and d.changed == []
+
 
 def test_expand_pins_rect():
     """expand_pins places label at center for a simple rectangle."""
@@ -873,6 +1181,26 @@ def test_expand_pins_rect():
     lbl = list(layout.all(LayoutLabel))[0]
     assert lbl.pos == Vec2I(50, 50)
 
+def test_pin_shape_rect():
+    """pin_shape takes rect refs as they are, like expand_pins after expand_rects."""
+    sym = Symbol()
+    sym.my_pin = Pin()
+    sym = sym.freeze()
+
+    layers = SG13G2().layers
+    layout = Layout(ref_layers=layers, symbol=sym)
+
+    r = layout % LayoutRect(layer=layers.Metal1, rect=(0, 0, 100, 50))
+    r.create_pin(sym.my_pin)
+
+    pinlayer, vertices, pos = pin_shape(list(layout.all(LayoutPin))[0])
+    assert pinlayer == layers.Metal1.pin
+    assert vertices == rect_vertices(Rect4I(0, 0, 100, 50))
+    assert pos == Vec2I(50, 25)
+
+    expand_rects(layout)
+    assert list(layout.all(LayoutPoly))[0].vertices() == vertices
+
 
 def test_expand_pins_concave_L():
     """expand_pins places label inside an L-shaped concave polygon."""
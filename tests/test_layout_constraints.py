@@ -2,10 +2,12 @@
 # SPDX-License-Identifier: Apache-2.0
 
 import pytest
+import numpy as np
+from itertools import chain
 
 from ordec.core import *
 from ordec.lib.ihp130 import SG13G2
-from ordec.core.constraints import Variable, LinearTerm, Constraint, UnderconstrainedError
+from ordec.core.constraints import Variable, LinearTerm, Constraint, UnderconstrainedError, SolverSession
 
 def test_equalities():
     layers = SG13G2().layers
@@ -170,6 +172,82 @@ def test_no_solution():
     with pytest.raises(SolverError):
         s.solve()
 
+def test_conflicting_offsets():
+    layers = SG13G2().layers
+    l = Layout(ref_layers=layers)
+
+    l.r1 = LayoutRect(layer=layers.Metal1)
+    l.r2 = LayoutRect(layer=layers.Metal1)
+
+    s = Solver(l)
+    s.constrain(l.r1.rect == Rect4I(0, 0, 100, 100))
+    s.constrain(l.r2.size == (100, 100))
+    s.constrain(l.r2.lx == l.r1.ux + 50)
+    s.constrain(l.r2.ly == l.r1.ly)
+    s.constrain(l.r2.ux == l.r1.lx + 200) # conflicting with lx == r1.ux + 50
+
+    with pytest.raises(SolverError):
+        s.solve()
+
+def test_components():
+    layers = SG13G2().layers
+    l = Layout(ref_layers=layers)
+
+    # Two independent rows of rects, each placed relative to its first rect:
+    n = 50
+    for row in range(2):
+        for i in range(n):
+            l % LayoutRect(layer=layers.Metal1)
+    rects = list(l.all(LayoutRect))
+
+    s = Solver(l)
+    for row in range(2):
+        first = rects[row*n]
+        s.constrain(first.southwest == (0, 1000*row))
+        for prev, r in zip(rects[row*n:(row+1)*n], rects[row*n+1:(row+1)*n]):
+            s.constrain(r.size == (100, 200))
+            s.constrain(r.lx == prev.ux + 20)
+            s.constrain(r.ly == prev.ly)
+    s.constrain(rects[0].size == (100, 200))
+    # Width of the first rect of the second row is only bounded from below:
+    s.constrain(rects[n].height == 200)
+    s.constrain(rects[n].width >= 300)
+
+    s.solve()
+
+    assert rects[n-1].rect == Rect4I(120*(n-1), 0, 120*(n-1)+100, 200)
+    assert rects[n].rect == Rect4I(0, 1000, 300, 1200)
+    assert rects[2*n-1].rect == Rect4I(320+120*(n-2), 1000, 420+120*(n-2), 1200)
+
+def test_underconstrained_component():
+    layers = SG13G2().layers
+    l = Layout(ref_layers=layers)
+
+    l.r1 = LayoutRect(layer=layers.Metal1)
+    l.r2 = LayoutRect(layer=layers.Metal1)
+    l.r3 = LayoutRect(layer=layers.Metal1)
+
+    s = Solver(l)
+    s.constrain(l.r1.rect == Rect4I(0, 0, 100, 100))
+    # r2 and r3 only have fixed offsets to each other:
+    s.constrain(l.r2.size == (100, 100))
+    s.constrain(l.r3.size == (100, 100))
+    s.constrain(l.r3.southwest == l.r2.southeast)
+
+    with pytest.raises(UnderconstrainedError) as exc_info:
+        s.solve()
+
+    err = exc_info.value
+    assert err.ambiguity_info.degrees_of_freedom == 2
+    assert err.ambiguity_info.constraint_rank == 10
+    null_space = err.ambiguity_info.null_space
+    assert null_space.shape == (12, 2)
+    # r1 is fixed:
+    for i, v in enumerate(err.ambiguity_info.variables):
+        if v.nid == l.r1.nid:
+            assert np.allclose(null_space[i], 0)
+    assert np.allclose(null_space.T @ null_space, np.eye(2))
+
 
 def test_vec2():
     layers = SG13G2().layers
@@ -324,3 +402,113 @@ def test_rect4_constraints_contains():
     s.solve()
 
     assert layout.r4.rect == Rect4I(lx=1000, ly=-1000, ux=1700, uy=-400)        
+
+def test_session_resolve():
+    layers = SG13G2().layers
+    session = SolverSession()
+
+    def build(gap, min_width, session):
+        l = Layout(ref_layers=layers)
+        l.r1 = LayoutRect(layer=layers.Metal1)
+        l.r2 = LayoutRect(layer=layers.Metal1)
+        l.r3 = LayoutRect(layer=layers.Metal1)
+
+        s = Solver(l, session=session)
+        s.constrain(l.r1.rect == Rect4I(0, 0, 100, 100))
+        for prev, r in ((l.r1, l.r2), (l.r2, l.r3)):
+            s.constrain(r.height == 100)
+            s.constrain(r.width >= min_width)
+            s.constrain(r.lx >= prev.ux + gap)
+            s.constrain(r.ly == prev.ly)
+        s.constrain(l.r3.ux <= 500)
+        s.solve()
+        return l.r2.rect, l.r3.rect
+
+    # Only constants change: solved again from the cached problem, with the
+    # same results as without cache.
+    for gap, min_width in ((20, 50), (30, 60), (0, 150), (20, 50)):
+        assert build(gap, min_width, session) == build(gap, min_width, SolverSession(size=0))
+    assert (session.hits, session.misses) == (3, 1)
+
+    with pytest.raises(SolverError):
+        build(0, 300, session) # r3.ux <= 500 cannot be met.
+
+def test_session_conflicting_constants():
+    layers = SG13G2().layers
+    session = SolverSession()
+
+    def build(offset):
+        l = Layout(ref_layers=layers)
+        l.r1 = LayoutRect(layer=layers.Metal1)
+        s = Solver(l, session=session)
+        s.constrain(l.r1.southwest == (0, 0))
+        s.constrain(l.r1.ux == l.r1.lx + 100)
+        s.constrain(l.r1.ux == l.r1.lx + offset)
+        s.constrain(l.r1.height == 100)
+        s.solve()
+        return l.r1.rect
+
+    assert build(100) == Rect4I(0, 0, 100, 100)
+    with pytest.raises(SolverError):
+        build(200)
+    assert session.hits == 1
+
+def test_constrain_rows():
+    layers = SG13G2().layers
+
+    def build():
+        l = Layout(ref_layers=layers)
+        rects = []
+        for i in range(10):
+            setattr(l, f'r{i}', LayoutRect(layer=layers.Metal1))
+            rects.append(getattr(l, f'r{i}'))
+        l.box = LayoutRect(layer=layers.Metal2)
+        return l, rects
+
+    l, rects = build()
+    s = Solver(l, session=SolverSession(size=0))
+    s.constrain(rects[0].southwest == (0, 0))
+    for prev, r in zip(rects, rects[1:]):
+        s.constrain(r.lx == prev.ux + 50)
+        s.constrain(r.ly == prev.ly)
+    for r in rects:
+        s.constrain(r.size == (100, 200))
+        s.constrain(l.box.rect.contains(r.rect))
+    s.solve()
+    expected = [r.rect for r in rects] + [l.box.rect]
+
+    # The same constraints in array form:
+    l, rects = build()
+    s = Solver(l, session=SolverSession(size=0))
+    s.constrain(rects[0].southwest == (0, 0))
+    lx, ly, ux, uy = s.variable_ids(rects, LayoutRect.rect).T
+    s.constrain_rows(np.column_stack((lx[1:], ux[:-1])), (1, -1), -50)
+    s.constrain_rows(np.column_stack((ly[1:], ly[:-1])), (1, -1))
+    s.constrain_rows(np.column_stack((ux, lx)), (1, -1), -100)
+    s.constrain_rows(np.column_stack((uy, ly)), (1, -1), np.full(10, -200))
+    box = s.variable_ids([l.box], LayoutRect.rect)[0]
+    for j, sign in enumerate((1, 1, -1, -1)):
+        s.constrain_rows(np.column_stack((np.full(10, box[j]), (lx, ly, ux, uy)[j])),
+            (sign, -sign), equality=False)
+    assert s.constrained_variables() == {v for r in rects + [l.box]
+        for v in chain.from_iterable(t.variables for t in r.rect)}
+    s.solve()
+    assert [r.rect for r in rects] + [l.box.rect] == expected
+    assert expected[-1] == Rect4I(0, 0, 1450, 200)
+
+    with pytest.raises(ValueError, match="already defined"):
+        s.variable_ids(rects, LayoutRect.rect)
+
+def test_constrain_rows_error():
+    layers = SG13G2().layers
+    l = Layout(ref_layers=layers)
+    l.r1 = LayoutRect(layer=layers.Metal1)
+
+    s = Solver(l)
+    s.constrain(l.r1.rect == Rect4I(0, 0, 100, 100))
+    (lx, ly, ux, uy), = s.variable_ids([l.r1], LayoutRect.rect)
+    with pytest.raises(ValueError):
+        s.constrain_rows([[lx, 4]], (1, -1))
+    s.constrain_rows([[ux, lx]], (1, -1), -200)
+    with pytest.raises(SolverError, match=r"Conflicting equality constraint: LinearTerm\(1.0\*nid1.rect.2 \+ -1.0\*nid1.rect.0 \+ -200.0\)"):
+        s.solve()
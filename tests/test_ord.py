@@ -1,7 +1,13 @@
 # SPDX-FileCopyrightText: 2025 ORDeC contributors
 # SPDX-License-Identifier: Apache-2.0
 
+import os
+import sys
+from collections import OrderedDict
+import pytest
 import ordec.importer
+from ordec import language
+from ordec.larkcache import LazyLark, grammar_cache_path
 from ordec.core import Cell
 
 def test_ord_empty():
@@ -14,3 +20,60 @@ def test_ord_multicell():
     from .lib.ord import multicell
     assert issubclass(multicell.Cell1, Cell)
     assert issubclass(multicell.Cell2, Cell)
+
+def test_ord_compile_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(sys, 'pycache_prefix', None)
+    monkeypatch.setattr(sys, 'dont_write_bytecode', False)
+    ord_path = str(tmp_path / 'cached.ord')
+    src = "cell Cached:\n    pass\n"
+    cache_path = language.ord_cache_path(ord_path)
+    assert cache_path.startswith(str(tmp_path / '__pycache__'))
+
+    g = {}
+    code = language.compile_ord(src, g, ord_path, cache_path=cache_path)
+    assert os.path.exists(cache_path)
+    py_source = g['__ord_py_source__']
+
+    # Second compilation in a fresh process (empty memory cache) is read
+    # from the cache file without parsing:
+    def ord_to_py(source):
+        raise AssertionError("parsed again")
+    monkeypatch.setattr(language, 'ord_to_py', ord_to_py)
+    monkeypatch.setattr(language, '_compiled', OrderedDict())
+    g = {}
+    assert language.compile_ord(src, g, ord_path, cache_path=cache_path) == code
+    assert g['__ord_py_source__'] == py_source
+    exec(code, g, g)
+    assert issubclass(g['Cached'], Cell)
+
+    # Changed sources and translators are not served from the cache:
+    with pytest.raises(AssertionError, match="parsed again"):
+        language.compile_ord(src + "\n", {}, ord_path, cache_path=cache_path)
+    monkeypatch.setattr(language, '_compiled', OrderedDict())
+    monkeypatch.setattr(language, '_translator_hash', b'other')
+    with pytest.raises(AssertionError, match="parsed again"):
+        language.compile_ord(src, {}, ord_path, cache_path=cache_path)
+
+def test_lazy_lark_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(sys, 'pycache_prefix', str(tmp_path))
+    monkeypatch.setattr(sys, 'dont_write_bytecode', False)
+
+    parser = LazyLark('ordec.layout', 'rdb_value.lark', parser='lalr')
+    assert parser._lark is None # nothing built before first use
+    tree = parser.parse("text: 'abc'")
+    cache_path = grammar_cache_path(parser.grammar_path())
+    assert cache_path.startswith(str(tmp_path)) and os.path.exists(cache_path)
+
+    # Parsers created later load the cached tables instead of building them:
+    parser = LazyLark('ordec.layout', 'rdb_value.lark', parser='lalr')
+    def build():
+        raise AssertionError("built again")
+    monkeypatch.setattr(parser, '_build', build)
+    assert parser.parse("text: 'abc'") == tree
+
+    # Other options do not match the cache:
+    parser = LazyLark('ordec.layout', 'rdb_value.lark', parser='lalr',
+        propagate_positions=True)
+    monkeypatch.setattr(parser, '_build', build)
+    with pytest.raises(AssertionError, match="built again"):
+        parser.parse("text: 'abc'")
@@ -852,6 +852,57 @@ def test_index_custom_sort():
     index_values = s.all(MyItem.idx_ref.query(1), wrap_cursor=False)
     assert index_values == [99, 98, 100, 102, 101] # ordered by node.order
 
+def test_index_spatial():
+    def box_extent(state, node, nid, override):
+        if node.box is None:
+            return None
+        return node.group, node.box
+
+    boxes = SpatialIndex(extent=box_extent, cell_bits=4)
+
+    class MyBox(Node):
+        in_subgraphs=[MyHead]
+        group = Attr(str)
+        box = Attr(tuple)
+        idx_box = boxes.track(group, box)
+
+    s = MyHead()
+    with s.updater() as u:
+        u.add_single(MyBox(group='a', box=(0, 0, 10, 10)), 1)
+        u.add_single(MyBox(group='a', box=(100, 0, 5000, 20)), 2) # coarse level
+        u.add_single(MyBox(group='a', box=(-40, -40, -30, -30)), 3)
+        u.add_single(MyBox(group='b', box=(0, 0, 10, 10)), 4)
+        u.add_single(MyBox(group='a'), 5) # no extent
+
+    def search(group, region):
+        return list(s.all(boxes.query(group, region), wrap_cursor=False))
+
+    assert search('a', (5, 5, 6, 6)) == [1]
+    assert search('a', (10, 10, 10, 10)) == [1] # touching counts
+    assert search('a', (11, 11, 12, 12)) == []
+    assert search('a', (4000, 15, 4000, 15)) == [2]
+    assert search('a', (-10**9, -10**9, 10**9, 10**9)) == [1, 2, 3]
+    assert search('b', (-10**9, -10**9, 10**9, 10**9)) == [4]
+    assert search('c', (-10**9, -10**9, 10**9, 10**9)) == []
+
+    frozen = s.freeze()
+    s.cursor_at(1).box = (200, 200, 210, 210)
+    s.cursor_at(3).remove()
+    assert search('a', (5, 5, 6, 6)) == []
+    assert search('a', (205, 205, 205, 205)) == [1]
+    assert search('a', (-10**9, -10**9, 10**9, 10**9)) == [1, 2]
+    # Frozen snapshot is unaffected:
+    assert list(frozen.all(boxes.query('a', (5, 5, 6, 6)), wrap_cursor=False)) == [1]
+    assert frozen.one(boxes.query('a', (-35, -35, -35, -35))).nid == 3
+
+    with s.updater() as u:
+        for nid in (1, 2, 4, 5):
+            u.remove_nid(nid)
+    assert search('a', (-10**9, -10**9, 10**9, 10**9)) == []
+    # Empty cells and levels are dropped from the index:
+    assert not any(isinstance(key, IndexKey) and key.index is boxes
+        for key in s.subgraph.index)
+
 def test_subgraph_ntype():
     s = MyHead()
     assert isinstance(s, MyHead)
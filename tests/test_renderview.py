@@ -66,6 +66,8 @@ testdata = [
 
     testcase(lambda: libtest.RotateTest().schematic,
         refdir / "libtest_rotatetest_sch.svg"),
+    testcase(lambda: libtest.RotateTest().schematic,
+        refdir / "libtest_rotatetest_defs_sch.svg", dict(symbol_defs=True)),
     testcase(lambda: libtest.PortAlignTest().schematic,
         refdir / "libtest_portaligntest_sch.svg"),
     testcase(lambda: libtest.TapAlignTest().schematic,
@@ -122,14 +124,16 @@ testdata = [
         refdir / "ordtest_strongarm_sch.svg"),
 ]
 
+@pytest.mark.parametrize("backend", ['etree', 'stream'])
 @pytest.mark.parametrize("testcase", testdata, ids=lambda t: t.ref_file.with_suffix("").name)
-def test_renderview(testcase, tmp_path, update_ref):
+def test_renderview(testcase, backend, tmp_path, update_ref):
     view = testcase.viewgen()
 
     render_opts = dict(
         include_nids=False, # Do not include nids to make the output independent of nids.
         enable_grid=False, # Disable grid to make the files smaller.
-        enable_css=False # Keep CSS out of the refs. The web UI loads the same CSS (SchematicRenderer.css) separately via /api/schematic.css. For visual inspection, render with enable_css=True.
+        enable_css=False, # Keep CSS out of the refs. The web UI loads the same CSS (SchematicRenderer.css) separately via /api/schematic.css. For visual inspection, render with enable_css=True.
+        backend=backend, # Both backends must produce the same output.
     ) | testcase.render_opts 
 
     svg = view.render(**render_opts).svg()
@@ -142,3 +146,36 @@ def test_renderview(testcase, tmp_path, update_ref):
 
     # Pytest is better at string diffs than at byte diffs:
     assert svg.decode('ascii') == svg_ref.decode('ascii')
+
+def test_symbol_defs():
+    from ordec.core import SchemInstance
+    from ordec.schematic.render import symbol_fragment
+
+    sch = generic_mos.Ringosc().schematic
+    insts = list(sch.all(SchemInstance))
+    orientations = {(inst.symbol, inst.loc_transform().d4) for inst in insts}
+    assert len(orientations) < len(insts)
+
+    svg = sch.render(symbol_defs=True).svg().decode('ascii')
+    assert svg.count('<defs>') == 1
+    assert svg.count('<use ') == len(insts)
+    assert svg.count('class="symbolOutline"') == len(orientations)
+    assert svg.count('class="instanceName"') == len(insts)
+
+    # Fragments of frozen symbols are cached:
+    inst = insts[0]
+    frag = symbol_fragment(inst.symbol, inst.loc_transform().d4)
+    assert symbol_fragment(inst.symbol, inst.loc_transform().d4) is frag
+    assert f'href="#{frag.id}"' in svg
+
+@pytest.mark.parametrize("render_opts", [
+    dict(),
+    dict(indent=False),
+    dict(symbol_defs=True, indent=False),
+])
+def test_render_backends(render_opts):
+    sch = libtest.TapAlignTest().schematic
+    r_etree = sch.render(backend='etree', **render_opts)
+    r_stream = sch.render(backend='stream', **render_opts)
+    assert r_etree.svg() == r_stream.svg()
+    assert r_etree.webdata() == r_stream.webdata()
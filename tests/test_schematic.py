@@ -66,6 +66,36 @@ def test_schematic_net_partitioned_unlabeled_main():
     # The marker sits on a terminal of the unlabeled island.
     assert errors[0].pos in (Vec2R(8, 6), Vec2R(14, 6), Vec2R(14, 2))
 
+def test_schematic_long_wire():
+    # Connectivity is found without recursion, so wires with more vertices
+    # than the recursion limit are fine.
+    res = Res(r=R(1000)).symbol
+    s = Schematic()
+    s.n = Net()
+    s.n2 = Net()
+    s.r1 = SchemInstance(res.portmap(p=s.n, m=s.n2), pos=Vec2R(0, 2))
+    s.r2 = SchemInstance(res.portmap(p=s.n, m=s.n2), pos=Vec2R(6, 2))
+    vertices = [Vec2R(2, 6 + k) for k in range(3000)]
+    vertices += [Vec2R(8, 6 + 2999), Vec2R(8, 6)]
+    s.n % SchemWire(vertices=vertices)
+    s.n2 % SchemWire(vertices=[Vec2R(2, 2), Vec2R(2, 0), Vec2R(8, 0), Vec2R(8, 2)])
+    s.check()
+    assert not s.has_errors()
+
+def test_schematic_all_shorts():
+    # Every position claimed by more than one net is reported once.
+    s = Schematic()
+    s.a = Net()
+    s.b = Net()
+    s.a % SchemWire(vertices=[Vec2R(0, 0), Vec2R(0, 2), Vec2R(2, 2)])
+    s.b % SchemWire(vertices=[Vec2R(0, 2), Vec2R(0, 4)])
+    s.b % SchemTapPoint(pos=Vec2R(0, 0))
+    s.a % SchemTapPoint(pos=Vec2R(0, 4))
+    s.check()
+    shorts = {e.pos for e in s.all(SchemErrorMarker)
+        if e.error_type == SchemErrorType.GeometricShort}
+    assert shorts == {Vec2R(0, 0), Vec2R(0, 2), Vec2R(0, 4)}
+
 def test_schematic_bad_wiring():
     s = lib_test.TestNmosInv(variant='vdd_bad_wiring', add_conn_points=True, add_terminal_taps=True).schematic
     errors = list(s.all(SchemErrorMarker))
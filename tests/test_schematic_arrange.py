@@ -156,6 +156,53 @@ def test_nested_groups_python_api():
     assert sch.c.pos == Vec2R(7, 3)
 
 
+def nested_arrangement(first_pos=None):
+    """Series/Row/Col nesting with mixed orientations and sizes. The
+    first instance can be pinned to force constraint-based placement."""
+    nmos, pmos = Nmos().symbol, Pmos().symbol
+    sch = Schematic()
+    sch.n1 = SchemInstance(symbol=nmos, orientation=D4.MY)
+    if first_pos is not None:
+        sch.n1.pos = first_pos
+    sch.n2 = SchemInstance(symbol=nmos)
+    sch.p1 = SchemInstance(symbol=pmos, orientation=D4.R90)
+    sch.p2 = SchemInstance(symbol=pmos)
+    sch.p3 = SchemInstance(symbol=pmos, orientation=D4.R180)
+    stack = Series(gap=2)
+    stack.add(sch.n1)
+    stack.add(sch.n2)
+    inner = Col(gap=1, align='end')
+    inner.add(sch.p1)
+    inner.add(sch.p2)
+    top = Row(gap=3)
+    top.add(stack)
+    top.add(inner)
+    top.add(sch.p3)
+    return sch, top
+
+
+def test_free_group_placed_directly():
+    sch, top = nested_arrangement()
+    solver = Solver(sch)
+    assert top.emit(solver) is True
+    # Unconstrained and auto-anchored: positions are assigned in closed
+    # form, nothing enters the solver.
+    assert not solver.equalities and not solver.inequalities
+    placed = {name: sch[name].pos for name in ('n1', 'n2', 'p1', 'p2', 'p3')}
+    assert all(isinstance(pos, Vec2R) for pos in placed.values())
+    assert min(pos.x for pos in placed.values()) >= 0
+
+    # Same positions through constraints when the group follows a pinned
+    # child:
+    sch, top = nested_arrangement(first_pos=placed['n1'])
+    solver = Solver(sch)
+    assert top.emit(solver) is False
+    assert solver.equalities
+    solver.solve()
+    for name, pos in placed.items():
+        assert sch[name].pos == pos
+
+
 def test_ord_series_auto_connection():
     from .lib.ord.inverter_series import Inv
 
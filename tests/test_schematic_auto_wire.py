@@ -6,13 +6,18 @@ Unit tests for the grid routing core (ordec.schematic.auto_wire). Higher-level
 auto_wire behavior is covered through test_renderview.py.
 """
 
+import importlib
+import types
 import numpy as np
 
 from ordec.core import *
 from ordec.core.schema import SchemInstanceSubcursor
+from ordec.language import compile_ord
+from ordec.schematic import incremental
 from ordec.schematic.auto_wire import (
-    RoutingPort, GridConn, place_cells_and_ports, draw_connections,
-    _blocked_masks_by_node, _direction_bit,
+    RoutingPort, GridConn, RoutingCache, SearchBuffers, SearchBackend,
+    place_cells_and_ports, draw_connections, partition_connections, a_star,
+    _blocked_masks_by_node, _direction_bit, _search_masks,
     GRID_EMPTY, GRID_ROUTED, GRID_DIR, GRID_BLOCKED, GRID_PIN, GRID_PORT,
 )
 
@@ -67,6 +72,168 @@ def test_blocked_masks_match_direction_bit():
     assert _blocked_masks_by_node(moves, height) == {key: 1 | 4}
 
 
+def test_search_masks():
+    width, height = 4, 3
+    grid = np.zeros((height, width), dtype=np.int8)
+    grid[1][2] = GRID_BLOCKED
+    grid[2][0] = GRID_ROUTED
+    kinds, move_masks, congestion = _search_masks(grid, height, True, None)
+    for x in range(width):
+        for y in range(height):
+            key = x * height + y
+            assert kinds[key] == grid[y][x]
+            expected = 0
+            for dx, dy in ((0, 1), (0, -1), (1, 0), (-1, 0)):
+                nx, ny = x + dx, y + dy
+                if 0 <= nx < width and 0 <= ny < height \
+                        and grid[ny][nx] < GRID_BLOCKED:
+                    expected |= _direction_bit(dx, dy)
+            assert move_masks[key] == expected
+    assert set(congestion) == {0 * height + 2}
+    # One byte per node regardless of the grid's dtype and memory layout:
+    assert _search_masks(grid.astype(np.int64), height, True, None) \
+        == (kinds, move_masks, congestion)
+    assert _search_masks(np.asfortranarray(grid), height, True, None) \
+        == (kinds, move_masks, congestion)
+
+    # Explicit usage counts replace the routed cells of the grid.
+    _, _, congestion = _search_masks(grid, height, True, {(1, 1): 2})
+    assert set(congestion) == {1 * height + 1}
+    _, _, congestion = _search_masks(grid, height, False, {(1, 1): 2})
+    assert congestion == {}
+
+
+def test_search_buffers_reused():
+    width, height = 12, 10
+    grid = np.zeros((height, width), dtype=np.int8)
+    grid[2:8, 5] = GRID_BLOCKED
+    searches = [((0, 0), (11, 9), East), ((11, 5), (0, 5), West),
+                ((3, 9), (7, 0), South), ((0, 0), (11, 9), North)]
+
+    buffers = SearchBuffers(width * height)
+    for start, end, start_dir in searches:
+        fresh = a_star(grid, start, end, width, height, {}, None, start_dir,
+                       RoutingCache())
+        reused = a_star(grid, start, end, width, height, {}, None, start_dir,
+                        RoutingCache(), buffers=buffers)
+        assert reused == fresh
+        assert fresh[-1] == end
+    assert buffers.generation == len(searches)
+    # The grid lookup tables are computed once per grid:
+    assert buffers.masks_grid is grid
+    masks = buffers.masks
+    a_star(grid, (0, 0), (11, 9), width, height, {}, None, East,
+           RoutingCache(), buffers=buffers)
+    assert buffers.masks is masks
+    buffers.invalidate_masks()
+    assert buffers.grid_masks(grid) == masks
+    assert buffers.masks is not masks
+
+
+class CountingBackend(SearchBackend):
+    """Module-level, so that worker processes can create it as well."""
+    def __init__(self, width, height):
+        super().__init__(width, height)
+        self.searches = 0
+
+    def a_star(self, *args, **kwargs):
+        self.searches += 1
+        return super().a_star(*args, **kwargs)
+
+    def reverse_a_star(self, *args, **kwargs):
+        self.searches += 1
+        return super().reverse_a_star(*args, **kwargs)
+
+
+def test_draw_connections_backend():
+    """draw_connections() runs all searches on the given backend."""
+    s = Schematic()
+    s.a = Net()
+    width, height = 15, 12
+    ports = [RoutingPort(0, 5, s.a, East), RoutingPort(14, 5, s.a, West)]
+    grid = np.zeros((height, width), dtype=np.int8)
+    place_cells_and_ports(grid, [], ports, width, height, 0, 0)
+    conns = [GridConn(s.a, (0, 5), East, (14, 5), West)]
+    backend = CountingBackend(width, height)
+    vertices = draw_connections(grid, conns, width, height, backend=backend)
+    assert backend.searches == 1
+    assert vertices[s.a] == [[(0, 5), (14, 5)]]
+
+
+def test_partition_connections():
+    s = Schematic()
+    s.a = Net()
+    s.b = Net()
+    s.c = Net()
+    conns = [
+        GridConn(s.a, (2, 5), East, (10, 5), West),
+        GridConn(s.b, (40, 5), East, (50, 5), West),
+        GridConn(s.a, (2, 5), East, (8, 9), South),
+    ]
+    clusters = partition_connections(conns, 60, 12, margin=3)
+    assert clusters == [
+        ((0, 2, 13, 11), [conns[0], conns[2]]),
+        ((37, 2, 53, 8), [conns[1]]),
+    ]
+
+    # Nets with overlapping boxes end up in the same cluster.
+    conns.append(GridConn(s.c, (12, 2), East, (38, 2), West))
+    clusters = partition_connections(conns, 60, 12, margin=3)
+    assert len(clusters) == 1
+    assert clusters[0][0] == (0, 0, 53, 11)
+
+
+def test_draw_connections_parallel():
+    s = Schematic()
+    s.a = Net()
+    s.b = Net()
+    width, height = 60, 12
+    ports = [RoutingPort(0, 5, s.a, East), RoutingPort(40, 3, s.b, East)]
+    conns = [GridConn(s.a, (0, 5), East, (14, 8), West),
+             GridConn(s.b, (40, 3), East, (55, 7), West)]
+
+    def route(workers):
+        grid = np.zeros((height, width), dtype=np.int8)
+        place_cells_and_ports(grid, [], ports, width, height, 0, 0)
+        return draw_connections(grid, conns, width, height,
+                                workers=workers), grid
+
+    assert len(partition_connections(conns, width, height)) == 2
+    sequential, sequential_grid = route(None)
+    parallel, parallel_grid = route(1)
+    assert parallel == sequential
+    assert list(parallel) == list(sequential)
+    assert (parallel_grid == sequential_grid).all()
+
+
+def test_draw_connections_parallel_retry(monkeypatch):
+    """A cluster that cannot be routed within its window is rerouted on the
+    full grid."""
+    auto_wire_module = importlib.import_module('ordec.schematic.auto_wire')
+    monkeypatch.setattr(auto_wire_module, 'CLUSTER_MARGIN', 3)
+
+    s = Schematic()
+    s.a = Net()
+    s.b = Net()
+    width, height = 60, 30
+    ports = [RoutingPort(0, 5, s.a, East), RoutingPort(40, 5, s.b, East)]
+    conns = [GridConn(s.a, (0, 5), East, (20, 5), West),
+             GridConn(s.b, (40, 5), East, (55, 5), West)]
+    grid = np.zeros((height, width), dtype=np.int8)
+    grid[:25, 10] = GRID_BLOCKED # Wall with an opening far outside a's window.
+    place_cells_and_ports(grid, [], ports, width, height, 0, 0)
+
+    backend = CountingBackend(width, height)
+    vertices = draw_connections(grid, conns, width, height, backend=backend,
+                                workers=1)
+    assert backend.searches > 0 # The retry runs on the given backend.
+    assert list(vertices) == [s.b, s.a] # Shorter connection first.
+    (path_a,), (path_b,) = vertices[s.a], vertices[s.b]
+    assert path_a[0] == (0, 5) and path_a[-1] == (20, 5)
+    assert max(y for x, y in path_a) >= 25
+    assert path_b[0] == (40, 5) and path_b[-1] == (55, 5)
+
+
 def test_place_and_draw_connections():
     """Routes two stacked cells against four net terminals through the
     low-level grid API (formerly the module's __main__ demo)."""
@@ -349,3 +516,84 @@ def test_ripup_rejected_when_reroute_rides_own_net():
     vertices, net_y, net_a = route_ripup_overlap_maze()
     assert not vertices[net_a]
     assert_anchor_hosts_branch(vertices[net_y], ends={(5, 1), (7, 7)})
+
+
+DIVIDER_ORD = """
+from ordec.core import *
+from ordec.lib import Vdc, Res, Gnd
+
+cell Divider:
+    viewgen schematic -> Schematic:
+        net vss, vdd, a, b
+
+        Vdc vdc: .$dc = 1; .m -- vss; .p -- vdd; .pos = {vdc_pos}
+        Res res_1: .$r = {r}; .m -- vss; .p -- a; .pos = (5,6)
+        Res res_2: .$r = 100; .m -- a; .p -- b; .pos = (5,12)
+        Res res_3: .$r = 100; .m -- b; .p -- vdd; .pos = (5,18)
+        Gnd gnd: .p -- vss; .pos = (0,0)
+"""
+
+def divider_schematic(r=100, vdc_pos=(0, 6)):
+    """Schematic of a freshly compiled Divider cell, like after a reload of
+    its source file."""
+    mod = types.ModuleType('incremental_divider')
+    src = DIVIDER_ORD.format(r=r, vdc_pos=vdc_pos)
+    exec(compile_ord(src, mod.__dict__, 'incremental_divider.ord'), mod.__dict__)
+    return mod.Divider().schematic
+
+def wires_by_net(s):
+    return [(w.ref.full_path_str(), tuple(w.vertices()))
+            for w in s.all(SchemWire)]
+
+def test_incremental_auto_wire(monkeypatch):
+    auto_wire_mod = importlib.import_module('ordec.schematic.auto_wire')
+    incremental._records.clear()
+    first = divider_schematic()
+    assert not first.has_errors()
+
+    routed = []
+    route_connections = auto_wire_mod._route_connections
+    def spy(grid, connections, *args, **kwargs):
+        routed.append({c.net.full_path_str() for c in connections})
+        return route_connections(grid, connections, *args, **kwargs)
+    monkeypatch.setattr(auto_wire_mod, '_route_connections', spy)
+
+    # Changing a parameter does not change the routing problem:
+    edited = divider_schematic(r=200)
+    assert routed == []
+    assert wires_by_net(edited) == wires_by_net(first)
+    assert edited.outline == first.outline
+    assert not edited.has_errors()
+
+    # Moving vdc only reroutes the nets connected to it:
+    moved = divider_schematic(vdc_pos=(0, 8))
+    assert routed == [{'vss', 'vdd'}]
+    assert not moved.has_errors()
+    unchanged = [w for w in wires_by_net(first) if w[0] in ('a', 'b')]
+    assert [w for w in wires_by_net(moved) if w[0] in ('a', 'b')] == unchanged
+
+    # Without a previous result, everything is routed:
+    incremental._records.clear()
+    routed.clear()
+    divider_schematic(r=300)
+    assert routed == [{'vss', 'vdd', 'a', 'b'}]
+
+def test_incremental_check(monkeypatch):
+    incremental._records.clear()
+    first = divider_schematic()
+    with monkeypatch.context() as m:
+        def no_check(*args, **kwargs):
+            raise AssertionError("check() should have been skipped")
+        m.setattr(incremental, 'schem_check', no_check)
+        replayed = divider_schematic(r=200)
+    incremental._records.clear()
+    checked = divider_schematic(r=200)
+    def check_output(s):
+        return (
+            [(t.ref.full_path_str(), t.pos, t.align) for t in s.all(SchemTapPoint)],
+            [(p.ref.full_path_str(), p.pos) for p in s.all(SchemConnPoint)],
+            [(m.pos, m.error_type) for m in s.all(SchemErrorMarker)],
+        )
+    assert check_output(replayed) == check_output(checked)
+    assert check_output(first) == check_output(checked)
+    assert incremental.check_signature(replayed) == incremental.check_signature(checked)
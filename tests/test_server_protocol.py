@@ -10,11 +10,15 @@ import json
 import queue
 import socket
 import threading
+import time
 import pytest
+from websockets.exceptions import ConnectionClosed
 from websockets.sync.client import connect
 
 from ordec import server
 from ordec.jobrunner import ThreadedJobRunner
+from ordec.viewcache import ViewCache
+from ordec.viewdiff import apply_patch
 
 TEST_SRC = '''
 from ordec.core import *
@@ -43,10 +47,9 @@ def with_progress():
     return "progressed"
 '''
 
-@pytest.fixture(scope="module")
-def proto_server():
+def start_server(mode, view_cache=None, max_jobs=4):
     """Backend-only server on a free port with fast cancel timeouts."""
-    jobrunner = ThreadedJobRunner(4)
+    jobrunner = ThreadedJobRunner(max_jobs)
     jobrunner.cooperative_timeout = 0.3
     jobrunner.async_exc_timeout = 2.0
 
@@ -56,22 +59,31 @@ def proto_server():
 
     key = server.ServerKey()
     startup_queue = queue.Queue(maxsize=1)
-    t = threading.Thread(target=server.server_thread,
+    target = server.async_server_thread if mode == 'asyncio' else server.server_thread
+    t = threading.Thread(target=target,
         args=('127.0.0.1', port, server.StaticHandler(), key, startup_queue),
-        kwargs={'jobrunner': jobrunner}, daemon=True)
+        kwargs={'jobrunner': jobrunner, 'view_cache': view_cache}, daemon=True)
     t.start()
     startup_error = startup_queue.get()
     if startup_error is not None:
         raise RuntimeError(f"Test server failed to start: {startup_error}")
-    yield f"ws://127.0.0.1:{port}/api/websocket", key
+    return f"ws://127.0.0.1:{port}/api/websocket", key
+
+@pytest.fixture(scope="module", params=['threaded', 'asyncio'])
+def proto_server(request):
+    """Server shared by the tests of this module, once per server mode."""
+    return start_server(request.param)
 
 class Client:
     """Minimal protocol client: authenticates, sends the test source,
     consumes the viewlist, then exposes send/recv of JSON messages."""
-    def __init__(self, url, key, src=TEST_SRC):
+    def __init__(self, url, key, src=TEST_SRC, client=None):
         self.sock = connect(url)
-        self.send({'msg': 'source', 'srctype': 'python', 'src': src,
-            'auth': key.token()})
+        msg = {'msg': 'source', 'srctype': 'python', 'src': src,
+            'auth': key.token()}
+        if client is not None:
+            msg['client'] = client
+        self.send(msg)
         viewlist = self.recv()
         assert viewlist['msg'] == 'viewlist'
         self.views = {v['name'] for v in viewlist['views']}
@@ -82,8 +94,13 @@ class Client:
     def recv(self, timeout=30):
         return json.loads(self.sock.recv(timeout=timeout))
 
-    def getview(self, view, req):
-        self.send({'msg': 'getview', 'view': view, 'req': req})
+    def getview(self, view, req, base=None, refresh=False):
+        msg = {'msg': 'getview', 'view': view, 'req': req}
+        if base is not None:
+            msg['base'] = base
+        if refresh:
+            msg['refresh'] = True
+        self.send(msg)
 
     def cancelview(self, req):
         self.send({'msg': 'cancelview', 'req': req})
@@ -182,3 +199,327 @@ def test_cancel_unknown_req_ignored(proto_server):
         assert 'type' in terminal
     finally:
         c.close()
+
+TILES_SRC = '''
+from ordec.core import *
+from ordec.lib.ihp130 import SG13G2
+from ordec.layout.webdata import webdata
+
+@generate_func
+def layout():
+    layers = SG13G2().layers
+    l = Layout(ref_layers=layers)
+    l % LayoutRect(layer=layers.Metal1, rect=Rect4I(0, 0, 100, 100))
+    l % LayoutRect(layer=layers.Metal1, rect=Rect4I(900, 900, 1000, 1000))
+    return l
+
+class Tiled:
+    """Forces tiled mode, which is otherwise only used for large layouts."""
+    def __init__(self, layout):
+        self.layout = layout
+
+    def webdata(self):
+        return webdata(self.layout, tiled=True)
+
+    def webtiles(self, level, tiles):
+        return self.layout.webtiles(level, tiles)
+
+@generate_func
+def text():
+    return "no tiles"
+'''
+
+def test_gettiles(proto_server):
+    url, key = proto_server
+    c = Client(url, key, src=TILES_SRC)
+    try:
+        c.getview('Tiled(layout())', req=50)
+        _, terminal = c.recv_until_terminal(50)
+        assert terminal['type'] == 'layout_gl'
+        assert terminal['data']['tiled']['maxLevel'] == 2
+        assert terminal['data']['layers'][0]['polys'] == []
+
+        c.send({'msg': 'gettiles', 'view': 'Tiled(layout())', 'req': 51,
+            'level': 2, 'tiles': [[0, 0], [0, 3], [3, 3]]})
+        msg = c.recv()
+        assert msg['msg'] == 'tiles' and msg['req'] == 51
+        assert [len(t['layers']) for t in msg['tiles']] == [1, 0, 1]
+        assert len(msg['tiles'][0]['layers'][0]['polys']) == 1
+
+        c.send({'msg': 'gettiles', 'view': 'text()', 'req': 52,
+            'level': 0, 'tiles': [[0, 0]]})
+        msg = c.recv()
+        assert msg['req'] == 52 and 'exception' in msg
+    finally:
+        c.close()
+
+EXTLIB_SRC = '''
+from ordec.core import *
+from ordec.extlibrary import ExtLibrary
+from ordec.lib.ihp130 import SG13G2
+
+def make_layout():
+    return Layout(ref_layers=SG13G2().layers)
+
+small = ExtLibrary()
+small.layout_funcs = {{'c0': make_layout}}
+small.symbol_funcs = {{'c0': make_layout, 'c1': make_layout}}
+
+big = ExtLibrary()
+big.layout_funcs = {{f'cell{{i:04}}': make_layout for i in range({n})}}
+'''
+
+def test_getviewpage(proto_server):
+    url, key = proto_server
+    # Large enough to be paged, with a second, partial page:
+    n = max(server.VIEWLIST_INLINE_CELLS, server.VIEWLIST_PAGE_CELLS) + 10
+    c = Client(url, key, src=EXTLIB_SRC.format(n=n))
+    try:
+        # Small libraries are listed inline, large ones by a placeholder:
+        assert {"small['c0'].layout", "small['c0'].symbol", "small['c1'].symbol", 'big'} <= c.views
+        assert not any(name.startswith('big[') for name in c.views)
+
+        c.send({'msg': 'getviewpage', 'library': 'big', 'offset': 0})
+        msg = c.recv()
+        assert msg['msg'] == 'viewpage' and msg['library'] == 'big'
+        assert len(msg['views']) == server.VIEWLIST_PAGE_CELLS
+        assert msg['views'][0]['name'] == "big['cell0000'].layout"
+        assert msg['next'] == server.VIEWLIST_PAGE_CELLS
+
+        c.send({'msg': 'getviewpage', 'library': 'big', 'offset': msg['next']})
+        msg = c.recv()
+        assert len(msg['views']) == n - server.VIEWLIST_PAGE_CELLS
+        assert msg['views'][-1]['name'] == f"big['cell{n-1:04}'].layout"
+        assert msg['next'] is None
+
+        c.send({'msg': 'getviewpage', 'library': 'make_layout', 'offset': 0})
+        assert 'exception' in c.recv()
+
+        c.getview("big['cell0001'].layout", req=60)
+        _, terminal = c.recv_until_terminal(60)
+        assert terminal['type'] == 'layout_gl'
+    finally:
+        c.close()
+
+PREFETCH_SRC = '''
+from ordec.core import *
+import time
+
+@generate_func
+def one_second():
+    time.sleep(1)
+    return "done"
+
+@generate_func
+def two_seconds():
+    for i in range(20):
+        progress(f"step {i}", i/20)
+        time.sleep(0.1)
+    return "done"
+
+@generate_func
+def quick():
+    return "quick result"
+'''
+
+@pytest.mark.parametrize('mode', ['threaded', 'asyncio'])
+def test_prefetch(mode):
+    url, key = start_server(mode)
+    c = Client(url, key, src=PREFETCH_SRC, client='a')
+    try:
+        c.getview('one_second()', req=1)
+        assert c.recv_until_terminal(1)[1]['data'] is not None
+    finally:
+        c.close()
+
+    # Other clients do not prefetch the views client 'a' requested:
+    c = Client(url, key, src=PREFETCH_SRC, client='b')
+    try:
+        time.sleep(1.5)
+        t0 = time.monotonic()
+        c.getview('one_second()', req=2)
+        c.recv_until_terminal(2)
+        assert time.monotonic() - t0 > 0.9
+    finally:
+        c.close()
+
+    # After a rebuild, the view requested before is generated right away:
+    c = Client(url, key, src=PREFETCH_SRC, client='a')
+    try:
+        time.sleep(1.5)
+        t0 = time.monotonic()
+        c.getview('one_second()', req=2)
+        terminal = c.recv_until_terminal(2)[1]
+        assert time.monotonic() - t0 < 0.5
+        assert 'type' in terminal and terminal['view'] == 'one_second()'
+    finally:
+        c.close()
+
+    # A request for a view that is being prefetched takes over its job:
+    c = Client(url, key, src=PREFETCH_SRC, client='a')
+    try:
+        time.sleep(0.5)
+        t0 = time.monotonic()
+        c.getview('one_second()', req=3)
+        terminal = c.recv_until_terminal(3)[1]
+        assert time.monotonic() - t0 < 0.9
+        assert 'type' in terminal and terminal['view'] == 'one_second()'
+    finally:
+        c.close()
+
+@pytest.mark.parametrize('mode', ['threaded', 'asyncio'])
+def test_prefetch_preempted(mode):
+    url, key = start_server(mode, max_jobs=1)
+    c = Client(url, key, src=PREFETCH_SRC, client='a')
+    try:
+        c.getview('two_seconds()', req=1)
+        assert c.recv_until_terminal(1)[1]['data'] is not None
+    finally:
+        c.close()
+
+    # The prefetch job holds the only slot; a real request cancels it:
+    c = Client(url, key, src=PREFETCH_SRC, client='a')
+    try:
+        time.sleep(0.3)
+        t0 = time.monotonic()
+        c.getview('quick()', req=2)
+        assert c.recv_until_terminal(2)[1]['data'] is not None
+        assert time.monotonic() - t0 < 1.0
+        # The cancelled prefetch is not taken for a result:
+        c.getview('two_seconds()', req=3)
+        terminal = c.recv_until_terminal(3)[1]
+        assert terminal['data'] is not None
+    finally:
+        c.close()
+
+DELTA_SRC = '''
+from ordec.core import *
+
+VALUE = {value!r}
+
+@generate_func
+def report():
+    report = Report()
+    for i in range(100):
+        report.pre(f"line {{i}}: " + (VALUE if i == 50 else "unchanged"))
+    return report
+'''
+
+def test_view_delta(proto_server):
+    url, key = proto_server
+    c = Client(url, key, src=DELTA_SRC.format(value='a'))
+    try:
+        c.getview('report()', req=1)
+        first = c.recv_until_terminal(1)[1]
+    finally:
+        c.close()
+
+    # After an edit, only the changed report element is sent:
+    c = Client(url, key, src=DELTA_SRC.format(value='b'))
+    try:
+        c.getview('report()', req=2, base=first['digest'])
+        delta = c.recv_until_terminal(2)[1]
+        c.getview('report()', req=3)
+        full = c.recv_until_terminal(3)[1]
+        # Unchanged data and unknown bases:
+        c.getview('report()', req=4, base=full['digest'])
+        unchanged = c.recv_until_terminal(4)[1]
+        c.getview('report()', req=5, base='0' * 32)
+        unknown_base = c.recv_until_terminal(5)[1]
+    finally:
+        c.close()
+    assert 'data' not in delta
+    assert delta['base'] == first['digest']
+    assert delta['type'] == full['type'] == 'report'
+    assert delta['digest'] == full['digest'] != first['digest']
+    assert apply_patch(first['data'], delta['patch']) == full['data']
+    assert len(json.dumps(delta['patch'])) < len(json.dumps(full['data'])) / 10
+    assert unchanged['patch'] is None and unchanged['digest'] == full['digest']
+    assert unknown_base['data'] == full['data']
+
+def test_invalid_base(proto_server):
+    url, key = proto_server
+    c = Client(url, key, src=DELTA_SRC.format(value='a'))
+    try:
+        # Rejected like other malformed messages, rather than failing in
+        # the job without a terminal message:
+        c.getview('report()', req=1, base=1)
+        with pytest.raises(ConnectionClosed):
+            c.recv()
+    finally:
+        c.close()
+
+def test_view_payloads(monkeypatch):
+    monkeypatch.setattr(server, 'VIEW_DIFF_BASES_BYTES', 1000)
+    handler = server.ConnectionHandler(server.ServerKey(), {},
+        jobrunner=ThreadedJobRunner(1))
+    payloads = [{'text': f'{i}' * 300} for i in range(5)]
+    digests = [handler.remember_payload(data) for data in payloads]
+    # Bounded by JSON size, not by number of payloads:
+    assert list(handler.view_payloads) == digests[-3:]
+    assert handler.view_payloads_bytes == 3 * len(json.dumps(payloads[0]))
+    # A payload larger than the bound is still kept until the next one:
+    big = {'text': 'x' * 2000}
+    big_digest = handler.remember_payload(big)
+    assert list(handler.view_payloads) == [big_digest]
+
+    # Messages carrying a kept payload reuse its JSON text:
+    msg = {'msg': 'view', 'view': 'v()', 'data': big, 'digest': big_digest,
+        'req': 1}
+    counting = CountingDumps()
+    monkeypatch.setattr(server.json, 'dumps', counting)
+    encoded = handler.encode_msg(msg)
+    monkeypatch.undo()
+    assert json.loads(encoded) == msg
+    assert max(counting.sizes) < len(big['text'])
+    # Others (evicted, different object) are encoded as usual:
+    assert json.loads(handler.encode_msg(dict(msg, data=dict(big)))) == msg
+    assert json.loads(handler.encode_msg({'msg': 'viewlist', 'views': []})) \
+        == {'msg': 'viewlist', 'views': []}
+
+class CountingDumps:
+    """json.dumps replacement recording the sizes of its results."""
+    def __init__(self):
+        self.sizes = []
+        self.dumps = json.dumps
+
+    def __call__(self, obj, **kwargs):
+        result = self.dumps(obj, **kwargs)
+        self.sizes.append(len(result))
+        return result
+
+STAMP_SRC = '''
+from ordec.core import *
+import time
+
+@generate_func
+def stamp():
+    return str(time.monotonic_ns())
+'''
+
+def getview_once(url, key, src, view, base=None, refresh=False):
+    c = Client(url, key, src=src)
+    try:
+        c.getview(view, req=1, base=base, refresh=refresh)
+        return c.recv_until_terminal(1)[1]
+    finally:
+        c.close()
+
+def test_view_cache(tmp_path):
+    # Like two worker processes sharing a cache directory:
+    servers = [start_server('threaded', view_cache=ViewCache(tmp_path)),
+        start_server('asyncio', view_cache=ViewCache(tmp_path))]
+    first = getview_once(*servers[0], STAMP_SRC, 'stamp()')
+    assert getview_once(*servers[1], STAMP_SRC, 'stamp()')['data'] == first['data']
+    other_src = getview_once(*servers[1], STAMP_SRC + '\n', 'stamp()')
+    assert other_src['data'] != first['data']
+    # A refresh by the user regenerates the view and updates the cache:
+    refreshed = getview_once(*servers[1], STAMP_SRC, 'stamp()', refresh=True)
+    assert refreshed['data'] != first['data']
+    assert getview_once(*servers[0], STAMP_SRC, 'stamp()')['data'] == refreshed['data']
+
+    # The base of a patch can come from the other server:
+    delta = getview_once(*servers[0], DELTA_SRC.format(value='a'), 'report()')
+    delta = getview_once(*servers[1], DELTA_SRC.format(value='b'), 'report()',
+        base=delta['digest'])
+    assert delta['patch'] is not None
@@ -0,0 +1,179 @@
+# SPDX-FileCopyrightText: 2026 ORDeC contributors
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Incremental module reload in local mode: after a source file changes, only
+the changed module and the modules importing it are imported again.
+"""
+
+import json
+import os
+import queue
+import socket
+import sys
+import threading
+
+import pytest
+from websockets.sync.client import connect
+
+from ordec import server
+from ordec.jobrunner import InlineJobRunner
+
+PROJECT = {
+    '__init__.py': 'from .top import Top\nfrom . import other\n',
+    'top.py': 'from .leaf import Leaf\n\nclass Top:\n    pass\n',
+    'leaf.py': '''
+from ordec.core import *
+
+calls = []
+
+class Leaf(Cell):
+    @generate
+    def schematic(self):
+        calls.append(1)
+        return Schematic(cell=self)
+''',
+    'other.py': 'VALUE = 1\n',
+}
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    pkg = tmp_path / 'reloadproj'
+    pkg.mkdir()
+    for name, src in PROJECT.items():
+        (pkg / name).write_text(src)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    yield pkg
+    for name in list(sys.modules):
+        if name == 'reloadproj' or name.startswith('reloadproj.'):
+            del sys.modules[name]
+
+def touch(path, src):
+    st = os.stat(path)
+    path.write_text(src)
+    # Make sure the change is visible despite coarse file timestamps:
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+
+def test_incremental_reload(project):
+    handler = server.ConnectionHandler(server.ServerKey(), sys.modules,
+        jobrunner=InlineJobRunner())
+    conn_globals, watch_files, exc = handler.build_localmodule('reloadproj')
+    assert exc is None
+    assert sorted(watch_files) == sorted(str(project / name) for name in PROJECT)
+    modules = {name: sys.modules[f'reloadproj.{name}'] for name in ('top', 'leaf', 'other')}
+    leaf = modules['leaf']
+    leaf.Leaf().schematic
+    assert len(leaf.calls) == 1
+
+    # Unchanged: nothing is reloaded, all files are still watched.
+    conn_globals2, watch_files2, exc = handler.build_localmodule('reloadproj')
+    assert exc is None
+    assert conn_globals2 is conn_globals
+    assert sorted(watch_files2) == sorted(watch_files)
+
+    # other.py changed: other and its importer (the package) are reloaded,
+    # top and leaf are kept with their cached views.
+    touch(project / 'other.py', 'VALUE = 2\n')
+    conn_globals3, watch_files3, exc = handler.build_localmodule('reloadproj')
+    assert exc is None
+    assert conn_globals3 is not conn_globals
+    assert conn_globals3['other'].VALUE == 2
+    assert sys.modules['reloadproj.other'] is not modules['other']
+    assert sys.modules['reloadproj.top'] is modules['top']
+    assert sys.modules['reloadproj.leaf'] is leaf
+    assert sorted(watch_files3) == sorted(watch_files)
+    leaf.Leaf().schematic
+    assert len(leaf.calls) == 1
+
+    # leaf.py changed: leaf, top and the package are reloaded.
+    touch(project / 'leaf.py', PROJECT['leaf.py'] + '\nVALUE = 3\n')
+    conn_globals4, _, exc = handler.build_localmodule('reloadproj')
+    assert exc is None
+    assert sys.modules['reloadproj.leaf'] is not leaf
+    assert sys.modules['reloadproj.top'] is not modules['top']
+    assert sys.modules['reloadproj.leaf'].VALUE == 3
+    assert sys.modules['reloadproj.other'] is conn_globals3['other']
+    assert conn_globals4['other'] is conn_globals3['other']
+
+def test_incremental_reload_error(project):
+    handler = server.ConnectionHandler(server.ServerKey(), sys.modules,
+        jobrunner=InlineJobRunner())
+    _, _, exc = handler.build_localmodule('reloadproj')
+    assert exc is None
+    leaf = sys.modules['reloadproj.leaf']
+
+    touch(project / 'top.py', 'from .leaf import Leaf\nclass Top(\n')
+    conn_globals, watch_files, exc = handler.build_localmodule('reloadproj')
+    assert isinstance(exc, SyntaxError)
+    assert conn_globals == {}
+    assert str(project / 'top.py') in watch_files
+    assert sys.modules['reloadproj.leaf'] is leaf
+
+    touch(project / 'top.py', PROJECT['top.py'])
+    conn_globals, _, exc = handler.build_localmodule('reloadproj')
+    assert exc is None
+    assert sys.modules['reloadproj.leaf'] is leaf
+    assert conn_globals['Top'] is sys.modules['reloadproj.top'].Top
+
+def test_reload_untracked_imports(project):
+    handler = server.ConnectionHandler(server.ServerKey(), sys.modules,
+        jobrunner=InlineJobRunner())
+    (project / 'lazy.py').write_text('VALUE = 1\n')
+    (project / 'dynamic.py').write_text('VALUE = 1\n')
+    touch(project / 'other.py', PROJECT['other.py'] + '''
+import importlib
+dynamic = importlib.import_module('reloadproj.dynamic')
+
+def lazy_value():
+    from . import lazy
+    return lazy.VALUE
+''')
+    conn_globals, _, exc = handler.build_localmodule('reloadproj')
+    assert exc is None
+    top = sys.modules['reloadproj.top']
+
+    # Unchanged: kept.
+    conn_globals, _, exc = handler.build_localmodule('reloadproj')
+    assert sys.modules['reloadproj.top'] is top
+    assert conn_globals['other'].dynamic.VALUE == 1
+    # dynamic has no known importers, so everything is reloaded:
+    touch(project / 'dynamic.py', 'VALUE = 2\n')
+    conn_globals, _, exc = handler.build_localmodule('reloadproj')
+    assert exc is None
+    assert conn_globals['other'].dynamic.VALUE == 2
+    assert sys.modules['reloadproj.top'] is not top
+    top = sys.modules['reloadproj.top']
+
+    # lazy is imported while a view is generated, outside of the build.
+    # Its importers are unknown as well:
+    assert conn_globals['other'].lazy_value() == 1
+    touch(project / 'lazy.py', 'VALUE = 2\n')
+    conn_globals, _, exc = handler.build_localmodule('reloadproj')
+    assert exc is None
+    assert conn_globals['other'].lazy_value() == 2
+    assert sys.modules['reloadproj.top'] is not top
+
+@pytest.mark.parametrize('target', [server.server_thread, server.async_server_thread])
+def test_localmodule_changed(project, target):
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        port = s.getsockname()[1]
+    key = server.ServerKey()
+    startup_queue = queue.Queue(maxsize=1)
+    server_queue = queue.Queue(maxsize=1)
+    t = threading.Thread(target=target,
+        args=('127.0.0.1', port, server.StaticHandler(), key, startup_queue, server_queue),
+        daemon=True)
+    t.start()
+    assert startup_queue.get() is None
+    try:
+        with connect(f"ws://127.0.0.1:{port}/api/websocket") as ws:
+            ws.send(json.dumps({'msg': 'localmodule', 'module': 'reloadproj',
+                'auth': key.token()}))
+            assert json.loads(ws.recv(timeout=30))['msg'] == 'viewlist'
+            touch(project / 'other.py', 'VALUE = 2\n')
+            assert json.loads(ws.recv(timeout=30)) == {'msg': 'localmodule_changed'}
+    finally:
+        server_queue.get().shutdown()
+        t.join(timeout=30)
+    assert not t.is_alive()
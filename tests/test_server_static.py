@@ -0,0 +1,72 @@
+# SPDX-FileCopyrightText: 2026 ORDeC contributors
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Static file serving from the in-memory, precompressed asset cache.
+"""
+
+import gzip
+
+import pytest
+from websockets.datastructures import Headers
+from websockets.http11 import Request
+
+from ordec import server
+
+APP_JS = b"export function main() { return 'hello world'; }\n" * 100
+
+@pytest.fixture
+def static_handler(tmp_path):
+    (tmp_path / 'assets').mkdir()
+    (tmp_path / 'index.html').write_text('<html>index</html>')
+    (tmp_path / 'assets' / 'app-Bx3_9kQz.js').write_bytes(APP_JS)
+    (tmp_path / 'assets' / 'logo.svg').write_bytes(b'<svg/>')
+    return server.StaticHandler(server.anonymous_tar(tmp_path))
+
+def get(handler, path, **headers):
+    return handler.process_request(None, Request(path,
+        Headers({k.replace('_', '-'): v for k, v in headers.items()})))
+
+def test_static_index(static_handler):
+    resp = get(static_handler, '/')
+    assert resp.status_code == 200
+    assert resp.body == b'<html>index</html>'
+    assert resp.headers['Content-Type'] == 'text/html'
+    assert resp.headers['Cache-Control'] == 'no-cache'
+    assert 'Content-Encoding' not in resp.headers
+    assert get(static_handler, '/index.html').headers['ETag'] == resp.headers['ETag']
+    assert get(static_handler, '/missing.js').status_code == 404
+
+def test_static_compression(static_handler):
+    plain = get(static_handler, '/assets/app-Bx3_9kQz.js')
+    assert plain.body == APP_JS
+    assert 'Content-Encoding' not in plain.headers
+    assert plain.headers['Vary'] == 'Accept-Encoding'
+    assert plain.headers['Cache-Control'] == 'public, max-age=31536000, immutable'
+
+    compressed = get(static_handler, '/assets/app-Bx3_9kQz.js',
+        Accept_Encoding='gzip, deflate, br;q=0')
+    assert compressed.headers['Content-Encoding'] == 'gzip'
+    assert int(compressed.headers['Content-Length']) == len(compressed.body)
+    assert gzip.decompress(compressed.body) == APP_JS
+    assert compressed.headers['ETag'] != plain.headers['ETag']
+
+    assert 'Content-Encoding' not in get(static_handler, '/assets/app-Bx3_9kQz.js',
+        Accept_Encoding='gzip;q=0').headers
+    # Too small to be compressed, not hashed:
+    svg = get(static_handler, '/assets/logo.svg', Accept_Encoding='gzip')
+    assert 'Content-Encoding' not in svg.headers
+    assert svg.headers['Cache-Control'] == 'no-cache'
+
+def test_static_not_modified(static_handler):
+    etag = get(static_handler, '/assets/app-Bx3_9kQz.js',
+        Accept_Encoding='gzip').headers['ETag']
+    resp = get(static_handler, '/assets/app-Bx3_9kQz.js',
+        Accept_Encoding='gzip', If_None_Match=f'"other", {etag}')
+    assert resp.status_code == 304
+    assert resp.body == b''
+    assert resp.headers['ETag'] == etag
+    assert 'Content-Length' not in resp.headers
+    # The ETag of the gzip variant does not match the uncompressed one:
+    resp = get(static_handler, '/assets/app-Bx3_9kQz.js', If_None_Match=etag)
+    assert resp.status_code == 200
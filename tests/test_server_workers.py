@@ -0,0 +1,83 @@
+# SPDX-FileCopyrightText: 2026 ORDeC contributors
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Serving from several worker processes (ordec --workers): connections are
+distributed among the workers, which share generated views through the
+view cache.
+"""
+
+import json
+import os
+import pathlib
+import re
+import signal
+import socket
+import subprocess
+import sys
+
+import pytest
+from websockets.sync.client import connect
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+
+PID_SRC = '''
+from ordec.core import *
+import os
+
+@generate_func
+def pid():
+    return str(os.getpid())
+'''
+
+@pytest.fixture
+def workers_server(tmp_path):
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        port = s.getsockname()[1]
+    env = dict(os.environ, PYTHONUNBUFFERED='1')
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, (str(ROOT), env.get('PYTHONPATH'))))
+    proc = subprocess.Popen([sys.executable, '-c', 'from ordec.server import main; main()',
+        '--backend-only', '--no-browser', '--workers', '2', '--port', str(port),
+        '--cache-dir', str(tmp_path)],
+        stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, env=env)
+    try:
+        for line in proc.stdout:
+            m = re.search(r'#auth=([0-9a-f]+)', line)
+            if m:
+                break
+        else:
+            pytest.fail("server did not start")
+        yield proc, f"ws://127.0.0.1:{port}/api/websocket", m.group(1)
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+        proc.wait()
+        proc.stdout.close()
+
+def getview(url, token, src, view):
+    # Workers may still be starting up:
+    with connect(url, open_timeout=30) as ws:
+        ws.send(json.dumps({'msg': 'source', 'srctype': 'python', 'src': src,
+            'auth': token}))
+        assert json.loads(ws.recv(timeout=30))['msg'] == 'viewlist'
+        ws.send(json.dumps({'msg': 'getview', 'view': view, 'req': 1}))
+        while True:
+            msg = json.loads(ws.recv(timeout=30))
+            if msg['msg'] == 'view':
+                return msg['data']['elements'][0]['text']
+
+def test_workers(workers_server):
+    proc, url, token = workers_server
+    worker_pids = set(subprocess.run(['pgrep', '-P', str(proc.pid)],
+        capture_output=True, text=True).stdout.split())
+    assert len(worker_pids) == 2
+
+    # Different sources are generated by any worker:
+    pids = [getview(url, token, PID_SRC + '#' * i, 'pid()') for i in range(8)]
+    assert set(pids) <= worker_pids
+    # The same source is taken from the cache, whichever worker serves it:
+    assert [getview(url, token, PID_SRC, 'pid()') for i in range(4)] == [pids[0]] * 4
+
+    proc.send_signal(signal.SIGINT)
+    assert proc.wait(timeout=30) == 0
@@ -0,0 +1,72 @@
+# SPDX-FileCopyrightText: 2026 ORDeC contributors
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+On-disk cache of view messages, shared by the server's worker processes.
+"""
+
+import gzip
+import os
+
+from ordec.viewcache import ViewCache
+
+def view_msg(text, digest):
+    return {'msg': 'view', 'view': 'report()', 'type': 'report',
+        'data': {'elements': [{'element_type': 'preformatted_text', 'text': text}]},
+        'digest': digest}
+
+def test_get_put(tmp_path):
+    cache = ViewCache(tmp_path / 'cache')
+    key = cache.source_key('python', 'src')
+    assert key == ViewCache.source_key('python', 'src')
+    assert key != cache.source_key('python', 'src2')
+    assert key != cache.source_key('pythonsrc', '')
+    assert cache.get(key, 'report()') is None
+
+    msg = view_msg('hello', 'a' * 32)
+    cache.put(key, 'report()', msg)
+    assert cache.get(key, 'report()') == msg
+    assert cache.get(key, 'other()') is None
+    assert cache.get(cache.source_key('python', 'src2'), 'report()') is None
+    assert cache.get_payload('a' * 32) == msg['data']
+    assert cache.get_payload('../x') is None
+
+    # Other processes see the entries:
+    assert ViewCache(tmp_path / 'cache').get(key, 'report()') == msg
+
+def test_corrupt_entry(tmp_path):
+    cache = ViewCache(tmp_path)
+    key = cache.source_key('src')
+    cache.put(key, 'report()', view_msg('hello', 'b' * 32))
+    (data_path,) = (tmp_path / 'data').iterdir()
+    data_path.write_bytes(gzip.compress(b'{"trunc'))
+    assert cache.get(key, 'report()') is None
+    data_path.unlink()
+    assert cache.get(key, 'report()') is None
+
+def test_prune(tmp_path):
+    cache = ViewCache(tmp_path, max_bytes=10**9)
+    keys = [cache.source_key(str(i)) for i in range(10)]
+    for i, key in enumerate(keys):
+        cache.put(key, 'report()', view_msg(os.urandom(1000).hex(), f'{i:032}'))
+        # Older entries were used longer ago:
+        for path in tmp_path.rglob('*.json.gz'):
+            st = path.stat()
+            os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns - 10**9))
+    sizes = sum(p.stat().st_size for p in tmp_path.rglob('*.json.gz'))
+    cache.max_bytes = sizes // 2
+    cache.prune()
+    assert sum(p.stat().st_size for p in tmp_path.rglob('*.json.gz')) <= sizes // 2
+    assert cache.get(keys[0], 'report()') is None
+    assert cache.get(keys[-1], 'report()') is not None
+
+def test_put_after_prune(tmp_path):
+    cache = ViewCache(tmp_path)
+    key = cache.source_key('src')
+    msg = view_msg('hello', 'c' * 32)
+    cache.put(key, 'report()', msg)
+    # Another process pruned everything:
+    for path in tmp_path.rglob('*.json.gz'):
+        path.unlink()
+    cache.put(cache.source_key('src2'), 'report()', msg)
+    assert cache.get(cache.source_key('src2'), 'report()') == msg
@@ -0,0 +1,59 @@
+# SPDX-FileCopyrightText: 2026 ORDeC contributors
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Patches of view data (see ordec.viewdiff), which the server sends instead of
+the full data when a view changed only a little.
+"""
+
+import json
+
+import pytest
+
+from ordec.viewdiff import diff, apply_patch, tokenize
+from ordec.lib import generic_mos
+
+@pytest.mark.parametrize('old, new', [
+    (1, 1),
+    (1, 2),
+    ('a', None),
+    ({'a': 1, 'b': [1, 2]}, {'a': 1, 'b': [1, 3], 'c': 'x'}),
+    ({'a': 1, 'b': 2}, {'b': 2}),
+    ([1, 2, 3, 4], [0, 1, 3, 4, 5]),
+    ([], [{'nid': 1}]),
+    ('<g>\n' * 100, '<g>\n' * 50 + '<text>changed</text>' + '<g>\n' * 50),
+])
+def test_roundtrip(old, new):
+    patch = diff(old, new)
+    assert json.loads(json.dumps(patch)) == patch
+    assert apply_patch(old, patch) == new
+    assert (patch is None) == (old == new)
+
+def test_tokenize():
+    for s in ['', '\n\n', 'a<b c="d">\n  <e/>text\n<', 'ä\U0001F600<x>']:
+        assert ''.join(tokenize(s)) == s
+    assert tokenize('<g>\n  <path/></g>') == ['<g>\n', '  ', '<path/>', '</g>']
+
+def test_layers_by_nid():
+    poly = lambda i: {'nid': 100 + i, 'vertices': [0, 0, i, 0, i, i, 0, i]}
+    old = {'layers': [
+        {'nid': 1, 'name': 'M1', 'polys': [poly(i) for i in range(50)]},
+        {'nid': 2, 'name': 'M2', 'polys': [poly(i) for i in range(50, 100)]},
+    ]}
+    new = {'layers': [
+        {'nid': 2, 'name': 'M2', 'polys': [poly(i) for i in range(50, 100)] + [poly(100)]},
+        {'nid': 3, 'name': 'M3', 'polys': []},
+    ]}
+    new['layers'][0]['polys'][10] = dict(poly(60), vertices=[0, 0, 1, 1, 2, 2])
+    patch = diff(old, new)
+    assert apply_patch(old, patch) == new
+    assert len(json.dumps(patch)) < len(json.dumps(new)) / 10
+
+def test_symbol_svg():
+    old = generic_mos.Nmos(w=1, l=1).symbol.webdata()
+    new = generic_mos.Nmos(w=2, l=1).symbol.webdata()
+    assert old[0] == new[0] == 'svg'
+    patch = diff(old[1], new[1])
+    assert apply_patch(old[1], patch) == new[1]
+    # Only the parameter text changed:
+    assert len(json.dumps(patch)) < len(json.dumps(new[1])) / 10
@@ -3,6 +3,10 @@
 
 import { session } from './auth.js';
 
+// Identifies this page to the server across reconnects, so that the views
+// it prefetches after a rebuild are the ones this page requested before.
+const clientId = Math.random().toString(36).slice(2, 14);
+
 export class OrdecClient {
     constructor(srctype, resultViewers, setStatus) {
         this.views = new Map();
@@ -10,7 +14,13 @@ export class OrdecClient {
         // may be in flight at once; the server's pass manager decides how
         // many run concurrently.
         this.inflight = new Map();
+        // In-flight tile requests of tiled layout views: req id -> ResultViewer.
+        // Tracked separately, as they do not make the client 'busy'.
+        this.tileRequests = new Map();
         this.reqCounter = 0;
+        // Number of large ExtLibraries whose views are still being fetched
+        // page by page (see requestViewPage).
+        this.pendingLibraries = 0;
         this.srctype = srctype;
         this.src = ""; // set by Editor from the outside
         // Course mode: epilogue source binding the lesson's check as the
@@ -53,6 +63,7 @@ export class OrdecClient {
         this.sock.onclose = (ev) => this.wsOnClose(ev);
         this.sock.onerror = (ev) => this.wsOnError(ev);
         this.inflight.clear();
+        this.tileRequests.clear();
     }
 
     wsOnMessage(messageEvent) {
@@ -61,13 +72,39 @@ export class OrdecClient {
         if (msg['msg'] == 'viewlist') {
             this.exception = null;
             this.views.clear();
+            this.pendingLibraries = 0;
             msg['views'].forEach(view => {
-                this.views.set(view.name, view);
+                if (view.library) {
+                    // Placeholder of a large ExtLibrary: its views are
+                    // fetched separately, so that this list arrives quickly.
+                    this.pendingLibraries++;
+                    this.requestViewPage(view.name, 0);
+                } else {
+                    this.views.set(view.name, view);
+                }
             });
             // freshViewlist=true: a view selected in a viewer but absent
             // from this authoritative list is really gone (deselect it),
             // as opposed to the list merely being stale or not yet loaded.
-            this.resultViewers.forEach(rv => rv.updateViewListAndException(true));
+            this.resultViewers.forEach(rv => rv.updateViewListAndException(this.pendingLibraries == 0));
+            this.requestViews();
+        } else if (msg['msg'] == 'viewpage') {
+            if (messageEvent.target !== this.sock) {
+                return; // belongs to the viewlist of a replaced socket
+            }
+            if (msg['exception']) {
+                console.error(`Views of ${msg['library']} unavailable:`, msg['exception']);
+            } else {
+                msg['views'].forEach(view => {
+                    this.views.set(view.name, view);
+                });
+            }
+            if (msg['next'] != null) {
+                this.requestViewPage(msg['library'], msg['next']);
+            } else {
+                this.pendingLibraries--;
+            }
+            this.resultViewers.forEach(rv => rv.updateViewList(this.pendingLibraries == 0));
             this.requestViews();
         } else if (msg['msg'] == 'exception') {
             this.exception = msg['exception'];
@@ -85,6 +122,10 @@ export class OrdecClient {
             } finally {
                 this.requestViews();
             }
+        } else if (msg['msg'] == 'tiles') {
+            const rv = this.tileRequests.get(msg['req']);
+            this.tileRequests.delete(msg['req']);
+            rv?.updateTiles(msg);
         } else if (msg['msg'] == 'viewprogress') {
             this.inflight.get(msg['req'])?.updateProgress(msg);
         } else if (msg['msg'] == 'localmodule_changed') {
@@ -107,6 +148,7 @@ export class OrdecClient {
         // reconnect doesn't get stuck waiting for responses that will never
         // arrive.
         this.inflight.clear();
+        this.tileRequests.clear();
         if (session.hubMode && !this.sockOpened) {
             // Hub-hosted and the socket never opened: the server instance
             // was culled or stopped; reconnecting is futile. A page reload
@@ -125,6 +167,7 @@ export class OrdecClient {
         }
         console.error("WebSocket error:", errorEvent);
         this.inflight.clear();
+        this.tileRequests.clear();
         if (!this.exception) {
             this.setStatus('disconnected');
         }
@@ -182,6 +225,7 @@ export class OrdecClient {
                 msg: 'localmodule',
                 module: this.localModule,
                 auth: session.authKey,
+                client: clientId,
             };
         } else {
             // Integrated mode:
@@ -190,6 +234,7 @@ export class OrdecClient {
                 srctype: this.srctype,
                 src: this.src,
                 auth: session.authKey,
+                client: clientId,
             };
             if (this.checkSrc) {
                 msg.check_src = this.checkSrc;
@@ -198,6 +243,14 @@ export class OrdecClient {
         this.sock.send(JSON.stringify(msg));
     }
 
+    requestViewPage(library, offset) {
+        this.sock.send(JSON.stringify({
+            msg: 'getviewpage',
+            library: library,
+            offset: offset,
+        }));
+    }
+
     requestViews() {
         // Dispatch a request for every viewer that wants one and has none in
         // flight yet. Unlike the previous one-at-a-time protocol, requests
@@ -210,16 +263,43 @@ export class OrdecClient {
                 const req = ++this.reqCounter;
                 rv.currentReq = req;
                 this.inflight.set(req, rv);
-                this.sock.send(JSON.stringify({
+                const msg = {
                     msg: 'getview',
                     view: rv.viewSelected,
                     req: req,
-                }));
+                };
+                if (rv.viewDigest) {
+                    // Lets the server send a patch against the shown data:
+                    msg.base = rv.viewDigest;
+                }
+                if (rv.refreshRequestedByUser) {
+                    // Regenerate instead of using the server's view cache:
+                    msg.refresh = true;
+                }
+                this.sock.send(JSON.stringify(msg));
             });
         }
         this.updateStatus();
     }
 
+    requestTiles(rv, level, tiles) {
+        // Returns the req id of the tile request, or null if it could not be
+        // sent.
+        if (this.exception || !this.sock || this.sock.readyState != WebSocket.OPEN) {
+            return null;
+        }
+        const req = ++this.reqCounter;
+        this.tileRequests.set(req, rv);
+        this.sock.send(JSON.stringify({
+            msg: 'gettiles',
+            view: rv.viewSelected,
+            req: req,
+            level: level,
+            tiles: tiles,
+        }));
+        return req;
+    }
+
     cancelView(rv) {
         // Idempotent; the in-flight entry is only removed by the terminal
         // 'view' message (which a cancel always produces).
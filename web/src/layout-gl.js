@@ -134,6 +134,11 @@ function calcLayerColor(color, layerId, dampen) {
     ];
 }
 
+// Tiled mode (large layouts): at most this many tiles are kept client-side.
+const TILE_CACHE_SIZE = 512;
+// Delay after the last zoom/pan event before visible tiles are requested (ms).
+const TILE_REQUEST_DELAY = 100;
+
 export class LayoutGL {
     constructor(resContent) {
         this.resContent = resContent;
@@ -181,6 +186,7 @@ export class LayoutGL {
             //this.g.attr("transform", transform);
             //console.log("zoomed", this.transform);
             this.drawGL();
+            this.scheduleTileRequest();
         });
 
         d3.select(this.canvas).call(this.zoom).call(this.zoom.transform, this.transform);
@@ -195,6 +201,7 @@ export class LayoutGL {
             this.canvas.width = this.canvas.clientWidth;
             this.canvas.height = this.canvas.clientHeight;
             this.drawGL();
+            this.scheduleTileRequest();
         });
         this.resizeObserver.observe(this.canvas);
 
@@ -302,6 +309,16 @@ export class LayoutGL {
 
     update(msgData) {
         this.data = msgData;
+        if (this.data.tiled) {
+            // Tile key 'level/x/y' -> tile data, least recently used first:
+            this.tiles = new Map();
+            // Tile keys requested, but not yet received:
+            this.tilesPending = new Set();
+            // Req ids of tile requests issued for the current data, to
+            // ignore late responses for data that was replaced meanwhile:
+            this.tileReqs = new Set();
+            this.tilesShown = null;
+        }
 
         if (this._pendingDrc) {
             const pendingDrc = this._pendingDrc;
@@ -336,6 +353,121 @@ export class LayoutGL {
         this.loadLabels(false);
         this.updateLayerList();
         this.updateLayers();
+        if (this.data.tiled) {
+            this.requestVisibleTiles();
+        }
+    }
+
+    // Returns the quadtree level and the keys + [x, y] coordinates of all
+    // tiles covering the visible viewport in tiled mode. The level is chosen
+    // so that one pixel of a tile is not larger than one screen pixel.
+    visibleTiles() {
+        const {origin, maxLevel, tilePx} = this.data.tiled;
+        const level = Math.max(0, Math.min(maxLevel,
+            Math.ceil(maxLevel + Math.log2(this.transform.k))));
+        const size = tilePx * 2**(maxLevel - level);
+        const count = 2**level;
+        // Y axis is flipped (see updateProjectionMatrix):
+        const [x0, y0] = this.transform.invert([0, 0]);
+        const [x1, y1] = this.transform.invert([this.width || this.canvas.width,
+            this.height || this.canvas.height]);
+        const clamp = v => Math.max(0, Math.min(count - 1, v));
+        const txMin = clamp(Math.floor((x0 - origin[0]) / size));
+        const txMax = clamp(Math.floor((x1 - origin[0]) / size));
+        const tyMin = clamp(Math.floor((-y1 - origin[1]) / size));
+        const tyMax = clamp(Math.floor((-y0 - origin[1]) / size));
+        const tiles = [];
+        for (let tx = txMin; tx <= txMax; tx++) {
+            for (let ty = tyMin; ty <= tyMax; ty++) {
+                tiles.push({key: `${level}/${tx}/${ty}`, xy: [tx, ty]});
+            }
+        }
+        return {level, tiles};
+    }
+
+    scheduleTileRequest() {
+        if (!this.data?.tiled) return;
+        clearTimeout(this.tileRequestTimer);
+        this.tileRequestTimer = setTimeout(() => this.requestVisibleTiles(),
+            TILE_REQUEST_DELAY);
+    }
+
+    requestVisibleTiles() {
+        if (!this.gl || !this.data?.tiled) return;
+        const {level, tiles} = this.visibleTiles();
+        const missing = tiles.filter(t =>
+            !this.tiles.has(t.key) && !this.tilesPending.has(t.key));
+        if (missing.length > 0 && this.requestTiles) {
+            const req = this.requestTiles(level, missing.map(t => t.xy));
+            if (req !== null) {
+                this.tileReqs.add(req);
+                missing.forEach(t => this.tilesPending.add(t.key));
+            }
+        }
+        this.showTiles();
+    }
+
+    updateTiles(msg) {
+        if (!this.data?.tiled || !this.tileReqs.delete(msg.req)) return;
+        if (msg.exception || msg.cancelled) {
+            console.error("tile request failed:", msg.exception);
+            // Forget pending state, so that the tiles are requested again.
+            this.tilesPending.clear();
+            return;
+        }
+        msg.tiles.forEach(tile => {
+            const key = `${msg.level}/${tile.x}/${tile.y}`;
+            this.tilesPending.delete(key);
+            this.tiles.set(key, tile);
+        });
+        while (this.tiles.size > TILE_CACHE_SIZE) {
+            this.tiles.delete(this.tiles.keys().next().value);
+        }
+        this.showTiles();
+    }
+
+    // Loads the shapes of the visible tiles into the GL buffers. Until at
+    // least one visible tile has arrived, the previously shown shapes stay.
+    showTiles() {
+        const {tiles} = this.visibleTiles();
+        const available = tiles.filter(t => this.tiles.has(t.key));
+        if (available.length == 0) return;
+        const shownKey = available.map(t => t.key).join(',');
+        if (shownKey === this.tilesShown) return;
+        this.tilesShown = shownKey;
+
+        const layers = new Map();
+        this.data.layers.forEach(layer => {
+            layer.polys = [];
+            layer.labels = [];
+            layers.set(layer.nid, {layer, polys: new Set(), labels: new Set()});
+        });
+        available.forEach(t => {
+            const tile = this.tiles.get(t.key);
+            // Mark as recently used:
+            this.tiles.delete(t.key);
+            this.tiles.set(t.key, tile);
+            tile.layers.forEach(tileLayer => {
+                const entry = layers.get(tileLayer.nid);
+                if (!entry) return;
+                // Shapes crossing tile borders are part of multiple tiles:
+                tileLayer.polys.forEach(poly => {
+                    if (!entry.polys.has(poly.nid)) {
+                        entry.polys.add(poly.nid);
+                        entry.layer.polys.push(poly);
+                    }
+                });
+                tileLayer.labels.forEach(label => {
+                    if (!entry.labels.has(label.nid)) {
+                        entry.labels.add(label.nid);
+                        entry.layer.labels.push(label);
+                    }
+                });
+            });
+        });
+        this.loadShapes();
+        this.loadLabels(false);
+        this.drawGL();
     }
 
     updateLayerList() {
@@ -413,6 +545,7 @@ export class LayoutGL {
         this.canvas.removeEventListener("mousemove", this._onMousemove);
         this.canvas.removeEventListener("mouseleave", this._onMouseleave);
         window.removeEventListener('pagehide', this._onPagehide);
+        clearTimeout(this.tileRequestTimer);
         if (!this.gl) return;
         this.resizeObserver.disconnect();
         this.glResources.destroy();
@@ -10,6 +10,7 @@ import { HierSelector } from './hier-selector.js';
 import { viewEventBus } from './event-bus.js';
 import { CoordinateDisplay } from './viewer-coordinates.js';
 import { getCourseController, suppressCloseControls } from './course.js';
+import { applyPatch } from './viewdiff.js';
 
 let idCounter = 0;
 export function generateId() {
@@ -1145,6 +1146,11 @@ export class ResultViewer {
         this.resViewHead = container.element.querySelector(".resviewhead");
         this.viewUpToDate = false;
         this.viewSelected = null;
+        // Data of the view shown and its digest, which the next getview
+        // names as base, so that the server can send a patch against it
+        // (see ordec/viewdiff.py). Never modified: views get copies.
+        this.viewData = null;
+        this.viewDigest = null;
         this.refreshRequestedByUser = false;
         this.directView = state && state.directView;
         // Course mode: the special "Course" panel (see course.js). It shows a
@@ -1297,6 +1303,8 @@ export class ResultViewer {
         this.resContent.focus();
         this.view?.destroy?.();
         this.view = null;
+        this.viewData = null;
+        this.viewDigest = null;
         this.client.requestViews();
     }
 
@@ -1305,6 +1313,8 @@ export class ResultViewer {
         this.viewUpToDate = false;
         this.view?.destroy?.();
         this.view = null;
+        this.viewData = null;
+        this.viewDigest = null;
         this.container.setTitle('Result View');
         this.showRefreshOverlay(null);
         this.showException(null);
@@ -1402,6 +1412,10 @@ export class ResultViewer {
             this.restoreSelectedView = null;
             this.container.setState({ view: null });
             this._onViewDeselected();
+        } else if (prevSelected && this.client.pendingLibraries > 0) {
+            // The view may be one of the ExtLibrary views that are still
+            // being fetched: restore it when they arrive.
+            this.restoreSelectedView = prevSelected;
         }
         this.viewListInitialized = true;
     }
@@ -1471,6 +1485,25 @@ export class ResultViewer {
             return;
         }
 
+        let unchanged = false;
+        if ('patch' in msg) {
+            if (msg.base !== this.viewDigest) {
+                // Cannot happen with one request per viewer in flight; if it
+                // does, fetch the full data.
+                console.error(`Patch for ${msg.view} against unknown base.`);
+                this.viewData = null;
+                this.viewDigest = null;
+                this.viewUpToDate = false;
+                return;
+            }
+            unchanged = msg.patch === null;
+            msg = {...msg, data: applyPatch(this.viewData, msg.patch)};
+        }
+        if ('data' in msg) {
+            this.viewData = msg.data;
+            this.viewDigest = msg.digest ?? null;
+        }
+
         //this.resContent.replaceChildren();
         this.viewUpToDate = true;
         this.showRefreshOverlay(null);
@@ -1487,12 +1520,16 @@ export class ResultViewer {
                     pre.innerText = 'no handler found for type ' + msg.type;
                     this.resContent.replaceChildren(pre);
                 } else if(this.view instanceof viewClass) {
-                    this.view.update(msg.data);
+                    if (!unchanged) {
+                        this.view.update(structuredClone(msg.data));
+                    }
                 } else {
                     this.view = new viewClass(this.resContent);
                     this.view.viewName = this.viewSelected;
                     this.view.glContainer = this.container;
-                    this.view.update(msg.data);
+                    this.view.requestTiles = (level, tiles) =>
+                        this.client.requestTiles(this, level, tiles);
+                    this.view.update(structuredClone(msg.data));
                 }
             }
 
@@ -1509,6 +1546,13 @@ export class ResultViewer {
         }
     }
 
+    updateTiles(msg) {
+        // Tile responses of tiled layout views (see LayoutGL.updateTiles).
+        if (msg.view === this.viewSelected && this.view?.updateTiles) {
+            this.view.updateTiles(msg);
+        }
+    }
+
     testInfo() {
         // For automated browser testing (see test_web.py).
         const r = this.resContent.getBoundingClientRect();
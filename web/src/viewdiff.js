@@ -0,0 +1,52 @@
+// SPDX-FileCopyrightText: 2026 ORDeC contributors
+// SPDX-License-Identifier: Apache-2.0
+
+// Applies the view data patches computed by ordec/viewdiff.py (see there
+// for the patch format). Unchanged parts of the old data are shared with
+// the result, so neither must be modified afterwards.
+
+// Must give the same tokens as TOKEN_RE in ordec/viewdiff.py:
+const TOKEN_RE = /<[^<\n]*\n?|[^<\n]+\n?|\n/g;
+
+function tokenize(s) {
+    return s.match(TOKEN_RE) || [];
+}
+
+export function applyPatch(old, patch) {
+    if (patch === null) {
+        return old;
+    } else if ('v' in patch) {
+        return patch.v;
+    } else if ('o' in patch) {
+        const removed = new Set(patch.x || []);
+        const data = {};
+        for (const [key, value] of Object.entries(old)) {
+            if (!removed.has(key)) {
+                data[key] = value;
+            }
+        }
+        for (const [key, valuePatch] of Object.entries(patch.o)) {
+            data[key] = applyPatch(old[key], valuePatch);
+        }
+        return data;
+    } else if ('l' in patch) {
+        const data = [];
+        patch.l.forEach(op => {
+            if (Array.isArray(op)) {
+                for (let i = op[0]; i < op[1]; i++) {
+                    data.push(old[i]);
+                }
+            } else if ('i' in op) {
+                op.i.forEach(item => data.push(item));
+            } else {
+                data.push(applyPatch(old[op.p], op.d));
+            }
+        });
+        return data;
+    } else if ('s' in patch) {
+        const tokens = tokenize(old);
+        return patch.s.map(op => Array.isArray(op)
+            ? tokens.slice(op[0], op[1]).join('') : op).join('');
+    }
+    throw new Error('invalid patch');
+}